@@ -1 +1,5 @@
-# AI Package - Machine Learning and Analysis Logic
\ No newline at end of file
+# AI Package - Machine Learning and Analysis Logic
+import logging
+
+# Library logging stays silent unless the application configures a handler
+logging.getLogger(__name__).addHandler(logging.NullHandler())
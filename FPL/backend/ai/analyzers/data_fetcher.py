@@ -5,12 +5,74 @@ This module handles all data fetching from the Fantasy Premier League API.
 Separated from analysis logic to make it easier to cache, mock, or replace data sources.
 """
 
+import hashlib
+import logging
+import os
+import weakref
 import requests
 import pandas as pd
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import time
 from datetime import datetime, timedelta
 
+from ai.analyzers.records import decode_bootstrap, decode_fixtures, records_frame
+from ai.analyzers.snapshot import PlayerIndex, SnapshotDiff, diff_bootstrap, diff_fixtures
+from ai.instrumentation import span
+from ai.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://fantasy.premierleague.com/api/'
+
+# Decoder and differ per snapshot kind
+SNAPSHOT_CODECS = {
+    'bootstrap': (decode_bootstrap, diff_bootstrap),
+    'fixtures': (decode_fixtures, diff_fixtures),
+}
+
+
+def fixtures_frame(fixtures_data: List[Any]) -> pd.DataFrame:
+    """
+    Fixture records as a DataFrame with parsed kickoff times and result flags.
+
+    Args:
+        fixtures_data: Fixture records or dicts
+
+    Returns:
+        pd.DataFrame: One row per fixture, plus 'is_finished' and 'has_result'
+    """
+    df = records_frame(fixtures_data)
+    if df.empty:
+        return df
+
+    # Convert datetime fields
+    if 'kickoff_time' in df.columns:
+        df['kickoff_time'] = pd.to_datetime(df['kickoff_time'], errors='coerce')
+
+    # Add derived features
+    df['is_finished'] = df['finished'] == True
+    df['has_result'] = (~df['team_h_score'].isna()) & (~df['team_a_score'].isna())
+    return df
+
+
+def resolve_base_url(base_url: Optional[str] = None) -> str:
+    """
+    FPL API root to fetch from, always ending in a slash.
+
+    Resolution order: the explicit argument, the ``FPL_API_BASE_URL``
+    environment variable, then the public FPL API. Point the variable at a
+    local stand-in (``python -m benchmarks.standin``) to run without
+    touching the real service.
+
+    Args:
+        base_url: Explicit API root, e.g. 'http://127.0.0.1:8001/api/'
+
+    Returns:
+        str: API root URL
+    """
+    url = base_url or os.environ.get('FPL_API_BASE_URL') or DEFAULT_BASE_URL
+    return url.rstrip('/') + '/'
+
 
 class FPLDataFetcher:
     """
@@ -20,17 +82,125 @@ class FPLDataFetcher:
     and provides clean, structured data to other components.
     """
     
-    def __init__(self, cache_duration: int = 300):
+    def __init__(self, cache_duration: int = 300, base_url: Optional[str] = None):
         """
         Initialize the data fetcher.
         
         Args:
             cache_duration: How long to cache data in seconds (default: 5 minutes)
+            base_url: FPL API root (default: ``FPL_API_BASE_URL`` or the public API)
         """
-        self.base_url = 'https://fantasy.premierleague.com/api/'
+        self.base_url = resolve_base_url(base_url)
         self.cache_duration = cache_duration
         self._cache = {}
         self._cache_timestamps = {}
+        # Content hash, version and last diff per snapshot kind ('bootstrap', 'fixtures')
+        self._snapshot_hashes: Dict[str, str] = {}
+        self._snapshot_versions: Dict[str, int] = {}
+        self.last_diffs: Dict[str, SnapshotDiff] = {}
+        self._subscribers: List[Callable[[], Optional[Callable]]] = []
+        # Kept current from bootstrap diffs
+        self.player_index = PlayerIndex()
+        self.subscribe(self.player_index.apply)
+
+    def subscribe(self, callback: Callable[[SnapshotDiff, Any], None]) -> Callable:
+        """
+        Register a callback for new snapshot versions.
+
+        The callback receives the :class:`SnapshotDiff` and the new snapshot
+        each time bootstrap or fixtures content changes. Bound methods are held
+        weakly, so subscribing a cache does not keep its owner alive.
+
+        Args:
+            callback: Function or bound method taking (diff, snapshot)
+
+        Returns:
+            Callable: The callback, so this can be used as a decorator
+        """
+        if hasattr(callback, '__self__'):
+            self._subscribers.append(weakref.WeakMethod(callback))
+        else:
+            self._subscribers.append(lambda: callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable) -> None:
+        """Remove a callback registered with :meth:`subscribe`."""
+        self._subscribers = [ref for ref in self._subscribers if ref() not in (None, callback)]
+
+    def get_snapshot_version(self, kind: str = 'bootstrap') -> Optional[int]:
+        """Version of the current snapshot of ``kind`` (None before the first load)."""
+        return self._snapshot_versions.get(kind)
+
+    def get_snapshot_hash(self, kind: str = 'bootstrap') -> Optional[str]:
+        """Content hash of the current snapshot of ``kind``."""
+        return self._snapshot_hashes.get(kind)
+
+    def _install_snapshot(self, kind: str, content: bytes, decoder: Callable,
+                          differ: Callable) -> Tuple[Any, Optional[SnapshotDiff]]:
+        """
+        Decode a response body unless its content is unchanged, and diff it.
+
+        Returns:
+            Tuple[Any, Optional[SnapshotDiff]]: The snapshot (the previous object
+            when the content hash matches) and the diff (None if unchanged)
+        """
+        content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+        previous = self._cache.get(kind)
+        if previous is not None and self._snapshot_hashes.get(kind) == content_hash:
+            return previous, None
+
+        data = decoder(content)
+        previous_version = self._snapshot_versions.get(kind) if previous is not None else None
+        version = self._snapshot_versions.get(kind, 0) + 1
+        diff = differ(previous, data, SnapshotDiff(kind, version, previous_version, content_hash))
+        self._snapshot_hashes[kind] = content_hash
+        self._snapshot_versions[kind] = version
+        self.last_diffs[kind] = diff
+        return data, diff
+
+    def install_snapshot(self, kind: str, content: bytes) -> Any:
+        """
+        Install a bootstrap or fixtures response body downloaded elsewhere.
+
+        The body goes through the same hashing, decoding, diffing and
+        subscriber notification as a fetch, and the cached copy counts as
+        fresh. Used where the download happens outside this class (the async
+        server, and the workers it feeds).
+
+        Args:
+            kind: 'bootstrap' or 'fixtures'
+            content: Raw response body
+
+        Returns:
+            Any: The decoded snapshot
+        """
+        decoder, differ = SNAPSHOT_CODECS[kind]
+        data, diff = self._install_snapshot(kind, content, decoder, differ)
+        self._cache[kind] = data
+        self._cache_timestamps[kind] = time.time()
+        self._notify(diff, data)
+        return data
+
+    def get_cached(self, kind: str, default: Any = None) -> Any:
+        """Cached payload of ``kind`` ('bootstrap', 'fixtures', ...) without fetching, however old."""
+        return self._cache.get(kind, default)
+
+    def _notify(self, diff: Optional[SnapshotDiff], snapshot: Any) -> None:
+        if diff is None:
+            return
+        logger.debug("New %s snapshot v%s: %s", diff.kind, diff.version, diff.summary())
+        alive = []
+        for ref in self._subscribers:
+            callback = ref()
+            if callback is None:
+                continue
+            alive.append(ref)
+            try:
+                callback(diff, snapshot)
+            except Exception:
+                # A broken subscriber must not break the fetch
+                logger.exception("Snapshot subscriber %r failed", callback)
+        self._subscribers = alive
         
     def get_bootstrap_data(self, use_cache: bool = True) -> Dict:
         """
@@ -48,17 +218,19 @@ class FPLDataFetcher:
             return self._cache[cache_key]
         
         try:
-            response = requests.get(f'{self.base_url}bootstrap-static/', timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            with span('fetcher.bootstrap'):
+                response = requests.get(f'{self.base_url}bootstrap-static/', timeout=10)
+                response.raise_for_status()
+                data, diff = self._install_snapshot(cache_key, response.content, decode_bootstrap, diff_bootstrap)
             
             self._cache[cache_key] = data
             self._cache_timestamps[cache_key] = time.time()
+            self._notify(diff, data)
             
             return data
             
-        except requests.RequestException as e:
-            print(f"Error fetching bootstrap data: {e}")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error fetching bootstrap data: %s", e)
             # Return cached data if available, even if expired
             return self._cache.get(cache_key, {})
     
@@ -78,17 +250,19 @@ class FPLDataFetcher:
             return self._cache[cache_key]
         
         try:
-            response = requests.get(f'{self.base_url}fixtures/', timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            with span('fetcher.fixtures'):
+                response = requests.get(f'{self.base_url}fixtures/', timeout=10)
+                response.raise_for_status()
+                data, diff = self._install_snapshot(cache_key, response.content, decode_fixtures, diff_fixtures)
             
             self._cache[cache_key] = data
             self._cache_timestamps[cache_key] = time.time()
+            self._notify(diff, data)
             
             return data
             
-        except requests.RequestException as e:
-            print(f"Error fetching fixtures data: {e}")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error fetching fixtures data: %s", e)
             return self._cache.get(cache_key, [])
     
     def get_player_detailed_data(self, player_id: int, use_cache: bool = True) -> Dict:
@@ -108,17 +282,18 @@ class FPLDataFetcher:
             return self._cache[cache_key]
         
         try:
-            response = requests.get(f'{self.base_url}element-summary/{player_id}/', timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            with span('fetcher.element_summary'):
+                response = requests.get(f'{self.base_url}element-summary/{player_id}/', timeout=10)
+                response.raise_for_status()
+                data = loads(response.content)
             
             self._cache[cache_key] = data
             self._cache_timestamps[cache_key] = time.time()
             
             return data
             
-        except requests.RequestException as e:
-            print(f"Error fetching player {player_id} data: {e}")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error fetching player %s data: %s", player_id, e)
             return self._cache.get(cache_key, {})
     
     def get_gameweek_data(self, gameweek: int, use_cache: bool = True) -> Dict:
@@ -138,19 +313,21 @@ class FPLDataFetcher:
             return self._cache[cache_key]
         
         try:
-            response = requests.get(f'{self.base_url}event/{gameweek}/live/', timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            with span('fetcher.event_live'):
+                response = requests.get(f'{self.base_url}event/{gameweek}/live/', timeout=10)
+                response.raise_for_status()
+                data = loads(response.content)
             
             self._cache[cache_key] = data
             self._cache_timestamps[cache_key] = time.time()
             
             return data
             
-        except requests.RequestException as e:
-            print(f"Error fetching gameweek {gameweek} data: {e}")
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error fetching gameweek %s data: %s", gameweek, e)
             return self._cache.get(cache_key, {})
     
+    @span('fetcher.get_players_dataframe')
     def get_players_dataframe(self, include_detailed: bool = False) -> pd.DataFrame:
         """
         Get players data as a pandas DataFrame.
@@ -173,7 +350,7 @@ class FPLDataFetcher:
             positions = {pos['id']: pos for pos in bootstrap_data.get('element_types', [])}
             
             # Convert to DataFrame
-            df = pd.DataFrame(players)
+            df = records_frame(players)
             
             if df.empty:
                 return df
@@ -190,14 +367,17 @@ class FPLDataFetcher:
             # Add derived features
             df['points_per_game'] = df['total_points'] / df['minutes'].replace(0, 1) * 90
             df['value'] = df['total_points'] / df['price'].replace(0, 1)
-            df['minutes_per_game'] = df['minutes'] / df['games_played'].replace(0, 1)
+            # The API has no games_played; fall back to starts
+            games = df['games_played'] if 'games_played' in df.columns else df['starts']
+            df['minutes_per_game'] = df['minutes'] / games.replace(0, 1)
             
             return df
             
         except Exception as e:
-            print(f"Error creating players DataFrame: {e}")
+            logger.error("Error creating players DataFrame: %s", e)
             return pd.DataFrame()
     
+    @span('fetcher.get_fixtures_dataframe')
     def get_fixtures_dataframe(self) -> pd.DataFrame:
         """
         Get fixtures data as a pandas DataFrame.
@@ -211,23 +391,10 @@ class FPLDataFetcher:
             return pd.DataFrame()
         
         try:
-            df = pd.DataFrame(fixtures_data)
-            
-            if df.empty:
-                return df
-            
-            # Convert datetime fields
-            if 'kickoff_time' in df.columns:
-                df['kickoff_time'] = pd.to_datetime(df['kickoff_time'], errors='coerce')
-            
-            # Add derived features
-            df['is_finished'] = df['finished'] == True
-            df['has_result'] = (~df['team_h_score'].isna()) & (~df['team_a_score'].isna())
-            
-            return df
+            return fixtures_frame(fixtures_data)
             
         except Exception as e:
-            print(f"Error creating fixtures DataFrame: {e}")
+            logger.error("Error creating fixtures DataFrame: %s", e)
             return pd.DataFrame()
     
     def _is_cache_valid(self, cache_key: str) -> bool:
@@ -239,9 +406,10 @@ class FPLDataFetcher:
         return age < self.cache_duration
     
     def clear_cache(self):
-        """Clear all cached data."""
+        """Clear all cached data; the next snapshot is delivered to subscribers as a reset."""
         self._cache.clear()
         self._cache_timestamps.clear()
+        self._snapshot_hashes.clear()
     
     def get_cache_status(self) -> Dict:
         """Get information about current cache status."""
@@ -0,0 +1,480 @@
+"""
+Gameweek Dataset Builder Module
+
+Builds a player x gameweek training table from the FPL API and stores it as
+partitioned Arrow files (``season=YYYY-YY/gameweek=NN/part-0.feather``).
+Partitions are written once per finished gameweek, so refreshing after a
+gameweek only fetches and writes the new one. Reads go through memory-mapped
+Arrow datasets, so training never re-fetches history or needs it all in RAM.
+"""
+
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.records import records_frame
+
+logger = logging.getLogger(__name__)
+
+
+class GameweekDatasetBuilder:
+    """
+    Assembles and stores the long player x gameweek table.
+
+    Each stored row holds what a player did in one gameweek plus the fixture
+    context (opponent difficulty, home/away). Lagged features are derived at
+    read time from earlier partitions only, so a row never sees its own result.
+    """
+
+    # Per-gameweek stats copied from the live/history payloads
+    STAT_COLUMNS = [
+        'minutes', 'total_points', 'goals_scored', 'assists', 'clean_sheets',
+        'goals_conceded', 'saves', 'bonus', 'bps', 'influence', 'creativity',
+        'threat', 'ict_index', 'starts',
+    ]
+
+    # Features known before a gameweek kicks off (used for training and inference)
+    FEATURE_COLUMNS = [
+        'price', 'element_type', 'was_home', 'fixture_count', 'opponent_difficulty',
+        'points_lag1', 'minutes_lag1', 'form_lag4', 'minutes_rolling4',
+        'ict_rolling4', 'bps_rolling4', 'points_per_game_prior', 'starts_rate_prior',
+    ]
+
+    def __init__(self, data_fetcher: Optional[FPLDataFetcher] = None,
+                 root_dir: str = 'data/gameweeks', season: Optional[str] = None,
+                 file_format: str = 'feather'):
+        """
+        Initialize the dataset builder.
+
+        Args:
+            data_fetcher: Fetcher used for all API access (a new one is created if omitted)
+            root_dir: Directory holding the partitioned dataset
+            season: Season label such as '2025-26' (derived from bootstrap events if omitted)
+            file_format: 'feather' (uncompressed, zero-copy memory mapping) or 'parquet'
+        """
+        if file_format not in ('feather', 'parquet'):
+            raise ValueError(f"Unsupported file format: {file_format}")
+
+        self.data_fetcher = data_fetcher or FPLDataFetcher()
+        self.root_dir = root_dir
+        self.file_format = file_format
+        self._season = season
+
+    @property
+    def season(self) -> str:
+        """Season label for partitions written by this builder."""
+        if self._season is None:
+            self._season = self._derive_season(self.data_fetcher.get_bootstrap_data())
+        return self._season
+
+    @staticmethod
+    def _derive_season(bootstrap: Dict) -> str:
+        """Derive a 'YYYY-YY' label from the first event deadline."""
+        events = bootstrap.get('events', [])
+        deadline = pd.to_datetime(events[0].get('deadline_time'), errors='coerce') if events else pd.NaT
+        if pd.isna(deadline):
+            deadline = pd.Timestamp.now(tz='UTC')
+        start_year = deadline.year if deadline.month >= 7 else deadline.year - 1
+        return f"{start_year}-{(start_year + 1) % 100:02d}"
+
+    # ------------------------------------------------------------------
+    # Partition layout
+    # ------------------------------------------------------------------
+
+    def _partition_dir(self, gameweek: int, season: Optional[str] = None) -> str:
+        return os.path.join(self.root_dir, f"season={season or self.season}", f"gameweek={int(gameweek):02d}")
+
+    def _partition_path(self, gameweek: int, season: Optional[str] = None) -> str:
+        extension = 'feather' if self.file_format == 'feather' else 'parquet'
+        return os.path.join(self._partition_dir(gameweek, season), f"part-0.{extension}")
+
+    def stored_gameweeks(self, season: Optional[str] = None) -> List[int]:
+        """
+        List gameweeks that already have a partition on disk.
+
+        Args:
+            season: Season label (default: current season)
+
+        Returns:
+            List[int]: Sorted gameweek numbers
+        """
+        season_dir = os.path.join(self.root_dir, f"season={season or self.season}")
+        if not os.path.isdir(season_dir):
+            return []
+        gameweeks = []
+        for name in os.listdir(season_dir):
+            if name.startswith('gameweek=') and os.listdir(os.path.join(season_dir, name)):
+                gameweeks.append(int(name.split('=', 1)[1]))
+        return sorted(gameweeks)
+
+    def write_partition(self, frame: pd.DataFrame, gameweek: int, season: Optional[str] = None) -> str:
+        """
+        Write one gameweek partition, replacing any existing file atomically.
+
+        Args:
+            frame: Rows for this gameweek (partition columns are dropped)
+            gameweek: Gameweek number
+            season: Season label (default: current season)
+
+        Returns:
+            str: Path of the written file
+        """
+        path = self._partition_path(gameweek, season)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        table = pa.Table.from_pandas(
+            frame.drop(columns=['season', 'gameweek'], errors='ignore'), preserve_index=False
+        )
+        tmp_path = f"{path}.tmp"
+        if self.file_format == 'feather':
+            # Uncompressed Arrow IPC can be memory-mapped without decoding
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+        else:
+            pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    # ------------------------------------------------------------------
+    # Building rows from the API
+    # ------------------------------------------------------------------
+
+    def _fixture_context(self, gameweek: int) -> Dict[int, Dict]:
+        """Map team id to its fixture count, mean difficulty and home share for a gameweek."""
+        context: Dict[int, Dict] = {}
+        for fx in self.data_fetcher.get_fixtures_data():
+            if fx.get('event') != gameweek:
+                continue
+            for team_key, diff_key, is_home in (('team_h', 'team_h_difficulty', 1.0),
+                                                ('team_a', 'team_a_difficulty', 0.0)):
+                entry = context.setdefault(fx.get(team_key), {'difficulties': [], 'home': []})
+                entry['difficulties'].append(fx.get(diff_key) or 3)
+                entry['home'].append(is_home)
+        return {
+            team_id: {
+                'fixture_count': len(entry['difficulties']),
+                'opponent_difficulty': float(np.mean(entry['difficulties'])),
+                'was_home': float(np.mean(entry['home'])),
+            }
+            for team_id, entry in context.items()
+        }
+
+    def build_gameweek_frame(self, gameweek: int) -> pd.DataFrame:
+        """
+        Build one gameweek's rows from the event live payload.
+
+        One request covers every player's stats. Prices come from each
+        player's element-summary history (see :meth:`_gameweek_prices`), so a
+        gameweek built after later price changes still gets the price it was
+        played at. Players whose team blanked get a row with
+        ``fixture_count`` 0 so the lagged features stay aligned.
+
+        Args:
+            gameweek: Gameweek number
+
+        Returns:
+            pd.DataFrame: One row per player
+        """
+        live = self.data_fetcher.get_gameweek_data(gameweek)
+        bootstrap = self.data_fetcher.get_bootstrap_data()
+        if not live or not bootstrap:
+            return pd.DataFrame()
+
+        players = {p['id']: p for p in bootstrap.get('elements', [])}
+        context = self._fixture_context(gameweek)
+        blank = {'fixture_count': 0, 'opponent_difficulty': np.nan, 'was_home': np.nan}
+        prices = self._gameweek_prices(gameweek, [players[e['id']] for e in live.get('elements', [])
+                                                  if e['id'] in players])
+
+        rows = []
+        for element in live.get('elements', []):
+            player = players.get(element['id'])
+            if player is None:
+                continue
+            stats = element.get('stats', {})
+            row = {
+                'player_id': element['id'],
+                'team': player['team'],
+                'element_type': player['element_type'],
+                'price': prices[element['id']],
+            }
+            row.update(context.get(player['team'], blank))
+            for col in self.STAT_COLUMNS:
+                row[col] = pd.to_numeric(stats.get(col, 0), errors='coerce')
+            rows.append(row)
+
+        return pd.DataFrame(rows)
+
+    def _gameweek_prices(self, gameweek: int, players: List[Dict]) -> Dict[int, float]:
+        """
+        Each player's price in a gameweek, in millions, from their history ``value``.
+
+        A player without a match that gameweek (a blank) takes the value of
+        their last match before it, or their first after it. Only a player
+        with no history at all falls back to the current ``now_cost``.
+        Summaries go through the fetcher's cache.
+
+        Args:
+            gameweek: Gameweek number
+            players: Bootstrap player records
+
+        Returns:
+            Dict[int, float]: Price by player id
+        """
+        prices = {}
+        for player in players:
+            history = self.data_fetcher.get_player_detailed_data(player['id']).get('history', [])
+            values = sorted((int(match['round']), match['value']) for match in history
+                            if match.get('round') is not None and match.get('value') is not None)
+            before = [value for round_, value in values if round_ <= gameweek]
+            value = before[-1] if before else (values[0][1] if values else player['now_cost'])
+            prices[player['id']] = value / 10.0
+        return prices
+
+    def build_player_history_frame(self, player_ids: Optional[Iterable[int]] = None) -> pd.DataFrame:
+        """
+        Build rows for past gameweeks from each player's element-summary history.
+
+        Used for backfilling a season; costs one request per player, so the
+        regular incremental path uses :meth:`build_gameweek_frame` instead.
+
+        Args:
+            player_ids: Players to fetch (default: every player in bootstrap)
+
+        Returns:
+            pd.DataFrame: One row per player per gameweek, with a 'gameweek' column
+        """
+        bootstrap = self.data_fetcher.get_bootstrap_data()
+        players = {p['id']: p for p in bootstrap.get('elements', [])}
+        fixtures = {fx['id']: fx for fx in self.data_fetcher.get_fixtures_data()}
+        if player_ids is None:
+            player_ids = list(players)
+
+        rows = []
+        for player_id in player_ids:
+            player = players.get(player_id)
+            if player is None:
+                continue
+            history = self.data_fetcher.get_player_detailed_data(player_id).get('history', [])
+            for match in history:
+                fx = fixtures.get(match.get('fixture'), {})
+                was_home = bool(match.get('was_home'))
+                difficulty = fx.get('team_h_difficulty' if was_home else 'team_a_difficulty', 3)
+                row = {
+                    'player_id': player_id,
+                    'gameweek': int(match['round']),
+                    'team': player['team'],
+                    'element_type': player['element_type'],
+                    'price': match.get('value', player['now_cost']) / 10.0,
+                    'fixture_count': 1,
+                    'opponent_difficulty': float(difficulty or 3),
+                    'was_home': float(was_home),
+                }
+                for col in self.STAT_COLUMNS:
+                    row[col] = pd.to_numeric(match.get(col, 0), errors='coerce')
+                rows.append(row)
+
+        if not rows:
+            return pd.DataFrame()
+
+        frame = pd.DataFrame(rows)
+        # Double gameweeks appear as two history rows: sum stats, average context
+        aggregations = {col: 'sum' for col in self.STAT_COLUMNS + ['fixture_count']}
+        aggregations.update({'team': 'first', 'element_type': 'first', 'price': 'first',
+                             'opponent_difficulty': 'mean', 'was_home': 'mean'})
+        return frame.groupby(['player_id', 'gameweek'], as_index=False).agg(aggregations)
+
+    def finished_gameweeks(self) -> List[int]:
+        """Gameweeks marked finished in the bootstrap events."""
+        events = self.data_fetcher.get_bootstrap_data().get('events', [])
+        return sorted(ev['id'] for ev in events if ev.get('finished'))
+
+    def update(self, through_gameweek: Optional[int] = None) -> List[int]:
+        """
+        Append partitions for finished gameweeks that are not stored yet.
+
+        Args:
+            through_gameweek: Last gameweek to consider (default: latest finished)
+
+        Returns:
+            List[int]: Gameweeks written by this call
+        """
+        stored = set(self.stored_gameweeks())
+        written = []
+        for gameweek in self.finished_gameweeks():
+            if through_gameweek is not None and gameweek > through_gameweek:
+                break
+            if gameweek in stored:
+                continue
+            frame = self.build_gameweek_frame(gameweek)
+            if frame.empty:
+                logger.warning("No live data for GW%s, skipping", gameweek)
+                continue
+            self.write_partition(frame, gameweek)
+            written.append(gameweek)
+        return written
+
+    def backfill(self, player_ids: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Write partitions for every missing past gameweek from player histories.
+
+        Args:
+            player_ids: Players to include (default: every player in bootstrap)
+
+        Returns:
+            List[int]: Gameweeks written by this call
+        """
+        frame = self.build_player_history_frame(player_ids)
+        if frame.empty:
+            return []
+        stored = set(self.stored_gameweeks())
+        written = []
+        for gameweek, rows in frame.groupby('gameweek'):
+            if int(gameweek) in stored:
+                continue
+            self.write_partition(rows, int(gameweek))
+            written.append(int(gameweek))
+        return written
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def dataset(self) -> ds.Dataset:
+        """
+        Open the stored partitions as a memory-mapped Arrow dataset.
+
+        Returns:
+            ds.Dataset: Hive-partitioned dataset with 'season' and 'gameweek' columns
+        """
+        filesystem = pafs.LocalFileSystem(use_mmap=True)
+        partitioning = ds.partitioning(
+            pa.schema([('season', pa.string()), ('gameweek', pa.int32())]), flavor='hive'
+        )
+        return ds.dataset(self.root_dir, format='ipc' if self.file_format == 'feather' else 'parquet',
+                          filesystem=filesystem, partitioning=partitioning)
+
+    def load(self, columns: Optional[List[str]] = None, seasons: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Load selected columns from disk.
+
+        Only the requested columns are materialized; everything else stays in
+        the memory-mapped files.
+
+        Args:
+            columns: Columns to load (default: all)
+            seasons: Seasons to include (default: all)
+
+        Returns:
+            pd.DataFrame: Requested rows and columns
+        """
+        if not os.path.isdir(self.root_dir):
+            return pd.DataFrame()
+        dataset = self.dataset()
+        row_filter = ds.field('season').isin(seasons) if seasons else None
+        return dataset.to_table(columns=columns, filter=row_filter).to_pandas()
+
+    @staticmethod
+    def add_lagged_features(frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add features computed only from each player's earlier gameweeks.
+
+        Args:
+            frame: Long table with season, gameweek, player_id and stat columns
+
+        Returns:
+            pd.DataFrame: Frame sorted by player and time, with lag columns added
+        """
+        frame = frame.sort_values(['player_id', 'season', 'gameweek']).reset_index(drop=True)
+        grouped = frame.groupby(['player_id', 'season'], sort=False)
+
+        prev = grouped[['total_points', 'minutes', 'ict_index', 'bps', 'starts']].shift(1)
+        frame['points_lag1'] = prev['total_points']
+        frame['minutes_lag1'] = prev['minutes']
+
+        keys = [frame['player_id'], frame['season']]
+        for col, name in (('total_points', 'form_lag4'), ('minutes', 'minutes_rolling4'),
+                          ('ict_index', 'ict_rolling4'), ('bps', 'bps_rolling4')):
+            rolled = prev[col].groupby(keys).rolling(4, min_periods=1).mean()
+            frame[name] = rolled.reset_index(level=[0, 1], drop=True)
+
+        played = (prev['minutes'] > 0).astype(float)
+        games_prior = played.groupby(keys).cumsum()
+        points_prior = prev['total_points'].fillna(0).groupby(keys).cumsum()
+        starts_prior = prev['starts'].fillna(0).groupby(keys).cumsum()
+        gws_prior = grouped.cumcount()
+        frame['points_per_game_prior'] = points_prior / games_prior.replace(0, np.nan)
+        frame['starts_rate_prior'] = starts_prior / gws_prior.replace(0, np.nan)
+
+        lag_columns = ['points_lag1', 'minutes_lag1', 'form_lag4', 'minutes_rolling4',
+                       'ict_rolling4', 'bps_rolling4', 'points_per_game_prior', 'starts_rate_prior']
+        frame[lag_columns] = frame[lag_columns].fillna(0.0)
+        return frame
+
+    def training_frame(self, seasons: Optional[List[str]] = None, min_gameweek: int = 2) -> pd.DataFrame:
+        """
+        Load the stored table with lagged features, ready for model training.
+
+        Args:
+            seasons: Seasons to include (default: all)
+            min_gameweek: Drop earlier gameweeks, which have no history to lag from
+
+        Returns:
+            pd.DataFrame: FEATURE_COLUMNS plus 'total_points', 'gameweek', 'season', 'player_id'
+        """
+        needed = ['season', 'gameweek', 'player_id', 'price', 'element_type', 'was_home',
+                  'fixture_count', 'opponent_difficulty', 'total_points', 'minutes',
+                  'ict_index', 'bps', 'starts']
+        frame = self.load(columns=needed, seasons=seasons)
+        if frame.empty:
+            return frame
+
+        frame = self.add_lagged_features(frame)
+        frame = frame[frame['gameweek'] >= min_gameweek]
+        # Blank gameweeks carry no signal for a points model
+        frame = frame[frame['fixture_count'] > 0]
+        frame[['opponent_difficulty', 'was_home']] = frame[['opponent_difficulty', 'was_home']].fillna(3.0)
+        return frame[self.FEATURE_COLUMNS + ['total_points', 'gameweek', 'season', 'player_id']].reset_index(drop=True)
+
+    def inference_frame(self, gameweek: int) -> pd.DataFrame:
+        """
+        Build feature rows for an upcoming gameweek from the stored history.
+
+        Args:
+            gameweek: Upcoming gameweek number
+
+        Returns:
+            pd.DataFrame: FEATURE_COLUMNS plus 'player_id' for every current player
+        """
+        bootstrap = self.data_fetcher.get_bootstrap_data()
+        players = records_frame(bootstrap.get('elements', []))
+        if players.empty:
+            return players
+
+        context = self._fixture_context(gameweek)
+        upcoming = pd.DataFrame({
+            'season': self.season,
+            'gameweek': gameweek,
+            'player_id': players['id'],
+            'price': players['now_cost'] / 10.0,
+            'element_type': players['element_type'],
+            'fixture_count': players['team'].map(lambda t: context.get(t, {}).get('fixture_count', 0)),
+            'opponent_difficulty': players['team'].map(lambda t: context.get(t, {}).get('opponent_difficulty', 3.0)),
+            'was_home': players['team'].map(lambda t: context.get(t, {}).get('was_home', 0.5)),
+        })
+        for col in ('total_points', 'minutes', 'ict_index', 'bps', 'starts'):
+            upcoming[col] = np.nan
+
+        history = self.load(columns=list(upcoming.columns), seasons=[self.season])
+        history = history[history['gameweek'] < gameweek] if not history.empty else history
+        frame = self.add_lagged_features(pd.concat([history, upcoming], ignore_index=True))
+        frame = frame[frame['gameweek'] == gameweek]
+        return frame[self.FEATURE_COLUMNS + ['player_id']].reset_index(drop=True)
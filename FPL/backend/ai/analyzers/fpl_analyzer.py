@@ -3,41 +3,71 @@ import json
 import numpy as np
 import pandas as pd
 from operator import itemgetter
-import copy
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Any
+
+from ai.analyzers.data_fetcher import resolve_base_url
+from ai.analyzers.records import decode_bootstrap, decode_fixtures
+from ai.analyzers.team_strength import AWAY, HOME, TeamStrengthModel
+from ai.instrumentation import span
+
+def project_fields(record: Dict, fields: Sequence[str]) -> Dict:
+    """Keep only the requested keys of a record (unknown keys are ignored)."""
+    return {field: record[field] for field in fields if field in record}
+
 
 class FPLAnalyzer:
-    def __init__(self):
-        self.base_url = 'https://fantasy.premierleague.com/api/'
+    def __init__(self, base_url: Optional[str] = None, team_strength: Optional[TeamStrengthModel] = None):
+        self.base_url = resolve_base_url(base_url)
         self.bootstrap_data = None
         self.fixtures_data = None
         self.teams = {}
         self.team_id = {}
+        # Learned from finished results; each fetch applies only the new ones
+        self.team_strength = team_strength or TeamStrengthModel()
         
     def fetch_data(self) -> Tuple[Dict, List]:
         """Fetch data from FPL API"""
-        try:
-            # Get bootstrap data
-            bootstrap_response = requests.get(f'{self.base_url}bootstrap-static/')
-            bootstrap_response.raise_for_status()
-            self.bootstrap_data = bootstrap_response.json()
-            
-            # Get fixtures data  
-            fixtures_response = requests.get(f'{self.base_url}fixtures/')
-            fixtures_response.raise_for_status()
-            self.fixtures_data = fixtures_response.json()
-            
-            # Build team mappings
-            self.teams = self.bootstrap_data['teams']
-            self.team_id = {team['id']: team['name'] for team in self.teams}
-            
-            return self.bootstrap_data, self.fixtures_data
-            
-        except requests.RequestException as e:
-            raise Exception(f"Failed to fetch FPL data: {str(e)}")
+        # The span covers only the API round trips and decoding; the
+        # team-strength update in load_data is timed as strength.update
+        with span('analyzer.fetch_data'):
+            try:
+                # Get bootstrap data
+                bootstrap_response = requests.get(f'{self.base_url}bootstrap-static/')
+                bootstrap_response.raise_for_status()
+                bootstrap = decode_bootstrap(bootstrap_response.content)
+
+                # Get fixtures data
+                fixtures_response = requests.get(f'{self.base_url}fixtures/')
+                fixtures_response.raise_for_status()
+                fixtures = decode_fixtures(fixtures_response.content)
+
+            except (requests.RequestException, ValueError) as e:
+                raise Exception(f"Failed to fetch FPL data: {str(e)}")
+
+        return self.load_data(bootstrap, fixtures)
+
+    def load_data(self, bootstrap: Any, fixtures: List[Any]) -> Tuple[Dict, List]:
+        """Use a bootstrap and fixtures snapshot fetched elsewhere (e.g. by a shared FPLDataFetcher)"""
+        self.bootstrap_data = bootstrap
+        self.fixtures_data = fixtures
+
+        # Build team mappings
+        self.teams = self.bootstrap_data['teams']
+        self.team_id = {team['id']: team['name'] for team in self.teams}
+        self.team_strength.set_teams(self.teams)
+        self.team_strength.update(self.fixtures_data)
+
+        return self.bootstrap_data, self.fixtures_data
+
+    def get_team_strength(self) -> Dict:
+        """Learned attack and defence ratings per team."""
+        if not self.fixtures_data:
+            return {'success': False, 'error': 'Data not loaded. Call fetch_data() first.'}
+        return dict(self.team_strength.ratings(), success=True)
     
+    @span('analyzer.process_fixtures')
     def process_fixtures(self) -> Dict[str, List[float]]:
-        """Process fixtures and calculate difficulty ratings"""
+        """Difficulty of each team's fixtures in gameweek order, from the learned team strengths"""
         if not self.fixtures_data or not self.team_id:
             raise Exception("Data not loaded. Call fetch_data() first.")
             
@@ -51,22 +81,24 @@ class FPLAnalyzer:
             if event not in fix_list:
                 fix_list[event] = []
             
-            fix_list[event].append([
-                fixture['team_h'],
-                fixture['team_a'], 
-                fixture['team_h_difficulty'],
-                fixture['team_a_difficulty']
-            ])
+            fix_list[event].append([fixture['team_h'], fixture['team_a']])
+        
+        difficulty = self.team_strength.difficulty_matrix()
         
         # Build team fixtures dictionary
         team_fix = {}
         for gameweek, fixtures in fix_list.items():
-            for home_team, away_team, home_diff, away_diff in fixtures:
+            for home_team, away_team in fixtures:
                 home_name = self.team_id.get(home_team)
                 away_name = self.team_id.get(away_team)
                 
                 if not home_name or not away_name:
                     continue
+                if max(home_team, away_team) < len(difficulty):
+                    home_diff = round(float(difficulty[home_team, away_team, HOME]), 2)
+                    away_diff = round(float(difficulty[away_team, home_team, AWAY]), 2)
+                else:
+                    home_diff = away_diff = 3.0
                 
                 # Home team fixture
                 if home_name not in team_fix:
@@ -78,83 +110,86 @@ class FPLAnalyzer:
                     team_fix[away_name] = []
                 team_fix[away_name].append([home_name, away_diff, 'Away', gameweek])
         
-        # Apply custom difficulty adjustments
-        team_fix_alt = copy.deepcopy(team_fix)
-        newly_promoted = ['Burnley', 'Sheffield Utd', 'Luton']  # Update for current season
-        top_teams = ['Liverpool', 'Arsenal', 'Man City', 'Chelsea', 'Newcastle']
-        
-        for team, fixtures in team_fix_alt.items():
-            for fixture in fixtures:
-                opponent, difficulty, venue, gameweek = fixture
-                
-                if venue == 'Away':
-                    if team in newly_promoted and opponent in top_teams:
-                        fixture[1] = 5
-                    elif team in newly_promoted and opponent not in newly_promoted:
-                        fixture[1] = 4.5
-                else:  # Home
-                    if opponent in newly_promoted and team in top_teams:
-                        fixture[1] = 1
-                    elif opponent in newly_promoted and team not in newly_promoted:
-                        fixture[1] = 1.5
-        
         # Sort by gameweek and create difficulty arrays
         fix_by_week = {}
-        for team, fixtures in team_fix_alt.items():
+        for team, fixtures in team_fix.items():
             sorted_fixtures = sorted(fixtures, key=itemgetter(3))
             fix_by_week[team] = [fixture[1] for fixture in sorted_fixtures]
             
         return fix_by_week
     
+    @span('analyzer.get_top_teams_with_easiest_fixtures')
     def get_top_teams_with_easiest_fixtures(self, fixtures: Dict[str, List[float]], 
                                           window_size: int = 5, top_n: int = 5) -> List[Dict]:
         """Get teams with easiest fixture runs"""
         num_weeks = 38
         records = []
+        if not fixtures:
+            return records
+        
+        # Teams x gameweeks matrix, NaN-padded where a team has fewer fixtures
+        teams = list(fixtures)
+        lengths = np.array([len(fixtures[team]) for team in teams])
+        ratings = np.full((len(teams), max(num_weeks, int(lengths.max()))), np.nan)
+        for row, team in enumerate(teams):
+            ratings[row, :lengths[row]] = fixtures[team]
         
         for start in range(0, num_weeks - window_size + 1, 2):
             end = start + window_size
-            avg_difficulties = []
-            
-            for team, ratings in fixtures.items():
-                if len(ratings) >= end:
-                    window_ratings = ratings[start:end]
-                    window_avg = np.mean(window_ratings)
-                    avg_difficulties.append({
-                        'team': team,
-                        'avg': window_avg,
-                        'fixtures': window_ratings
-                    })
-            
-            # Sort by average difficulty (easiest first)
-            avg_difficulties.sort(key=lambda x: x['avg'])
+            eligible = np.flatnonzero(lengths >= end)
+            if len(eligible) == 0:
+                continue
+            window = ratings[eligible, start:end]
+            window_avg = window.mean(axis=1)
             
-            # Get top n teams
-            top_teams = avg_difficulties[:top_n]
+            # Easiest first; stable so ties keep team order
+            order = np.argsort(window_avg, kind='stable')[:top_n]
+            # One bulk conversion to Python floats instead of per-value casts
+            top_avgs = window_avg[order].tolist()
+            top_fixtures = window[order].tolist()
             
-            for team_data in top_teams:
+            for i, row in enumerate(order.tolist()):
                 records.append({
                     'window': f'GW{start+1}-{end}',
-                    'team': team_data['team'],
-                    'avg_difficulty': float(team_data['avg']),
-                    'fixtures': [float(f) for f in team_data['fixtures']]
+                    'team': teams[eligible[row]],
+                    'avg_difficulty': top_avgs[i],
+                    'fixtures': top_fixtures[i]
                 })
                 
         return records
     
+    @span('analyzer.get_player_data')
     def get_player_data(self, position_filter: str = 'all', 
                        min_price: float = 4.0, max_price: float = 15.0) -> List[Dict]:
         """Get filtered player data with prices"""
+        return list(self.iter_player_data(position_filter, min_price, max_price))
+
+    def iter_player_data(self, position_filter: str = 'all', min_price: float = 4.0, max_price: float = 15.0,
+                         fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """
+        Yield filtered players one at a time, highest total points first.
+
+        Only the raw element references are sorted up front; each output dict
+        is built when it is consumed, so a streaming response can start
+        writing before the whole list exists.
+
+        Args:
+            position_filter: Element type id as a string, or 'all'
+            min_price: Minimum price in millions
+            max_price: Maximum price in millions
+            fields: Keys to keep in each record (default: all)
+
+        Yields:
+            Dict: One processed player
+        """
         if not self.bootstrap_data:
             raise Exception("Data not loaded. Call fetch_data() first.")
             
-        players = self.bootstrap_data['elements']
+        players = sorted(self.bootstrap_data['elements'], key=lambda p: p['total_points'], reverse=True)
         teams = {team['id']: team['name'] for team in self.bootstrap_data['teams']}
         positions = {pos['id']: pos['singular_name_short'] 
                     for pos in self.bootstrap_data['element_types']}
         
-        processed_players = []
-        
         for player in players:
             price = player['now_cost'] / 10.0
             
@@ -165,7 +200,7 @@ class FPLAnalyzer:
             if price < min_price or price > max_price:
                 continue
             
-            processed_players.append({
+            record = {
                 'id': player['id'],
                 'first_name': player['first_name'],
                 'second_name': player['second_name'], 
@@ -182,12 +217,8 @@ class FPLAnalyzer:
                 'goals_scored': player['goals_scored'],
                 'assists': player['assists'],
                 'clean_sheets': player['clean_sheets']
-            })
-        
-        # Sort by total points (descending)
-        processed_players.sort(key=lambda x: x['total_points'], reverse=True)
-        
-        return processed_players
+            }
+            yield project_fields(record, fields) if fields else record
     
     def analyze_fixtures(self, window_size: int = 5, top_n: int = 5) -> Dict:
         """Complete fixture analysis workflow"""
@@ -229,6 +260,7 @@ class FPLAnalyzer:
                 'message': 'Failed to analyze players'
             }
 
+    @span('analyzer.compare_players_ai')
     def compare_players_ai(self, player1_data: Dict, player2_data: Dict) -> Dict:
         """
         Generate intelligent AI-powered comparison between two players
@@ -0,0 +1,152 @@
+"""
+League Table Module
+
+The Premier League table from finished fixture results.
+
+Results are turned into one row per club per match and summed with a
+single groupby into per-club totals (played, won, drawn, lost, goals for
+and against). The totals are kept between snapshots: a new snapshot adds
+only the fixtures that finished since the last one, and the table is only
+rebuilt from scratch when an applied result changes (a corrected score or
+an unfinished match). Form is each club's last five results.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from ai.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+TOTAL_COLUMNS = ['played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against']
+
+FORM_LENGTH = 5
+
+
+def club_results(results: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per club per finished fixture.
+
+    Args:
+        results: Fixtures frame rows with 'id', 'kickoff_time', 'team_h',
+            'team_a', 'team_h_score' and 'team_a_score'
+
+    Returns:
+        pd.DataFrame: 'fixture', 'kickoff_time', 'team', 'goals_for',
+        'goals_against' and 'result' ('W', 'D' or 'L')
+    """
+    home_goals = results['team_h_score'].to_numpy(dtype=np.int64)
+    away_goals = results['team_a_score'].to_numpy(dtype=np.int64)
+    rows = pd.DataFrame({
+        'fixture': np.tile(results['id'].to_numpy(), 2),
+        'kickoff_time': np.tile(results['kickoff_time'].to_numpy(), 2),
+        'team': np.concatenate([results['team_h'].to_numpy(), results['team_a'].to_numpy()]),
+        'goals_for': np.concatenate([home_goals, away_goals]),
+        'goals_against': np.concatenate([away_goals, home_goals]),
+    })
+    rows['result'] = np.array(['L', 'D', 'W'])[np.sign(rows['goals_for'] - rows['goals_against']) + 1]
+    return rows
+
+
+def club_totals(rows: pd.DataFrame) -> pd.DataFrame:
+    """Per-club totals of :func:`club_results` rows, indexed by team id."""
+    return rows.assign(
+        played=1,
+        wins=(rows['result'] == 'W').astype(np.int64),
+        draws=(rows['result'] == 'D').astype(np.int64),
+        losses=(rows['result'] == 'L').astype(np.int64),
+    ).groupby('team')[TOTAL_COLUMNS].sum()
+
+
+class LeagueTable:
+    """
+    League table kept current from fixture snapshots.
+
+    Example:
+        table = LeagueTable()
+        table.update(fetcher.get_fixtures_dataframe())   # adds only new results
+        table.standings(bootstrap['teams'])
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every applied result."""
+        self.totals = pd.DataFrame(columns=TOTAL_COLUMNS, dtype=np.int64)
+        self.results = club_results(pd.DataFrame(
+            columns=['id', 'kickoff_time', 'team_h', 'team_a', 'team_h_score', 'team_a_score']))
+        # Applied score per fixture id, to spot corrections
+        self.scores = pd.DataFrame(columns=['team_h_score', 'team_a_score'], dtype=np.int64)
+
+    @span('table.update')
+    def update(self, fixtures: pd.DataFrame) -> int:
+        """
+        Apply the results that finished since the last update.
+
+        Args:
+            fixtures: Fixtures frame (see ``FPLDataFetcher.get_fixtures_dataframe``)
+
+        Returns:
+            int: Number of results applied (all of them after a rebuild)
+        """
+        if fixtures.empty:
+            return 0
+        finished = fixtures[fixtures['is_finished'] & fixtures['has_result']]
+        scores = finished.set_index('id')[['team_h_score', 'team_a_score']].astype(np.int64)
+        known = scores.index.isin(self.scores.index)
+        applied = self.scores.reindex(scores.index[known])
+        if known.sum() < len(self.scores) or (applied.to_numpy() != scores[known].to_numpy()).any():
+            # A result was corrected or withdrawn: the running totals no longer hold
+            logger.debug("Applied results changed; rebuilding the league table")
+            self.reset()
+            known[:] = False
+        fresh = finished[~known]
+        if fresh.empty:
+            return 0
+
+        rows = club_results(fresh)
+        self.totals = self.totals.add(club_totals(rows), fill_value=0).astype(np.int64)
+        self.results = pd.concat([self.results, rows], ignore_index=True)
+        self.scores = pd.concat([self.scores, scores[~known]])
+        return len(fresh)
+
+    def form(self, length: int = FORM_LENGTH) -> pd.Series:
+        """Each club's last ``length`` results, oldest first (e.g. 'WWDLW'), indexed by team id."""
+        recent = self.results.sort_values(['kickoff_time', 'fixture'], kind='stable').groupby('team').tail(length)
+        return recent.groupby('team')['result'].agg(''.join)
+
+    def standings(self, teams: Iterable[Any]) -> List[Dict]:
+        """
+        The sorted table, in the shape of the Node ``/api/fpl/table`` route.
+
+        Clubs are ordered by points, then goal difference, then goals scored,
+        then name.
+
+        Args:
+            teams: Bootstrap team records with 'id', 'name' and 'short_name'
+
+        Returns:
+            List[Dict]: One entry per club with position, shortName, name,
+            played, wins, draws, losses, goalsFor, goalsAgainst,
+            goalDifference, points and form
+        """
+        teams = pd.DataFrame([{'id': t['id'], 'name': t.get('name') or '',
+                               'shortName': (t.get('short_name') or '').upper()} for t in teams])
+        if teams.empty:
+            return []
+        table = teams.join(self.totals, on='id').fillna({column: 0 for column in TOTAL_COLUMNS})
+        table[TOTAL_COLUMNS] = table[TOTAL_COLUMNS].astype(np.int64)
+        table['goalDifference'] = table['goals_for'] - table['goals_against']
+        table['points'] = 3 * table['wins'] + table['draws']
+        table['form'] = table['id'].map(self.form()).fillna('')
+        table = table.sort_values(['points', 'goalDifference', 'goals_for', 'name'],
+                                  ascending=[False, False, False, True], kind='stable')
+        table['position'] = np.arange(1, len(table) + 1)
+        table = table.rename(columns={'goals_for': 'goalsFor', 'goals_against': 'goalsAgainst'})
+        return table[['position', 'shortName', 'name', 'played', 'wins', 'draws', 'losses', 'goalsFor',
+                      'goalsAgainst', 'goalDifference', 'points', 'form']].to_dict('records')
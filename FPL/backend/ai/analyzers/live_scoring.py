@@ -0,0 +1,305 @@
+"""
+Live Scoring Module
+
+Live gameweek points from the ``event/{gw}/live/`` payload, for players and
+for large batches of tracked squads.
+
+The payload is parsed into dense arrays with one row per appearance (player
+and fixture, so double gameweeks are scored match by match) and one int32
+column per stat. Points follow FPL's scoring rules, vectorized over rows,
+plus provisional bonus: in a finished or running match whose bonus has not
+been awarded yet, the top three BPS get 3/2/1. Bonus for every match comes
+from one grouped sort of all appearances by (fixture, BPS) rather than a
+loop over fixtures.
+
+Each poll is diffed against the previous one. Only appearances whose stats
+changed are rescored, and squad totals are moved by the change in those
+players' points through a sparse squads x players selection matrix (1 per
+starter, 2 for the captain), so a refresh costs what changed rather than the
+number of squads.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from ai.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+# Stat columns kept from the live payload, in array order
+LIVE_STATS = ('minutes', 'goals_scored', 'assists', 'clean_sheets', 'goals_conceded', 'own_goals',
+              'penalties_saved', 'penalties_missed', 'yellow_cards', 'red_cards', 'saves', 'bonus',
+              'bps', 'defensive_contribution')
+STAT_INDEX = {name: i for i, name in enumerate(LIVE_STATS)}
+
+# Points per unit of each linear stat, by element type (rows 1-4; row 0 unused)
+_LINEAR_POINTS = np.zeros((5, len(LIVE_STATS)), dtype=np.int32)
+for _position, _goal, _clean_sheet in ((1, 10, 4), (2, 6, 4), (3, 5, 1), (4, 4, 0)):
+    _LINEAR_POINTS[_position, [STAT_INDEX[s] for s in ('goals_scored', 'assists', 'clean_sheets', 'own_goals',
+                                                        'penalties_saved', 'penalties_missed', 'yellow_cards',
+                                                        'red_cards', 'bonus')]] = (
+        _goal, 3, _clean_sheet, -2, 5, -2, -1, -3, 1)
+
+# Defensive contributions needed for +2, by element type (goalkeepers never score them)
+_DEFENSIVE_THRESHOLD = np.array([0, 0, 10, 12, 12])
+
+
+class LiveFrame:
+    """
+    One parsed live payload.
+
+    Attributes:
+        ids: (rows,) player id per appearance
+        fixtures: (rows,) fixture id per appearance (0 when the player has not featured)
+        stats: (rows, len(LIVE_STATS)) int32 stat values
+    """
+
+    __slots__ = ('ids', 'fixtures', 'stats')
+
+    def __init__(self, ids: np.ndarray, fixtures: np.ndarray, stats: np.ndarray):
+        self.ids = ids
+        self.fixtures = fixtures
+        self.stats = stats
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def parse_live(payload: Dict) -> LiveFrame:
+    """
+    Parse an ``event/{gw}/live/`` payload into per-appearance arrays.
+
+    A player with one fixture in ``explain`` gets one row carrying the
+    aggregate ``stats``. A player with several (a double gameweek) gets a row
+    per fixture from that fixture's ``explain`` values. ``explain`` only
+    lists the stats that happened in a fixture, so a stat listed for another
+    of the player's fixtures is 0 in this one; only stats no fixture lists,
+    such as BPS, are split evenly across the rows.
+
+    Args:
+        payload: Decoded live payload ({'elements': [...]})
+
+    Returns:
+        LiveFrame: Parsed rows
+    """
+    ids, fixtures, rows = [], [], []
+    for element in payload.get('elements', []):
+        stats = element.get('stats') or {}
+        totals = [int(stats.get(name) or 0) for name in LIVE_STATS]
+        explain = element.get('explain') or []
+        if len(explain) <= 1:
+            ids.append(element['id'])
+            fixtures.append(explain[0].get('fixture', 0) if explain else 0)
+            rows.append(totals)
+            continue
+        per_fixture = [{item['identifier']: int(item.get('value') or 0) for item in fixture.get('stats', [])}
+                       for fixture in explain]
+        listed = set().union(*per_fixture)
+        for k, (fixture, values) in enumerate(zip(explain, per_fixture)):
+            ids.append(element['id'])
+            fixtures.append(fixture.get('fixture', 0))
+            rows.append([values.get(name, 0) if name in listed
+                         else totals[i] // len(explain) + int(k < totals[i] % len(explain))
+                         for i, name in enumerate(LIVE_STATS)])
+    return LiveFrame(np.array(ids, dtype=np.intp), np.array(fixtures, dtype=np.int64),
+                     np.array(rows, dtype=np.int32).reshape(len(rows), len(LIVE_STATS)))
+
+
+def appearance_points(stats: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    FPL points of each appearance, including any bonus already awarded.
+
+    Args:
+        stats: (rows, len(LIVE_STATS)) stat values
+        positions: (rows,) element type ids (1-4)
+
+    Returns:
+        np.ndarray: (rows,) int32 points
+    """
+    minutes = stats[:, STAT_INDEX['minutes']]
+    points = np.where(minutes >= 60, 2, (minutes > 0).astype(np.int32))
+    points = points + (stats * _LINEAR_POINTS[positions]).sum(axis=1)
+    # Stats that score per block rather than per unit
+    defence = positions <= 2
+    points -= np.where(defence, stats[:, STAT_INDEX['goals_conceded']] // 2, 0)
+    points += np.where(positions == 1, stats[:, STAT_INDEX['saves']] // 3, 0)
+    points += np.where((positions > 1) & (stats[:, STAT_INDEX['defensive_contribution']]
+                                          >= _DEFENSIVE_THRESHOLD[positions]), 2, 0)
+    return points.astype(np.int32)
+
+
+def provisional_bonus(fixtures: np.ndarray, stats: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Provisional 3/2/1 bonus per appearance from BPS, in matches whose bonus is not yet awarded.
+
+    FPL's tie rules: tied players share the higher bonus and push the next
+    ones down, so each player gets 3 minus the number of players in the
+    match with strictly more BPS (e.g. a tie for first gives 3, 3, 1). All
+    matches are ranked in one pass: appearances are sorted by (fixture,
+    -BPS), and a player's rank is the offset of the first row with the same
+    BPS from the first row of the fixture.
+
+    Args:
+        fixtures: (rows,) fixture id per appearance
+        stats: (rows, len(LIVE_STATS)) stat values
+        rows: Only rank these appearances (whole fixtures), e.g. those of
+            matches whose stats changed since the last poll
+
+    Returns:
+        np.ndarray: (len(rows) or rows,) int32 provisional bonus
+    """
+    if rows is not None:
+        return provisional_bonus(fixtures[rows], stats[rows])
+    bonus = np.zeros(len(fixtures), dtype=np.int32)
+    bps = stats[:, STAT_INDEX['bps']]
+    played = (stats[:, STAT_INDEX['minutes']] > 0) & (fixtures != 0)
+    # Matches with bonus already awarded keep the awarded bonus only
+    confirmed = np.unique(fixtures[played & (stats[:, STAT_INDEX['bonus']] > 0)])
+    eligible = np.flatnonzero(played & ~np.isin(fixtures, confirmed))
+    if not len(eligible):
+        return bonus
+
+    order = eligible[np.lexsort((-bps[eligible], fixtures[eligible]))]
+    sorted_fixtures, sorted_bps = fixtures[order], bps[order]
+    position = np.arange(len(order))
+    new_fixture = np.r_[True, sorted_fixtures[1:] != sorted_fixtures[:-1]]
+    new_value = new_fixture | np.r_[True, sorted_bps[1:] != sorted_bps[:-1]]
+    fixture_start = np.maximum.accumulate(np.where(new_fixture, position, 0))
+    value_start = np.maximum.accumulate(np.where(new_value, position, 0))
+    bonus[order] = np.maximum(0, 3 - (value_start - fixture_start))
+    return bonus
+
+
+class LiveScoringEngine:
+    """
+    Live points for players and tracked squads, refreshed incrementally per poll.
+
+    Example:
+        engine = LiveScoringEngine.from_bootstrap(bootstrap)
+        engine.track(squads)                      # (N, 16) int32: 15 picks, captain
+        engine.update(fetcher.get_gameweek_data(gw, use_cache=False))
+        engine.squad_points                       # (N,) live totals
+    """
+
+    def __init__(self, positions_by_id: np.ndarray):
+        """
+        Args:
+            positions_by_id: Element type (1-4) indexed by player id
+        """
+        self.positions_by_id = np.asarray(positions_by_id, dtype=np.intp)
+        self.frame: Optional[LiveFrame] = None
+        self.row_points = np.zeros(0, dtype=np.int32)
+        self.row_bonus = np.zeros(0, dtype=np.int32)
+        self.player_points = np.zeros(len(self.positions_by_id), dtype=np.int32)
+        self.selection: Optional[sparse.csc_matrix] = None
+        self.squad_points = np.zeros(0, dtype=np.int32)
+
+    @classmethod
+    def from_bootstrap(cls, bootstrap: Any) -> 'LiveScoringEngine':
+        """Engine with positions from the bootstrap elements."""
+        elements = bootstrap['elements']
+        positions = np.zeros(max((e['id'] for e in elements), default=0) + 1, dtype=np.intp)
+        positions[[e['id'] for e in elements]] = [e['element_type'] for e in elements]
+        return cls(positions)
+
+    def track(self, squads: np.ndarray) -> None:
+        """
+        Track squads: the first 11 of 15 picks start and the 16th column is the captain.
+
+        Args:
+            squads: (N, 16) int32 player ids
+        """
+        squads = np.asarray(squads, dtype=np.intp)
+        n_squads = len(squads)
+        # Starters weigh 1 and the captain's entry adds 1 more; duplicates are summed
+        rows = np.repeat(np.arange(n_squads), 12)
+        cols = np.concatenate([squads[:, :11], squads[:, 15:16]], axis=1).ravel()
+        self.selection = sparse.csc_matrix((np.ones(len(cols), dtype=np.int32), (rows, cols)),
+                                           shape=(n_squads, len(self.positions_by_id)))
+        self.squad_points = (self.selection @ self.player_points).astype(np.int32)
+
+    @span('live.update')
+    def update(self, payload: Dict) -> Dict:
+        """
+        Apply a poll of the live payload.
+
+        Args:
+            payload: Decoded ``event/{gw}/live/`` payload
+
+        Returns:
+            Dict: Rows rescored, players whose points changed and whether the
+            poll was applied incrementally
+        """
+        frame = parse_live(payload)
+        if len(frame) and frame.ids.max() >= len(self.positions_by_id):
+            raise ValueError('Live payload has players missing from the bootstrap positions')
+        previous = self.frame
+        same_rows = (previous is not None and np.array_equal(previous.ids, frame.ids)
+                     and np.array_equal(previous.fixtures, frame.fixtures))
+
+        if same_rows:
+            changed = np.flatnonzero((frame.stats != previous.stats).any(axis=1))
+            row_points = self.row_points.copy()
+            row_points[changed] = appearance_points(frame.stats[changed], self.positions_by_id[frame.ids[changed]])
+            # Bonus depends on every BPS in a match: re-rank the matches that changed
+            row_bonus = self.row_bonus.copy()
+            touched = np.flatnonzero(np.isin(frame.fixtures, np.unique(frame.fixtures[changed])))
+            row_bonus[touched] = provisional_bonus(frame.fixtures, frame.stats, touched)
+        else:
+            changed = np.arange(len(frame))
+            row_points = appearance_points(frame.stats, self.positions_by_id[frame.ids])
+            row_bonus = provisional_bonus(frame.fixtures, frame.stats)
+        row_totals = row_points + row_bonus
+
+        player_points = np.bincount(frame.ids, weights=row_totals,
+                                    minlength=len(self.positions_by_id)).astype(np.int32)
+        delta = player_points - self.player_points
+        moved = np.flatnonzero(delta)
+        if self.selection is not None and len(moved):
+            self.squad_points += (self.selection[:, moved] @ delta[moved]).astype(np.int32)
+
+        self.frame = frame
+        self.row_points = row_points
+        self.row_bonus = row_bonus
+        self.player_points = player_points
+        logger.debug("Live poll: %d rows rescored, %d players moved", len(changed), len(moved))
+        return {'rows': len(frame), 'rescored': int(len(changed)), 'players_changed': int(len(moved)),
+                'incremental': bool(same_rows)}
+
+    def poll(self, data_fetcher, gameweek: int) -> Dict:
+        """Fetch the gameweek's live payload (bypassing the cache) and apply it."""
+        return self.update(data_fetcher.get_gameweek_data(gameweek, use_cache=False))
+
+    def bonus_table(self) -> List[Dict]:
+        """
+        Bonus per match from the last poll.
+
+        Returns:
+            List[Dict]: Per fixture (ascending id) whether bonus is confirmed,
+            and the players in line for bonus with their BPS, best first
+        """
+        frame = self.frame
+        if frame is None:
+            return []
+        bps = frame.stats[:, STAT_INDEX['bps']]
+        awarded = frame.stats[:, STAT_INDEX['bonus']]
+        bonus = np.where(self.row_bonus > 0, self.row_bonus, awarded)
+        rows = np.flatnonzero((bonus > 0) & (frame.fixtures != 0))
+        rows = rows[np.lexsort((-bps[rows], frame.fixtures[rows]))]
+        played = (frame.stats[:, STAT_INDEX['minutes']] > 0) & (frame.fixtures != 0)
+        confirmed = set(np.unique(frame.fixtures[played & (awarded > 0)]).tolist())
+
+        table: Dict[int, Dict] = {int(f): {'fixture': int(f), 'confirmed': int(f) in confirmed, 'players': []}
+                                  for f in np.unique(frame.fixtures[played])}
+        for i in rows:
+            table[int(frame.fixtures[i])]['players'].append(
+                {'id': int(frame.ids[i]), 'bps': int(bps[i]), 'bonus': int(bonus[i])})
+        return list(table.values())
+
+    def points_for(self, player_ids: Sequence[int]) -> Dict[int, int]:
+        """Live points of the given players."""
+        return {int(pid): int(self.player_points[pid]) for pid in player_ids}
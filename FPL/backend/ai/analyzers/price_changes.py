@@ -0,0 +1,297 @@
+"""
+Price Change Module
+
+Overnight price rise and fall projections from net transfers.
+
+FPL moves a player's price once enough managers have transferred them in
+(or out) since their last change, relative to how many own them. The
+predictor keeps, per player, the net transfers counted towards the next
+change and a smoothed transfer rate, in NumPy arrays indexed by element id.
+It subscribes to the fetcher's bootstrap diffs, so each refresh only touches
+the players whose transfer counts, ownership or price moved: their net
+transfers advance by the change since the last snapshot (the gameweek
+counters reset at each deadline, which is detected per player), and a price
+change restarts them from the transfers made since the previous snapshot. Rankings project every player's progress to the next
+nightly update in one vectorized pass.
+
+The thresholds are an approximation of FPL's undisclosed algorithm: a
+fraction of the player's owners, with a floor for barely owned players.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+# Fields whose change requires a player's progress to be updated
+TRACKED_FIELDS = ('now_cost', 'transfers_in_event', 'transfers_out_event', 'selected_by_percent')
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an FPL ISO timestamp ('2024-08-16T17:30:00Z')."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class PriceChangePredictor:
+    """
+    Per-player transfer progress towards the next price change.
+
+    Example:
+        predictor = PriceChangePredictor()
+        fetcher.subscribe(predictor.apply)
+        fetcher.get_bootstrap_data()
+        predictor.predictions(limit=20)['risers']
+    """
+
+    def __init__(self, rise_fraction: float = 0.1, fall_fraction: float = 0.05, min_threshold: float = 10000.0,
+                 velocity_halflife_hours: float = 3.0, update_time_utc: Tuple[int, int] = (1, 30),
+                 clock: Optional[Callable[[], float]] = None):
+        """
+        Args:
+            rise_fraction: Net transfers in for a rise, as a fraction of owners
+            fall_fraction: Net transfers out for a fall, as a fraction of owners
+            min_threshold: Smallest threshold, however few managers own the player
+            velocity_halflife_hours: Half-life of the smoothed transfer rate
+            update_time_utc: (hour, minute) of the nightly price update
+            clock: Time source in epoch seconds (default: time.time)
+        """
+        self.rise_fraction = rise_fraction
+        self.fall_fraction = fall_fraction
+        self.min_threshold = min_threshold
+        self.velocity_halflife_hours = velocity_halflife_hours
+        self.update_time_utc = update_time_utc
+        self.clock = clock or time.time
+        self.version: Optional[int] = None
+        self.total_players = 0
+        self.records: Dict[int, Any] = {}
+        # Diffs may arrive on a fetcher's thread while predictions are read on another
+        self._lock = threading.RLock()
+        self._allocate(0)
+
+    def _allocate(self, size: int) -> None:
+        self.known = np.zeros(size, dtype=bool)
+        self.cost = np.zeros(size, dtype=np.int32)
+        self.owned_percent = np.zeros(size)
+        self.transfers_in = np.zeros(size, dtype=np.int64)
+        self.transfers_out = np.zeros(size, dtype=np.int64)
+        # Net transfers counted towards the next change, and net transfers per hour
+        self.net = np.zeros(size)
+        self.velocity = np.zeros(size)
+        self.seen_at = np.zeros(size)
+
+    def _grow(self, max_id: int) -> None:
+        size = len(self.known)
+        if max_id < size:
+            return
+        extra = max(max_id + 1, 2 * size) - size
+        for name in ('known', 'cost', 'owned_percent', 'transfers_in', 'transfers_out', 'net', 'velocity', 'seen_at'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, dtype=array.dtype)]))
+
+    @staticmethod
+    def _columns(players: List[Any]) -> Dict[str, np.ndarray]:
+        return {
+            'id': np.array([p['id'] for p in players], dtype=np.intp),
+            'now_cost': np.array([p.get('now_cost') or 0 for p in players], dtype=np.int32),
+            'transfers_in': np.array([p.get('transfers_in_event') or 0 for p in players], dtype=np.int64),
+            'transfers_out': np.array([p.get('transfers_out_event') or 0 for p in players], dtype=np.int64),
+            'owned_percent': np.array([float(p.get('selected_by_percent') or 0) for p in players]),
+            'cost_change_event': np.array([p.get('cost_change_event') or 0 for p in players], dtype=np.int64),
+        }
+
+    def thresholds(self, ids: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Net transfers needed for a rise and for a fall (both positive), per player."""
+        owners = self.owned_percent if ids is None else self.owned_percent[ids]
+        owners = owners / 100.0 * self.total_players
+        return (np.maximum(self.rise_fraction * owners, self.min_threshold),
+                np.maximum(self.fall_fraction * owners, self.min_threshold))
+
+    @span('prices.rebuild')
+    def rebuild(self, bootstrap: Any, version: Optional[int] = None) -> None:
+        """
+        Estimate every player's progress from one snapshot.
+
+        Without history, the gameweek's net transfers (less what this
+        gameweek's price changes already consumed) count towards the next
+        change, and the rate is their average since the gameweek deadline.
+        """
+        players = list(bootstrap.get('elements') or [])
+        self.total_players = int(bootstrap.get('total_players') or 0)
+        self.records = {p['id']: p for p in players}
+        now = self.clock()
+        current = next((e for e in bootstrap.get('events') or [] if e.get('is_current')), None)
+        deadline = _parse_time(current.get('deadline_time')) if current is not None else None
+        hours = max((now - deadline) / 3600.0, 1.0) if deadline is not None else 24.0
+
+        self._allocate(0)
+        if not players:
+            self.version = version
+            return
+        columns = self._columns(players)
+        ids = columns['id']
+        self._grow(int(ids.max()))
+        self.known[ids] = True
+        self.cost[ids] = columns['now_cost']
+        self.owned_percent[ids] = columns['owned_percent']
+        self.transfers_in[ids] = columns['transfers_in']
+        self.transfers_out[ids] = columns['transfers_out']
+
+        net = (columns['transfers_in'] - columns['transfers_out']).astype(float)
+        rise, fall = self.thresholds(ids)
+        changes = columns['cost_change_event']
+        consumed = np.where(changes > 0, changes * rise, changes * fall)
+        consumed = np.where(np.sign(changes) == np.sign(net), consumed, 0.0)
+        # Transfers beyond those this gameweek's changes used up, short of another change
+        remaining = np.where(np.sign(net - consumed) == np.sign(net), net - consumed, 0.0)
+        self.net[ids] = np.clip(remaining, -fall, rise)
+        self.velocity[ids] = net / hours
+        self.seen_at[ids] = now
+        self.version = version
+
+    def apply(self, diff: Any, bootstrap: Any) -> None:
+        """
+        ``FPLDataFetcher.subscribe`` callback: advance the changed players.
+
+        Args:
+            diff: Bootstrap diff (other kinds are ignored)
+            bootstrap: The new snapshot, used only when a full rebuild is needed
+        """
+        if diff.kind != 'bootstrap':
+            return
+        with self._lock:
+            self._apply(diff, bootstrap)
+
+    def _apply(self, diff: Any, bootstrap: Any) -> None:
+        if diff.is_reset or self.version != diff.previous_version:
+            self.rebuild(bootstrap, diff.version)
+            return
+        with span('prices.apply'):
+            self.total_players = int(bootstrap.get('total_players') or self.total_players)
+            for player_id in diff.removed:
+                self.records.pop(player_id, None)
+                if player_id < len(self.known):
+                    self.known[player_id] = False
+            players = [record for record_id, record in diff.records.items()
+                       if record_id in diff.added or not diff.changed[record_id].keys().isdisjoint(TRACKED_FIELDS)]
+            self.records.update(diff.records)
+            if players:
+                self._advance(self._columns(players))
+        self.version = diff.version
+
+    def _advance(self, columns: Dict[str, np.ndarray]) -> None:
+        """Move the given players' net transfers, rates and prices to a new snapshot."""
+        ids = columns['id']
+        self._grow(int(ids.max()))
+        now = self.clock()
+        new = ~self.known[ids]
+        # Gameweek counters restart at each deadline: the new counts are all new transfers
+        rolled = ((columns['transfers_in'] < self.transfers_in[ids])
+                  | (columns['transfers_out'] < self.transfers_out[ids]))
+        current_net = columns['transfers_in'] - columns['transfers_out']
+        delta = np.where(rolled | new, current_net,
+                         current_net - (self.transfers_in[ids] - self.transfers_out[ids])).astype(float)
+        repriced = ~new & (columns['now_cost'] != self.cost[ids])
+
+        hours = np.maximum((now - self.seen_at[ids]) / 3600.0, 1.0 / 60)
+        weight = 1.0 - 0.5 ** (hours / self.velocity_halflife_hours)
+        velocity = np.where(new, 0.0, self.velocity[ids] * (1.0 - weight) + weight * delta / hours)
+
+        # A price change consumes the progress so far; transfers since the last snapshot count towards the next
+        self.net[ids] = np.where(repriced | new, 0.0, self.net[ids]) + delta
+        self.velocity[ids] = velocity
+        self.seen_at[ids] = now
+        self.known[ids] = True
+        self.cost[ids] = columns['now_cost']
+        self.owned_percent[ids] = columns['owned_percent']
+        self.transfers_in[ids] = columns['transfers_in']
+        self.transfers_out[ids] = columns['transfers_out']
+
+    def next_update(self, now: Optional[float] = None) -> float:
+        """Epoch seconds of the next nightly price update."""
+        now = self.clock() if now is None else now
+        moment = datetime.fromtimestamp(now, timezone.utc)
+        hour, minute = self.update_time_utc
+        update = moment.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if update <= moment:
+            update += timedelta(days=1)
+        return update.timestamp()
+
+    @span('prices.predictions')
+    def predictions(self, limit: int = 20, now: Optional[float] = None) -> Dict:
+        """
+        Players most likely to rise and fall at the next price update.
+
+        Each player's net transfers are projected to the update time at their
+        current rate (decayed for players not seen changing recently);
+        progress is that projection as a fraction of the threshold, and a
+        change is predicted once it reaches 1 (or -1).
+
+        Args:
+            limit: Players per list
+            now: Epoch seconds (default: the clock)
+
+        Returns:
+            Dict: Success flag, next update time, 'risers' and 'fallers'
+            ranked by projected progress, and counts of predicted changes
+        """
+        with self._lock:
+            return self._predictions(limit, now)
+
+    def _predictions(self, limit: int, now: Optional[float]) -> Dict:
+        ids = np.flatnonzero(self.known)
+        if not len(ids):
+            return {'success': False, 'error': 'No player data available'}
+        now = self.clock() if now is None else now
+        update_at = self.next_update(now)
+        hours_left = (update_at - now) / 3600.0
+
+        stale = np.maximum(now - self.seen_at[ids], 0.0) / 3600.0
+        velocity = self.velocity[ids] * 0.5 ** (stale / self.velocity_halflife_hours)
+        net, projected = self.net[ids], self.net[ids] + velocity * hours_left
+        rise, fall = self.thresholds(ids)
+        progress = np.where(net >= 0, net / rise, net / fall)
+        projected_progress = np.where(projected >= 0, projected / rise, projected / fall)
+
+        def entries(order: np.ndarray) -> List[Dict]:
+            result = []
+            for i in order:
+                player_id = int(ids[i])
+                record = self.records.get(player_id) or {}
+                result.append({
+                    'id': player_id,
+                    'name': record.get('web_name'),
+                    'team': record.get('team'),
+                    'price': float(self.cost[player_id]) / 10,
+                    'selected_by_percent': float(self.owned_percent[player_id]),
+                    'net_transfers': int(round(net[i])),
+                    'transfers_per_hour': round(float(velocity[i]), 1),
+                    'progress': round(float(progress[i]) * 100, 1),
+                    'projected_progress': round(float(projected_progress[i]) * 100, 1),
+                    'predicted_change': float(np.clip(np.trunc(projected_progress[i]), -1, 1)) / 10,
+                })
+            return result
+
+        limit = min(limit, len(ids))
+        top = np.argpartition(-projected_progress, limit - 1)[:limit]
+        bottom = np.argpartition(projected_progress, limit - 1)[:limit]
+        return {
+            'success': True,
+            'next_update': datetime.fromtimestamp(update_at, timezone.utc).isoformat(),
+            'predicted_rises': int((projected_progress >= 1).sum()),
+            'predicted_falls': int((projected_progress <= -1).sum()),
+            'risers': entries(top[np.argsort(-projected_progress[top], kind='stable')]),
+            'fallers': entries(bottom[np.argsort(projected_progress[bottom], kind='stable')]),
+        }
@@ -0,0 +1,260 @@
+"""
+FPL Records Module
+
+Compact typed records for the bootstrap-static and fixtures payloads.
+
+Only the fields the pipeline reads are declared. The rest of each element
+(about 100 keys per player) is skipped while decoding and never becomes a
+Python object. With msgspec installed the records are ``msgspec.Struct``
+types decoded straight from the response bytes. Otherwise they are
+``__slots__`` classes built from the stdlib-decoded dicts, which are
+discarded right away.
+
+Records support ``record['field']``, ``record.get('field')`` and ``in``,
+so code written against the raw dicts keeps working.
+"""
+
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ai.serialization import decode, msgspec
+
+
+# (name, type, default) for every field kept from the API payloads
+PLAYER_FIELDS: List[Tuple[str, Any, Any]] = [
+    ('id', int, 0),
+    ('first_name', str, ''),
+    ('second_name', str, ''),
+    ('web_name', str, ''),
+    ('team', int, 0),
+    ('element_type', int, 0),
+    ('now_cost', int, 0),
+    ('status', str, 'a'),
+    ('chance_of_playing_next_round', Optional[int], None),
+    ('total_points', int, 0),
+    ('event_points', int, 0),
+    ('form', str, '0.0'),
+    ('points_per_game', str, '0.0'),
+    ('selected_by_percent', str, '0.0'),
+    ('minutes', int, 0),
+    ('starts', int, 0),
+    ('goals_scored', int, 0),
+    ('assists', int, 0),
+    ('clean_sheets', int, 0),
+    ('goals_conceded', int, 0),
+    ('saves', int, 0),
+    ('bonus', int, 0),
+    ('bps', int, 0),
+    ('influence', str, '0.0'),
+    ('creativity', str, '0.0'),
+    ('threat', str, '0.0'),
+    ('ict_index', str, '0.0'),
+    ('dreamteam_count', int, 0),
+    ('transfers_in_event', int, 0),
+    ('transfers_out_event', int, 0),
+    ('cost_change_event', int, 0),
+]
+
+TEAM_FIELDS: List[Tuple[str, Any, Any]] = [
+    ('id', int, 0),
+    ('code', int, 0),
+    ('name', str, ''),
+    ('short_name', str, ''),
+    ('strength', int, 0),
+    ('strength_attack_home', int, 0),
+    ('strength_attack_away', int, 0),
+    ('strength_defence_home', int, 0),
+    ('strength_defence_away', int, 0),
+]
+
+EVENT_FIELDS: List[Tuple[str, Any, Any]] = [
+    ('id', int, 0),
+    ('name', str, ''),
+    ('deadline_time', Optional[str], None),
+    ('finished', bool, False),
+    ('data_checked', bool, False),
+    ('is_previous', bool, False),
+    ('is_current', bool, False),
+    ('is_next', bool, False),
+]
+
+ELEMENT_TYPE_FIELDS: List[Tuple[str, Any, Any]] = [
+    ('id', int, 0),
+    ('singular_name', str, ''),
+    ('singular_name_short', str, ''),
+    ('plural_name', str, ''),
+    ('squad_select', int, 0),
+    ('squad_min_play', int, 0),
+    ('squad_max_play', int, 0),
+]
+
+FIXTURE_FIELDS: List[Tuple[str, Any, Any]] = [
+    ('id', int, 0),
+    ('code', int, 0),
+    ('event', Optional[int], None),
+    ('kickoff_time', Optional[str], None),
+    ('started', Optional[bool], None),
+    ('finished', bool, False),
+    ('finished_provisional', bool, False),
+    ('minutes', int, 0),
+    ('team_h', int, 0),
+    ('team_a', int, 0),
+    ('team_h_score', Optional[int], None),
+    ('team_a_score', Optional[int], None),
+    ('team_h_difficulty', int, 3),
+    ('team_a_difficulty', int, 3),
+]
+
+
+class RecordAccess:
+    """Dict-style read access for record types."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__struct_fields__
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.__struct_fields__
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the declared fields."""
+        return {field: getattr(self, field) for field in self.__struct_fields__}
+
+
+if msgspec is not None:
+    class _Record(msgspec.Struct, RecordAccess, gc=False):
+        """Base for the generated structs (no GC tracking: records hold no cycles)."""
+
+    def _define(name: str, fields: List[Tuple[str, Any, Any]]) -> type:
+        return msgspec.defstruct(name, fields, bases=(_Record,), module=__name__)
+else:  # pragma: no cover - exercised only without msgspec
+    class _Record(RecordAccess):
+        """Base for the generated ``__slots__`` classes."""
+
+        __slots__ = ()
+        __struct_fields__: Tuple[str, ...] = ()
+        _defaults: Dict[str, Any] = {}
+        _children: Dict[str, type] = {}
+
+        def __init__(self, **values):
+            for field in self.__struct_fields__:
+                setattr(self, field, values.get(field, self._defaults[field]))
+
+        @classmethod
+        def from_dict(cls, data: Dict) -> '_Record':
+            record = cls.__new__(cls)
+            for field in cls.__struct_fields__:
+                value = data.get(field, cls._defaults[field])
+                child = cls._children.get(field)
+                if child is not None and value:
+                    value = [child.from_dict(item) for item in value]
+                setattr(record, field, value)
+            return record
+
+        def __repr__(self) -> str:
+            values = ', '.join(f'{f}={getattr(self, f)!r}' for f in self.__struct_fields__)
+            return f'{type(self).__name__}({values})'
+
+        def __eq__(self, other: Any) -> bool:
+            return type(self) is type(other) and all(
+                getattr(self, f) == getattr(other, f) for f in self.__struct_fields__)
+
+    def _define(name: str, fields: List[Tuple[str, Any, Any]]) -> type:
+        names = tuple(field[0] for field in fields)
+        children = {}
+        for field_name, field_type, _ in fields:
+            item_type = getattr(field_type, '__args__', (None,))[0]
+            if isinstance(item_type, type) and issubclass(item_type, _Record):
+                children[field_name] = item_type
+        return type(name, (_Record,), {
+            '__slots__': names,
+            '__struct_fields__': names,
+            '_defaults': {field[0]: field[2] for field in fields},
+            '_children': children,
+            '__module__': __name__,
+        })
+
+
+class _FixtureList(list):
+    """Marker so ``decode`` builds fixture records without msgspec."""
+
+    @staticmethod
+    def from_dict(data: List[Dict]) -> List['Fixture']:
+        return [Fixture.from_dict(item) for item in data]
+
+
+Player = _define('Player', PLAYER_FIELDS)
+Team = _define('Team', TEAM_FIELDS)
+Event = _define('Event', EVENT_FIELDS)
+ElementType = _define('ElementType', ELEMENT_TYPE_FIELDS)
+Fixture = _define('Fixture', FIXTURE_FIELDS)
+Bootstrap = _define('Bootstrap', [
+    ('events', List[Event], []),
+    ('teams', List[Team], []),
+    ('elements', List[Player], []),
+    ('element_types', List[ElementType], []),
+    ('total_players', int, 0),
+])
+
+
+def decode_bootstrap(data: bytes) -> 'Bootstrap':
+    """
+    Decode a bootstrap-static response body into compact records.
+
+    Args:
+        data: Raw response bytes
+
+    Returns:
+        Bootstrap: Events, teams, elements and element types
+    """
+    return decode(data, Bootstrap)
+
+
+def decode_fixtures(data: bytes) -> List['Fixture']:
+    """
+    Decode a fixtures response body into compact records.
+
+    Args:
+        data: Raw response bytes
+
+    Returns:
+        List[Fixture]: One record per fixture
+    """
+    return decode(data, List[Fixture] if msgspec is not None else _FixtureList)
+
+
+def records_frame(records: Sequence[Any], fields: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Build a DataFrame column by column from records (or plain dicts).
+
+    Args:
+        records: Records of one type
+        fields: Columns to include (default: every declared field)
+
+    Returns:
+        pd.DataFrame: One row per record
+    """
+    if not records:
+        return pd.DataFrame()
+    first = records[0]
+    if isinstance(first, dict):
+        frame = pd.DataFrame(records)
+        return frame[list(fields)] if fields is not None else frame
+    fields = list(fields) if fields is not None else list(first.__struct_fields__)
+    if len(fields) == 1:
+        return pd.DataFrame({fields[0]: [getattr(r, fields[0]) for r in records]})
+    # attrgetter over many fields returns one tuple per record; transpose to columns
+    columns = zip(*map(attrgetter(*fields), records))
+    return pd.DataFrame(dict(zip(fields, map(list, columns))), columns=fields)
@@ -0,0 +1,221 @@
+"""
+Snapshot Diff Module
+
+Structured differences between two versions of an FPL payload.
+
+``FPLDataFetcher`` hashes every bootstrap and fixtures response. When the
+content changes it bumps the snapshot version and diffs the new records
+against the previous ones, so subscribers (prediction caches, indexes,
+tables) can update only the players or fixtures that changed instead of
+rebuilding from scratch.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class SnapshotDiff:
+    """
+    What changed between two versions of one payload kind.
+
+    Attributes:
+        kind: 'bootstrap' or 'fixtures'
+        version: Version number of the new snapshot
+        previous_version: Version it was diffed against (None for the first load)
+        content_hash: Hash of the new response body
+        added: Ids present only in the new snapshot
+        removed: Ids present only in the old snapshot
+        changed: Id mapped to {field: (old, new)} for records present in both
+        records: New record for every added or changed id
+        teams_changed: Bootstrap only: team records differ
+        element_types_changed: Bootstrap only: positions differ
+        events_changed: Bootstrap only: gameweek records differ (e.g. is_current moved)
+    """
+
+    __slots__ = ('kind', 'version', 'previous_version', 'content_hash', 'added', 'removed', 'changed',
+                 'records', 'teams_changed', 'element_types_changed', 'events_changed')
+
+    def __init__(self, kind: str, version: int, previous_version: Optional[int], content_hash: str):
+        self.kind = kind
+        self.version = version
+        self.previous_version = previous_version
+        self.content_hash = content_hash
+        self.added: Set[int] = set()
+        self.removed: Set[int] = set()
+        self.changed: Dict[int, Dict[str, Tuple[Any, Any]]] = {}
+        self.records: Dict[int, Any] = {}
+        self.teams_changed = False
+        self.element_types_changed = False
+        self.events_changed = False
+
+    @property
+    def is_reset(self) -> bool:
+        """True when there is no previous snapshot to apply deltas to."""
+        return self.previous_version is None
+
+    @property
+    def structural(self) -> bool:
+        """True when lookups shared by every player (teams, positions) changed."""
+        return self.is_reset or self.teams_changed or self.element_types_changed
+
+    @property
+    def changed_ids(self) -> Set[int]:
+        """Ids of records that were modified in place."""
+        return set(self.changed)
+
+    @property
+    def touched_ids(self) -> Set[int]:
+        """Ids whose derived data must be recomputed (changed or added)."""
+        return self.added | set(self.changed)
+
+    def fields_changed(self, field: str) -> Dict[int, Tuple[Any, Any]]:
+        """Map id to (old, new) for one field, e.g. 'now_cost' for price changes."""
+        return {record_id: fields[field] for record_id, fields in self.changed.items() if field in fields}
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.teams_changed
+                    or self.element_types_changed or self.events_changed)
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts suitable for logging or an API response."""
+        field_counts: Dict[str, int] = {}
+        for fields in self.changed.values():
+            for field in fields:
+                field_counts[field] = field_counts.get(field, 0) + 1
+        return {
+            'kind': self.kind,
+            'version': self.version,
+            'previous_version': self.previous_version,
+            'added': len(self.added),
+            'removed': len(self.removed),
+            'changed': len(self.changed),
+            'changed_fields': field_counts,
+            'teams_changed': self.teams_changed,
+            'element_types_changed': self.element_types_changed,
+            'events_changed': self.events_changed,
+        }
+
+
+def _fields_of(record: Any) -> Iterable[str]:
+    fields = getattr(record, '__struct_fields__', None)
+    return fields if fields is not None else record.keys()
+
+
+def diff_records(old: Iterable[Any], new: Iterable[Any], diff: SnapshotDiff) -> SnapshotDiff:
+    """
+    Fill ``diff`` with the added, removed and changed records between two lists.
+
+    Records are matched by ``id``. Unchanged records are skipped with a single
+    equality check, so only the changed ones pay for a field-by-field comparison.
+
+    Args:
+        old: Previous records (typed records or dicts)
+        new: Current records
+        diff: Diff to fill in
+
+    Returns:
+        SnapshotDiff: The same diff object
+    """
+    old_by_id = {record['id']: record for record in old}
+    for record in new:
+        record_id = record['id']
+        previous = old_by_id.pop(record_id, None)
+        if previous is None:
+            diff.added.add(record_id)
+            diff.records[record_id] = record
+        elif previous != record:
+            fields = {}
+            for field in _fields_of(record):
+                before, after = previous.get(field), record.get(field)
+                if before != after:
+                    fields[field] = (before, after)
+            if fields:
+                diff.changed[record_id] = fields
+                diff.records[record_id] = record
+    diff.removed.update(old_by_id)
+    return diff
+
+
+def diff_bootstrap(old: Any, new: Any, diff: SnapshotDiff) -> SnapshotDiff:
+    """Diff players by id and flag changes to teams, positions and events."""
+    if not old:
+        diff.records.update((player['id'], player) for player in new.get('elements', []))
+        diff.added.update(diff.records)
+        return diff
+    diff_records(old.get('elements', []), new.get('elements', []), diff)
+    diff.teams_changed = _lists_differ(old.get('teams', []), new.get('teams', []))
+    diff.element_types_changed = _lists_differ(old.get('element_types', []), new.get('element_types', []))
+    diff.events_changed = _lists_differ(old.get('events', []), new.get('events', []))
+    return diff
+
+
+def diff_fixtures(old: Optional[List[Any]], new: List[Any], diff: SnapshotDiff) -> SnapshotDiff:
+    """Diff fixtures by id (scores, kickoff times, finished flags, ...)."""
+    if not old:
+        diff.records.update((fixture['id'], fixture) for fixture in new)
+        diff.added.update(diff.records)
+        return diff
+    return diff_records(old, new, diff)
+
+
+def _lists_differ(old: List[Any], new: List[Any]) -> bool:
+    return len(old) != len(new) or any(a != b for a, b in zip(old, new))
+
+
+class PlayerIndex:
+    """
+    Players by id, team and position, kept current by applying bootstrap diffs.
+
+    A refresh that changes a handful of prices touches only those players'
+    entries; the index is rebuilt only on the first load.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[int, Any] = {}
+        self.by_team: Dict[int, Set[int]] = {}
+        self.by_position: Dict[int, Set[int]] = {}
+        self.version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def _add(self, player: Any) -> None:
+        player_id = player['id']
+        self.by_id[player_id] = player
+        self.by_team.setdefault(player['team'], set()).add(player_id)
+        self.by_position.setdefault(player['element_type'], set()).add(player_id)
+
+    def _discard(self, player_id: int) -> None:
+        player = self.by_id.pop(player_id, None)
+        if player is not None:
+            self.by_team.get(player['team'], set()).discard(player_id)
+            self.by_position.get(player['element_type'], set()).discard(player_id)
+
+    def rebuild(self, players: Iterable[Any], version: Optional[int] = None) -> None:
+        """Index every player from scratch."""
+        self.by_id, self.by_team, self.by_position = {}, {}, {}
+        for player in players:
+            self._add(player)
+        self.version = version
+
+    def apply(self, diff: SnapshotDiff, bootstrap: Any) -> None:
+        """
+        Bring the index up to ``diff.version``.
+
+        Args:
+            diff: Bootstrap diff from the fetcher (other kinds are ignored)
+            bootstrap: The new snapshot, used only when a full rebuild is needed
+        """
+        if diff.kind != 'bootstrap':
+            return
+        if diff.is_reset or self.version != diff.previous_version:
+            self.rebuild(bootstrap.get('elements', []), diff.version)
+            return
+        for player_id in diff.removed:
+            self._discard(player_id)
+        for player_id, player in diff.records.items():
+            self._discard(player_id)
+            self._add(player)
+        self.version = diff.version
+
+    def get(self, player_id: int, default: Any = None) -> Any:
+        return self.by_id.get(player_id, default)
@@ -0,0 +1,266 @@
+"""
+Team Strength Module
+
+Attack and defence ratings learned from finished fixture scores.
+
+Each club has an attack rating ``a`` and a defence rating ``d`` on the log
+scale of expected goals, so a match's expected score is Poisson with
+
+    home goals ~ exp(mu + home + a[home] - d[away])
+    away goals ~ exp(mu + a[away] - d[home])
+
+Ratings are learned online: a round of results (one gameweek) moves every
+club that played by a step along the gradient of the Poisson log-likelihood
+(goals scored minus goals expected), in a handful of vectorized array
+operations. New results of a new round are applied as they arrive, so a
+refresh costs the new matches, not the season. A corrected score, or a
+result for a round already stepped (a gameweek still being played), triggers
+a refit instead, which takes about a millisecond for a full season; the
+ratings therefore always equal a fit of the whole snapshot, whatever order
+the results arrived in. Before any results, ratings start
+from the FPL team strength fields when the bootstrap carries them.
+
+``difficulty_matrix`` turns the ratings into a dense FDR-style grid
+(1 easy .. 5 hard) for every club, opponent and venue, which the fixture
+analysis and the model's fixture factor both read instead of FPL's static
+difficulty.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ai.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+HOME, AWAY = 0, 1
+
+
+class TeamStrengthModel:
+    """
+    Online Poisson attack/defence ratings per club, indexed by FPL team id.
+
+    Example:
+        strength = TeamStrengthModel()
+        strength.set_teams(bootstrap['teams'])
+        strength.update(fixtures)          # applies only new results
+        difficulty = strength.difficulty_matrix()
+        difficulty[team_id, opponent_id, HOME]
+    """
+
+    def __init__(self, learning_rate: float = 0.08, baseline_rate: float = 0.01, mean_goals: float = 1.35,
+                 home_advantage: float = 0.2, prior_scale: float = 0.001, log_ratio_per_step: float = 0.4):
+        """
+        Args:
+            learning_rate: Step size of the club ratings per result
+            baseline_rate: Step size of the league-wide scoring rate and home advantage
+            mean_goals: Initial goals per team per match
+            home_advantage: Initial log home advantage
+            prior_scale: Rating per point of FPL team strength away from the league mean
+            log_ratio_per_step: Log ratio of expected goals for and against per
+                difficulty step away from 3
+        """
+        self.learning_rate = learning_rate
+        self.baseline_rate = baseline_rate
+        self.mean_goals = mean_goals
+        self.home_advantage = home_advantage
+        self.prior_scale = prior_scale
+        self.log_ratio_per_step = log_ratio_per_step
+        self.prior_attack = np.zeros(1)
+        self.prior_defence = np.zeros(1)
+        self._team_names: Dict[int, str] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every result and return to the priors."""
+        self.mu = float(np.log(self.mean_goals))
+        self.home = self.home_advantage
+        self.attack = self.prior_attack.copy()
+        self.defence = self.prior_defence.copy()
+        # Fixture id -> (event, kickoff, home id, away id, home goals, away goals) of every applied result
+        self.results: Dict[int, Tuple] = {}
+        self._matrix: Optional[np.ndarray] = None
+
+    @property
+    def size(self) -> int:
+        """Length of the team-id-indexed arrays (ids run 1..size-1)."""
+        return len(self.attack)
+
+    def _grow(self, max_id: int) -> None:
+        if max_id < self.size:
+            return
+        extra = max_id + 1 - self.size
+        for name in ('attack', 'defence', 'prior_attack', 'prior_defence'):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(extra)]))
+
+    def set_teams(self, teams: Iterable[Any]) -> None:
+        """
+        Set the priors from bootstrap team records.
+
+        Clubs rated by FPL start above or below average by ``prior_scale``
+        per strength point; a change in the priors refits the results.
+
+        Args:
+            teams: Records with 'id' and, optionally, the strength_attack_* and
+                strength_defence_* fields
+        """
+        teams = list(teams)
+        if not teams:
+            return
+        self._team_names = {team['id']: team.get('name') for team in teams}
+        size = max(self.size, max(self._team_names) + 1)
+        attack, defence = np.zeros(size), np.zeros(size)
+        ids = np.array(list(self._team_names), dtype=np.intp)
+        ratings = np.array([[team.get(f'strength_{kind}_{venue}') or 0
+                             for kind in ('attack', 'defence') for venue in ('home', 'away')] for team in teams],
+                           dtype=float)
+        if ratings.any():
+            attack[ids] = ratings[:, :2].mean(axis=1)
+            defence[ids] = ratings[:, 2:].mean(axis=1)
+            attack[ids] = (attack[ids] - attack[ids].mean()) * self.prior_scale
+            defence[ids] = (defence[ids] - defence[ids].mean()) * self.prior_scale
+        if (size == len(self.prior_attack) and np.array_equal(attack, self.prior_attack)
+                and np.array_equal(defence, self.prior_defence)):
+            return
+        self.prior_attack, self.prior_defence = attack, defence
+        self.refit()
+
+    @staticmethod
+    def _result_rows(fixtures: Iterable[Any]) -> List[Tuple]:
+        """(event, kickoff, id, home id, away id, home goals, away goals) per finished fixture."""
+        return [(fx.get('event') or 0, fx.get('kickoff_time') or '', fx['id'], int(fx['team_h']), int(fx['team_a']),
+                 int(fx['team_h_score']), int(fx['team_a_score']))
+                for fx in fixtures
+                if fx.get('finished') and fx.get('team_h_score') is not None and fx.get('team_a_score') is not None]
+
+    def refit(self, fixtures: Optional[Iterable[Any]] = None) -> int:
+        """
+        Rebuild the ratings from the priors (default: over the results already applied).
+
+        Args:
+            fixtures: Fixture snapshot to fit instead
+
+        Returns:
+            int: Number of results applied
+        """
+        rows = list(self.results.values()) if fixtures is None else self._result_rows(fixtures)
+        self.reset()
+        self._apply(rows)
+        return len(rows)
+
+    @span('strength.update')
+    def update(self, fixtures: Iterable[Any]) -> int:
+        """
+        Apply the finished results not seen yet, one gameweek round at a time.
+
+        A result whose score differs from the one applied earlier (a
+        correction), or one from a gameweek already stepped through, refits
+        every result instead, so the ratings match :meth:`refit` on the
+        same results.
+
+        Args:
+            fixtures: Fixture dicts or records (a full snapshot or just the changed ones)
+
+        Returns:
+            int: Number of results applied
+        """
+        fresh, corrected = [], False
+        for row in self._result_rows(fixtures):
+            applied = self.results.get(row[2])
+            if applied is None:
+                fresh.append(row)
+            elif applied[5:] != row[5:]:
+                logger.debug("Score of fixture %s corrected; refitting team strength", row[2])
+                self.results[row[2]] = row
+                corrected = True
+        # A round is one step: late results of a stepped round must join it, not follow it
+        late = bool(fresh) and bool(self.results) and (
+            min(row[0] for row in fresh) <= max(row[0] for row in self.results.values()))
+        if corrected or late:
+            rows = list(self.results.values()) + fresh
+            self.reset()
+            fresh = rows
+        self._apply(fresh)
+        return len(fresh)
+
+    def _apply(self, rows: List[Tuple]) -> None:
+        """Step through result rows in gameweek order, one vectorized step per gameweek."""
+        if not rows:
+            return
+        rows = sorted(rows)
+        events = np.array([row[0] for row in rows])
+        matches = np.array([row[3:] for row in rows], dtype=np.int64)
+        self._grow(int(matches[:, :2].max()))
+        starts = np.flatnonzero(np.r_[True, events[1:] != events[:-1]])
+        for start, end in zip(starts, np.r_[starts[1:], len(rows)]):
+            self._step(*matches[start:end].T)
+        self.results.update((row[2], row) for row in rows)
+        self._matrix = None
+
+    def _step(self, home: np.ndarray, away: np.ndarray, home_goals: np.ndarray, away_goals: np.ndarray) -> None:
+        """One gradient step of the Poisson log-likelihood over a round of results."""
+        home_error = home_goals - np.exp(self.mu + self.home + self.attack[home] - self.defence[away])
+        away_error = away_goals - np.exp(self.mu + self.attack[away] - self.defence[home])
+        # np.add.at accumulates clubs that play twice in a round (double gameweeks)
+        rate = self.learning_rate
+        np.add.at(self.attack, home, rate * home_error)
+        np.add.at(self.defence, away, -rate * home_error)
+        np.add.at(self.attack, away, rate * away_error)
+        np.add.at(self.defence, home, -rate * away_error)
+        self.mu += self.baseline_rate * float((home_error + away_error).mean())
+        self.home += self.baseline_rate * float(home_error.mean())
+
+    def expected_goals(self) -> np.ndarray:
+        """
+        Expected goals for every club against every opponent.
+
+        Returns:
+            np.ndarray: (size, size, 2) goals team i scores against opponent j,
+            at HOME (index 0) or AWAY (index 1)
+        """
+        base = self.mu + self.attack[:, None] - self.defence[None, :]
+        return np.exp(np.stack([base + self.home, base], axis=-1))
+
+    def difficulty_matrix(self) -> np.ndarray:
+        """
+        FDR-style difficulty of every fixture, from expected goals for and against.
+
+        Difficulty is 3 when a club expects to score as many as it concedes,
+        and moves one step per ``log_ratio_per_step`` of the log ratio,
+        clamped to [1, 5]. Cached until the ratings change.
+
+        Returns:
+            np.ndarray: (size, size, 2) difficulty for team i against opponent j
+            at HOME (index 0) or AWAY (index 1)
+        """
+        if self._matrix is None:
+            goals = np.log(self.expected_goals())
+            # Goals conceded at home are the opponent's away goals, and vice versa
+            conceded = goals.transpose(1, 0, 2)[:, :, ::-1]
+            self._matrix = np.clip(3.0 - (goals - conceded) / self.log_ratio_per_step, 1.0, 5.0)
+        return self._matrix
+
+    def fixture_difficulty(self, team_id: int, opponent_id: int, home: bool) -> float:
+        """Difficulty of one fixture (3.0 for clubs without ratings)."""
+        if max(team_id, opponent_id) >= self.size:
+            return 3.0
+        return float(self.difficulty_matrix()[team_id, opponent_id, HOME if home else AWAY])
+
+    def ratings(self) -> Dict[str, Any]:
+        """Attack, defence and expected goals per club, strongest first, for an API response."""
+        ids = sorted(self._team_names or range(1, self.size),
+                     key=lambda team_id: self.defence[team_id] + self.attack[team_id], reverse=True)
+        return {
+            'results': len(self.results),
+            'mean_goals': round(float(np.exp(self.mu)), 3),
+            'home_advantage': round(float(np.exp(self.home)), 3),
+            'teams': [{
+                'id': int(team_id),
+                'name': self._team_names.get(team_id),
+                'attack': round(float(self.attack[team_id]), 4),
+                'defence': round(float(self.defence[team_id]), 4),
+            } for team_id in ids if team_id < self.size],
+        }
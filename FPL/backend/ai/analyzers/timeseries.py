@@ -0,0 +1,485 @@
+"""
+Snapshot Time Series Module
+
+Append-only history of per-player bootstrap numbers (price, form, ownership,
+gameweek transfers), so trends survive the next fetch.
+
+Each appended snapshot is written as a small tail file. Once ``chunk_size``
+snapshots have accumulated they are sealed into a chunk: a directory of
+``.npy`` files with one ``(players, snapshots)`` matrix per column. Values
+are stored as fixed-point integers (form and ownership in tenths), and each
+column is encoded one of two ways, whichever is smaller for that chunk:
+
+- delta: the first snapshot's values plus the change between consecutive
+  snapshots, in the narrowest integer type that fits (prices and ownership
+  barely move between fetches, so most deltas fit in int8);
+- dictionary: the distinct values plus narrow per-cell codes (form has
+  few distinct values).
+
+Chunks are immutable and opened with ``np.load(mmap_mode='r')``, so reading
+one player's series touches one row per chunk, and reading every player at
+a time touches one chunk, without loading the full history. A JSON manifest,
+replaced atomically after every write, lists the chunks and tail files;
+a single process should write to a store, while any number may read it.
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ai.instrumentation import span
+
+logger = logging.getLogger(__name__)
+
+
+# Recorded columns and their fixed-point scale (value stored as round(value * scale))
+DEFAULT_COLUMNS = {
+    'now_cost': 1,
+    'form': 10,
+    'selected_by_percent': 10,
+    'transfers_in_event': 1,
+    'transfers_out_event': 1,
+}
+
+DOWNSAMPLE_METHODS = ('last', 'first', 'mean', 'min', 'max')
+
+_MANIFEST = 'manifest.json'
+
+
+def _int_dtype(low: int, high: int) -> np.dtype:
+    """Narrowest signed integer type holding [low, high]."""
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def encode_column(matrix: np.ndarray) -> Tuple[str, Dict[str, np.ndarray]]:
+    """
+    Encode a ``(players, snapshots)`` int64 matrix with delta or dictionary encoding.
+
+    Args:
+        matrix: Fixed-point values, one row per player
+
+    Returns:
+        Tuple[str, Dict[str, np.ndarray]]: 'delta' with 'base' and 'delta'
+        arrays, or 'dictionary' with 'values' and 'codes', whichever is smaller
+    """
+    base = matrix[:, 0]
+    deltas = np.diff(matrix, axis=1)
+    delta = {
+        'base': base.astype(_int_dtype(int(base.min(initial=0)), int(base.max(initial=0)))),
+        'delta': deltas.astype(_int_dtype(int(deltas.min(initial=0)), int(deltas.max(initial=0)))),
+    }
+    values, codes = np.unique(matrix, return_inverse=True)
+    if len(values) <= np.iinfo(np.uint16).max:
+        code_dtype = np.uint8 if len(values) <= np.iinfo(np.uint8).max + 1 else np.uint16
+        dictionary = {
+            'values': values.astype(_int_dtype(int(values.min(initial=0)), int(values.max(initial=0)))),
+            'codes': codes.reshape(matrix.shape).astype(code_dtype),
+        }
+        if sum(a.nbytes for a in dictionary.values()) < sum(a.nbytes for a in delta.values()):
+            return 'dictionary', dictionary
+    return 'delta', delta
+
+
+def decode_rows(encoding: str, arrays: Dict[str, np.ndarray], rows: Any) -> np.ndarray:
+    """Full history of the given rows (players) of an encoded column, as int64."""
+    if encoding == 'dictionary':
+        return np.asarray(arrays['values'], dtype=np.int64)[arrays['codes'][rows]]
+    base = np.asarray(arrays['base'][rows], dtype=np.int64)
+    deltas = np.asarray(arrays['delta'][rows], dtype=np.int64)
+    return np.concatenate([base[..., None], deltas], axis=-1).cumsum(axis=-1)
+
+
+def decode_snapshot(encoding: str, arrays: Dict[str, np.ndarray], index: int) -> np.ndarray:
+    """Every player's value at one snapshot of an encoded column, as int64."""
+    if encoding == 'dictionary':
+        return np.asarray(arrays['values'], dtype=np.int64)[arrays['codes'][:, index]]
+    return (np.asarray(arrays['base'], dtype=np.int64)
+            + np.asarray(arrays['delta'][:, :index], dtype=np.int64).sum(axis=1))
+
+
+def downsample(times: np.ndarray, values: np.ndarray, every: float,
+               how: str = 'last') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduce a time-ordered series to one value per ``every``-second bucket.
+
+    Args:
+        times: (n,) sorted timestamps in seconds
+        values: (n,) or (n, k) values
+        every: Bucket width in seconds
+        how: One of DOWNSAMPLE_METHODS
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Bucket start times and reduced values
+    """
+    if how not in DOWNSAMPLE_METHODS:
+        raise ValueError(f'Unknown downsample method: {how}')
+    if not len(times):
+        return times, values
+    buckets = np.floor(times / every)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if how == 'first':
+        reduced = values[starts]
+    elif how == 'last':
+        reduced = values[np.r_[starts[1:], len(times)] - 1]
+    elif how == 'mean':
+        counts = np.diff(np.r_[starts, len(times)])
+        reduced = np.add.reduceat(values.astype(float), starts, axis=0) / counts.reshape((-1,) + (1,) * (values.ndim - 1))
+    else:
+        reduced = getattr(np, 'minimum' if how == 'min' else 'maximum').reduceat(values, starts, axis=0)
+    return buckets[starts] * every, reduced
+
+
+class _Chunk:
+    """Memory-mapped arrays of one sealed chunk."""
+
+    def __init__(self, path: str, entry: Dict):
+        def load(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        self.times = np.asarray(load('times'))
+        self.ids = np.asarray(load('ids'))
+        present = os.path.join(path, 'present.npy')
+        self.present = np.load(present, mmap_mode='r') if os.path.exists(present) else None
+        self.columns = {
+            column: (encoding, {part: load(f'{column}.{part}')
+                                for part in (('values', 'codes') if encoding == 'dictionary' else ('base', 'delta'))})
+            for column, encoding in entry['encodings'].items()
+        }
+
+    def row(self, player_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.ids, player_id))
+        return row if row < len(self.ids) and self.ids[row] == player_id else None
+
+
+class SnapshotTimeSeries:
+    """
+    Columnar, append-only store of per-player bootstrap numbers over time.
+
+    Example:
+        store = SnapshotTimeSeries('data/timeseries')
+        store.append_bootstrap(fetcher.get_bootstrap_data())
+        store.series(350, ['now_cost', 'form'], every=86400)
+        store.at(time.time() - 7 * 86400)
+    """
+
+    def __init__(self, directory: str, columns: Optional[Dict[str, int]] = None, chunk_size: int = 256):
+        """
+        Args:
+            directory: Store location (created if missing)
+            columns: Column name to fixed-point scale for a new store
+                (default: DEFAULT_COLUMNS); an existing store keeps its own
+            chunk_size: Snapshots per sealed chunk
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._manifest_mtime: Optional[int] = None
+        self._chunks: Dict[str, _Chunk] = {}
+        self._tails: Dict[str, Dict[str, np.ndarray]] = {}
+        self.manifest = {
+            'format': 1,
+            'columns': dict(columns or DEFAULT_COLUMNS),
+            'chunk_size': chunk_size,
+            'next_seq': 0,
+            'last_source': None,
+            'chunks': [],
+            'tail': [],
+        }
+        self._refresh()
+
+    @property
+    def columns(self) -> Dict[str, int]:
+        return self.manifest['columns']
+
+    def __len__(self) -> int:
+        self._refresh()
+        return sum(c['count'] for c in self.manifest['chunks']) + len(self.manifest['tail'])
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _refresh(self) -> None:
+        """Reload the manifest if another process has written since the last read."""
+        try:
+            mtime = os.stat(self._path(_MANIFEST)).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._manifest_mtime:
+            with open(self._path(_MANIFEST), 'rb') as f:
+                self.manifest = json.load(f)
+            self._manifest_mtime = mtime
+
+    def _write_manifest(self) -> None:
+        tmp = self._path(_MANIFEST + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, self._path(_MANIFEST))
+        self._manifest_mtime = os.stat(self._path(_MANIFEST)).st_mtime_ns
+
+    def _encode_players(self, players: Iterable[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sorted ids and (columns, players) fixed-point values of a player list."""
+        players = [p for p in players if p.get('id') is not None]
+        ids = np.array([int(p.get('id')) for p in players], dtype=np.int64)
+        values = np.empty((len(self.columns), len(players)), dtype=np.int64)
+        for i, (column, scale) in enumerate(self.columns.items()):
+            # Form and ownership arrive as strings ("5.4"); missing values count as 0
+            raw = np.array([p.get(column) for p in players], dtype=object)
+            raw[pd.isna(raw)] = 0
+            values[i] = np.rint(raw.astype(float) * scale)
+        order = np.argsort(ids, kind='stable')
+        return ids[order], values[:, order]
+
+    @span('timeseries.append')
+    def append(self, players: Iterable[Any], timestamp: Optional[float] = None,
+               source_key: Optional[str] = None) -> bool:
+        """
+        Record one snapshot of the given players.
+
+        Args:
+            players: Bootstrap elements (dicts or records with 'id' and the columns)
+            timestamp: Snapshot time in seconds since the epoch (default: now);
+                must not precede the last recorded snapshot
+            source_key: Content hash of the snapshot; a repeat of the last one is skipped
+
+        Returns:
+            bool: Whether a snapshot was recorded
+        """
+        self._refresh()
+        if source_key is not None and source_key == self.manifest['last_source']:
+            return False
+        timestamp = time.time() if timestamp is None else float(timestamp)
+        last = self._last_time()
+        if last is not None and timestamp < last:
+            raise ValueError(f'Snapshot at {timestamp} precedes the last recorded one ({last})')
+
+        ids, values = self._encode_players(players)
+        name = f"tail-{self.manifest['next_seq']:08d}.npz"
+        tmp = self._path(name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, ids=ids, values=values)
+        os.replace(tmp, self._path(name))
+        self._tails[name] = {'ids': ids, 'values': values}
+
+        self.manifest['next_seq'] += 1
+        self.manifest['tail'].append({'name': name, 'time': timestamp})
+        self.manifest['last_source'] = source_key
+        if len(self.manifest['tail']) >= self.manifest['chunk_size']:
+            self._seal()
+        else:
+            self._write_manifest()
+        return True
+
+    def append_bootstrap(self, bootstrap: Any, timestamp: Optional[float] = None,
+                         source_key: Optional[str] = None) -> bool:
+        """Record the elements of a bootstrap-static payload (see :meth:`append`)."""
+        return self.append(bootstrap.get('elements') or [], timestamp, source_key)
+
+    def on_snapshot(self, diff: Any, snapshot: Any) -> None:
+        """``FPLDataFetcher.subscribe`` callback recording each new bootstrap version."""
+        if diff.kind == 'bootstrap':
+            self.append_bootstrap(snapshot, source_key=diff.content_hash)
+
+    def seal(self) -> None:
+        """Compact pending tail snapshots into a chunk now, rather than at ``chunk_size``."""
+        self._refresh()
+        if self.manifest['tail']:
+            self._seal()
+
+    @span('timeseries.seal')
+    def _seal(self) -> None:
+        entries = self.manifest['tail']
+        tails = [self._load_tail(entry['name']) for entry in entries]
+        ids = np.unique(np.concatenate([t['ids'] for t in tails]))
+        n_players, n_snapshots = len(ids), len(tails)
+
+        matrix = np.zeros((len(self.columns), n_players, n_snapshots), dtype=np.int64)
+        present = np.zeros((n_players, n_snapshots), dtype=bool)
+        for t, tail in enumerate(tails):
+            rows = np.searchsorted(ids, tail['ids'])
+            matrix[:, rows, t] = tail['values']
+            present[rows, t] = True
+        # Carry values across snapshots a player is missing from, so gaps cost no deltas
+        carried = np.maximum.accumulate(np.where(present, np.arange(n_snapshots), 0), axis=1)
+        matrix = np.take_along_axis(matrix, np.broadcast_to(carried, matrix.shape), axis=2)
+
+        name = f"chunk-{self.manifest['next_seq']:08d}"
+        tmp = self._path(name + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        np.save(os.path.join(tmp, 'times.npy'), np.array([e['time'] for e in entries], dtype=np.float64))
+        np.save(os.path.join(tmp, 'ids.npy'), ids)
+        if not present.all():
+            np.save(os.path.join(tmp, 'present.npy'), present)
+        encodings = {}
+        for column, values in zip(self.columns, matrix):
+            encodings[column], arrays = encode_column(values)
+            for part, array in arrays.items():
+                np.save(os.path.join(tmp, f'{column}.{part}.npy'), array)
+        os.replace(tmp, self._path(name))
+
+        self.manifest['next_seq'] += 1
+        self.manifest['chunks'].append({
+            'name': name, 'start': entries[0]['time'], 'end': entries[-1]['time'],
+            'count': n_snapshots, 'encodings': encodings,
+        })
+        self.manifest['tail'] = []
+        self._write_manifest()
+        for entry in entries:
+            self._tails.pop(entry['name'], None)
+            try:
+                os.remove(self._path(entry['name']))
+            except FileNotFoundError:
+                pass
+        logger.debug("Sealed %s: %d snapshots x %d players (%s)", name, n_snapshots, n_players, encodings)
+
+    def _last_time(self) -> Optional[float]:
+        if self.manifest['tail']:
+            return self.manifest['tail'][-1]['time']
+        if self.manifest['chunks']:
+            return self.manifest['chunks'][-1]['end']
+        return None
+
+    def _load_tail(self, name: str) -> Dict[str, np.ndarray]:
+        tail = self._tails.get(name)
+        if tail is None:
+            with np.load(self._path(name)) as data:
+                tail = self._tails[name] = {'ids': data['ids'], 'values': data['values']}
+        return tail
+
+    def _chunk(self, entry: Dict) -> _Chunk:
+        chunk = self._chunks.get(entry['name'])
+        if chunk is None:
+            chunk = self._chunks[entry['name']] = _Chunk(self._path(entry['name']), entry)
+        return chunk
+
+    def _select(self, columns: Optional[Sequence[str]]) -> List[str]:
+        columns = list(columns or self.columns)
+        unknown = [c for c in columns if c not in self.columns]
+        if unknown:
+            raise KeyError(f'Unknown columns: {unknown}')
+        return columns
+
+    def _to_frame(self, index: Any, values: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Undo the fixed-point scaling (scale 1 columns stay integers)."""
+        return pd.DataFrame({
+            column: raw if self.columns[column] == 1 else raw / self.columns[column]
+            for column, raw in values.items()
+        }, index=index)
+
+    def times(self) -> np.ndarray:
+        """Timestamps of every recorded snapshot (only the chunks' time arrays are read)."""
+        self._refresh()
+        return np.concatenate([self._chunk(e).times for e in self.manifest['chunks']]
+                              + [np.array([e['time'] for e in self.manifest['tail']], dtype=np.float64)])
+
+    @span('timeseries.series')
+    def series(self, player_id: int, columns: Optional[Sequence[str]] = None, start: Optional[float] = None,
+               end: Optional[float] = None, every: Optional[float] = None, how: str = 'last') -> pd.DataFrame:
+        """
+        One player's history, read one row per overlapping chunk.
+
+        Args:
+            player_id: FPL element id
+            columns: Columns to return (default: all recorded)
+            start: Earliest timestamp (inclusive)
+            end: Latest timestamp (inclusive)
+            every: Downsample to buckets of this many seconds
+            how: Reduction per bucket (see DOWNSAMPLE_METHODS)
+
+        Returns:
+            pd.DataFrame: One row per snapshot (or bucket) the player appears
+            in, indexed by timestamp
+        """
+        self._refresh()
+        columns = self._select(columns)
+        lo = -np.inf if start is None else start
+        hi = np.inf if end is None else end
+        times, parts = [], {c: [] for c in columns}
+
+        for entry in self.manifest['chunks']:
+            if entry['end'] < lo or entry['start'] > hi:
+                continue
+            chunk = self._chunk(entry)
+            row = chunk.row(player_id)
+            if row is None:
+                continue
+            keep = (chunk.times >= lo) & (chunk.times <= hi)
+            if chunk.present is not None:
+                keep &= np.asarray(chunk.present[row])
+            times.append(chunk.times[keep])
+            for column in columns:
+                encoding, arrays = chunk.columns[column]
+                parts[column].append(decode_rows(encoding, arrays, row)[keep])
+
+        positions = {c: i for i, c in enumerate(self.columns)}
+        for entry in self.manifest['tail']:
+            if not lo <= entry['time'] <= hi:
+                continue
+            tail = self._load_tail(entry['name'])
+            i = int(np.searchsorted(tail['ids'], player_id))
+            if i == len(tail['ids']) or tail['ids'][i] != player_id:
+                continue
+            times.append(np.array([entry['time']]))
+            for column in columns:
+                parts[column].append(tail['values'][positions[column], i:i + 1])
+
+        times = np.concatenate(times) if times else np.empty(0)
+        values = {c: np.concatenate(p) if p else np.empty(0, dtype=np.int64) for c, p in parts.items()}
+        if every:
+            for column in columns:
+                bucket_times, values[column] = downsample(times, values[column], every, how)
+            times = bucket_times
+        return self._to_frame(pd.Index(times, name='time'), values)
+
+    @span('timeseries.at')
+    def at(self, timestamp: Optional[float] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Every player's values in the latest snapshot at or before ``timestamp``.
+
+        Only the chunk holding that snapshot is read.
+
+        Args:
+            timestamp: Seconds since the epoch (default: the latest snapshot)
+            columns: Columns to return (default: all recorded)
+
+        Returns:
+            pd.DataFrame: Indexed by player id, with the snapshot's timestamp
+            in ``frame.attrs['time']``; empty if nothing was recorded by then
+        """
+        self._refresh()
+        columns = self._select(columns)
+        timestamp = np.inf if timestamp is None else timestamp
+
+        tail = [e for e in self.manifest['tail'] if e['time'] <= timestamp]
+        if tail:
+            entry = tail[-1]
+            data = self._load_tail(entry['name'])
+            positions = {c: i for i, c in enumerate(self.columns)}
+            frame = self._to_frame(pd.Index(data['ids'], name='id'),
+                                   {c: data['values'][positions[c]] for c in columns})
+            frame.attrs['time'] = entry['time']
+            return frame
+
+        chunks = [e for e in self.manifest['chunks'] if e['start'] <= timestamp]
+        if not chunks:
+            frame = self._to_frame(pd.Index([], name='id', dtype=np.int64),
+                                   {c: np.empty(0, dtype=np.int64) for c in columns})
+            frame.attrs['time'] = None
+            return frame
+        chunk = self._chunk(chunks[-1])
+        index = int(np.searchsorted(chunk.times, timestamp, side='right')) - 1
+        rows = slice(None) if chunk.present is None else np.asarray(chunk.present[:, index])
+        frame = self._to_frame(pd.Index(chunk.ids[rows], name='id'), {
+            column: decode_snapshot(*chunk.columns[column], index)[rows] for column in columns
+        })
+        frame.attrs['time'] = float(chunk.times[index])
+        return frame
@@ -0,0 +1,260 @@
+"""
+Instrumentation Module
+
+Lightweight timing spans and a leveled logger for the Python pipeline.
+
+``span`` works as a context manager or a decorator and records wall time and
+the net change in allocated memory blocks for a named stage. Records are
+aggregated in a process-wide registry that renders Prometheus text format,
+which the FastAPI app serves on ``/metrics``.
+
+Logging goes through the standard ``logging`` module under the ``ai`` logger,
+which is silent until :func:`configure_logging` (or the application) attaches
+a handler.
+"""
+
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _StageStats:
+    """Aggregated measurements for one stage."""
+
+    __slots__ = ('count', 'errors', 'total_seconds', 'max_seconds', 'net_blocks', 'bucket_counts')
+
+    def __init__(self, num_buckets: int):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.net_blocks = 0
+        self.bucket_counts = [0] * num_buckets
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of per-stage timing histograms.
+
+    Recording is a dict lookup and a few additions under a lock, so spans can
+    stay enabled in production.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, prefix: str = 'fpl'):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._stages: Dict[str, _StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, net_blocks: int = 0, error: bool = False) -> None:
+        """
+        Record one completed stage.
+
+        Args:
+            stage: Stage name, e.g. 'model.engineer_features'
+            seconds: Wall time spent in the stage
+            net_blocks: Change in allocated memory blocks across the stage
+            error: Whether the stage raised
+        """
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats(len(self.buckets))
+            stats.count += 1
+            stats.total_seconds += seconds
+            stats.net_blocks += net_blocks
+            if seconds > stats.max_seconds:
+                stats.max_seconds = seconds
+            if error:
+                stats.errors += 1
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    stats.bucket_counts[i] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get a copy of the aggregated measurements.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Stage names mapped to count, totals and max
+        """
+        with self._lock:
+            return {
+                stage: {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'total_seconds': stats.total_seconds,
+                    'mean_seconds': stats.total_seconds / stats.count if stats.count else 0.0,
+                    'max_seconds': stats.max_seconds,
+                    'net_allocated_blocks': stats.net_blocks,
+                }
+                for stage, stats in self._stages.items()
+            }
+
+    def export(self, reset: bool = False) -> Dict[str, Tuple]:
+        """
+        Raw per-stage aggregates, for shipping to another process's registry.
+
+        Args:
+            reset: Clear the registry after reading, so the next export holds
+                only what was recorded since this one
+
+        Returns:
+            Dict[str, Tuple]: Stage names mapped to (count, errors, total, max, blocks, buckets)
+        """
+        with self._lock:
+            exported = {
+                stage: (stats.count, stats.errors, stats.total_seconds, stats.max_seconds,
+                        stats.net_blocks, tuple(stats.bucket_counts))
+                for stage, stats in self._stages.items()
+            }
+            if reset:
+                self._stages.clear()
+        return exported
+
+    def merge(self, exported: Dict[str, Tuple]) -> None:
+        """
+        Add aggregates produced by :meth:`export` (e.g. in a worker process).
+
+        Args:
+            exported: Output of another registry's ``export`` with the same buckets
+        """
+        with self._lock:
+            for stage, (count, errors, total, maximum, blocks, buckets) in exported.items():
+                stats = self._stages.get(stage)
+                if stats is None:
+                    stats = self._stages[stage] = _StageStats(len(self.buckets))
+                stats.count += count
+                stats.errors += errors
+                stats.total_seconds += total
+                stats.net_blocks += blocks
+                stats.max_seconds = max(stats.max_seconds, maximum)
+                stats.bucket_counts = [a + b for a, b in zip(stats.bucket_counts, buckets)]
+
+    def reset(self) -> None:
+        """Drop all recorded measurements."""
+        with self._lock:
+            self._stages.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Render the registry in Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text ending with a newline
+        """
+        name = f'{self.prefix}_stage_duration_seconds'
+        lines: List[str] = [
+            f'# HELP {name} Wall time spent in instrumented pipeline stages.',
+            f'# TYPE {name} histogram',
+        ]
+        with self._lock:
+            stages = sorted(self._stages.items())
+            for stage, stats in stages:
+                label = _escape_label(stage)
+                cumulative = 0
+                for bound, count in zip(self.buckets, stats.bucket_counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{label}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {stats.count}')
+                lines.append(f'{name}_sum{{stage="{label}"}} {stats.total_seconds:.6f}')
+                lines.append(f'{name}_count{{stage="{label}"}} {stats.count}')
+
+            lines.append(f'# HELP {self.prefix}_stage_max_seconds Slowest observed run of each stage.')
+            lines.append(f'# TYPE {self.prefix}_stage_max_seconds gauge')
+            for stage, stats in stages:
+                lines.append(f'{self.prefix}_stage_max_seconds{{stage="{_escape_label(stage)}"}} {stats.max_seconds:.6f}')
+
+            lines.append(f'# HELP {self.prefix}_stage_errors_total Stage runs that raised an exception.')
+            lines.append(f'# TYPE {self.prefix}_stage_errors_total counter')
+            for stage, stats in stages:
+                lines.append(f'{self.prefix}_stage_errors_total{{stage="{_escape_label(stage)}"}} {stats.errors}')
+
+            lines.append(f'# HELP {self.prefix}_stage_net_allocated_blocks '
+                         'Cumulative net change in allocated memory blocks across each stage.')
+            lines.append(f'# TYPE {self.prefix}_stage_net_allocated_blocks gauge')
+            for stage, stats in stages:
+                lines.append(f'{self.prefix}_stage_net_allocated_blocks{{stage="{_escape_label(stage)}"}} {stats.net_blocks}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REGISTRY = MetricsRegistry()
+
+
+class span:
+    """
+    Time a named stage, as a context manager or a decorator.
+
+    Example:
+        with span('analyzer.process_fixtures'):
+            ...
+
+        @span('model.engineer_features')
+        def engineer_features(self, df): ...
+
+    The allocation figure is the change in ``sys.getallocatedblocks()``,
+    which is cheap to read; exact per-allocation tracing (tracemalloc) is
+    left to offline profiling.
+    """
+
+    __slots__ = ('name', 'registry', '_start', '_blocks')
+
+    def __init__(self, name: str, registry: Optional[MetricsRegistry] = None):
+        self.name = name
+        self.registry = registry or REGISTRY
+        self._start = 0.0
+        self._blocks = 0
+
+    def __enter__(self) -> 'span':
+        self._blocks = sys.getallocatedblocks()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self._start
+        self.registry.record(self.name, elapsed, sys.getallocatedblocks() - self._blocks,
+                             error=exc_type is not None)
+        return False
+
+    def __call__(self, fn: Callable) -> Callable:
+        name, registry = self.name, self.registry
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # A fresh span per call keeps the decorator re-entrant and thread-safe
+            with span(name, registry):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """
+    Attach a stderr handler to the ``ai`` logger.
+
+    Args:
+        level: Level name such as 'INFO' or 'DEBUG' (default: the FPL_LOG_LEVEL
+            environment variable; nothing is configured if neither is set)
+    """
+    level = level or os.environ.get('FPL_LOG_LEVEL')
+    if not level:
+        return
+    logger = logging.getLogger('ai')
+    if not any(isinstance(h, logging.StreamHandler) for h in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level.upper())
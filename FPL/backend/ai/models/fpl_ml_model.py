@@ -5,58 +5,106 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 import joblib
-import requests
-from typing import List, Dict, Tuple
+from typing import Any, Iterator, List, Dict, Optional, Sequence, Tuple
+import logging
+import os
 import warnings
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.fpl_analyzer import project_fields
+from ai.analyzers.records import records_frame
+from ai.analyzers.team_strength import AWAY, HOME, TeamStrengthModel
+from ai.instrumentation import span
+from ai.models.hyperparameter_search import HyperparameterSearch, build_regressor
+from ai.predictors.base_predictor import BasePredictor
+from ai.predictors.chip_planner import ChipPlanner, FixtureIndex, upcoming_gameweeks
+from ai.predictors.lineup_optimizer import LineupOptimizer
+from ai.predictors.squad_scorer import SquadScorer
+from ai.predictors.squad_simulator import SquadSimulator
+
 warnings.filterwarnings('ignore')
+logger = logging.getLogger(__name__)
+
+# Player columns carried through feature engineering but not fed to the model
+PASSTHROUGH_COLUMNS = ('id', 'first_name', 'second_name', 'team_name', 'position', 'total_points',
+                       'chance_of_playing_next_round')
 
-class FPLMLModel:
-    def __init__(self):
-        self.base_url = 'https://fantasy.premierleague.com/api/'
+class FPLMLModel(BasePredictor):
+    def __init__(self, data_fetcher: Optional[FPLDataFetcher] = None, base_url: Optional[str] = None,
+                 team_strength: Optional[TeamStrengthModel] = None):
+        super().__init__()
+        # Bootstrap and fixtures come through the fetcher's cache, so repeated
+        # calls within its cache window do not hit the FPL API again
+        self.data_fetcher = data_fetcher or FPLDataFetcher(base_url=base_url)
+        # Predictions for the current bootstrap version, patched from snapshot diffs
+        self._prediction_cache: Optional[Dict[str, Any]] = None
+        self.data_fetcher.subscribe(self._apply_snapshot_diff)
+        self.simulator = SquadSimulator()
+        self.lineup_optimizer = LineupOptimizer()
+        self.chip_planner = ChipPlanner()
+        # Fixture difficulty learned from results, replacing FPL's static ratings;
+        # pass the analyzer's model to share one fit
+        self.team_strength = team_strength or TeamStrengthModel()
+        # Prediction vectors indexed by player id, for batch squad scoring
+        self._scorer_cache: Optional[Dict[str, Any]] = None
         self.model = None
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.feature_columns = []
+        # 'bootstrap' (season aggregates, served) or 'gameweek' (lagged stored table, offline)
+        self.feature_set = 'bootstrap'
         self.target_column = 'total_points'
+        self.gameweek_column = 'gameweek'
+        self.model_params = {'n_estimators': 100, 'max_depth': 6, 'learning_rate': 0.1}
+        self.n_jobs = -1
         self.is_trained = False
         
+    @span('model.fetch_player_data')
     def fetch_player_data(self) -> pd.DataFrame:
         """Fetch current player data from FPL API"""
         try:
             # Get bootstrap data
-            response = requests.get(f'{self.base_url}bootstrap-static/')
-            response.raise_for_status()
-            data = response.json()
-            
-            # Extract players, teams, and positions
-            players = data['elements']
-            teams = {team['id']: team['name'] for team in data['teams']}
-            positions = {pos['id']: pos['singular_name_short'] for pos in data['element_types']}
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(players)
-            
-            # Add team and position names
-            df['team_name'] = df['team'].map(teams)
-            df['position'] = df['element_type'].map(positions)
-            
-            # Convert price to float (in millions)
-            df['price'] = df['now_cost'] / 10.0
-            
-            return df
+            data = self.data_fetcher.get_bootstrap_data()
+            if not data:
+                raise ValueError('No bootstrap data available')
+            return self._players_frame(data)
             
         except Exception as e:
-            print(f"Error fetching data: {e}")
+            logger.error("Error fetching data: %s", e)
             return pd.DataFrame()
     
-    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Engineer features for ML model"""
+    @staticmethod
+    def _players_frame(bootstrap: Any, players: Optional[List[Any]] = None) -> pd.DataFrame:
+        """Player rows with team name, position and price (default: every element)."""
+        teams = {team['id']: team['name'] for team in bootstrap['teams']}
+        positions = {pos['id']: pos['singular_name_short'] for pos in bootstrap['element_types']}
+        
+        # Convert to DataFrame
+        df = records_frame(bootstrap['elements'] if players is None else players)
+        if df.empty:
+            return df
+        
+        # Add team and position names
+        df['team_name'] = df['team'].map(teams)
+        df['position'] = df['element_type'].map(positions)
+        
+        # Convert price to float (in millions)
+        df['price'] = df['now_cost'] / 10.0
+        
+        return df
+
+    @span('model.engineer_features')
+    def engineer_features(self, df: pd.DataFrame, fit_encoders: bool = True) -> pd.DataFrame:
+        """Engineer features for ML model.
+
+        With ``fit_encoders=False`` the existing label encoders are reused, which
+        keeps encodings stable when only a subset of players is re-engineered.
+        """
         try:
             # Create feature DataFrame
             features = df.copy()
             
-            print(f"🔍 Starting feature engineering with {len(features)} players")
-            print(f"📊 Available columns: {list(features.columns)}")
+            logger.debug("Starting feature engineering with %d players", len(features))
             
             # Basic numerical features
             numerical_features = [
@@ -68,130 +116,89 @@ class FPLMLModel:
             
             # Filter to available columns
             available_features = [col for col in numerical_features if col in features.columns]
-            print(f"🎯 Using numerical features: {available_features}")
+            logger.debug("Using numerical features: %s", available_features)
             
-            # Keep all necessary columns for later use
-            features = features[available_features + ['id', 'first_name', 'second_name', 'team_name', 'position', 'total_points']]
+            # Keep all necessary columns for later use (availability is passed
+            # through for lineup selection, not used as a feature)
+            if 'chance_of_playing_next_round' not in features.columns:
+                features['chance_of_playing_next_round'] = None
+            features = features[available_features + list(PASSTHROUGH_COLUMNS)]
             
             # Convert numerical columns to float and handle missing values
             for col in available_features:
-                if col in features.columns:
-                    print(f"🔄 Converting {col} to numeric...")
-                    # Convert to numeric, coercing errors to NaN
-                    features[col] = pd.to_numeric(features[col], errors='coerce')
-                    # Fill NaN with 0
-                    features[col] = features[col].fillna(0)
-                    print(f"✅ {col}: {features[col].dtype}, range: {features[col].min():.2f} to {features[col].max():.2f}")
+                # Convert to numeric, coercing errors to NaN, then fill NaN with 0
+                features[col] = pd.to_numeric(features[col], errors='coerce').fillna(0)
             
             # Handle missing values for target column
-            print("🔄 Converting total_points to numeric...")
             features['total_points'] = pd.to_numeric(features['total_points'], errors='coerce').fillna(0)
-            print(f"✅ total_points: {features['total_points'].dtype}, range: {features['total_points'].min():.2f} to {features['total_points'].max():.2f}")
             
             # Encode categorical variables
             if 'team_name' in features.columns:
-                print("🔄 Encoding team names...")
-                le_team = LabelEncoder()
-                features['team_encoded'] = le_team.fit_transform(features['team_name'].astype(str))
-                self.label_encoders['team'] = le_team
-                print(f"✅ Encoded {len(le_team.classes_)} teams")
+                if fit_encoders:
+                    self.label_encoders['team'] = LabelEncoder().fit(features['team_name'].astype(str))
+                features['team_encoded'] = self.label_encoders['team'].transform(features['team_name'].astype(str))
                 
             if 'position' in features.columns:
-                print("🔄 Encoding positions...")
-                le_pos = LabelEncoder()
-                features['position_encoded'] = le_pos.fit_transform(features['position'].astype(str))
-                self.label_encoders['position'] = le_pos
-                print(f"✅ Encoded {len(le_pos.classes_)} positions")
+                if fit_encoders:
+                    self.label_encoders['position'] = LabelEncoder().fit(features['position'].astype(str))
+                features['position_encoded'] = self.label_encoders['position'].transform(features['position'].astype(str))
             
             # Create interaction features (ensure they're numeric)
             if 'form' in features.columns and 'points_per_game' in features.columns:
-                print("🔄 Creating form_ppg_ratio...")
                 features['form_ppg_ratio'] = features['form'] / (features['points_per_game'] + 0.1)
-                print(f"✅ form_ppg_ratio: {features['form_ppg_ratio'].dtype}, range: {features['form_ppg_ratio'].min():.2f} to {features['form_ppg_ratio'].max():.2f}")
             
             if 'goals_scored' in features.columns and 'assists' in features.columns:
-                print("🔄 Creating goal_involvements...")
                 features['goal_involvements'] = features['goals_scored'] + features['assists']
-                print(f"✅ goal_involvements: {features['goal_involvements'].dtype}, range: {features['goal_involvements'].min():.2f} to {features['goal_involvements'].max():.2f}")
             
             # Select final feature columns (for ML training)
-            feature_cols = [col for col in features.columns if col not in ['id', 'first_name', 'second_name', 'team_name', 'position', 'total_points']]
+            feature_cols = [col for col in features.columns if col not in PASSTHROUGH_COLUMNS]
             self.feature_columns = feature_cols
+            if fit_encoders:
+                self.feature_set = 'bootstrap'
             
-            print(f"🎯 Final feature columns: {feature_cols}")
-            print(f"📊 Feature matrix shape: {features[feature_cols].shape}")
-            print(f"🎯 Target shape: {features['total_points'].shape}")
+            logger.debug("Feature matrix shape: %s", features[feature_cols].shape)
             
             return features  # Return full DataFrame with all columns
             
         except Exception as e:
-            print(f"❌ Error in feature engineering: {e}")
-            print(f"🔍 DataFrame info:")
-            print(f"   Shape: {df.shape}")
-            print(f"   Columns: {list(df.columns)}")
-            print(f"   Dtypes: {df.dtypes}")
+            logger.error("Error in feature engineering: %s (input shape %s, columns %s)",
+                         e, df.shape, list(df.columns))
             raise e
     
+    @span('model.train_model')
     def train_model(self, df: pd.DataFrame) -> Dict:
         """Train XGBoost model on player data"""
         try:
-            print(f"🚀 Starting model training...")
-            print(f"📊 Input DataFrame shape: {df.shape}")
-            print(f"🎯 Target column: {self.target_column}")
-            print(f"🔧 Feature columns: {self.feature_columns}")
+            logger.info("Starting model training on %s rows", df.shape)
             
             # Prepare features and target
             X = df[self.feature_columns]
             y = df[self.target_column]
             
-            print(f"📈 Features shape: {X.shape}")
-            print(f"🎯 Target shape: {y.shape}")
-            print(f"🔍 Feature dtypes: {X.dtypes}")
-            print(f"🎯 Target dtype: {y.dtype}")
-            
             # Check for any remaining non-numeric data
             for col in X.columns:
                 if not pd.api.types.is_numeric_dtype(X[col]):
-                    print(f"⚠️ Warning: Column {col} is not numeric: {X[col].dtype}")
-                    print(f"   Sample values: {X[col].head()}")
+                    logger.warning("Column %s is not numeric: %s", col, X[col].dtype)
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            print(f"✂️ Split complete - Train: {X_train.shape}, Test: {X_test.shape}")
             
             # Scale features
-            print("⚖️ Scaling features...")
             X_train_scaled = self.scaler.fit_transform(X_train)
             X_test_scaled = self.scaler.transform(X_test)
-            print(f"✅ Features scaled successfully")
             
             # Initialize and train XGBoost model
-            print("🤖 Initializing XGBoost model...")
-            self.model = xgb.XGBRegressor(
-                n_estimators=100,
-                max_depth=6,
-                learning_rate=0.1,
-                random_state=42,
-                objective='reg:squarederror'
-            )
-            
-            print("🏋️ Training XGBoost model...")
+            self.model = build_regressor(self.model_params, n_jobs=self.n_jobs)
             self.model.fit(X_train_scaled, y_train)
-            print("✅ Model training complete!")
             
             # Make predictions
-            print("🔮 Making predictions...")
             y_pred = self.model.predict(X_test_scaled)
-            print(f"✅ Predictions complete: {len(y_pred)} predictions")
             
             # Calculate metrics
             mse = mean_squared_error(y_test, y_pred)
             mae = mean_absolute_error(y_test, y_pred)
             
-            print(f"📊 Training metrics:")
-            print(f"   MSE: {mse:.2f}")
-            print(f"   MAE: {mae:.2f}")
-            print(f"   RMSE: {np.sqrt(mse):.2f}")
+            logger.info("Training metrics: MSE %.2f, MAE %.2f, RMSE %.2f", mse, mae, np.sqrt(mse))
             
             self.is_trained = True
             
@@ -204,18 +211,148 @@ class FPLMLModel:
             }
             
         except Exception as e:
-            print(f"❌ Error in model training: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in model training: %s", e)
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    @span('model.search_hyperparameters')
+    def search_hyperparameters(self, df: pd.DataFrame, param_grid: Optional[Dict[str, List[Any]]] = None,
+                               n_splits: int = 4, n_workers: Optional[int] = None, n_jobs: int = 1,
+                               time_budget: Optional[float] = None,
+                               leaderboard_path: Optional[str] = None) -> Dict:
+        """Cross-validate configurations by gameweek in a process pool, then refit the best one.
+
+        Rows are grouped by ``self.gameweek_column`` within their 'season' when
+        the frame spans several; data without a gameweek column (season
+        aggregates) falls back to contiguous row blocks in their given order.
+        """
+        try:
+            X = df[self.feature_columns].to_numpy(dtype=np.float32)
+            y = df[self.target_column].to_numpy(dtype=np.float32)
+            if self.gameweek_column in df.columns:
+                gameweeks = df[self.gameweek_column].to_numpy()
+            else:
+                logger.warning("No '%s' column, using row order for CV folds", self.gameweek_column)
+                gameweeks = np.arange(len(df)) * (n_splits + 1) // max(len(df), 1)
+
+            search = HyperparameterSearch(param_grid, n_splits=n_splits, n_workers=n_workers,
+                                          n_jobs=n_jobs, time_budget=time_budget)
+            seasons = df['season'].to_numpy() if 'season' in df.columns else None
+            results = search.run(X, y, gameweeks, seasons)
+            if not results:
+                return {'success': False, 'error': 'No configuration finished within the time budget'}
+
+            if leaderboard_path:
+                search.write_leaderboard(leaderboard_path)
+
+            best = results[0]
+            logger.info("Best config: %s | CV RMSE %.3f | fit %.2fs", best['params'], best['rmse'], best['fit_seconds'])
+
+            # Refit the winner on all rows with the boosting rounds early stopping chose
+            self.model_params = dict(best['params'], n_estimators=max(1, best['n_estimators']))
+            self.n_jobs = n_jobs
+            X_scaled = self.scaler.fit_transform(df[self.feature_columns])
+            self.model = build_regressor(self.model_params, n_jobs=n_jobs)
+            self.model.fit(X_scaled, y)
+            self.is_trained = True
+
+            return {
+                'success': True,
+                'best_params': self.model_params,
+                'cv_rmse': best['rmse'],
+                'cv_mae': best['mae'],
+                'leaderboard': search.leaderboard().to_dict(orient='records'),
+                'feature_importance': dict(zip(self.feature_columns, self.model.feature_importances_))
+            }
+
+        except Exception as e:
+            logger.exception("Error in hyperparameter search: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    def train_on_gameweek_dataset(self, builder, search: bool = False, **search_kwargs) -> Dict:
+        """Train on the stored player x gameweek table instead of season aggregates.
+
+        ``builder`` is a GameweekDatasetBuilder; its partitions are read through
+        memory-mapped Arrow files. With ``search=True`` the configuration is
+        chosen by search_hyperparameters (extra kwargs are passed through).
+
+        The result is an offline model: its features are the table's lag
+        features, not the bootstrap columns the served routes engineer, so it
+        predicts through :meth:`predict_gameweek` only. A file saved from it
+        is refused by the server's workers.
+        """
+        frame = builder.training_frame()
+        if frame.empty:
+            return {'success': False, 'error': 'No stored gameweek data to train on'}
+
+        self.feature_set = 'gameweek'
+        self.feature_columns = list(builder.FEATURE_COLUMNS)
+        self.target_column = 'total_points'
+        if search:
+            return self.search_hyperparameters(frame, **search_kwargs)
+        return self.train_model(frame)
+
+    def predict_gameweek(self, builder, gameweek: int) -> pd.DataFrame:
+        """
+        Predict an upcoming gameweek with a model from :meth:`train_on_gameweek_dataset`.
+
+        Args:
+            builder: GameweekDatasetBuilder holding the stored history
+            gameweek: Upcoming gameweek number
+
+        Returns:
+            pd.DataFrame: 'player_id' and 'predicted_points', best first
+
+        Raises:
+            ValueError: The model was not trained on the gameweek table
+        """
+        if self.model is None or self.feature_set != 'gameweek':
+            raise ValueError("predict_gameweek needs a model from train_on_gameweek_dataset()")
+        frame = builder.inference_frame(gameweek)
+        if frame.empty:
+            return pd.DataFrame(columns=['player_id', 'predicted_points'])
+        predictions = self.model.predict(self.scaler.transform(frame[self.feature_columns]))
+        result = pd.DataFrame({'player_id': frame['player_id'], 'predicted_points': predictions})
+        return result.sort_values(['predicted_points', 'player_id'], ascending=[False, True],
+                                  kind='stable').reset_index(drop=True)
+
+    def _require_bootstrap_features(self) -> None:
+        if self.feature_set != 'bootstrap':
+            raise ValueError("Model was trained on the gameweek table; use predict_gameweek()")
+
+    def train(self, data: pd.DataFrame) -> bool:
+        """Train on raw bootstrap player rows (BasePredictor interface)"""
+        if not all(col in data.columns for col in self.feature_columns) or not self.feature_columns:
+            data = self.engineer_features(data)
+        return bool(self.train_model(data).get('success'))
+
+    def predict(self, data: pd.DataFrame) -> List[float]:
+        """Predict points for engineered rows, or raw bootstrap player rows as train() accepts"""
+        if self.model is None:
+            raise Exception("Model not trained. Call train_model() first.")
+        self._require_bootstrap_features()
+        if not all(col in data.columns for col in self.feature_columns):
+            # Reuse the fitted encoders and keep the trained feature list
+            feature_columns = self.feature_columns
+            data = self.engineer_features(data, fit_encoders=False)
+            self.feature_columns = feature_columns
+        X_scaled = self.scaler.transform(data[self.feature_columns])
+        return self.model.predict(X_scaled).tolist()
+
+    def get_feature_importance(self) -> Dict[str, float]:
+        """Get XGBoost feature importance keyed by feature name"""
+        if self.model is None:
+            return {}
+        return {col: float(score) for col, score in zip(self.feature_columns, self.model.feature_importances_)}
+
+    @span('model.predict_player_points')
     def predict_player_points(self, df: pd.DataFrame) -> pd.DataFrame:
         """Predict points for all players"""
         if self.model is None:
             raise Exception("Model not trained. Call train_model() first.")
+        self._require_bootstrap_features()
         
         # Prepare features for prediction
         X = df[self.feature_columns]
@@ -230,9 +367,18 @@ class FPLMLModel:
         
         return result_df
     
+    @span('model.get_all_players_with_predictions')
     def get_all_players_with_predictions(self) -> List[Dict]:
         """Get all players with ML predictions"""
         try:
+            # Predictions only change with the bootstrap snapshot or the model
+            bootstrap = self.data_fetcher.get_bootstrap_data()
+            version = self.data_fetcher.get_snapshot_version('bootstrap')
+            cached = self._prediction_cache
+            if (bootstrap and cached is not None and cached['version'] == version
+                    and cached['model'] is self.model):
+                return list(cached['players'])
+
             # Fetch data
             df = self.fetch_player_data()
             if df.empty:
@@ -244,92 +390,153 @@ class FPLMLModel:
             # Get predictions
             predictions_df = self.predict_player_points(features_df)
             
-            # Convert to list of dictionaries
-            players = []
-            for _, player in predictions_df.iterrows():
-                players.append({
-                    'id': int(player['id']),
-                    'name': f"{player['first_name']} {player['second_name']}",
-                    'team': player['team_name'],
-                    'position': player['position'],
-                    'price': float(player['price']),
-                    'predicted_points': float(player['predicted_points']),
-                    'actual_points': int(player['total_points']),
-                    'form': float(player['form']),
-                    'points_per_game': float(player['points_per_game']),
-                    'selected_by_percent': float(player['selected_by_percent']),
-                    'minutes': int(player['minutes']),
-                    'goals_scored': int(player['goals_scored']),
-                    'assists': int(player['assists']),
-                    'clean_sheets': int(player['clean_sheets'])
-                })
-            
-            # Sort by predicted points
-            players.sort(key=lambda x: x['predicted_points'], reverse=True)
+            # Ties break on player id so a patched list orders like a full recompute
+            predictions_df = predictions_df.sort_values(['predicted_points', 'id'], ascending=[False, True],
+                                                        kind='stable')
+            players = self._prediction_records(predictions_df)
             
-            return players
+            self._prediction_cache = {
+                'version': version,
+                'model': self.model,
+                'players': players,
+                'by_id': {p['id']: p for p in players},
+            }
+            return list(players)
             
         except Exception as e:
-            print(f"Error getting players with predictions: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting players with predictions: %s", e)
             return []
+
+    @staticmethod
+    def _prediction_records(predictions_df: pd.DataFrame) -> List[Dict]:
+        """Convert prediction rows to the API's player dicts."""
+        # Convert column-wise: one tolist() per column yields Python scalars
+        # directly, instead of casting every value of every row
+        columns = {
+                'id': predictions_df['id'].astype(int),
+                'name': predictions_df['first_name'].astype(str) + ' ' + predictions_df['second_name'].astype(str),
+                'team': predictions_df['team_name'],
+                'position': predictions_df['position'],
+                'price': predictions_df['price'].astype(float),
+                'predicted_points': predictions_df['predicted_points'].astype(float),
+                'actual_points': predictions_df['total_points'].astype(int),
+                'form': predictions_df['form'].astype(float),
+                'points_per_game': predictions_df['points_per_game'].astype(float),
+                'selected_by_percent': predictions_df['selected_by_percent'].astype(float),
+                'minutes': predictions_df['minutes'].astype(int),
+                'goals_scored': predictions_df['goals_scored'].astype(int),
+                'assists': predictions_df['assists'].astype(int),
+                'clean_sheets': predictions_df['clean_sheets'].astype(int),
+                # None when the player has no flag, as in the FPL API
+                'chance_of_playing_next_round': predictions_df['chance_of_playing_next_round'].astype(object).where(
+                    predictions_df['chance_of_playing_next_round'].notna(), None),
+            }
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*(col.tolist() for col in columns.values()))]
+
+    def _apply_snapshot_diff(self, diff, bootstrap: Any) -> None:
+        """
+        Patch cached predictions with a bootstrap diff.
+
+        Only added and changed players are re-engineered and re-predicted;
+        removed players are dropped. Team or position changes, a missed
+        version, or a diff touching most of the league clear the cache so the
+        next call recomputes everything.
+        """
+        cached = self._prediction_cache
+        if diff.kind != 'bootstrap' or cached is None:
+            return
+        touched = diff.touched_ids
+        if (diff.structural or cached['version'] != diff.previous_version
+                or cached['model'] is not self.model or len(touched) > len(cached['by_id']) // 2):
+            self._prediction_cache = None
+            return
+
+        with span('model.apply_snapshot_diff'):
+            try:
+                by_id = cached['by_id']
+                for player_id in diff.removed:
+                    by_id.pop(player_id, None)
+                if touched:
+                    frame = self._players_frame(bootstrap, [diff.records[i] for i in touched])
+                    features = self.engineer_features(frame, fit_encoders=False)
+                    for player in self._prediction_records(self.predict_player_points(features)):
+                        by_id[player['id']] = player
+            except Exception as e:
+                # e.g. a team name the encoders have not seen: fall back to a full recompute
+                logger.debug("Incremental prediction update failed, dropping cache: %s", e)
+                self._prediction_cache = None
+                return
+
+            # Re-sorting the cached list is the only step that touches every player
+            cached['players'] = sorted(by_id.values(), key=lambda p: (-p['predicted_points'], p['id']))
+            cached['version'] = diff.version
     
-    def auto_train(self) -> bool:
-        """Automatically train the model with current data"""
+    def iter_players_with_predictions(self, fields: Optional[Sequence[str]] = None) -> Iterator[Dict]:
+        """
+        Yield players with predictions, highest predicted points first.
+
+        Prediction itself is one batched call, but records are projected and
+        handed out one at a time so callers can stream them.
+
+        Args:
+            fields: Keys to keep in each record (default: all)
+
+        Yields:
+            Dict: One player with its prediction
+        """
+        for player in self.get_all_players_with_predictions():
+            yield project_fields(player, fields) if fields else player
+
+    def auto_train(self, filepath: str = 'fpl_xgboost_model.pkl') -> bool:
+        """Automatically train the model with current data and save it to ``filepath``"""
         try:
-            print("🤖 Starting automatic ML model training...")
+            logger.info("Starting automatic ML model training")
             
             # Fetch data
-            print("📡 Fetching player data from FPL API...")
             df = self.fetch_player_data()
             if df.empty:
-                print("❌ No data available for training")
+                logger.error("No data available for training")
                 return False
             
-            print(f"✅ Fetched {len(df)} players from FPL API")
-            print(f"📊 Data columns: {list(df.columns)}")
+            logger.info("Fetched %d players from FPL API", len(df))
             
             # Engineer features
-            print("🔧 Engineering features...")
             features_df = self.engineer_features(df)
-            print(f"✅ Feature engineering complete: {features_df.shape}")
             
             # Train model
-            print("🏋️ Starting model training...")
             result = self.train_model(features_df)
             
             if result['success']:
-                print(f"✅ Model trained successfully! RMSE: {result['rmse']:.2f}")
-                # Save model
-                print("💾 Saving trained model...")
-                self.save_model()
-                print("✅ Model saved successfully!")
+                logger.info("Model trained successfully, RMSE %.2f", result['rmse'])
+                self.save_model(filepath)
                 return True
             else:
-                print(f"❌ Training failed: {result.get('error', 'Unknown error')}")
+                logger.error("Training failed: %s", result.get('error', 'Unknown error'))
                 return False
                 
         except Exception as e:
-            print(f"❌ Auto-training error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Auto-training error: %s", e)
             return False
     
-    def save_model(self, filepath: str = 'fpl_xgboost_model.pkl'):
-        """Save the trained model"""
+    def save_model(self, filepath: str = 'fpl_xgboost_model.pkl') -> bool:
+        """Save the trained model (written to a temporary file and swapped in, so readers never see a partial file)"""
         if self.model is not None:
             model_data = {
                 'model': self.model,
                 'scaler': self.scaler,
                 'label_encoders': self.label_encoders,
-                'feature_columns': self.feature_columns
+                'feature_columns': self.feature_columns,
+                'feature_set': self.feature_set,
+                'model_params': self.model_params
             }
-            joblib.dump(model_data, filepath)
+            temp_path = f'{filepath}.{os.getpid()}.tmp'
+            joblib.dump(model_data, temp_path)
+            os.replace(temp_path, filepath)
             return True
         return False
     
-    def load_model(self, filepath: str = 'fpl_xgboost_model.pkl'):
+    def load_model(self, filepath: str = 'fpl_xgboost_model.pkl') -> bool:
         """Load a trained model"""
         try:
             model_data = joblib.load(filepath)
@@ -337,18 +544,19 @@ class FPLMLModel:
             self.scaler = model_data['scaler']
             self.label_encoders = model_data['label_encoders']
             self.feature_columns = model_data['feature_columns']
+            self.feature_set = model_data.get('feature_set', 'bootstrap')
+            self.model_params = model_data.get('model_params', self.model_params)
             self.is_trained = True
             return True
         except:
             return False
 
+    @span('model.compute_team_fixture_difficulty')
     def _compute_team_fixture_difficulty(self, window_size: int = 5) -> Dict[str, float]:
         """Compute average upcoming fixture difficulty per team over next N gameweeks."""
         try:
-            # Fetch bootstrap for events and teams
-            bootstrap_resp = requests.get(f"{self.base_url}bootstrap-static/")
-            bootstrap_resp.raise_for_status()
-            bootstrap = bootstrap_resp.json()
+            # Bootstrap for events and teams
+            bootstrap = self.data_fetcher.get_bootstrap_data()
 
             # Map team id to team name
             team_id_to_name = {team['id']: team['name'] for team in bootstrap.get('teams', [])}
@@ -365,10 +573,8 @@ class FPLMLModel:
                         current_event = ev.get('id')
                         break
 
-            # Fetch fixtures
-            fixtures_resp = requests.get(f"{self.base_url}fixtures/")
-            fixtures_resp.raise_for_status()
-            fixtures = fixtures_resp.json()
+            # Fixtures
+            fixtures = self.data_fetcher.get_fixtures_data()
 
             # Fallback if current_event not found
             if current_event is None:
@@ -379,7 +585,8 @@ class FPLMLModel:
             start_event = int(current_event)
             end_event = start_event + max(0, int(window_size) - 1)
 
-            # Collect difficulties per team id
+            # Collect learned difficulties per team id
+            difficulty = self._team_difficulty(bootstrap, fixtures)
             team_diffs: Dict[int, list] = {}
             for fx in fixtures:
                 ev = fx.get('event')
@@ -387,12 +594,10 @@ class FPLMLModel:
                     continue
                 home_id = fx.get('team_h')
                 away_id = fx.get('team_a')
-                home_diff = fx.get('team_h_difficulty')
-                away_diff = fx.get('team_a_difficulty')
-                if home_id:
-                    team_diffs.setdefault(home_id, []).append(home_diff)
-                if away_id:
-                    team_diffs.setdefault(away_id, []).append(away_diff)
+                if not home_id or not away_id or max(home_id, away_id) >= len(difficulty):
+                    continue
+                team_diffs.setdefault(home_id, []).append(float(difficulty[home_id, away_id, HOME]))
+                team_diffs.setdefault(away_id, []).append(float(difficulty[away_id, home_id, AWAY]))
 
             # Average and map to names
             team_avg: Dict[str, float] = {}
@@ -406,12 +611,22 @@ class FPLMLModel:
 
             return team_avg
         except Exception as e:
-            print(f"⚠️ Failed to compute fixture difficulty: {e}")
+            logger.warning("Failed to compute fixture difficulty: %s", e)
             return {}
 
+    def _team_difficulty(self, bootstrap: Any = None, fixtures: Optional[List[Any]] = None) -> np.ndarray:
+        """Learned (team id, opponent id, venue) difficulty matrix, after applying any new results."""
+        if bootstrap is None:
+            bootstrap = self.data_fetcher.get_bootstrap_data()
+        if fixtures is None:
+            fixtures = self.data_fetcher.get_fixtures_data()
+        self.team_strength.set_teams(bootstrap.get('teams', []))
+        self.team_strength.update(fixtures)
+        return self.team_strength.difficulty_matrix()
+
     @staticmethod
     def _compute_fixture_factor(avg_difficulty: float, weight: float) -> float:
-        """Convert average difficulty (1 easy .. 5 hard) to a multiplier.
+        """Convert average learned difficulty (1 easy .. 5 hard) to a multiplier.
         Factor is centered at 1.0 for difficulty=3, scaled by weight, and clamped to [0.8, 1.2].
         """
         try:
@@ -423,34 +638,169 @@ class FPLMLModel:
         except Exception:
             return 1.0
 
-    def create_best_team(self, budget: float = 100.0, fixture_window: int = 5, fixture_weight: float = 0.15) -> Dict:
-        """Create the best possible FPL team with 15 players"""
+    @span('model.fixture_adjusted_players')
+    def get_fixture_adjusted_players(self, fixture_window: int = 5, fixture_weight: float = 0.15) -> List[Dict]:
+        """
+        Players with predictions scaled by their upcoming fixture difficulty.
+
+        This is the shared input of every team-building strategy: predictions
+        and fixture factors are computed once and each strategy only sorts and
+        selects over the result.
+
+        Args:
+            fixture_window: Number of upcoming gameweeks to average difficulty over
+            fixture_weight: Strength of the fixture adjustment
+
+        Returns:
+            List[Dict]: Player dicts with ``predicted_points`` fixture-adjusted and
+            the unadjusted value in ``raw_predicted_points``
+        """
+        players = self.get_all_players_with_predictions()
+        if not players:
+            return []
+
+        team_fixture_avg = self._compute_team_fixture_difficulty(window_size=fixture_window)
+        # One factor per team rather than per player
+        team_factors = {team: self._compute_fixture_factor(avg, fixture_weight)
+                        for team, avg in team_fixture_avg.items()}
+
+        enriched_players = []
+        for p in players:
+            avg_diff = team_fixture_avg.get(p['team'])
+            fx_factor = team_factors.get(p['team'], 1.0)
+            enriched = dict(p)
+            enriched['fixture_avg_difficulty'] = float(avg_diff) if avg_diff is not None else None
+            enriched['fixture_factor'] = float(fx_factor)
+            enriched['raw_predicted_points'] = float(p['predicted_points'])
+            enriched['predicted_points'] = float(p['predicted_points'] * fx_factor)
+            enriched_players.append(enriched)
+        return enriched_players
+
+    def squad_scorer(self, fixture_window: int = 5, fixture_weight: float = 0.15,
+                     gameweeks: Optional[int] = None) -> Optional[SquadScorer]:
+        """
+        Scorer over prediction vectors indexed by FPL player id.
+
+        Built once per snapshot, model and parameters. With ``gameweeks`` the
+        fixture-adjusted predictions are the players x gameweeks matrix of the
+        next ``gameweeks`` gameweeks (blank and double gameweeks included)
+        instead of the ``fixture_window`` average.
+
+        Returns:
+            Optional[SquadScorer]: None when no predictions are available
+        """
+        key = (self.data_fetcher.get_snapshot_version('bootstrap'),
+               self.data_fetcher.get_snapshot_version('fixtures'), id(self.model),
+               fixture_window, fixture_weight, gameweeks)
+        cached = self._scorer_cache
+        if cached is not None and cached['key'] == key:
+            return cached['scorer']
+
+        players = self.get_all_players_with_predictions()
+        if not players:
+            return None
+        ids = np.array([p['id'] for p in players], dtype=np.intp)
+        # Unknown ids stay NaN, which marks squads containing them invalid
+        expected = np.full(int(ids.max()) + 1, np.nan)
+        expected[ids] = [p['predicted_points'] for p in players]
+        if gameweeks:
+            bootstrap = self.data_fetcher.get_bootstrap_data()
+            fixtures = self.data_fetcher.get_fixtures_data()
+            teams = {team['id']: team['name'] for team in bootstrap['teams']}
+            index = FixtureIndex(fixtures, list(teams),
+                                 upcoming_gameweeks(bootstrap.get('events', []), fixtures)[:gameweeks],
+                                 self._team_difficulty(bootstrap, fixtures))
+            matrix = ChipPlanner.prediction_matrix(players, index, fixture_weight,
+                                                   {name: team_id for team_id, name in teams.items()})
+            adjusted = np.zeros((len(expected), matrix.shape[1]))
+            adjusted[ids] = matrix
+        else:
+            # Players the fixture pass skips keep their unadjusted prediction
+            adjusted = expected.copy()
+            enriched = self.get_fixture_adjusted_players(fixture_window, fixture_weight)
+            adjusted[[p['id'] for p in enriched]] = [p['predicted_points'] for p in enriched]
+
+        scorer = SquadScorer(expected, adjusted)
+        self._scorer_cache = {'key': key, 'scorer': scorer}
+        return scorer
+
+    @span('model.score_squads')
+    def score_squads(self, squads: np.ndarray, fixture_window: int = 5, fixture_weight: float = 0.15,
+                     gameweeks: Optional[int] = None) -> Dict:
+        """
+        Score a batch of squads (see :class:`SquadScorer`).
+
+        Args:
+            squads: (N, 16) int32 FPL player ids in pick order, captain last
+            fixture_window: Gameweeks averaged for the fixture adjustment
+            fixture_weight: Strength of the fixture adjustment
+            gameweeks: Score per gameweek over this many upcoming gameweeks instead
+
+        Returns:
+            Dict: Success flag and per-squad arrays (see :meth:`SquadScorer.score`)
+        """
+        try:
+            scorer = self.squad_scorer(fixture_window, fixture_weight, gameweeks)
+            if scorer is None:
+                return {'success': False, 'error': 'No players available'}
+            result = scorer.score(squads)
+            return dict(result, success=True, squads=len(squads), invalid=int((~result['valid']).sum()))
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
+    @span('model.plan_chips')
+    def plan_chips(self, squad_ids: Optional[Sequence[int]] = None, budget: Optional[float] = None,
+                   horizon: int = 5, fixture_weight: float = 0.15) -> Dict:
+        """
+        Rank Wildcard, Free Hit, Bench Boost and Triple Captain timing (see :class:`ChipPlanner`).
+
+        Args:
+            squad_ids: The held squad's 15 player ids (default: the best squad now)
+            budget: Budget in millions for Wildcard and Free Hit squads
+            horizon: Gameweeks a Wildcard squad is built for
+            fixture_weight: Strength of the fixture difficulty adjustment
+
+        Returns:
+            Dict: Chip options per gameweek, blank and double gameweeks, and the plan
+        """
         try:
-            print(f"🏆 Creating best FPL team with £{budget}M budget...")
-            print(f"📅 Fixture window: next {fixture_window} GWs | 🎚️ Fixture weight: {fixture_weight}")
-            
-            # Get all players with predictions
             players = self.get_all_players_with_predictions()
             if not players:
                 return {'success': False, 'error': 'No players available'}
-            
-            print(f"📊 Analyzing {len(players)} players for team selection...")
+            bootstrap = self.data_fetcher.get_bootstrap_data()
+            fixtures = self.data_fetcher.get_fixtures_data()
+            # Memoized squads stay valid until the snapshots or the model change
+            key = (self.data_fetcher.get_snapshot_version('bootstrap'),
+                   self.data_fetcher.get_snapshot_version('fixtures'), id(self.model), fixture_weight)
+            return self.chip_planner.plan(players, bootstrap, fixtures, squad_ids, budget,
+                                          fixture_weight, horizon, key=key,
+                                          difficulty=self._team_difficulty(bootstrap, fixtures))
+        except Exception as e:
+            logger.exception("Error planning chips: %s", e)
+            return {'success': False, 'error': str(e)}
+
+    @span('model.create_best_team')
+    def create_best_team(self, budget: float = 100.0, fixture_window: int = 5, fixture_weight: float = 0.15,
+                         enriched_players: Optional[List[Dict]] = None, simulate: bool = False,
+                         threshold: Optional[float] = None, lineup: bool = True) -> Dict:
+        """Create the best possible FPL team with 15 players.
 
-            # Compute team fixture difficulties and factors
-            team_fixture_avg = self._compute_team_fixture_difficulty(window_size=fixture_window)
+        ``enriched_players`` (from :meth:`get_fixture_adjusted_players`) skips
+        recomputing predictions and fixture factors when building several teams.
+        With ``simulate`` the stats include a Monte Carlo points distribution
+        (see :class:`SquadSimulator`), with the chance of beating ``threshold``.
+        With ``lineup`` the result includes the starting XI, captaincy and
+        bench order (see :class:`LineupOptimizer`).
+        """
+        try:
+            logger.info("Creating best FPL team with £%sM budget (fixture window %s, weight %s)",
+                        budget, fixture_window, fixture_weight)
             
-            # Attach fixture-adjusted predictions to each player
-            enriched_players = []
-            for p in players:
-                avg_diff = team_fixture_avg.get(p['team'])
-                fx_factor = self._compute_fixture_factor(avg_diff, fixture_weight)
-                adjusted_pts = p['predicted_points'] * fx_factor
-                enriched = dict(p)
-                enriched['fixture_avg_difficulty'] = float(avg_diff) if avg_diff is not None else None
-                enriched['fixture_factor'] = float(fx_factor)
-                enriched['raw_predicted_points'] = float(p['predicted_points'])
-                enriched['predicted_points'] = float(adjusted_pts)
-                enriched_players.append(enriched)
+            # Get all players with fixture-adjusted predictions
+            if enriched_players is None:
+                enriched_players = self.get_fixture_adjusted_players(fixture_window, fixture_weight)
+            if not enriched_players:
+                return {'success': False, 'error': 'No players available'}
             
             # FPL team requirements
             team_requirements = {
@@ -479,11 +829,7 @@ class FPLMLModel:
             total_predicted_points = 0.0
             total_raw_predicted_points = 0.0
             
-            print("🔍 Selecting players by position...")
-            
             for position, count in team_requirements.items():
-                print(f"  {position}: Selecting {count} players...")
-                
                 available_players = position_players[position]
                 if len(available_players) < count:
                     return {'success': False, 'error': f'Not enough {position} players available'}
@@ -506,8 +852,6 @@ class FPLMLModel:
                     total_cost += player['price']
                     total_predicted_points += player['predicted_points']
                     total_raw_predicted_points += player.get('raw_predicted_points', player['predicted_points'])
-                    
-                    print(f"    ✅ {player['name']} ({player['team']}) - £{player['price']}M - {player['predicted_points']:.1f} pts (fx {player.get('fixture_factor',1.0):.2f}, avg diff {player.get('fixture_avg_difficulty','-')})")
             
             # Calculate team statistics
             team_stats = {
@@ -521,37 +865,47 @@ class FPLMLModel:
             
             # Sort selected players by predicted points
             selected_players.sort(key=lambda x: x['predicted_points'], reverse=True)
+            if simulate:
+                team_stats['simulation'] = self.simulator.simulate(selected_players, threshold)
             
-            print(f"🎯 Team creation complete!")
-            print(f"💰 Total cost: £{total_cost:.1f}M")
-            print(f"💵 Budget remaining: £{team_stats['budget_remaining']:.1f}M")
-            print(f"🎯 Total predicted points: {total_predicted_points:.1f}")
-            print(f"📊 Value for money: {team_stats['value_for_money']:.2f} pts/£M")
-            print(f"⚽ Formation: {team_stats['formation']}")
+            logger.debug("Team created: cost £%.1fM, %.1f predicted points, formation %s",
+                         total_cost, total_predicted_points, team_stats['formation'])
             
-            return {
+            result = {
                 'success': True,
                 'team': selected_players,
                 'stats': team_stats,
                 'message': f'Best team created with {len(selected_players)} players'
             }
+            if lineup:
+                result['lineup'] = self.lineup_optimizer.pick_lineup(selected_players)
+            return result
             
         except Exception as e:
-            print(f"❌ Error creating best team: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error creating best team: %s", e)
             return {'success': False, 'error': str(e)}
     
-    def get_team_suggestions(self, budget: float = 100.0, num_suggestions: int = 3, fixture_window: int = 5, fixture_weight: float = 0.15) -> Dict:
-        """Get multiple team suggestions with different strategies"""
+    @span('model.get_team_suggestions')
+    def get_team_suggestions(self, budget: float = 100.0, num_suggestions: int = 3, fixture_window: int = 5, fixture_weight: float = 0.15,
+                             simulate: bool = False, threshold: Optional[float] = None) -> Dict:
+        """Get multiple team suggestions with different strategies.
+
+        With ``simulate`` each suggestion's stats include a Monte Carlo points
+        distribution. ``threshold`` defaults to the best expected total among
+        the suggestions, so each strategy reports its chance of beating it.
+        Every suggestion includes its lineup, picked for all of them in one batch.
+        """
         try:
-            print(f"💡 Generating {num_suggestions} team suggestions...")
-            
             suggestions = []
             
+            # Predictions and fixture factors are shared by all strategies
+            enriched = self.get_fixture_adjusted_players(fixture_window, fixture_weight)
+            if not enriched:
+                return {'success': False, 'error': 'No players available'}
+            
             # Strategy 1: Value for money (balanced approach)
-            print("🎯 Strategy 1: Value for money (balanced)")
-            team1 = self.create_best_team(budget, fixture_window, fixture_weight)
+            team1 = self.create_best_team(budget, fixture_window, fixture_weight, enriched_players=enriched,
+                                          lineup=False)
             if team1['success']:
                 suggestions.append({
                     'strategy': 'Value for Money (Balanced)',
@@ -561,8 +915,7 @@ class FPLMLModel:
                 })
             
             # Strategy 2: Premium heavy (expensive players)
-            print("💎 Strategy 2: Premium heavy")
-            team2 = self._create_premium_team(budget, fixture_window, fixture_weight)
+            team2 = self._create_premium_team(budget, fixture_window, fixture_weight, enriched_players=enriched)
             if team2['success']:
                 suggestions.append({
                     'strategy': 'Premium Heavy',
@@ -572,8 +925,7 @@ class FPLMLModel:
                 })
             
             # Strategy 3: Budget friendly
-            print("💰 Strategy 3: Budget friendly")
-            team3 = self._create_budget_team(budget, fixture_window, fixture_weight)
+            team3 = self._create_budget_team(budget, fixture_window, fixture_weight, enriched_players=enriched)
             if team3['success']:
                 suggestions.append({
                     'strategy': 'Budget Friendly',
@@ -582,6 +934,17 @@ class FPLMLModel:
                     'stats': team3['stats']
                 })
             
+            lineups = self.lineup_optimizer.pick_lineups([s['team'] for s in suggestions])
+            for suggestion, lineup in zip(suggestions, lineups):
+                suggestion['lineup'] = lineup
+
+            if simulate and suggestions:
+                if threshold is None:
+                    threshold = round(max(self.simulator.expected_points(s['team']) for s in suggestions), 2)
+                for suggestion in suggestions:
+                    suggestion['stats'] = dict(suggestion['stats'],
+                                               simulation=self.simulator.simulate(suggestion['team'], threshold))
+            
             return {
                 'success': True,
                 'suggestions': suggestions,
@@ -589,28 +952,20 @@ class FPLMLModel:
             }
             
         except Exception as e:
-            print(f"❌ Error generating team suggestions: {e}")
+            logger.exception("Error generating team suggestions: %s", e)
             return {'success': False, 'error': str(e)}
     
-    def _create_premium_team(self, budget: float, fixture_window: int = 5, fixture_weight: float = 0.15) -> Dict:
+    def _create_premium_team(self, budget: float, fixture_window: int = 5, fixture_weight: float = 0.15,
+                             enriched_players: Optional[List[Dict]] = None) -> Dict:
         """Create team with expensive, high-scoring players"""
         try:
-            players = self.get_all_players_with_predictions()
-            if not players:
+            if enriched_players is None:
+                enriched_players = self.get_fixture_adjusted_players(fixture_window, fixture_weight)
+            if not enriched_players:
                 return {'success': False, 'error': 'No players available'}
             
-            # Adjust by fixture difficulty
-            team_fixture_avg = self._compute_team_fixture_difficulty(window_size=fixture_window)
-            enriched = []
-            for p in players:
-                avg_diff = team_fixture_avg.get(p['team'])
-                fx_factor = self._compute_fixture_factor(avg_diff, fixture_weight)
-                q = dict(p)
-                q['fixture_avg_difficulty'] = float(avg_diff) if avg_diff is not None else None
-                q['fixture_factor'] = float(fx_factor)
-                q['raw_predicted_points'] = float(p['predicted_points'])
-                q['predicted_points'] = float(p['predicted_points'] * fx_factor)
-                enriched.append(q)
+            # Sort a copy: the fixture-adjusted list is shared between strategies
+            enriched = list(enriched_players)
 
             # Sort by adjusted predicted points (highest first)
             enriched.sort(key=lambda x: x['predicted_points'], reverse=True)
@@ -650,25 +1005,17 @@ class FPLMLModel:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def _create_budget_team(self, budget: float, fixture_window: int = 5, fixture_weight: float = 0.15) -> Dict:
+    def _create_budget_team(self, budget: float, fixture_window: int = 5, fixture_weight: float = 0.15,
+                            enriched_players: Optional[List[Dict]] = None) -> Dict:
         """Create team maximizing value with cheaper players"""
         try:
-            players = self.get_all_players_with_predictions()
-            if not players:
+            if enriched_players is None:
+                enriched_players = self.get_fixture_adjusted_players(fixture_window, fixture_weight)
+            if not enriched_players:
                 return {'success': False, 'error': 'No players available'}
             
-            # Adjust by fixture difficulty
-            team_fixture_avg = self._compute_team_fixture_difficulty(window_size=fixture_window)
-            enriched = []
-            for p in players:
-                avg_diff = team_fixture_avg.get(p['team'])
-                fx_factor = self._compute_fixture_factor(avg_diff, fixture_weight)
-                q = dict(p)
-                q['fixture_avg_difficulty'] = float(avg_diff) if avg_diff is not None else None
-                q['fixture_factor'] = float(fx_factor)
-                q['raw_predicted_points'] = float(p['predicted_points'])
-                q['predicted_points'] = float(p['predicted_points'] * fx_factor)
-                enriched.append(q)
+            # Sort a copy: the fixture-adjusted list is shared between strategies
+            enriched = list(enriched_players)
             
             # Sort by value for money using adjusted predictions
             enriched.sort(key=lambda x: ((x['predicted_points'] / x['price']) if x['price'] else 0.0), reverse=True)
@@ -0,0 +1,314 @@
+"""
+Hyperparameter Search Module
+
+Time-aware cross-validation and a parallel hyperparameter search for the
+XGBoost points model. Folds are built by season and gameweek (train on earlier weeks,
+validate on the following block) so no future information leaks into a fold,
+and candidate configurations are evaluated across a process pool under an
+optional wall-clock budget.
+"""
+
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_PARAM_GRID = {
+    'max_depth': [3, 4, 6],
+    'learning_rate': [0.05, 0.1],
+    'min_child_weight': [1, 5],
+    'subsample': [0.8, 1.0],
+}
+
+# Upper bound on boosting rounds; early stopping picks the real number per fold
+DEFAULT_MAX_ESTIMATORS = 500
+DEFAULT_EARLY_STOPPING_ROUNDS = 25
+
+
+def expand_param_grid(param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Expand a grid of parameter lists into a list of configurations.
+
+    Args:
+        param_grid: Parameter names mapped to the candidate values
+
+    Returns:
+        List[Dict[str, Any]]: One dict per combination
+    """
+    keys = sorted(param_grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+
+def period_index(gameweeks: np.ndarray, seasons: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Order rows by (season, gameweek) as one increasing integer per row.
+
+    Gameweek numbers repeat every season, so data spanning several seasons
+    needs the season in the key; season labels ('2024-25') sort in time order.
+
+    Args:
+        gameweeks: Gameweek number for every row
+        seasons: Season label for every row (None = a single season)
+
+    Returns:
+        np.ndarray: 0-based rank of each row's (season, gameweek) pair
+    """
+    gameweeks = np.asarray(gameweeks)
+    if seasons is None:
+        return np.unique(gameweeks, return_inverse=True)[1].reshape(-1)
+    periods = pd.MultiIndex.from_arrays([np.asarray(seasons), gameweeks])
+    return pd.factorize(periods, sort=True)[0]
+
+
+def gameweek_folds(gameweeks: np.ndarray, n_splits: int = 4,
+                   seasons: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Build forward-chaining folds grouped by (season, gameweek).
+
+    The sorted unique periods are cut into ``n_splits + 1`` contiguous
+    blocks. Fold ``k`` trains on blocks ``0..k`` and validates on block
+    ``k + 1``, so every validation row is strictly later than its training rows.
+
+    Args:
+        gameweeks: Gameweek number for every row
+        n_splits: Number of folds to produce
+        seasons: Season label for every row (None = a single season)
+
+    Returns:
+        List[Tuple[np.ndarray, np.ndarray]]: (train_index, validation_index) pairs
+    """
+    periods = period_index(gameweeks, seasons)
+    unique_periods = np.unique(periods)
+    if len(unique_periods) < 2:
+        raise ValueError("Time-aware CV needs at least two distinct gameweeks")
+
+    n_splits = max(1, min(n_splits, len(unique_periods) - 1))
+    blocks = np.array_split(unique_periods, n_splits + 1)
+
+    folds = []
+    for k in range(n_splits):
+        train_periods = np.concatenate(blocks[:k + 1])
+        valid_periods = blocks[k + 1]
+        train_idx = np.flatnonzero(np.isin(periods, train_periods))
+        valid_idx = np.flatnonzero(np.isin(periods, valid_periods))
+        folds.append((train_idx, valid_idx))
+    return folds
+
+
+def _early_stopping_split(train_idx: np.ndarray, periods: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Hold out the latest training gameweek (a :func:`period_index` value) for early stopping."""
+    train_gws = periods[train_idx]
+    last_gw = train_gws.max()
+    fit_idx = train_idx[train_gws < last_gw]
+    stop_idx = train_idx[train_gws == last_gw]
+    if len(fit_idx) == 0:
+        # Only one gameweek of training data: stop on the tail rows instead
+        cut = max(1, int(len(train_idx) * 0.85))
+        return train_idx[:cut], train_idx[cut:]
+    return fit_idx, stop_idx
+
+
+def build_regressor(params: Dict[str, Any], n_jobs: int = 1,
+                    early_stopping_rounds: Optional[int] = None) -> xgb.XGBRegressor:
+    """
+    Create an XGBRegressor with the repo's fixed settings applied.
+
+    Args:
+        params: Tunable hyperparameters (max_depth, learning_rate, ...)
+        n_jobs: Threads used by this one model
+        early_stopping_rounds: Rounds without improvement before stopping
+
+    Returns:
+        xgb.XGBRegressor: Unfitted regressor
+    """
+    config = {
+        'n_estimators': DEFAULT_MAX_ESTIMATORS,
+        'tree_method': 'hist',
+        'objective': 'reg:squarederror',
+        'random_state': 42,
+    }
+    config.update(params)
+    return xgb.XGBRegressor(n_jobs=n_jobs, early_stopping_rounds=early_stopping_rounds, **config)
+
+
+def evaluate_config(params: Dict[str, Any], X: np.ndarray, y: np.ndarray, periods: np.ndarray,
+                    folds: List[Tuple[np.ndarray, np.ndarray]], n_jobs: int = 1,
+                    early_stopping_rounds: int = DEFAULT_EARLY_STOPPING_ROUNDS,
+                    deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Cross-validate one configuration over the given folds.
+
+    Runs inside a worker process, so it only takes picklable arguments.
+    ``periods`` orders the rows in time (see :func:`period_index`). Folds
+    that would start after ``deadline`` are skipped.
+
+    Returns:
+        Dict[str, Any]: Metrics, timings and the number of folds completed
+    """
+    rmses, maes, best_iterations = [], [], []
+    fit_seconds = 0.0
+    predict_seconds = 0.0
+    predicted_rows = 0
+
+    for train_idx, valid_idx in folds:
+        if deadline is not None and time.time() >= deadline:
+            break
+
+        fit_idx, stop_idx = _early_stopping_split(train_idx, periods)
+        model = build_regressor(params, n_jobs=n_jobs, early_stopping_rounds=early_stopping_rounds)
+
+        start = time.perf_counter()
+        model.fit(X[fit_idx], y[fit_idx], eval_set=[(X[stop_idx], y[stop_idx])], verbose=False)
+        fit_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        y_pred = model.predict(X[valid_idx])
+        predict_seconds += time.perf_counter() - start
+        predicted_rows += len(valid_idx)
+
+        rmses.append(float(np.sqrt(mean_squared_error(y[valid_idx], y_pred))))
+        maes.append(float(mean_absolute_error(y[valid_idx], y_pred)))
+        best_iterations.append(int(model.best_iteration) + 1)
+
+    return {
+        'params': params,
+        'folds_completed': len(rmses),
+        'rmse': float(np.mean(rmses)) if rmses else float('nan'),
+        'rmse_std': float(np.std(rmses)) if rmses else float('nan'),
+        'mae': float(np.mean(maes)) if maes else float('nan'),
+        'n_estimators': int(np.median(best_iterations)) if best_iterations else 0,
+        'fit_seconds': fit_seconds,
+        'predict_us_per_row': (predict_seconds / predicted_rows * 1e6) if predicted_rows else float('nan'),
+    }
+
+
+class HyperparameterSearch:
+    """
+    Parallel grid search with gameweek-aware cross-validation.
+
+    Each configuration is evaluated in its own worker process; ``n_jobs``
+    controls the threads used by every XGBoost fit inside a worker, so the
+    total CPU use is roughly ``n_workers * n_jobs``.
+    """
+
+    def __init__(self, param_grid: Optional[Dict[str, List[Any]]] = None, n_splits: int = 4,
+                 n_workers: Optional[int] = None, n_jobs: int = 1,
+                 time_budget: Optional[float] = None,
+                 early_stopping_rounds: int = DEFAULT_EARLY_STOPPING_ROUNDS):
+        """
+        Initialize the search.
+
+        Args:
+            param_grid: Parameter names mapped to candidate values (default: DEFAULT_PARAM_GRID)
+            n_splits: Number of forward-chaining gameweek folds
+            n_workers: Worker processes (default: CPU count divided by n_jobs)
+            n_jobs: Threads per XGBoost model
+            time_budget: Wall-clock budget in seconds for the whole search (None = unlimited)
+            early_stopping_rounds: Rounds without improvement before a fit stops
+        """
+        self.param_grid = param_grid or DEFAULT_PARAM_GRID
+        self.n_splits = n_splits
+        self.n_jobs = max(1, n_jobs)
+        self.n_workers = n_workers or max(1, (os.cpu_count() or 1) // self.n_jobs)
+        self.time_budget = time_budget
+        self.early_stopping_rounds = early_stopping_rounds
+        self.results: List[Dict[str, Any]] = []
+
+    def run(self, X: np.ndarray, y: np.ndarray, gameweeks: np.ndarray,
+            seasons: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate every configuration in the grid.
+
+        Configurations still queued when the time budget runs out are
+        cancelled; configurations already running finish their current fold.
+
+        Args:
+            X: Feature matrix
+            y: Target vector
+            gameweeks: Gameweek number for every row
+            seasons: Season label for every row, for data spanning several seasons
+
+        Returns:
+            List[Dict[str, Any]]: Leaderboard rows sorted by RMSE, then fit time
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        periods = period_index(gameweeks, seasons)
+
+        folds = gameweek_folds(periods, self.n_splits)
+        configs = expand_param_grid(self.param_grid)
+        started = time.time()
+        deadline = started + self.time_budget if self.time_budget else None
+
+        self.results = []
+        executor = ProcessPoolExecutor(max_workers=self.n_workers)
+        try:
+            futures = [
+                executor.submit(evaluate_config, params, X, y, periods, folds,
+                                self.n_jobs, self.early_stopping_rounds, deadline)
+                for params in configs
+            ]
+            remaining = (deadline - time.time()) if deadline else None
+            try:
+                for future in as_completed(futures, timeout=remaining):
+                    result = future.result()
+                    if result['folds_completed']:
+                        self.results.append(result)
+            except FuturesTimeoutError:
+                logger.info("Search budget of %ss reached, %d/%d configurations evaluated",
+                            self.time_budget, len(self.results), len(configs))
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        # Configurations cut short by the deadline are not comparable to full runs
+        full = [r for r in self.results if r['folds_completed'] == len(folds)]
+        partial = [r for r in self.results if r['folds_completed'] < len(folds)]
+        full.sort(key=lambda r: (r['rmse'], r['fit_seconds']))
+        partial.sort(key=lambda r: (r['rmse'], r['fit_seconds']))
+        self.results = full + partial
+
+        for rank, result in enumerate(self.results, start=1):
+            result['rank'] = rank
+        return self.results
+
+    def leaderboard(self) -> pd.DataFrame:
+        """Get the results as a DataFrame with one column per hyperparameter."""
+        if not self.results:
+            return pd.DataFrame()
+        rows = []
+        for result in self.results:
+            row = {k: v for k, v in result.items() if k != 'params'}
+            row.update(result['params'])
+            rows.append(row)
+        columns = ['rank', 'rmse', 'rmse_std', 'mae', 'fit_seconds', 'predict_us_per_row',
+                   'n_estimators', 'folds_completed'] + sorted(self.results[0]['params'])
+        return pd.DataFrame(rows)[columns]
+
+    def write_leaderboard(self, filepath: str) -> bool:
+        """
+        Write the leaderboard to disk (CSV, or JSON if the path ends in .json).
+
+        Args:
+            filepath: Destination path
+
+        Returns:
+            bool: True if the leaderboard was written
+        """
+        board = self.leaderboard()
+        if board.empty:
+            return False
+        if filepath.endswith('.json'):
+            board.to_json(filepath, orient='records', indent=2)
+        else:
+            board.to_csv(filepath, index=False)
+        return True
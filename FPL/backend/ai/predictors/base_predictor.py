@@ -7,6 +7,7 @@ Future ML models should inherit from this base to ensure consistency.
 
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any
+import numpy as np
 import pandas as pd
 
 
@@ -21,6 +22,7 @@ class BasePredictor(ABC):
     def __init__(self):
         self.is_trained = False
         self.model = None
+        self.target_column = 'total_points'
     
     @abstractmethod
     def train(self, data: pd.DataFrame) -> bool:
@@ -94,8 +96,25 @@ class BasePredictor(ABC):
         Returns:
             Dict[str, float]: Performance metrics
         """
-        # Default implementation - can be overridden by subclasses
-        return {"validation_score": 0.0}
+        if not self.is_trained or self.target_column not in test_data.columns or test_data.empty:
+            return {"validation_score": 0.0}
+
+        y_true = pd.to_numeric(test_data[self.target_column], errors='coerce').fillna(0).to_numpy(dtype=float)
+        y_pred = np.asarray(self.predict(test_data), dtype=float)
+        errors = y_pred - y_true
+
+        mse = float(np.mean(errors ** 2))
+        total_variance = float(np.sum((y_true - y_true.mean()) ** 2))
+        r2 = 1.0 - float(np.sum(errors ** 2)) / total_variance if total_variance > 0 else 0.0
+
+        return {
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "mae": float(np.mean(np.abs(errors))),
+            "r2": r2,
+            "validation_score": r2,
+            "samples": int(len(y_true)),
+        }
     
     def get_model_info(self) -> Dict[str, Any]:
         """
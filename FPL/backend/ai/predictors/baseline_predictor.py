@@ -0,0 +1,195 @@
+"""
+Baseline Predictor Module
+
+A closed-form ridge regression over a handful of form and usage columns,
+written in pure NumPy. It trains in milliseconds, predicts the whole league
+in microseconds and does not import xgboost or scikit-learn, so it is cheap
+enough for latency-sensitive endpoints while heavier models run offline.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ai.predictors.base_predictor import BasePredictor
+
+
+class BaselinePredictor(BasePredictor):
+    """
+    Ridge regression baseline with an optional fixture multiplier.
+
+    Predictions are ``(X - mean) / std @ weights + bias``. When the input
+    frame carries a ``fixture_factor`` column the prediction is scaled by it,
+    matching how the team builder adjusts XGBoost predictions.
+    """
+
+    DEFAULT_FEATURES = [
+        'form', 'points_per_game', 'ict_index', 'minutes', 'bps',
+        'price', 'selected_by_percent',
+    ]
+
+    # Features computed from raw bootstrap columns when the frame lacks them
+    DERIVED_FEATURES = {
+        'price': ('now_cost', lambda now_cost: now_cost / 10.0),
+    }
+
+    def __init__(self, feature_columns: Optional[List[str]] = None, alpha: float = 1.0,
+                 target_column: str = 'total_points'):
+        """
+        Initialize the baseline.
+
+        Args:
+            feature_columns: Numeric columns used as inputs (default: DEFAULT_FEATURES)
+            alpha: L2 penalty on the standardized weights
+            target_column: Column holding the training target
+        """
+        super().__init__()
+        self.feature_columns = list(feature_columns or self.DEFAULT_FEATURES)
+        self.alpha = alpha
+        self.target_column = target_column
+        self.mean_ = None
+        self.scale_ = None
+        self.weights_ = None
+        self.bias_ = 0.0
+
+    def _matrix(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Extract the feature matrix, coercing FPL's string-typed numbers.
+
+        Raises:
+            ValueError: A feature column is missing and cannot be derived
+        """
+        columns, missing = [], []
+        for col in self.feature_columns:
+            if col in data.columns:
+                values = pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=np.float64)
+            elif col in self.DERIVED_FEATURES and self.DERIVED_FEATURES[col][0] in data.columns:
+                source, derive = self.DERIVED_FEATURES[col]
+                values = derive(pd.to_numeric(data[source], errors='coerce').to_numpy(dtype=np.float64))
+            else:
+                missing.append(col)
+                continue
+            columns.append(np.nan_to_num(values))
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        return np.column_stack(columns) if columns else np.zeros((len(data), 0))
+
+    def train(self, data: pd.DataFrame) -> bool:
+        """
+        Fit the ridge weights in closed form.
+
+        Args:
+            data: Frame with the feature columns and the target column
+
+        Returns:
+            bool: True if training was successful, False otherwise
+        """
+        if data.empty or self.target_column not in data.columns:
+            return False
+        try:
+            X = self._matrix(data)
+        except ValueError:
+            return False
+        y = pd.to_numeric(data[self.target_column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+
+        self.mean_ = X.mean(axis=0)
+        self.scale_ = X.std(axis=0)
+        self.scale_[self.scale_ == 0] = 1.0
+        Z = (X - self.mean_) / self.scale_
+
+        self.bias_ = float(y.mean())
+        gram = Z.T @ Z + self.alpha * np.eye(Z.shape[1])
+        self.weights_ = np.linalg.solve(gram, Z.T @ (y - self.bias_))
+        self.model = self.weights_
+        self.is_trained = True
+        return True
+
+    def predict_array(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict from a raw feature matrix in ``feature_columns`` order.
+
+        This is the hot path for serving: one fused multiply-add per player.
+
+        Args:
+            X: Array of shape (n_players, n_features)
+
+        Returns:
+            np.ndarray: Predicted points
+        """
+        if not self.is_trained:
+            raise Exception("Model not trained. Call train() first.")
+        return ((X - self.mean_) / self.scale_) @ self.weights_ + self.bias_
+
+    def predict(self, data: pd.DataFrame) -> List[float]:
+        """
+        Predict points for every row, scaled by ``fixture_factor`` when present.
+
+        Args:
+            data: Frame with the feature columns
+
+        Returns:
+            List[float]: Predicted values
+
+        Raises:
+            ValueError: A feature column is missing
+        """
+        predictions = self.predict_array(self._matrix(data))
+        if 'fixture_factor' in data.columns:
+            predictions = predictions * data['fixture_factor'].to_numpy(dtype=np.float64)
+        return predictions.tolist()
+
+    def save_model(self, filepath: str) -> bool:
+        """
+        Save the fitted weights as a NumPy archive.
+
+        Args:
+            filepath: Path where to save the model
+
+        Returns:
+            bool: True if save was successful, False otherwise
+        """
+        if not self.is_trained:
+            return False
+        with open(filepath, 'wb') as fh:
+            np.savez(fh, mean=self.mean_, scale=self.scale_, weights=self.weights_,
+                     bias=np.array(self.bias_), alpha=np.array(self.alpha),
+                     feature_columns=np.array(self.feature_columns))
+        return True
+
+    def load_model(self, filepath: str) -> bool:
+        """
+        Load weights saved by :meth:`save_model`.
+
+        Args:
+            filepath: Path to the saved model
+
+        Returns:
+            bool: True if load was successful, False otherwise
+        """
+        try:
+            with np.load(filepath) as archive:
+                self.mean_ = archive['mean']
+                self.scale_ = archive['scale']
+                self.weights_ = archive['weights']
+                self.bias_ = float(archive['bias'])
+                self.alpha = float(archive['alpha'])
+                self.feature_columns = [str(c) for c in archive['feature_columns']]
+            self.model = self.weights_
+            self.is_trained = True
+            return True
+        except (OSError, KeyError, ValueError):
+            return False
+
+    def get_feature_importance(self) -> Dict[str, float]:
+        """
+        Get normalized absolute standardized weights.
+
+        Returns:
+            Dict[str, float]: Feature names mapped to importance scores
+        """
+        if not self.is_trained:
+            return {}
+        magnitude = np.abs(self.weights_)
+        total = magnitude.sum() or 1.0
+        return {col: float(w / total) for col, w in zip(self.feature_columns, magnitude)}
@@ -0,0 +1,415 @@
+"""
+Chip Planner Module
+
+Scores Wildcard, Free Hit, Bench Boost and Triple Captain for every
+remaining gameweek and returns a ranked plan.
+
+Everything works off one players x gameweeks prediction matrix: each
+player's per-match prediction times the fixture factor of every match the
+club plays that gameweek, so blank gameweeks score 0 and double gameweeks
+score both matches. Chips are then valued against the squad that would be
+fielded without them:
+
+- Triple Captain: the captain's expected points once more.
+- Bench Boost: the bench's expected points, less the auto-substitutions it
+  replaces.
+- Free Hit: the best squad for that gameweek alone versus the held squad.
+- Wildcard: the best squad for the ``horizon`` gameweeks from then on
+  versus the held squad over the same run.
+
+Optimal squads depend only on the gameweek window, so each one is built once
+and memoized; a Free Hit squad for gameweek g is reused wherever the window
+(g, 1) is needed. All squad-gameweek pairs are scored in a single batched
+``optimize_lineups`` call, so the gameweeks are evaluated together instead
+of running the optimizer once per gameweek per chip.
+"""
+
+from itertools import product
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ai.instrumentation import span
+from ai.predictors.lineup_optimizer import (DEFAULT_PLAY_PROBABILITY, POSITION_IDS, SQUAD_SHAPE,
+                                            optimize_lineups)
+from ai.predictors.squad_simulator import player_position
+
+
+CHIPS = ('wildcard', 'free_hit', 'bench_boost', 'triple_captain')
+
+# Most players a squad may hold from one club
+MAX_PER_CLUB = 3
+
+
+class FixtureIndex:
+    """
+    Fixtures indexed by club and gameweek.
+
+    Attributes:
+        gameweeks: Gameweek ids covered, ascending
+        team_ids: Club ids, in row order
+        counts: (clubs, gameweeks) number of matches per club and gameweek
+    """
+
+    def __init__(self, fixtures: Sequence[Any], team_ids: Sequence[int], gameweeks: Sequence[int],
+                 difficulty: Optional[np.ndarray] = None):
+        """
+        Args:
+            fixtures: Fixture dicts or records with 'event', 'team_h', 'team_a'
+                and the two difficulty ratings
+            team_ids: Clubs to index
+            gameweeks: Gameweeks to index
+            difficulty: (team id, opponent id, venue) difficulty matrix from
+                :class:`TeamStrengthModel` to use instead of the fixtures' ratings
+        """
+        self.team_ids = list(team_ids)
+        self.gameweeks = list(gameweeks)
+        team_row = {team_id: i for i, team_id in enumerate(self.team_ids)}
+        gameweek_col = {gw: j for j, gw in enumerate(self.gameweeks)}
+
+        # One entry per club per fixture
+        matrix = difficulty
+        rows, cols, pairs, difficulty = [], [], [], []
+        for fx in fixtures:
+            col = gameweek_col.get(fx.get('event'))
+            if col is None:
+                continue
+            for venue, (side, other) in enumerate((('h', 'a'), ('a', 'h'))):
+                row = team_row.get(fx.get(f'team_{side}'))
+                if row is not None:
+                    rows.append(row)
+                    cols.append(col)
+                    pairs.append((fx.get(f'team_{side}'), fx.get(f'team_{other}'), venue))
+                    difficulty.append(fx.get(f'team_{side}_difficulty') or 3)
+        self._rows = np.array(rows, dtype=np.intp)
+        self._cols = np.array(cols, dtype=np.intp)
+        self._difficulty = np.array(difficulty, dtype=float)
+        if matrix is not None and pairs:
+            team, opponent, venue = np.array(pairs, dtype=np.intp).T
+            rated = (team < len(matrix)) & (opponent < len(matrix))
+            self._difficulty[rated] = matrix[team[rated], opponent[rated], venue[rated]]
+
+        self.counts = np.zeros((len(self.team_ids), len(self.gameweeks)), dtype=np.int32)
+        np.add.at(self.counts, (self._rows, self._cols), 1)
+
+    def factor_sums(self, fixture_weight: float = 0.15) -> np.ndarray:
+        """
+        Sum of fixture factors per club and gameweek.
+
+        Each match contributes ``1 + (3 - difficulty) * fixture_weight``,
+        clamped to [0.8, 1.2] as in the model's fixture adjustment.
+
+        Returns:
+            np.ndarray: (clubs, gameweeks) factors; 0 for a blank
+        """
+        factors = np.clip(1.0 + (3.0 - self._difficulty) * fixture_weight, 0.8, 1.2)
+        sums = np.zeros(self.counts.shape)
+        np.add.at(sums, (self._rows, self._cols), factors)
+        return sums
+
+    def blank_gameweeks(self) -> Dict[int, List[int]]:
+        """Gameweeks in which some clubs have no match, with those clubs' ids."""
+        return self._clubs_where(self.counts == 0)
+
+    def double_gameweeks(self) -> Dict[int, List[int]]:
+        """Gameweeks in which some clubs play more than once, with those clubs' ids."""
+        return self._clubs_where(self.counts >= 2)
+
+    def _clubs_where(self, mask: np.ndarray) -> Dict[int, List[int]]:
+        return {self.gameweeks[j]: [self.team_ids[i] for i in np.flatnonzero(mask[:, j])]
+                for j in np.flatnonzero(mask.any(axis=0))}
+
+
+def upcoming_gameweeks(events: Sequence[Any], fixtures: Sequence[Any]) -> List[int]:
+    """
+    Gameweeks still to be picked for: the next deadline onwards.
+
+    Args:
+        events: Bootstrap events with 'id', 'is_next' and 'finished'
+        fixtures: Fixtures, used for the season length when events are missing
+
+    Returns:
+        List[int]: Ascending gameweek ids
+    """
+    ids = sorted(int(ev.get('id')) for ev in events if ev.get('id') is not None)
+    if not ids:
+        ids = sorted({int(fx.get('event')) for fx in fixtures if fx.get('event') is not None})
+    first = next((int(ev.get('id')) for ev in events if ev.get('is_next')), None)
+    if first is None:
+        unfinished = [int(ev.get('id')) for ev in events if not ev.get('finished')]
+        first = min(unfinished) if unfinished else (ids[0] if ids else 1)
+    return [gw for gw in ids if gw >= first]
+
+
+def best_squad(points: np.ndarray, positions: np.ndarray, costs: np.ndarray, clubs: np.ndarray,
+               budget: int) -> Optional[np.ndarray]:
+    """
+    Greedy 15-man squad maximizing total points within budget and club limits.
+
+    Players are taken in descending points order whenever the squad can
+    still be completed within budget from the cheapest remaining players.
+
+    Args:
+        points: Points per player
+        positions: Element type ids (1-4) per player
+        costs: Prices in FPL units (0.1m) per player
+        clubs: Club id per player
+        budget: Budget in FPL units
+
+    Returns:
+        Optional[np.ndarray]: Indices of the 15 players, None if no squad fits
+    """
+    need = dict(SQUAD_SHAPE)
+    # Cheapest players per position, for the cost of completing the squad
+    cheapest = {p: [int(i) for i in np.flatnonzero(positions == p)[np.argsort(costs[positions == p], kind='stable')]]
+                for p in need}
+    chosen: List[int] = []
+    taken = set()
+    per_club: Dict[int, int] = {}
+    spent = 0
+
+    def completion_cost(skip: int, position: int) -> int:
+        total = 0
+        for p, count in need.items():
+            count -= int(p == position)
+            if count <= 0:
+                continue
+            picked = 0
+            for i in cheapest[p]:
+                if i == skip or i in taken:
+                    continue
+                total += int(costs[i])
+                picked += 1
+                if picked == count:
+                    break
+        return total
+
+    for i in np.argsort(-points, kind='stable'):
+        i = int(i)
+        position, club = int(positions[i]), int(clubs[i])
+        if need.get(position, 0) == 0 or per_club.get(club, 0) >= MAX_PER_CLUB:
+            continue
+        if spent + int(costs[i]) + completion_cost(i, position) > budget:
+            continue
+        chosen.append(i)
+        taken.add(i)
+        spent += int(costs[i])
+        need[position] -= 1
+        per_club[club] = per_club.get(club, 0) + 1
+        if len(chosen) == 15:
+            return np.array(chosen, dtype=np.intp)
+    return None
+
+
+class ChipPlanner:
+    """
+    Chip timing over the rest of the season.
+
+    Squads are memoized per gameweek window until the ``key`` passed to
+    :meth:`plan` changes (e.g. a new data snapshot or model).
+
+    Example:
+        planner = ChipPlanner(horizon=5)
+        result = planner.plan(players, bootstrap, fixtures, squad_ids=my_ids, key=versions)
+        result['plan']
+    """
+
+    def __init__(self, horizon: int = 5, candidates_per_chip: int = 6):
+        """
+        Args:
+            horizon: Gameweeks a Wildcard squad is built for and credited over
+            candidates_per_chip: Best gameweeks per chip considered when
+                combining chips into a plan
+        """
+        self.horizon = horizon
+        self.candidates_per_chip = candidates_per_chip
+        self._squads: Dict[Tuple, Optional[np.ndarray]] = {}
+        self._squads_key: Hashable = None
+
+    @staticmethod
+    def prediction_matrix(players: Sequence[Dict], index: FixtureIndex, fixture_weight: float = 0.15,
+                          team_ids: Optional[Dict[str, int]] = None) -> np.ndarray:
+        """
+        Expected points per player and gameweek.
+
+        Args:
+            players: Player dicts with 'predicted_points' (per match) and 'team'
+                (club id, or club name resolved through ``team_ids``)
+            index: Fixtures by club and gameweek
+            fixture_weight: Strength of the fixture difficulty adjustment
+            team_ids: Club name -> id, when players carry club names
+
+        Returns:
+            np.ndarray: (players, gameweeks) expected points
+        """
+        row = {team_id: i for i, team_id in enumerate(index.team_ids)}
+        clubs = [(team_ids or {}).get(p.get('team'), p.get('team')) for p in players]
+        club_rows = np.array([row.get(club, -1) for club in clubs], dtype=np.intp)
+        base = np.array([max(float(p.get('predicted_points') or 0.0), 0.0) for p in players])
+
+        # An extra all-zero row for players whose club is not indexed
+        factors = np.vstack([index.factor_sums(fixture_weight), np.zeros((1, len(index.gameweeks)))])
+        return base[:, None] * factors[club_rows]
+
+    def _window_squad(self, matrix: np.ndarray, start: int, length: int, positions: np.ndarray,
+                      costs: np.ndarray, clubs: np.ndarray, budget: int) -> Optional[np.ndarray]:
+        key = (start, length, budget)
+        if key not in self._squads:
+            points = matrix[:, start:start + length].sum(axis=1)
+            self._squads[key] = best_squad(points, positions, costs, clubs, budget)
+        return self._squads[key]
+
+    @span('chips.plan')
+    def plan(self, players: Sequence[Dict], bootstrap: Any, fixtures: Sequence[Any],
+             squad_ids: Optional[Sequence[int]] = None, budget: Optional[float] = None,
+             fixture_weight: float = 0.15, horizon: Optional[int] = None, key: Hashable = None,
+             difficulty: Optional[np.ndarray] = None) -> Dict:
+        """
+        Value every chip in every remaining gameweek and pick a plan.
+
+        Each chip is valued on its own against the held squad (no transfers
+        are modelled), and the plan uses each chip at most once, in distinct
+        gameweeks, maximizing the total expected gain.
+
+        Args:
+            players: Player dicts with 'id', 'team' (club name), 'position',
+                'price', 'predicted_points' and optionally 'chance_of_playing_next_round'
+            bootstrap: Bootstrap snapshot (teams and events)
+            fixtures: Fixtures snapshot
+            squad_ids: The held squad's 15 player ids (default: the best squad
+                for the next ``horizon`` gameweeks, as if just wildcarded)
+            budget: Squad budget in millions for Wildcard and Free Hit squads
+                (default: the held squad's value, or 100.0)
+            fixture_weight: Strength of the fixture difficulty adjustment
+            horizon: Override the instance's Wildcard horizon
+            key: Identifies the inputs; memoized squads are dropped when it changes
+            difficulty: Learned difficulty matrix (default: the fixtures' FDR)
+
+        Returns:
+            Dict: Success flag, gameweeks, blank and double gameweeks (club
+            names), ranked options per chip, and the plan
+        """
+        if key is None or key != self._squads_key:
+            self._squads = {}
+            self._squads_key = key
+
+        teams = {team['id']: team['name'] for team in bootstrap['teams']}
+        gameweeks = upcoming_gameweeks(bootstrap.get('events', []), fixtures)
+        if not gameweeks or not players:
+            return {'success': False, 'error': 'No gameweeks or players to plan for'}
+
+        team_ids = {name: team_id for team_id, name in teams.items()}
+        with span('chips.prediction_matrix'):
+            index = FixtureIndex(fixtures, list(teams), gameweeks, difficulty)
+            matrix = self.prediction_matrix(players, index, fixture_weight, team_ids)
+        positions = np.array([POSITION_IDS.get(player_position(p), 0) for p in players])
+        costs = np.array([int(round(float(p.get('price') or 0.0) * 10)) for p in players])
+        clubs = np.array([team_ids.get(p.get('team'), 0) for p in players])
+        availability = np.array([
+            DEFAULT_PLAY_PROBABILITY if p.get('chance_of_playing_next_round') is None
+            else min(max(float(p['chance_of_playing_next_round']) / 100.0, 0.0), 1.0)
+            for p in players
+        ])
+
+        n_gw = len(gameweeks)
+        horizon = max(1, min(horizon or self.horizon, n_gw))
+        if squad_ids is not None:
+            if len(set(squad_ids)) != 15:
+                return {'success': False, 'error': 'A squad has 15 different players'}
+            row = {p.get('id'): i for i, p in enumerate(players)}
+            missing = [pid for pid in squad_ids if pid not in row]
+            if missing:
+                return {'success': False, 'error': f'Unknown player ids: {missing}'}
+            held = np.array([row[pid] for pid in squad_ids], dtype=np.intp)
+            if any(np.count_nonzero(positions[held] == p) != n for p, n in SQUAD_SHAPE.items()):
+                return {'success': False, 'error': 'Squad must have 2 GKP, 5 DEF, 5 MID and 3 FWD'}
+        else:
+            held = None
+        budget_units = int(round((budget if budget is not None else
+                                  (costs[held].sum() / 10.0 if held is not None else 100.0)) * 10))
+
+        with span('chips.squads'):
+            free_hit = [self._window_squad(matrix, g, 1, positions, costs, clubs, budget_units)
+                        for g in range(n_gw)]
+            wildcard = [self._window_squad(matrix, g, horizon, positions, costs, clubs, budget_units)
+                        for g in range(n_gw)]
+            if held is None:
+                held = wildcard[0]
+            if held is None:
+                return {'success': False, 'error': 'No squad fits the budget'}
+
+        # Every (squad, gameweek) pair to score: held squad in every gameweek,
+        # each Free Hit squad in its gameweek, each Wildcard squad over its window
+        pairs: List[Tuple[np.ndarray, int]] = [(held, g) for g in range(n_gw)]
+        pairs += [(squad, g) for g, squad in enumerate(free_hit) if squad is not None]
+        pairs += [(squad, t) for g, squad in enumerate(wildcard) if squad is not None
+                  for t in range(g, min(g + horizon, n_gw))]
+        with span('chips.lineups'):
+            squads = np.array([squad for squad, _ in pairs])
+            cols = np.array([g for _, g in pairs])
+            play_prob = np.where(cols[:, None] == 0, availability[squads], DEFAULT_PLAY_PROBABILITY)
+            lineups = optimize_lineups(matrix[squads, cols[:, None]], positions[squads], play_prob)
+
+        totals = lineups['expected_points']
+        held_total = totals[:n_gw]
+        bench_points = (matrix[squads, cols[:, None]] * ~lineups['starters']).sum(axis=1)
+        gains = {chip: np.full(n_gw, np.nan) for chip in CHIPS}
+        gains['triple_captain'] = lineups['captain_points'][:n_gw]
+        gains['bench_boost'] = bench_points[:n_gw] - lineups['autosub_points'][:n_gw]
+        k = n_gw
+        for g, squad in enumerate(free_hit):
+            if squad is not None:
+                gains['free_hit'][g] = totals[k] - held_total[g]
+                k += 1
+        for g, squad in enumerate(wildcard):
+            if squad is not None:
+                end = min(g + horizon, n_gw)
+                gains['wildcard'][g] = totals[k:k + end - g].sum() - held_total[g:end].sum()
+                k += end - g
+
+        options = {chip: [{'gameweek': gameweeks[g], 'gain': round(float(gains[chip][g]), 2)}
+                          for g in np.argsort(-np.nan_to_num(gains[chip], nan=-np.inf), kind='stable')
+                          if not np.isnan(gains[chip][g])]
+                   for chip in CHIPS}
+        plan = self._combine(gains)
+        for entry in plan:
+            g = entry.pop('index')
+            entry['gameweek'] = gameweeks[g]
+            squad = {'free_hit': free_hit, 'wildcard': wildcard}.get(entry['chip'], [None] * n_gw)[g]
+            if squad is not None:
+                entry['squad'] = [players[i].get('id') for i in squad]
+
+        return {
+            'success': True,
+            'gameweeks': gameweeks,
+            'horizon': horizon,
+            'budget': budget_units / 10.0,
+            'blank_gameweeks': {gw: [teams[t] for t in clubs_] for gw, clubs_ in index.blank_gameweeks().items()},
+            'double_gameweeks': {gw: [teams[t] for t in clubs_] for gw, clubs_ in index.double_gameweeks().items()},
+            'held_squad': [players[i].get('id') for i in held],
+            'held_expected_points': {gameweeks[g]: round(float(held_total[g]), 2) for g in range(n_gw)},
+            'options': options,
+            'plan': plan,
+            'total_gain': round(sum(entry['gain'] for entry in plan), 2),
+        }
+
+    def _combine(self, gains: Dict[str, np.ndarray]) -> List[Dict]:
+        """Best set of (chip, gameweek) picks with each chip once and one chip per gameweek."""
+        candidates = []
+        for chip in CHIPS:
+            values = np.nan_to_num(gains[chip], nan=-np.inf)
+            top = [int(g) for g in np.argsort(-values, kind='stable')[:self.candidates_per_chip] if values[g] > 0]
+            # None: leave the chip for later
+            candidates.append([None] + top)
+
+        best, best_total = (), 0.0
+        for picks in product(*candidates):
+            used = [g for g in picks if g is not None]
+            if len(used) != len(set(used)):
+                continue
+            total = sum(gains[chip][g] for chip, g in zip(CHIPS, picks) if g is not None)
+            if total > best_total:
+                best, best_total = picks, total
+        plan = [{'chip': chip, 'index': g, 'gain': round(float(gains[chip][g]), 2)}
+                for chip, g in zip(CHIPS, best) if g is not None]
+        return sorted(plan, key=lambda entry: entry['index'])
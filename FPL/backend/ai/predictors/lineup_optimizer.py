@@ -0,0 +1,368 @@
+"""
+Lineup Optimizer Module
+
+Picks the starting XI, captain, vice-captain and bench order for 15-man
+squads, such as those produced by ``TeamOptimizer`` or the ML team builder.
+
+Everything is computed for a whole batch of squads at once:
+
+- Formations: per-position prefix sums of the sorted expected points score
+  all 8 legal formations (1 GK; 3-5 DEF, 2-5 MID, 1-3 FWD) as one
+  ``(squads, 8)`` array, and the best is an ``argmax``.
+- Captaincy: each starter is scored as captain plus the best remaining
+  starter as vice (who doubles only if the captain does not play), by
+  expected points or by upside, a high quantile of the simulator's
+  per-player distribution.
+- Bench: the outfield bench orders (3! = 6) are scored by the exact
+  expected auto-substitution points under FPL's rules (substitutes keep
+  the formation legal). The rules' outcome for every formation, bench
+  composition, order and availability case is tabulated once, so scoring
+  reduces to weighting that table by each squad's availability odds.
+
+This lets lineups for a large batch of squads (e.g. every user's squad
+before a deadline) be auto-picked in one pass.
+"""
+
+from functools import lru_cache
+from itertools import permutations
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy.special import gammaincinv
+
+from ai.instrumentation import span
+from ai.predictors.squad_simulator import DEFAULT_POSITION_CV, player_position
+
+
+GKP, DEF, MID, FWD = 1, 2, 3, 4
+POSITION_IDS = {'GKP': GKP, 'DEF': DEF, 'MID': MID, 'FWD': FWD}
+
+# Legal outfield formations (DEF, MID, FWD)
+FORMATIONS = np.array([(d, m, f) for d in range(3, 6) for m in range(2, 6) for f in range(1, 4)
+                       if d + m + f == 10])
+
+# Outfield starters allowed per position after auto-substitutions (DEF, MID, FWD)
+MIN_OUTFIELD = np.array([3, 2, 1])
+MAX_OUTFIELD = np.array([5, 5, 3])
+
+# Chance a player features when the squad data carries no availability
+DEFAULT_PLAY_PROBABILITY = 0.9
+
+SQUAD_SHAPE = {GKP: 2, DEF: 5, MID: 5, FWD: 3}
+
+# Orders of the three outfield substitutes (slot -> bench index)
+_BENCH_ORDERS = np.array(list(permutations(range(3))))
+
+_INFEASIBLE = -1e9
+
+
+def upside_points(points: np.ndarray, positions: np.ndarray, quantile: float = 0.9,
+                  position_cv: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Per-player upside: a quantile of the gamma distribution ``SquadSimulator`` samples.
+
+    Args:
+        points: Expected points, any shape
+        positions: Element type ids (1-4), same shape
+        quantile: Quantile to report, e.g. 0.9 for a 1-in-10 good week
+        position_cv: Coefficient of variation per position name
+
+    Returns:
+        np.ndarray: Upside points, same shape as ``points``
+    """
+    cvs = dict(DEFAULT_POSITION_CV, **(position_cv or {}))
+    cv = np.ones(points.shape)
+    for name, position in POSITION_IDS.items():
+        cv[positions == position] = cvs[name]
+    shape = 1.0 / np.square(cv)
+    return gammaincinv(shape, quantile) * np.maximum(points, 0.0) / shape
+
+
+def optimize_lineups(points: np.ndarray, positions: np.ndarray, play_prob: Optional[np.ndarray] = None,
+                     captain_by: str = 'expected', upside_quantile: float = 0.9,
+                     chunk_size: int = 4096) -> Dict[str, np.ndarray]:
+    """
+    Vectorized lineup selection for a batch of 15-man squads.
+
+    Args:
+        points: (squads, 15) expected points per player
+        positions: (squads, 15) element type ids (1 GKP, 2 DEF, 3 MID, 4 FWD)
+        play_prob: (squads, 15) probability each player features (default 0.9)
+        captain_by: 'expected' or 'upside'
+        upside_quantile: Quantile used when ``captain_by='upside'``
+        chunk_size: Squads scored together when ordering benches (bounds memory)
+
+    Returns:
+        Dict[str, np.ndarray]: 'feasible' (squads,), 'formation' (squads, 3),
+        'starters' (squads, 15) bool, 'captain' and 'vice' (squads,) indices,
+        'bench' (squads, 4) indices in bench order (goalkeeper first),
+        'starting_points', 'captain_points', 'autosub_points' and
+        'expected_points' (squads,)
+    """
+    if captain_by not in ('expected', 'upside'):
+        raise ValueError("captain_by must be 'expected' or 'upside'")
+    points = np.asarray(points, dtype=float)
+    positions = np.asarray(positions)
+    n_squads, squad_size = points.shape
+    play_prob = (np.full(points.shape, DEFAULT_PLAY_PROBABILITY) if play_prob is None
+                 else np.clip(np.asarray(play_prob, dtype=float), 0.0, 1.0))
+    rows = np.arange(n_squads)[:, None]
+
+    with span('lineup.formations'):
+        # Squad indices sorted by points within each position, and prefix sums
+        order, prefix = {}, {}
+        for position in (GKP, DEF, MID, FWD):
+            values = np.where(positions == position, points, _INFEASIBLE)
+            order[position] = np.argsort(-values, axis=1, kind='stable')
+            prefix[position] = np.cumsum(np.take_along_axis(values, order[position], axis=1), axis=1)
+        scores = (prefix[GKP][:, :1] + prefix[DEF][:, FORMATIONS[:, 0] - 1]
+                  + prefix[MID][:, FORMATIONS[:, 1] - 1] + prefix[FWD][:, FORMATIONS[:, 2] - 1])
+        best = scores.argmax(axis=1)
+        starting_points = scores[np.arange(n_squads), best]
+        formation = FORMATIONS[best]
+        feasible = np.ones(n_squads, dtype=bool)
+        for position, size in SQUAD_SHAPE.items():
+            feasible &= (positions == position).sum(axis=1) == size
+
+        starters = np.zeros(points.shape, dtype=bool)
+        ranks = np.arange(squad_size)[None, :]
+        needed = {GKP: np.ones(n_squads, dtype=int), DEF: formation[:, 0], MID: formation[:, 1], FWD: formation[:, 2]}
+        for position, count in needed.items():
+            starters[rows, order[position]] |= ranks < count[:, None]
+
+    with span('lineup.captaincy'):
+        value = points if captain_by == 'expected' else upside_points(points, positions, upside_quantile)
+        ranked = np.where(starters, value, -np.inf)
+        top = np.argsort(-ranked, axis=1, kind='stable')[:, :2]
+        # Each starter's best vice is the top starter, or the runner-up for the top starter itself
+        vice_for = np.where(np.arange(squad_size)[None, :] == top[:, :1], top[:, 1:2], top[:, :1])
+        vice_value = np.take_along_axis(value, vice_for, axis=1)
+        armband = np.where(starters, value + (1.0 - play_prob) * vice_value, -np.inf)
+        captain = armband.argmax(axis=1)
+        vice = vice_for[np.arange(n_squads), captain]
+        captain_points = (points[np.arange(n_squads), captain]
+                          + (1.0 - play_prob[np.arange(n_squads), captain]) * points[np.arange(n_squads), vice])
+
+    with span('lineup.bench'):
+        bench, autosub_points = _order_bench(points, positions, play_prob, starters, best, chunk_size)
+
+    starting_points = np.where(feasible, starting_points, np.nan)
+    return {
+        'feasible': feasible,
+        'formation': formation,
+        'starters': starters,
+        'captain': captain,
+        'vice': vice,
+        'bench': bench,
+        'starting_points': starting_points,
+        'captain_points': captain_points,
+        'autosub_points': autosub_points,
+        'expected_points': starting_points + captain_points + autosub_points,
+    }
+
+
+@lru_cache(maxsize=1)
+def _autosub_table() -> np.ndarray:
+    """
+    Which bench players come on, for every case the auto-sub rules can see.
+
+    Indexed by formation (8), outfield bench positions (3^3), bench order
+    (3! = 6), which bench players featured (2^3) and missing starters per
+    position capped at 3 (4^3, since at most three substitutions happen).
+    Each bench player replaces a missing starter of the same position, or
+    one from a position still above its minimum if its own is below its
+    maximum. Built once with NumPy over all ~660k cases.
+
+    Returns:
+        np.ndarray: bool array of shape (8, 27, 6, 8, 64, 3), last axis by bench index
+    """
+    grids = np.meshgrid(np.arange(len(FORMATIONS)), np.arange(3), np.arange(3), np.arange(3),
+                        np.arange(len(_BENCH_ORDERS)), np.arange(8), np.arange(4), np.arange(4), np.arange(4),
+                        indexing='ij')
+    formation, k0, k1, k2, order, pattern, m_def, m_mid, m_fwd = (g.ravel() for g in grids)
+    rows = np.arange(formation.size)
+    kinds = np.stack([k0, k1, k2], axis=1)
+    orders = _BENCH_ORDERS[order]
+    featured = ((pattern[:, None] >> np.arange(3)) & 1).astype(bool)
+    missing = np.stack([m_def, m_mid, m_fwd], axis=1)
+    lineup = FORMATIONS[formation].copy()
+    came_on = np.zeros((formation.size, 3), dtype=bool)
+
+    for slot in range(3):
+        bench = orders[:, slot]
+        kind = kinds[rows, bench]
+        same = missing[rows, kind] > 0
+        swappable = (missing > 0) & (lineup > MIN_OUTFIELD)
+        swap_from = swappable.argmax(axis=1)
+        other = swappable.any(axis=1) & (lineup[rows, kind] < MAX_OUTFIELD[kind])
+        sub = featured[rows, bench] & (same | other)
+        came_on[rows, bench] = sub
+
+        same_rows = rows[sub & same]
+        missing[same_rows, kind[same_rows]] -= 1
+        other_rows = rows[sub & ~same]
+        missing[other_rows, swap_from[other_rows]] -= 1
+        lineup[other_rows, swap_from[other_rows]] -= 1
+        lineup[other_rows, kind[other_rows]] += 1
+
+    return came_on.reshape(len(FORMATIONS), 27, len(_BENCH_ORDERS), 8, 64, 3)
+
+
+def _missing_distribution(absent: np.ndarray) -> np.ndarray:
+    """(squads, 4) distribution of missing starters (0, 1, 2, 3+) from per-player absence odds."""
+    dist = np.zeros((absent.shape[0], 4))
+    dist[:, 0] = 1.0
+    for column in absent.T:
+        q = column[:, None]
+        shifted = np.concatenate([np.zeros((dist.shape[0], 1)), dist[:, :3]], axis=1)
+        shifted[:, 3] += dist[:, 3]
+        dist = dist * (1.0 - q) + shifted * q
+    return dist
+
+
+def _order_bench(points: np.ndarray, positions: np.ndarray, play_prob: np.ndarray, starters: np.ndarray,
+                 formation_index: np.ndarray, chunk_size: int):
+    """
+    Pick the outfield bench order with the highest expected auto-substitution points.
+
+    Expectations are exact under independent availability: the odds of each
+    missing-starter state and each bench availability pattern weight the
+    precomputed auto-sub outcomes, batched as one matrix product per group of
+    squads that share a formation and bench positions.
+    """
+    n_squads = points.shape[0]
+    rows = np.arange(n_squads)[:, None]
+    # Bench goalkeeper first, then the outfield bench by points as a starting order
+    bench_rank = np.where(~starters, np.where(positions == GKP, 1e12, 0.0) + points, -np.inf)
+    bench = np.argsort(-bench_rank, axis=1, kind='stable')[:, :4]
+    outfield = bench[:, 1:]
+
+    # Bench goalkeeper: comes on when the starting goalkeeper misses out
+    starting_gk_absent = np.where(starters & (positions == GKP), 1.0 - play_prob, 0.0).sum(axis=1)
+    gk_points = points[np.arange(n_squads), bench[:, 0]] * starting_gk_absent
+
+    # Points each outfield bench player brings when featuring, and the odds of featuring
+    bench_prob = play_prob[rows, outfield]
+    bench_value = np.where(bench_prob > 0, points[rows, outfield] / np.maximum(bench_prob, 1e-9), 0.0)
+    bits = ((np.arange(8)[:, None] >> np.arange(3)) & 1).astype(bool)
+    pattern_prob = np.prod(np.where(bits[None, :, :], bench_prob[:, None, :], 1.0 - bench_prob[:, None, :]), axis=2)
+
+    dists = [_missing_distribution(np.where(starters & (positions == p), 1.0 - play_prob, 0.0))
+             for p in (DEF, MID, FWD)]
+    state_prob = (dists[0][:, :, None, None] * dists[1][:, None, :, None] * dists[2][:, None, None, :]).reshape(n_squads, 64)
+
+    kinds = np.clip(positions[rows, outfield] - DEF, 0, 2)
+    keys = formation_index * 27 + kinds[:, 0] * 9 + kinds[:, 1] * 3 + kinds[:, 2]
+    table = _autosub_table().reshape(len(FORMATIONS) * 27, len(_BENCH_ORDERS), 8, 64, 3)
+    expected = np.zeros((n_squads, len(_BENCH_ORDERS)))
+    for key in np.unique(keys):
+        # (patterns, orders * states * bench) so each group is one matrix product
+        outcomes = table[key].transpose(1, 0, 2, 3).reshape(8, -1).astype(float)
+        members = np.flatnonzero(keys == key)
+        for start in range(0, members.size, chunk_size):
+            idx = members[start:start + chunk_size]
+            came_on = (pattern_prob[idx] @ outcomes).reshape(idx.size, len(_BENCH_ORDERS), 64, 3)
+            per_state = came_on @ bench_value[idx][:, None, :, None]
+            expected[idx] = (per_state[..., 0] * state_prob[idx][:, None, :]).sum(axis=2)
+
+    best = expected.argmax(axis=1)
+    ordered = np.concatenate([bench[:, :1], np.take_along_axis(outfield, _BENCH_ORDERS[best], axis=1)], axis=1)
+    return ordered, gk_points + expected[np.arange(n_squads), best]
+
+
+class LineupOptimizer:
+    """
+    Lineups for squads of player dicts (TeamOptimizer or ML team output).
+
+    Example:
+        lineups = LineupOptimizer().pick_lineups([team['team'] for team in teams])
+    """
+
+    def __init__(self, captain_by: str = 'expected', upside_quantile: float = 0.9):
+        """
+        Args:
+            captain_by: 'expected' or 'upside' (a high quantile of the player's points)
+            upside_quantile: Quantile used for upside captaincy
+        """
+        self.captain_by = captain_by
+        self.upside_quantile = upside_quantile
+
+    @staticmethod
+    def _points_key(squad: List[Dict], points_key: Optional[str]) -> str:
+        if points_key:
+            return points_key
+        return 'predicted_points' if all('predicted_points' in p for p in squad) else 'adjusted_predicted_points'
+
+    @staticmethod
+    def _play_probability(player: Dict) -> float:
+        chance = player.get('chance_of_playing_next_round')
+        if chance is not None:
+            return min(max(float(chance) / 100.0, 0.0), 1.0)
+        return DEFAULT_PLAY_PROBABILITY
+
+    def pick_lineups(self, squads: Sequence[List[Dict]], points_key: Optional[str] = None,
+                     captain_by: Optional[str] = None) -> List[Dict]:
+        """
+        Pick lineups for many squads in one vectorized pass.
+
+        Args:
+            squads: 15-player squads of dicts with points, 'position' or
+                'element_type', and optionally 'chance_of_playing_next_round'
+            points_key: Key holding expected points (default: 'predicted_points',
+                falling back to 'adjusted_predicted_points')
+            captain_by: Override the instance's captaincy mode
+
+        Returns:
+            List[Dict]: Per squad a success flag, formation, starting XI,
+            captain, vice-captain, bench order and expected points
+        """
+        if not squads:
+            return []
+        with span('lineup.pick_lineups'):
+            size = 15
+            points = np.zeros((len(squads), size))
+            positions = np.zeros((len(squads), size), dtype=int)
+            play_prob = np.full((len(squads), size), DEFAULT_PLAY_PROBABILITY)
+            for s, squad in enumerate(squads):
+                key = self._points_key(squad, points_key)
+                for i, player in enumerate(squad[:size]):
+                    points[s, i] = max(float(player.get(key) or 0.0), 0.0)
+                    positions[s, i] = POSITION_IDS.get(player_position(player), 0)
+                    play_prob[s, i] = self._play_probability(player)
+
+            result = optimize_lineups(points, positions, play_prob, captain_by or self.captain_by,
+                                      self.upside_quantile)
+
+            lineups = []
+            for s, squad in enumerate(squads):
+                if len(squad) != size or not result['feasible'][s]:
+                    lineups.append({'success': False, 'error': 'Squad must have 2 GKP, 5 DEF, 5 MID and 3 FWD'})
+                    continue
+                key = self._points_key(squad, points_key)
+                starters = [squad[i] for i in np.flatnonzero(result['starters'][s])]
+                starters.sort(key=lambda p: (POSITION_IDS.get(player_position(p), 0), -float(p.get(key) or 0.0)))
+                d, m, f = (int(x) for x in result['formation'][s])
+                lineups.append({
+                    'success': True,
+                    'formation': f'{d}-{m}-{f}',
+                    'starting_xi': [_summary(p) for p in starters],
+                    'captain': _summary(squad[result['captain'][s]]),
+                    'vice_captain': _summary(squad[result['vice'][s]]),
+                    'bench': [_summary(squad[i]) for i in result['bench'][s]],
+                    'expected_points': {
+                        'starting_xi': round(float(result['starting_points'][s]), 2),
+                        'captain': round(float(result['captain_points'][s]), 2),
+                        'autosubs': round(float(result['autosub_points'][s]), 2),
+                        'total': round(float(result['expected_points'][s]), 2),
+                    },
+                })
+            return lineups
+
+    def pick_lineup(self, squad: List[Dict], points_key: Optional[str] = None) -> Dict:
+        """Lineup for a single squad (see :meth:`pick_lineups`)."""
+        return self.pick_lineups([squad], points_key)[0]
+
+
+def _summary(player: Dict) -> Dict:
+    return {'id': player.get('id'), 'name': player.get('name') or player.get('web_name'),
+            'position': player_position(player)}
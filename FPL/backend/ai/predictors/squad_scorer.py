@@ -0,0 +1,134 @@
+"""
+Squad Scorer Module
+
+Scores many user squads at once against the model's predictions.
+
+Squads arrive as one ``(N, 16)`` int32 array: 15 player indices in FPL pick
+order (the first 11 start, the last 4 are the bench) and the captain's
+index. Indices address the prediction vectors directly (the server uses FPL
+element ids, with vectors indexed by id), so a batch is scored with a single
+fancy-indexing gather and a row sum, without a Python loop over squads.
+Predictions can be a vector (one gameweek) or a players x gameweeks matrix,
+in which case each squad is scored per gameweek.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from ai.instrumentation import span
+
+
+SQUAD_COLUMNS = 16
+STARTERS = 11
+
+
+def validate_squads(squads: np.ndarray, n_players: int) -> np.ndarray:
+    """
+    Rows that can be scored: 15 distinct known players and a starting captain.
+
+    Args:
+        squads: (N, 16) player indices, captain last
+        n_players: Length of the prediction vectors
+
+    Returns:
+        np.ndarray: (N,) bool
+    """
+    picks, captain = squads[:, :15], squads[:, 15]
+    valid = ((picks >= 0) & (picks < n_players)).all(axis=1)
+    ordered = np.sort(picks, axis=1)
+    valid &= (ordered[:, 1:] != ordered[:, :-1]).all(axis=1)
+    valid &= (picks[:, :STARTERS] == captain[:, None]).any(axis=1)
+    return valid
+
+
+def score_squads(squads: np.ndarray, points: np.ndarray, valid: Optional[np.ndarray] = None,
+                 captain_multiplier: int = 2) -> np.ndarray:
+    """
+    Expected points of each squad's starting XI with the captain's multiplier.
+
+    Args:
+        squads: (N, 16) player indices, captain last
+        points: (players,) or (players, gameweeks) expected points; NaN marks
+            players without a prediction
+        valid: Rows to score (default: :func:`validate_squads`)
+        captain_multiplier: 2, or 3 for a Triple Captain
+
+    Returns:
+        np.ndarray: (N,) or (N, gameweeks) points; NaN for invalid rows
+    """
+    if valid is None:
+        valid = validate_squads(squads, len(points))
+    # Invalid rows gather player 0 and are blanked afterwards, which keeps the
+    # gather a single vectorized operation
+    safe = np.where(valid[:, None], squads, 0)
+    totals = points[safe[:, :STARTERS]].sum(axis=1) + (captain_multiplier - 1) * points[safe[:, 15]]
+    totals[~valid] = np.nan
+    return totals
+
+
+def rank_scores(scores: np.ndarray) -> np.ndarray:
+    """
+    Rank within the batch, 1 for the highest score; ties share the best rank.
+
+    Args:
+        scores: (N,) scores; NaN rows are ranked 0
+
+    Returns:
+        np.ndarray: (N,) int32 ranks
+    """
+    scored = ~np.isnan(scores)
+    ordered = np.sort(-scores[scored])
+    ranks = np.zeros(len(scores), dtype=np.int32)
+    ranks[scored] = np.searchsorted(ordered, -scores[scored], side='left') + 1
+    return ranks
+
+
+class SquadScorer:
+    """
+    Batch scoring of squads against expected and fixture-adjusted predictions.
+
+    Example:
+        scorer = SquadScorer(expected_by_id, adjusted_by_id)
+        result = scorer.score(np.frombuffer(body, dtype='<i4').reshape(-1, 16))
+    """
+
+    def __init__(self, expected: np.ndarray, adjusted: Optional[np.ndarray] = None):
+        """
+        Args:
+            expected: (players,) model predictions, indexed like the squads
+            adjusted: (players,) or (players, gameweeks) fixture-adjusted
+                predictions (default: ``expected``)
+        """
+        self.expected = np.asarray(expected, dtype=float)
+        self.adjusted = self.expected if adjusted is None else np.asarray(adjusted, dtype=float)
+
+    @span('scorer.score')
+    def score(self, squads: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score a batch of squads.
+
+        Args:
+            squads: (N, 16) int32 player indices, captain last
+
+        Returns:
+            Dict[str, np.ndarray]: 'valid' (N,), 'expected_points' (N,),
+            'fixture_adjusted_points' (N,), per-gameweek 'gameweek_points'
+            (N, gameweeks) when the adjusted predictions are a matrix, and
+            'rank' (N,) by fixture-adjusted points (0 for invalid rows)
+        """
+        squads = np.asarray(squads, dtype=np.int32)
+        if squads.ndim != 2 or squads.shape[1] != SQUAD_COLUMNS:
+            raise ValueError(f'Squads must be an (N, {SQUAD_COLUMNS}) array')
+        valid = validate_squads(squads, len(self.expected))
+        # Squads with a player the model has no prediction for cannot be ranked
+        valid &= ~np.isnan(self.expected[np.where(valid[:, None], squads, 0)]).any(axis=1)
+        expected = score_squads(squads, self.expected, valid)
+        adjusted = score_squads(squads, self.adjusted, valid)
+        result = {'valid': valid, 'expected_points': expected}
+        if adjusted.ndim == 2:
+            result['gameweek_points'] = adjusted
+            adjusted = adjusted.sum(axis=1)
+        result['fixture_adjusted_points'] = adjusted
+        result['rank'] = rank_scores(adjusted)
+        return result
@@ -0,0 +1,221 @@
+"""
+Squad Simulator Module
+
+Monte Carlo distribution of a squad's points around the model's predictions.
+
+Each player's score is drawn from a gamma distribution whose mean is the
+predicted points and whose spread depends on position (attackers haul and
+blank more than goalkeepers). A shared gamma factor per club, with mean 1,
+correlates teammates: clean sheets and goal-heavy games lift the whole
+defence or attack together. Expected totals are unchanged by the noise,
+but the simulation adds percentile bands, the chance of beating a target,
+and how much the captain pick is worth.
+
+Samples are drawn in chunks as ``(chunk, players)`` NumPy arrays, so memory
+stays bounded however many samples are requested, and a seeded generator
+makes results reproducible (and therefore cacheable).
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ai.instrumentation import span
+
+
+# Coefficient of variation of a player's points by position
+DEFAULT_POSITION_CV = {'GKP': 0.6, 'DEF': 0.8, 'MID': 0.95, 'FWD': 1.05}
+
+POSITION_NAMES = {1: 'GKP', 2: 'DEF', 3: 'MID', 4: 'FWD'}
+
+# Minimum starters per position in a valid FPL lineup (exactly one goalkeeper)
+MIN_STARTERS = {'DEF': 3, 'MID': 2, 'FWD': 1}
+
+
+def player_position(player: Dict) -> Optional[str]:
+    """Position name ('GKP', 'DEF', 'MID', 'FWD') from 'position' or 'element_type'."""
+    position = player.get('position')
+    if position in DEFAULT_POSITION_CV:
+        return position
+    return POSITION_NAMES.get(player.get('element_type'))
+
+
+def default_starters(means: np.ndarray, positions: Sequence[Optional[str]]) -> List[int]:
+    """
+    Pick a starting XI by expected points under FPL formation rules.
+
+    The best goalkeeper and the positional minimums (3 DEF, 2 MID, 1 FWD)
+    are taken first, then the best remaining outfield players up to 11.
+    Squads without position information start their 11 highest means.
+
+    Args:
+        means: Expected points per squad member
+        positions: Position name per squad member (None if unknown)
+
+    Returns:
+        List[int]: Indices of the starters
+    """
+    order = [int(i) for i in np.argsort(-means, kind='stable')]
+    if not any(positions):
+        return order[:11]
+    starters = [i for i in order if positions[i] == 'GKP'][:1]
+    for position, count in MIN_STARTERS.items():
+        starters += [i for i in order if positions[i] == position][:count]
+    chosen = set(starters)
+    for i in order:
+        if len(starters) >= 11:
+            break
+        if i not in chosen and positions[i] not in ('GKP', None):
+            starters.append(i)
+            chosen.add(i)
+    return starters
+
+
+class SquadSimulator:
+    """
+    Vectorized Monte Carlo simulation of squad scores.
+
+    Example:
+        simulator = SquadSimulator(n_samples=20000, seed=7)
+        result = simulator.simulate(team['team'], threshold=60)
+        result['percentiles']['p90'], result['prob_above_threshold']
+    """
+
+    def __init__(self, n_samples: int = 20000, chunk_size: int = 5000, seed: Optional[int] = 0,
+                 position_cv: Optional[Dict[str, float]] = None, team_cv: float = 0.25,
+                 haul_factor: float = 2.0, min_haul_points: float = 6.0):
+        """
+        Args:
+            n_samples: Simulated gameweeks per squad
+            chunk_size: Samples drawn per batch (bounds memory at chunk_size x players)
+            seed: RNG seed; None for a fresh seed each call
+            position_cv: Coefficient of variation per position (default: DEFAULT_POSITION_CV)
+            team_cv: Coefficient of variation of the shared per-club factor (0 = independent players)
+            haul_factor: A player "hauls" when scoring at least this multiple of the expectation
+            min_haul_points: Floor on the haul line, so low or zero expectations do not
+                count every blank as a haul
+        """
+        self.n_samples = n_samples
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.position_cv = dict(DEFAULT_POSITION_CV, **(position_cv or {}))
+        self.team_cv = team_cv
+        self.haul_factor = haul_factor
+        self.min_haul_points = min_haul_points
+
+    def expected_points(self, squad: List[Dict], starters: Optional[Sequence[int]] = None,
+                        points_key: str = 'predicted_points') -> float:
+        """Closed-form expected total (starters plus the captain counted twice), without sampling."""
+        means = np.array([max(float(p.get(points_key) or 0.0), 0.0) for p in squad])
+        if not len(means):
+            return 0.0
+        if starters is None:
+            starters = default_starters(means, [player_position(p) for p in squad])
+        xi_means = means[np.asarray(starters, dtype=np.intp)]
+        return float(xi_means.sum() + xi_means.max())
+
+    def simulate(self, squad: List[Dict], threshold: Optional[float] = None,
+                 starters: Optional[Sequence[int]] = None, points_key: str = 'predicted_points',
+                 captain_options: int = 3, percentiles: Sequence[int] = (5, 25, 50, 75, 95)) -> Dict:
+        """
+        Simulate a squad's points.
+
+        The starters' points count, and the captain's count twice. The captain
+        is the starter with the highest expectation; the alternatives are
+        scored by what they would have added instead.
+
+        Args:
+            squad: Player dicts with ``points_key``, and ideally 'id', 'name',
+                'position' (or 'element_type') and 'team'
+            threshold: Total to beat (None: skip the probability)
+            starters: Indices into ``squad`` of the starting XI (default: best valid XI)
+            points_key: Key holding each player's expected points
+            captain_options: Number of captain candidates to compare
+            percentiles: Percentiles of the total to report
+
+        Returns:
+            Dict: Success flag, expected total, standard deviation, percentile
+            bands, threshold probability, captain analysis and per-player haul odds
+        """
+        if not squad:
+            return {'success': False, 'error': 'Empty squad'}
+        try:
+            with span('simulator.simulate'):
+                return self._simulate(squad, threshold, starters, points_key, captain_options, percentiles)
+        except (KeyError, TypeError, ValueError) as e:
+            return {'success': False, 'error': str(e)}
+
+    def _simulate(self, squad: List[Dict], threshold: Optional[float], starters: Optional[Sequence[int]],
+                  points_key: str, captain_options: int, percentiles: Sequence[int]) -> Dict:
+        means = np.array([max(float(p.get(points_key) or 0.0), 0.0) for p in squad])
+        positions = [player_position(p) for p in squad]
+        if starters is None:
+            starters = default_starters(means, positions)
+        starters = np.asarray(starters, dtype=np.intp)
+
+        xi_means = means[starters]
+        cv = np.array([self.position_cv.get(positions[i], 1.0) for i in starters])
+        shape = 1.0 / np.square(cv)
+        scale = xi_means / shape
+
+        # Column of the shared club factor for each starter
+        clubs = [squad[i].get('team') for i in starters]
+        _, club_index = np.unique(np.array([str(c) for c in clubs]), return_inverse=True)
+        n_clubs = int(club_index.max()) + 1
+
+        candidates = [int(i) for i in np.argsort(-xi_means, kind='stable')[:max(1, captain_options)]]
+        captain = candidates[0]
+
+        rng = np.random.default_rng(self.seed)
+        totals = np.empty(self.n_samples)
+        candidate_sum = np.zeros(len(candidates))
+        candidate_best = np.zeros(len(candidates))
+        candidate_regret = np.zeros(len(candidates))
+        hauls = np.zeros(len(starters))
+        haul_line = np.maximum(self.haul_factor * xi_means, self.min_haul_points)
+
+        for start in range(0, self.n_samples, self.chunk_size):
+            size = min(self.chunk_size, self.n_samples - start)
+            points = rng.gamma(shape, scale, size=(size, len(starters)))
+            if self.team_cv > 0:
+                team_shape = 1.0 / self.team_cv ** 2
+                factors = rng.gamma(team_shape, 1.0 / team_shape, size=(size, n_clubs))
+                points *= factors[:, club_index]
+
+            best = points.max(axis=1)
+            picked = points[:, candidates]
+            totals[start:start + size] = points.sum(axis=1) + points[:, captain]
+            candidate_sum += picked.sum(axis=0)
+            candidate_best += (picked >= best[:, None]).sum(axis=0)
+            candidate_regret += (best[:, None] - picked).sum(axis=0)
+            hauls += (points >= haul_line).sum(axis=0)
+
+        n = float(self.n_samples)
+        bands = np.percentile(totals, percentiles)
+        options = [{
+            'id': squad[starters[c]].get('id'),
+            'name': squad[starters[c]].get('name'),
+            'expected_gain': round(float(candidate_sum[k] / n), 3),
+            'prob_top_scorer': round(float(candidate_best[k] / n), 4),
+            'expected_regret': round(float(candidate_regret[k] / n), 3),
+        } for k, c in enumerate(candidates)]
+
+        result = {
+            'success': True,
+            'samples': self.n_samples,
+            'expected_points': round(float(totals.mean()), 3),
+            'std': round(float(totals.std()), 3),
+            'percentiles': {f'p{p}': round(float(v), 3) for p, v in zip(percentiles, bands)},
+            'captain': options[0],
+            'captain_options': options,
+            # Extra points from captaining the pick over leaving the armband unused
+            'captain_gain': options[0]['expected_gain'],
+            'starters': [squad[i].get('id') for i in starters],
+            'haul_probability': {
+                squad[i].get('id'): round(float(hauls[k] / n), 4) for k, i in enumerate(starters)
+            },
+        }
+        if threshold is not None:
+            result['threshold'] = threshold
+            result['prob_above_threshold'] = round(float((totals > threshold).mean()), 4)
+        return result
@@ -5,9 +5,12 @@ This module contains algorithms for creating optimal FPL teams.
 Separated from the ML model to allow for different optimization strategies.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import numpy as np
 
+from ai.instrumentation import span
+from ai.predictors.squad_simulator import SquadSimulator
+
 
 class TeamOptimizer:
     """
@@ -17,7 +20,12 @@ class TeamOptimizer:
     within budget constraints and FPL formation rules.
     """
     
-    def __init__(self):
+    def __init__(self, simulator: Optional[SquadSimulator] = None):
+        """
+        Args:
+            simulator: When given, team stats include a simulated points distribution
+        """
+        self.simulator = simulator
         self.formation_limits = {
             'GKP': {'min': 2, 'max': 2},
             'DEF': {'min': 5, 'max': 5}, 
@@ -26,6 +34,7 @@ class TeamOptimizer:
         }
         self.team_limits = 3  # Max 3 players from same team
         
+    @span('optimizer.optimize_team')
     def optimize_team(self, players: List[Dict], budget: float = 100.0) -> Dict:
         """
         Create an optimized team based on predicted points and budget.
@@ -128,13 +137,19 @@ class TeamOptimizer:
         # Convert cost back to millions
         total_cost_millions = total_cost / 10.0
         
-        return {
+        stats = {
             'total_predicted_points': round(total_predicted_points, 2),
             'total_cost': total_cost_millions,
             'remaining_budget': round(100.0 - total_cost_millions, 1),
             'players_count': len(team),
             'average_predicted_points': round(total_predicted_points / len(team), 2) if team else 0
         }
+        if self.simulator is not None and team:
+            # Value strategies overwrite adjusted_predicted_points with scores;
+            # simulate the underlying predictions when the players carry them
+            points_key = 'predicted_points' if all('predicted_points' in p for p in team) else 'adjusted_predicted_points'
+            stats['simulation'] = self.simulator.simulate(team, points_key=points_key)
+        return stats
     
     def _get_formation_summary(self, team: List[Dict]) -> Dict:
         """Get formation breakdown of the selected team."""
@@ -149,6 +164,7 @@ class TeamOptimizer:
                 
         return formation
     
+    @span('optimizer.generate_multiple_strategies')
     def generate_multiple_strategies(self, players: List[Dict], 
                                    budget: float = 100.0, 
                                    num_strategies: int = 3) -> Dict:
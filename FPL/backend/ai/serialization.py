@@ -0,0 +1,110 @@
+"""
+Serialization Module
+
+JSON encoding and decoding for FPL payloads and API responses.
+
+orjson is used when installed: it parses raw response bytes without an
+intermediate ``str`` and writes NumPy arrays and scalars natively. msgspec,
+when installed, decodes bytes straight into typed structs. Both are
+optional; without them the stdlib ``json`` module is used, with a default
+hook that converts NumPy values.
+"""
+
+import json
+from typing import Any, Optional, Type, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def _default(obj: Any) -> Any:
+    """Convert values the encoders do not handle natively."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps_stdlib(obj: Any) -> bytes:
+    """Encode with the stdlib ``json`` module (compact, UTF-8)."""
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_default).encode('utf-8')
+
+
+def loads_stdlib(data: Union[bytes, str]) -> Any:
+    """Decode with the stdlib ``json`` module."""
+    return json.loads(data)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        """
+        Encode an object as compact UTF-8 JSON bytes.
+
+        NumPy arrays and scalars are written directly, without converting
+        them to Python lists and floats first.
+
+        Args:
+            obj: Object to encode
+
+        Returns:
+            bytes: JSON document
+        """
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    def loads(data: Union[bytes, str]) -> Any:
+        """
+        Decode a JSON document from bytes or text.
+
+        Args:
+            data: JSON document, typically ``response.content``
+
+        Returns:
+            Any: Decoded object
+        """
+        return orjson.loads(data)
+else:  # pragma: no cover - exercised only without orjson
+    dumps = dumps_stdlib
+    loads = loads_stdlib
+
+
+def decode(data: Union[bytes, str], type: Optional[Type] = None) -> Any:
+    """
+    Decode JSON, optionally straight into a typed structure.
+
+    With msgspec installed and ``type`` given (a ``msgspec.Struct``, or a
+    container of them such as ``List[Fixture]``), fields the type does not
+    declare are skipped while parsing. Without msgspec the document is
+    decoded to builtins and converted with ``type.from_dict`` when the type
+    provides one.
+
+    Args:
+        data: JSON document
+        type: Target type (default: plain builtins)
+
+    Returns:
+        Any: Decoded object
+    """
+    if type is None:
+        return loads(data)
+    if msgspec is not None:
+        return msgspec.json.decode(data, type=type)
+    obj = loads(data)
+    from_dict = getattr(type, 'from_dict', None)
+    return from_dict(obj) if from_dict is not None else obj
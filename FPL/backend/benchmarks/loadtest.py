@@ -0,0 +1,323 @@
+"""
+Load Test Harness
+
+Drives a weighted mix of requests (opponents, player lists, ML endpoints)
+against the FastAPI server with a fixed number of concurrent virtual users,
+and reports throughput, latency percentiles and where the server spent its
+time: upstream fetches, CPU work in the workers, JSON serialization, and
+queueing/IPC around the process pool.
+
+The server runs in-process (through ``httpx.ASGITransport``, the default) or
+is reached over HTTP with ``--target``. Either way it should point at the
+local FPL stand-in (``python -m benchmarks.standin``), not the real API.
+Sweeping several ``--concurrency`` levels shows where throughput stops
+growing, which is the data for sizing ``FPL_WORKERS``.
+
+Usage:
+    python -m benchmarks.standin --port 8001 --latency-ms 50 &
+    python -m benchmarks.loadtest --upstream http://127.0.0.1:8001/api/ \\
+        --concurrency 1 4 16 --duration 20 --mix opponents=4,players=3,ml_players=2,suggestions=1
+    python -m benchmarks.loadtest --target http://127.0.0.1:8000 --concurrency 8 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+
+# Endpoint name -> builder returning (path, query params) for one request
+ENDPOINTS: Dict[str, Callable[[random.Random], Tuple[str, Dict]]] = {
+    'opponents': lambda rng: ('/api/fpl/opponents', {}),
+    'fixtures': lambda rng: ('/api/fixtures/analyze', {'window_size': rng.choice([3, 5, 8])}),
+    'players': lambda rng: ('/api/players/analyze', {'position': rng.choice(['all', '1', '2', '3', '4'])}),
+    'players_stream': lambda rng: ('/api/players/stream', {'fields': 'id,second_name,team,price_value,total_points'}),
+    'ml_players': lambda rng: ('/api/ml/players', {}),
+    'best_team': lambda rng: ('/api/ml/best-team', {'budget': rng.choice([95.0, 100.0, 105.0])}),
+    'suggestions': lambda rng: ('/api/ml/team-suggestions', {'budget': rng.choice([95.0, 100.0, 105.0])}),
+    'strategies': lambda rng: ('/api/ml/strategies', {'budget': rng.choice([95.0, 100.0, 105.0])}),
+}
+
+DEFAULT_MIX = 'opponents=4,players=3,ml_players=2,suggestions=1'
+
+# Leaf stages that wait on the FPL API (worker fetches include decoding the
+# body). None of them wrap CPU-bound work such as the team-strength update.
+UPSTREAM_STAGES = ('fetcher.bootstrap', 'fetcher.fixtures', 'fetcher.element_summary',
+                   'fetcher.event_live', 'analyzer.fetch_data')
+
+_METRIC_LINE = re.compile(r'^fpl_stage_duration_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse 'name=weight,...' into endpoint weights.
+
+    Raises:
+        ValueError: Unknown endpoint name or non-positive total weight
+    """
+    mix = {}
+    for item in spec.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f'Unknown endpoint {name!r}; choose from {sorted(ENDPOINTS)}')
+        mix[name] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise ValueError('Request mix needs a positive total weight')
+    return mix
+
+
+def parse_stage_metrics(text: str) -> Dict[str, Tuple[int, float]]:
+    """Extract (count, total seconds) per stage from the server's /metrics text."""
+    stages: Dict[str, List[float]] = {}
+    for line in text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            entry = stages.setdefault(stage, [0, 0.0])
+            if kind == 'count':
+                entry[0] = int(float(value))
+            else:
+                entry[1] = float(value)
+    return {stage: (int(count), total) for stage, (count, total) in stages.items()}
+
+
+def time_split(before: Dict[str, Tuple[int, float]], after: Dict[str, Tuple[int, float]]) -> Dict[str, float]:
+    """
+    Attribute server time between two /metrics scrapes.
+
+    Returns:
+        Dict[str, float]: Seconds spent on upstream fetches, CPU work
+        (worker tasks minus their fetches, plus in-process payload builds),
+        serialization, and queueing/IPC (pool wall time not spent in a task)
+    """
+    delta = {stage: total - before.get(stage, (0, 0.0))[1] for stage, (_, total) in after.items()}
+    upstream_worker = sum(v for s, v in delta.items() if s in UPSTREAM_STAGES)
+    upstream_server = sum(v for s, v in delta.items() if s.startswith('server.') and s.endswith('.upstream'))
+    worker_tasks = sum(v for s, v in delta.items() if s.startswith('worker.'))
+    pool_wall = sum(v for s, v in delta.items() if s.startswith('server.pool.'))
+    builds = sum(v for s, v in delta.items() if s.startswith('server.') and s.endswith('.build'))
+    return {
+        'upstream': upstream_worker + upstream_server,
+        'cpu': max(0.0, worker_tasks - upstream_worker) + builds,
+        'serialization': delta.get('server.serialize', 0.0),
+        'queue_ipc': max(0.0, pool_wall - worker_tasks),
+    }
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """Latency percentiles in milliseconds."""
+    if not latencies:
+        return {}
+    values = np.asarray(latencies) * 1000.0
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p95': float(p95), 'p99': float(p99),
+            'mean': float(values.mean()), 'max': float(values.max())}
+
+
+class LoadTest:
+    """
+    Closed-loop load generator: each virtual user sends its next request as
+    soon as the previous one completes (plus optional think time).
+    """
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], seed: int = 0,
+                 think_time: float = 0.0, timeout: float = 60.0):
+        """
+        Args:
+            client: Client bound to the server (ASGI transport or HTTP base URL)
+            mix: Endpoint weights from :func:`parse_mix`
+            seed: Seed for request selection and parameters
+            think_time: Seconds each user pauses between requests
+            timeout: Per-request timeout in seconds
+        """
+        self.client = client
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.seed = seed
+        self.think_time = think_time
+        self.timeout = timeout
+
+    async def _user(self, rng: random.Random, deadline: float, remaining: List[int], results: List) -> None:
+        while time.perf_counter() < deadline and remaining[0] != 0:
+            remaining[0] -= 1
+            name = rng.choices(self.names, self.weights)[0]
+            path, params = ENDPOINTS[name](rng)
+            start = time.perf_counter()
+            try:
+                response = await self.client.get(path, params=params, timeout=self.timeout)
+                await response.aread()
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            results.append((name, status, time.perf_counter() - start))
+            if self.think_time:
+                await asyncio.sleep(self.think_time)
+
+    async def run(self, concurrency: int, duration: float, max_requests: Optional[int] = None) -> Dict:
+        """
+        Run one load level and summarize it.
+
+        Args:
+            concurrency: Number of virtual users
+            duration: Seconds to keep sending requests
+            max_requests: Stop after this many requests (default: duration only)
+
+        Returns:
+            Dict: Throughput, latency percentiles, status counts, per-endpoint
+            stats and the server time split for this level
+        """
+        before = parse_stage_metrics((await self.client.get('/metrics')).text)
+        results: List[Tuple[str, object, float]] = []
+        remaining = [max_requests if max_requests else -1]
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            self._user(random.Random(self.seed * 1000 + k), deadline, remaining, results)
+            for k in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+        after = parse_stage_metrics((await self.client.get('/metrics')).text)
+
+        statuses: Dict[str, int] = {}
+        endpoints: Dict[str, Dict] = {}
+        for name in self.names:
+            latencies = [seconds for n, _, seconds in results if n == name]
+            if latencies:
+                endpoints[name] = dict(count=len(latencies), latency_ms=latency_summary(latencies))
+        for _, status, _ in results:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+
+        split = time_split(before, after)
+        completed = len(results)
+        return {
+            'concurrency': concurrency,
+            'requests': completed,
+            'errors': errors,
+            'status': statuses,
+            'duration_s': elapsed,
+            'throughput_rps': completed / elapsed if elapsed else 0.0,
+            'latency_ms': latency_summary([seconds for _, _, seconds in results]),
+            'endpoints': endpoints,
+            'time_split_s': split,
+            'time_split_ms_per_request': {k: v * 1000.0 / completed for k, v in split.items()} if completed else {},
+        }
+
+
+def start_standin(port: int, snapshot_dir: Optional[str], latency_ms: float) -> subprocess.Popen:
+    """Launch ``benchmarks.standin`` in a subprocess and wait until it answers."""
+    cmd = [sys.executable, '-m', 'benchmarks.standin', '--port', str(port), '--latency-ms', str(latency_ms)]
+    if snapshot_dir:
+        cmd += ['--snapshot-dir', snapshot_dir]
+    process = subprocess.Popen(cmd)
+    url = f'http://127.0.0.1:{port}/__standin/stats'
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError(f'Stand-in exited during startup with code {process.returncode}')
+        try:
+            httpx.get(url, timeout=0.5)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('Stand-in did not start within 10s')
+
+
+async def run_levels(args: argparse.Namespace) -> Dict:
+    mix = parse_mix(args.mix)
+    levels = []
+    if args.target:
+        async with httpx.AsyncClient(base_url=args.target) as client:
+            load = LoadTest(client, mix, args.seed, args.think_time, args.timeout)
+            for concurrency in args.concurrency:
+                levels.append(await load.run(concurrency, args.duration, args.requests))
+    else:
+        # Workers inherit the environment, so set the upstream before they start
+        os.environ['FPL_API_BASE_URL'] = args.upstream
+        if args.workers:
+            os.environ['FPL_WORKERS'] = str(args.workers)
+        from server import main as server_main
+
+        async with server_main.lifespan(server_main.app):
+            transport = httpx.ASGITransport(app=server_main.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://app') as client:
+                load = LoadTest(client, mix, args.seed, args.think_time, args.timeout)
+                if args.warmup:
+                    await load.run(1, args.duration, args.warmup)
+                for concurrency in args.concurrency:
+                    levels.append(await load.run(concurrency, args.duration, args.requests))
+    return {
+        'meta': {
+            'mode': 'http' if args.target else 'asgi',
+            'target': args.target,
+            'upstream': None if args.target else args.upstream,
+            'mix': mix,
+            'duration_s': args.duration,
+            'seed': args.seed,
+            'python': sys.version.split()[0],
+        },
+        'levels': levels,
+    }
+
+
+def print_report(report: Dict) -> None:
+    print(f"{'users':>5} {'req':>6} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}   "
+          f"{'upstream':>9} {'cpu':>9} {'serialize':>9} {'queue':>9}  (ms/request)")
+    for level in report['levels']:
+        latency = level['latency_ms'] or {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        split = level['time_split_ms_per_request'] or dict.fromkeys(('upstream', 'cpu', 'serialization', 'queue_ipc'), 0.0)
+        print(f"{level['concurrency']:>5} {level['requests']:>6} {level['errors']:>5} "
+              f"{level['throughput_rps']:>8.1f} {latency['p50']:>8.1f} {latency['p95']:>8.1f} {latency['p99']:>8.1f}   "
+              f"{split['upstream']:>9.2f} {split['cpu']:>9.2f} {split['serialization']:>9.2f} {split['queue_ipc']:>9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load-test the FastAPI server')
+    parser.add_argument('--target', default=None,
+                        help='Base URL of a running server (default: run the app in-process over ASGI)')
+    parser.add_argument('--upstream', default='http://127.0.0.1:8001/api/',
+                        help='FPL API root for the in-process server (the local stand-in)')
+    parser.add_argument('--start-standin', action='store_true',
+                        help='Launch benchmarks.standin on the --upstream port for the run')
+    parser.add_argument('--standin-latency-ms', type=float, default=0.0)
+    parser.add_argument('--snapshot-dir', default=None, help='Snapshot directory for --start-standin')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Weighted endpoints, from {sorted(ENDPOINTS)}')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='Virtual users per level')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per level')
+    parser.add_argument('--requests', type=int, default=None, help='Cap on requests per level')
+    parser.add_argument('--warmup', type=int, default=10, help='Requests before the first level (in-process only)')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Seconds between a user\'s requests')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    parser.add_argument('--workers', type=int, default=None, help='FPL_WORKERS for the in-process server')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='Write the JSON report here')
+    args = parser.parse_args()
+
+    standin = None
+    if args.start_standin:
+        port = httpx.URL(args.upstream).port or 8001
+        standin = start_standin(port, args.snapshot_dir, args.standin_latency_ms)
+    try:
+        report = asyncio.run(run_levels(args))
+    finally:
+        if standin is not None:
+            standin.terminate()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,383 @@
+"""
+Benchmark Fixture Generator
+
+Writes the recorded API payloads under ``benchmarks/fixtures``. The payloads
+follow the FPL API schema field-for-field (bootstrap elements carry the full
+~100 keys) but their values come from a seeded generator, so the files are
+reproducible and small enough to check in.
+
+Usage:
+    python -m benchmarks.make_fixtures
+"""
+
+import gzip
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+SEED = 20250815
+NUM_PLAYERS = 700
+FINISHED_GAMEWEEKS = 8
+ELEMENT_SUMMARY_IDS = [1, 2, 3, 4, 5, 6, 7, 8]
+
+TEAMS = [
+    ('Arsenal', 'ARS'), ('Aston Villa', 'AVL'), ('Bournemouth', 'BOU'), ('Brentford', 'BRE'),
+    ('Brighton', 'BHA'), ('Burnley', 'BUR'), ('Chelsea', 'CHE'), ('Crystal Palace', 'CRY'),
+    ('Everton', 'EVE'), ('Fulham', 'FUL'), ('Leeds', 'LEE'), ('Liverpool', 'LIV'),
+    ('Man City', 'MCI'), ('Man Utd', 'MUN'), ('Newcastle', 'NEW'), ("Nott'm Forest", 'NFO'),
+    ('Spurs', 'TOT'), ('Sunderland', 'SUN'), ('West Ham', 'WHU'), ('Wolves', 'WOL'),
+]
+
+ELEMENT_TYPES = [
+    {'id': 1, 'plural_name': 'Goalkeepers', 'plural_name_short': 'GKP', 'singular_name': 'Goalkeeper',
+     'singular_name_short': 'GKP', 'squad_select': 2, 'squad_min_play': 1, 'squad_max_play': 1},
+    {'id': 2, 'plural_name': 'Defenders', 'plural_name_short': 'DEF', 'singular_name': 'Defender',
+     'singular_name_short': 'DEF', 'squad_select': 5, 'squad_min_play': 3, 'squad_max_play': 5},
+    {'id': 3, 'plural_name': 'Midfielders', 'plural_name_short': 'MID', 'singular_name': 'Midfielder',
+     'singular_name_short': 'MID', 'squad_select': 5, 'squad_min_play': 2, 'squad_max_play': 5},
+    {'id': 4, 'plural_name': 'Forwards', 'plural_name_short': 'FWD', 'singular_name': 'Forward',
+     'singular_name_short': 'FWD', 'squad_select': 3, 'squad_min_play': 1, 'squad_max_play': 3},
+]
+
+# Element keys that the FPL API serves but the pipeline never reads
+_EXTRA_INT_KEYS = [
+    'code', 'cost_change_start', 'cost_change_start_fall', 'event_points',
+    'own_goals', 'penalties_saved', 'penalties_missed', 'yellow_cards', 'red_cards', 'saves',
+    'transfers_in', 'transfers_out', 'influence_rank', 'influence_rank_type', 'creativity_rank',
+    'creativity_rank_type', 'threat_rank', 'threat_rank_type', 'ict_index_rank', 'ict_index_rank_type',
+    'corners_and_indirect_freekicks_order', 'direct_freekicks_order', 'penalties_order',
+    'now_cost_rank', 'now_cost_rank_type', 'form_rank', 'form_rank_type', 'points_per_game_rank',
+    'points_per_game_rank_type', 'selected_rank', 'selected_rank_type', 'squad_number',
+    'team_code', 'region', 'team_join_date_year', 'birth_date_year', 'clearances_blocks_interceptions',
+    'recoveries', 'tackles', 'defensive_contribution', 'opta_code_num', 'scout_risks_count',
+]
+_EXTRA_STR_KEYS = [
+    'ep_next', 'ep_this', 'value_form', 'value_season', 'expected_goals', 'expected_assists',
+    'expected_goal_involvements', 'expected_goals_conceded', 'expected_goals_per_90',
+    'saves_per_90', 'expected_assists_per_90', 'expected_goal_involvements_per_90',
+    'expected_goals_conceded_per_90', 'goals_conceded_per_90', 'starts_per_90', 'clean_sheets_per_90',
+    'defensive_contribution_per_90', 'photo', 'news', 'scout_news_link', 'opta_code',
+]
+_EXTRA_BOOL_KEYS = [
+    'in_dreamteam', 'special', 'removed', 'can_transact', 'can_select', 'has_temporary_code',
+    'corners_and_indirect_freekicks_text', 'direct_freekicks_text', 'penalties_text',
+]
+
+
+def _price(rng: np.random.Generator, position: int) -> int:
+    low, high = {1: (40, 60), 2: (40, 75), 3: (45, 145), 4: (45, 150)}[position]
+    return int(rng.integers(low, high) // 5 * 5)
+
+
+def _chance_of_playing(rng: np.random.Generator, status: str):
+    # The API leaves it null for fit players and quotes 0/25/50/75 (100 once back) otherwise
+    if status == 'a':
+        return None if rng.random() < 0.9 else 100
+    if status in ('i', 'u'):
+        return 0
+    return int(rng.choice([25, 50, 75]))
+
+
+def make_elements(rng: np.random.Generator, num_players: int, gameweeks: int) -> List[Dict]:
+    """Generate bootstrap elements with the full API key set."""
+    positions = rng.choice([1, 2, 3, 4], size=num_players, p=[0.11, 0.34, 0.40, 0.15])
+    elements = []
+    for i in range(num_players):
+        position = int(positions[i])
+        now_cost = _price(rng, position)
+        quality = now_cost / 100.0
+        games = int(rng.integers(0, gameweeks + 1))
+        minutes = int(games * rng.integers(20, 91))
+        ppg = round(float(rng.gamma(2.0, 1.2) * quality) if games else 0.0, 1)
+        total_points = int(round(ppg * games))
+        element = {
+            'id': i + 1,
+            'first_name': f'Player{i + 1}',
+            'second_name': f'Surname{i + 1}',
+            'web_name': f'Surname{i + 1}',
+            'team': int(rng.integers(1, len(TEAMS) + 1)),
+            'element_type': position,
+            'status': str(rng.choice(['a', 'a', 'a', 'a', 'd', 'i', 'u'])),
+            'now_cost': now_cost,
+            'total_points': total_points,
+            'form': f'{max(0.0, ppg + rng.normal(0, 1.5)):.1f}',
+            'points_per_game': f'{ppg:.1f}',
+            'selected_by_percent': f'{min(80.0, rng.gamma(1.2, 4.0) * quality):.1f}',
+            'minutes': minutes,
+            'starts': int(min(games, minutes // 60)),
+            'goals_scored': int(rng.poisson(0.05 * games * position)),
+            'assists': int(rng.poisson(0.08 * games)),
+            'clean_sheets': int(rng.binomial(games, 0.3)) if position <= 3 else 0,
+            'goals_conceded': int(rng.poisson(1.2 * games)),
+            'bonus': int(rng.poisson(0.3 * games)),
+            'bps': int(rng.integers(0, 30) * games),
+            'influence': f'{rng.uniform(0, 40) * games:.1f}',
+            'creativity': f'{rng.uniform(0, 40) * games:.1f}',
+            'threat': f'{rng.uniform(0, 40) * games:.1f}',
+            'ict_index': f'{rng.uniform(0, 12) * games:.1f}',
+            'dreamteam_count': int(rng.binomial(games, 0.05)),
+            'transfers_in_event': int(rng.gamma(0.6, 30000)),
+            'transfers_out_event': int(rng.gamma(0.6, 30000)),
+        }
+        # A player moves at most one price step (0.1m) per night, rarely two
+        cost_change_event = int(rng.choice([-1, 0, 1, 2], p=[0.08, 0.84, 0.07, 0.01]))
+        element.update({
+            'chance_of_playing_next_round': _chance_of_playing(rng, element['status']),
+            'chance_of_playing_this_round': _chance_of_playing(rng, element['status']),
+            'cost_change_event': cost_change_event,
+            'cost_change_event_fall': -cost_change_event,
+        })
+        for key in _EXTRA_INT_KEYS:
+            element[key] = int(rng.integers(0, 500))
+        for key in _EXTRA_STR_KEYS:
+            element[key] = f'{rng.uniform(0, 5):.2f}'
+        for key in _EXTRA_BOOL_KEYS:
+            element[key] = bool(rng.integers(0, 2))
+        elements.append(element)
+    return elements
+
+
+def make_fixtures(rng: np.random.Generator, finished_gameweeks: int) -> List[Dict]:
+    """Generate a 38-gameweek, 380-fixture schedule (one round-robin, reversed)."""
+    team_ids = list(range(1, len(TEAMS) + 1))
+    rounds = []
+    rotation = team_ids[1:]
+    for _ in range(len(team_ids) - 1):
+        lineup = [team_ids[0]] + rotation
+        rounds.append([(lineup[k], lineup[-1 - k]) for k in range(len(lineup) // 2)])
+        rotation = rotation[-1:] + rotation[:-1]
+    rounds += [[(a, h) for h, a in pairing] for pairing in rounds]
+
+    strength = {team_id: float(rng.uniform(2, 5)) for team_id in team_ids}
+    fixtures = []
+    fixture_id = 1
+    for gameweek, pairing in enumerate(rounds, start=1):
+        for home, away in pairing:
+            finished = gameweek <= finished_gameweeks
+            fixtures.append({
+                'code': 2500000 + fixture_id,
+                'event': gameweek,
+                'finished': finished,
+                'finished_provisional': finished,
+                'id': fixture_id,
+                'kickoff_time': f'2025-{8 + (gameweek - 1) // 4:02d}-{1 + 7 * ((gameweek - 1) % 4):02d}T15:00:00Z',
+                'minutes': 90 if finished else 0,
+                'provisional_start_time': False,
+                'started': finished,
+                'team_a': away,
+                'team_a_score': int(rng.poisson(1.1)) if finished else None,
+                'team_h': home,
+                'team_h_score': int(rng.poisson(1.5)) if finished else None,
+                'stats': [],
+                'team_h_difficulty': int(np.clip(round(strength[away]), 2, 5)),
+                'team_a_difficulty': int(np.clip(round(strength[home] + 0.3), 2, 5)),
+                'pulse_id': 120000 + fixture_id,
+            })
+            fixture_id += 1
+    return fixtures
+
+
+def make_events(finished_gameweeks: int) -> List[Dict]:
+    """Generate the 38 bootstrap events around the current gameweek."""
+    return [{
+        'id': gameweek,
+        'name': f'Gameweek {gameweek}',
+        'deadline_time': f'2025-{8 + (gameweek - 1) // 4:02d}-{1 + 7 * ((gameweek - 1) % 4):02d}T10:00:00Z',
+        'finished': gameweek <= finished_gameweeks,
+        'data_checked': gameweek <= finished_gameweeks,
+        'is_previous': gameweek == finished_gameweeks - 1,
+        'is_current': gameweek == finished_gameweeks,
+        'is_next': gameweek == finished_gameweeks + 1,
+    } for gameweek in range(1, 39)]
+
+
+def make_element_summary(rng: np.random.Generator, element: Dict, fixtures: List[Dict]) -> Dict:
+    """Generate one player's element-summary payload (history and upcoming fixtures)."""
+    team = element['team']
+    history, upcoming = [], []
+    for fx in fixtures:
+        if team not in (fx['team_h'], fx['team_a']):
+            continue
+        was_home = fx['team_h'] == team
+        if fx['finished']:
+            minutes = int(rng.choice([0, 15, 60, 90, 90, 90]))
+            goals = int(rng.poisson(0.15)) if minutes else 0
+            assists = int(rng.poisson(0.1)) if minutes else 0
+            history.append({
+                'element': element['id'], 'fixture': fx['id'],
+                'opponent_team': fx['team_a'] if was_home else fx['team_h'],
+                'total_points': (2 if minutes >= 60 else int(minutes > 0)) + 5 * goals + 3 * assists,
+                'was_home': was_home, 'kickoff_time': fx['kickoff_time'],
+                'team_h_score': fx['team_h_score'], 'team_a_score': fx['team_a_score'],
+                'round': fx['event'], 'minutes': minutes, 'goals_scored': goals, 'assists': assists,
+                'clean_sheets': 0, 'goals_conceded': int(rng.poisson(1.2)) if minutes else 0,
+                'saves': 0, 'bonus': 0, 'bps': int(rng.integers(0, 35)) if minutes else 0,
+                'influence': f'{rng.uniform(0, 40):.1f}', 'creativity': f'{rng.uniform(0, 40):.1f}',
+                'threat': f'{rng.uniform(0, 40):.1f}', 'ict_index': f'{rng.uniform(0, 10):.1f}',
+                'starts': int(minutes >= 60), 'value': element['now_cost'],
+                'transfers_balance': int(rng.integers(-5000, 5000)), 'selected': int(rng.integers(0, 1000000)),
+            })
+        else:
+            upcoming.append({
+                'id': fx['id'], 'event': fx['event'], 'team_h': fx['team_h'], 'team_a': fx['team_a'],
+                'is_home': was_home, 'kickoff_time': fx['kickoff_time'], 'finished': False,
+                'difficulty': fx['team_h_difficulty'] if was_home else fx['team_a_difficulty'],
+            })
+    return {'fixtures': upcoming, 'history': history, 'history_past': []}
+
+
+# FPL scoring per element type (1 GKP, 2 DEF, 3 MID, 4 FWD)
+_GOAL_POINTS = {1: 10, 2: 6, 3: 5, 4: 4}
+_CLEAN_SHEET_POINTS = {1: 4, 2: 4, 3: 1, 4: 0}
+_DEFENSIVE_THRESHOLD = {2: 10, 3: 12, 4: 12}
+
+
+def _explain_points(position: int, stats: Dict) -> List[Dict]:
+    """Scoring breakdown of one appearance, like the live payload's ``explain`` stats."""
+    minutes = stats['minutes']
+    rules = [
+        ('minutes', minutes, 2 if minutes >= 60 else int(minutes > 0)),
+        ('goals_scored', stats['goals_scored'], _GOAL_POINTS[position] * stats['goals_scored']),
+        ('assists', stats['assists'], 3 * stats['assists']),
+        ('clean_sheets', stats['clean_sheets'], _CLEAN_SHEET_POINTS[position] * stats['clean_sheets']),
+        ('goals_conceded', stats['goals_conceded'], -(stats['goals_conceded'] // 2) if position <= 2 else 0),
+        ('saves', stats['saves'], stats['saves'] // 3),
+        ('penalties_saved', stats['penalties_saved'], 5 * stats['penalties_saved']),
+        ('penalties_missed', stats['penalties_missed'], -2 * stats['penalties_missed']),
+        ('yellow_cards', stats['yellow_cards'], -stats['yellow_cards']),
+        ('red_cards', stats['red_cards'], -3 * stats['red_cards']),
+        ('own_goals', stats['own_goals'], -2 * stats['own_goals']),
+        ('defensive_contribution', stats['defensive_contribution'],
+         2 if position > 1 and stats['defensive_contribution'] >= _DEFENSIVE_THRESHOLD[position] else 0),
+        ('bonus', stats['bonus'], stats['bonus']),
+    ]
+    return [{'identifier': name, 'points': points, 'value': value, 'points_modification': 0}
+            for name, value, points in rules if value]
+
+
+def _award_bonus(appearances: List[Dict]) -> None:
+    """Give 3/2/1 bonus by BPS within one fixture, with FPL's tie rules."""
+    for stats in appearances:
+        # Tied players share a bonus and push the next player down: 3 - (players strictly ahead)
+        ahead = sum(other['bps'] > stats['bps'] for other in appearances)
+        stats['bonus'] = max(0, 3 - ahead)
+
+
+def make_event_live(rng: np.random.Generator, elements: List[Dict], fixtures: List[Dict], gameweek: int) -> Dict:
+    """
+    Generate an ``event/{gw}/live/`` payload polled mid-gameweek.
+
+    Of the gameweek's fixtures, the first two are over with bonus awarded,
+    the next three are over with bonus still provisional, two are in play
+    and the rest have not kicked off.
+    """
+    matches = [fx for fx in fixtures if fx['event'] == gameweek]
+    by_team: Dict[int, List[Dict]] = {}
+    for element in elements:
+        by_team.setdefault(element['team'], []).append(element)
+
+    stat_keys = ['minutes', 'goals_scored', 'assists', 'clean_sheets', 'goals_conceded', 'own_goals',
+                 'penalties_saved', 'penalties_missed', 'yellow_cards', 'red_cards', 'saves', 'bonus',
+                 'bps', 'defensive_contribution', 'starts']
+    live = {element['id']: dict.fromkeys(stat_keys, 0) for element in elements}
+    explain: Dict[int, List[Dict]] = {element['id']: [] for element in elements}
+
+    for k, fx in enumerate(matches):
+        if k >= 7:
+            break
+        played = 90 if k < 5 else int(rng.integers(25, 85))
+        goals = {fx['team_h']: int(rng.poisson(1.5 * played / 90)), fx['team_a']: int(rng.poisson(1.1 * played / 90))}
+        appearances = []
+        for team, opponent in ((fx['team_h'], fx['team_a']), (fx['team_a'], fx['team_h'])):
+            squad = by_team.get(team, [])
+            keepers = [e for e in squad if e['element_type'] == 1][:1]
+            outfield = [e for e in squad if e['element_type'] != 1]
+            on_pitch = keepers + [outfield[i] for i in rng.permutation(len(outfield))[:10]]
+            for element in on_pitch:
+                position = element['element_type']
+                stats = live[element['id']]
+                stats['minutes'] = played if rng.random() > 0.15 else int(rng.integers(1, played + 1))
+                stats['starts'] = 1
+                stats['goals_conceded'] = goals[opponent]
+                stats['clean_sheets'] = int(goals[opponent] == 0 and stats['minutes'] >= 60 and position <= 3)
+                stats['saves'] = int(rng.poisson(3 * played / 90)) if position == 1 else 0
+                stats['yellow_cards'] = int(rng.random() < 0.1)
+                stats['defensive_contribution'] = int(rng.poisson(6 * played / 90)) if position > 1 else 0
+            scorers = [e for e in on_pitch if e['element_type'] > 1]
+            for _ in range(goals[team]):
+                weights = np.array([e['element_type'] - 1.5 for e in scorers])
+                scorer = scorers[int(rng.choice(len(scorers), p=weights / weights.sum()))]
+                live[scorer['id']]['goals_scored'] += 1
+                assister = scorers[int(rng.integers(0, len(scorers)))]
+                if assister is not scorer and rng.random() < 0.75:
+                    live[assister['id']]['assists'] += 1
+            for element in on_pitch:
+                stats = live[element['id']]
+                position = element['element_type']
+                stats['bps'] = ((6 if stats['minutes'] >= 60 else 3)
+                                + {1: 12, 2: 12, 3: 18, 4: 24}[position] * stats['goals_scored']
+                                + 9 * stats['assists'] + 12 * stats['clean_sheets'] * (position <= 2)
+                                + 2 * stats['saves'] - 3 * stats['yellow_cards'] + int(rng.integers(0, 15)))
+                appearances.append(stats)
+        if k < 2:
+            _award_bonus(appearances)
+        for team in (fx['team_h'], fx['team_a']):
+            for element in by_team.get(team, []):
+                stats = live[element['id']]
+                if stats['minutes']:
+                    explain[element['id']].append(
+                        {'fixture': fx['id'], 'stats': _explain_points(element['element_type'], stats)})
+
+    payload = []
+    for element in elements:
+        stats = dict(live[element['id']])
+        stats['total_points'] = sum(item['points'] for fx in explain[element['id']] for item in fx['stats'])
+        stats['in_dreamteam'] = False
+        for key in ('influence', 'creativity', 'threat', 'ict_index', 'expected_goals', 'expected_assists'):
+            stats[key] = f'{rng.uniform(0, 30) if stats["minutes"] else 0.0:.1f}'
+        payload.append({'id': element['id'], 'stats': stats, 'explain': explain[element['id']],
+                        'modified': False})
+    return {'elements': payload}
+
+
+def write_json_gz(name: str, payload) -> str:
+    """Write a payload as compact gzipped JSON inside the fixtures directory."""
+    path = os.path.join(FIXTURES_DIR, f'{name}.json.gz')
+    # mtime=0 keeps the archives byte-identical across regenerations
+    with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as fh:
+        fh.write(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+    return path
+
+
+def main() -> None:
+    rng = np.random.default_rng(SEED)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    elements = make_elements(rng, NUM_PLAYERS, FINISHED_GAMEWEEKS)
+    fixtures = make_fixtures(rng, FINISHED_GAMEWEEKS)
+    bootstrap = {
+        'events': make_events(FINISHED_GAMEWEEKS),
+        'teams': [{'id': i, 'code': 100 + i, 'name': name, 'short_name': short, 'strength': 3,
+                   'position': 0, 'played': 0, 'win': 0, 'draw': 0, 'loss': 0, 'points': 0}
+                  for i, (name, short) in enumerate(TEAMS, start=1)],
+        'elements': elements,
+        'element_types': ELEMENT_TYPES,
+        'total_players': 11000000,
+    }
+
+    print(write_json_gz('bootstrap-static', bootstrap))
+    print(write_json_gz('fixtures', fixtures))
+    for player_id in ELEMENT_SUMMARY_IDS:
+        summary = make_element_summary(rng, elements[player_id - 1], fixtures)
+        print(write_json_gz(f'element-summary-{player_id}', summary))
+    live_gameweek = FINISHED_GAMEWEEKS + 1
+    print(write_json_gz(f'event-{live_gameweek}-live', make_event_live(rng, elements, fixtures, live_gameweek)))
+
+
+if __name__ == '__main__':
+    main()
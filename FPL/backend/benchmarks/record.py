@@ -0,0 +1,166 @@
+"""
+API Snapshot Recorder
+
+Captures FPL API responses into a snapshot directory laid out like
+``benchmarks/fixtures`` (gzipped JSON named after the API path), so
+``RecordedAPI`` and the local stand-in server (``benchmarks.standin``)
+can replay them. Response bodies are stored byte-for-byte as served.
+
+Usage:
+    python -m benchmarks.record --output snapshots/gw9
+    python -m benchmarks.record --output snapshots/gw9 --element-summaries 1 2 3 --live-gameweeks 8 9
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import requests
+
+from ai.analyzers.data_fetcher import resolve_base_url
+from ai.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+# Element summaries recorded when none are requested explicitly
+DEFAULT_SUMMARY_COUNT = 8
+
+
+def snapshot_name(path: str) -> str:
+    """
+    File name (without .json.gz) for an API path.
+
+    'bootstrap-static/' -> 'bootstrap-static', 'element-summary/5/' ->
+    'element-summary-5', 'event/9/live/' -> 'event-9-live'.
+    """
+    return path.strip('/').replace('/', '-')
+
+
+class SnapshotRecorder:
+    """
+    Fetches API paths and writes them to a snapshot directory.
+
+    A short pause between requests keeps a full recording well inside the
+    FPL API's rate limits.
+    """
+
+    def __init__(self, output_dir: str, base_url: Optional[str] = None, delay: float = 0.5,
+                 session: Optional[requests.Session] = None):
+        """
+        Args:
+            output_dir: Directory to write the snapshot into (created if missing)
+            base_url: API root (default: ``FPL_API_BASE_URL`` or the public API)
+            delay: Seconds to wait between requests
+            session: HTTP session to reuse (default: a new one)
+        """
+        self.output_dir = output_dir
+        self.base_url = resolve_base_url(base_url)
+        self.delay = delay
+        self.session = session or requests.Session()
+        self.files: Dict[str, Dict] = {}
+        self._last_request = 0.0
+
+    def record(self, path: str) -> bytes:
+        """
+        Fetch one API path and write its body to the snapshot directory.
+
+        Args:
+            path: Path below the API root, e.g. 'fixtures/'
+
+        Returns:
+            bytes: The response body
+
+        Raises:
+            requests.RequestException: The request failed or returned an error status
+        """
+        wait = self.delay - (time.monotonic() - self._last_request)
+        if wait > 0:
+            time.sleep(wait)
+        try:
+            response = self.session.get(f'{self.base_url}{path}', timeout=10)
+        finally:
+            self._last_request = time.monotonic()
+        response.raise_for_status()
+
+        name = snapshot_name(path)
+        file_path = os.path.join(self.output_dir, f'{name}.json.gz')
+        # mtime=0 keeps identical responses byte-identical on disk
+        with open(file_path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as fh:
+            fh.write(response.content)
+        self.files[name] = {
+            'path': path,
+            'bytes': len(response.content),
+            'sha1': hashlib.sha1(response.content).hexdigest(),
+        }
+        logger.info("Recorded %s (%d bytes)", path, len(response.content))
+        return response.content
+
+    def record_snapshot(self, element_summaries: Optional[Iterable[int]] = None,
+                        live_gameweeks: Optional[Iterable[int]] = None) -> Dict:
+        """
+        Record bootstrap, fixtures, element summaries and live gameweek data.
+
+        Bootstrap and fixtures are required. Summaries and live data are
+        optional, so a failure there is logged and skipped.
+
+        Args:
+            element_summaries: Player ids (default: the most selected players)
+            live_gameweeks: Gameweeks for event/{gw}/live (default: the current one)
+
+        Returns:
+            Dict: The manifest written to manifest.json
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        bootstrap = loads(self.record('bootstrap-static/'))
+        self.record('fixtures/')
+
+        if element_summaries is None:
+            ranked = sorted(bootstrap.get('elements', []),
+                            key=lambda p: float(p.get('selected_by_percent') or 0), reverse=True)
+            element_summaries = [p['id'] for p in ranked[:DEFAULT_SUMMARY_COUNT]]
+        if live_gameweeks is None:
+            live_gameweeks = [e['id'] for e in bootstrap.get('events', []) if e.get('is_current')]
+
+        optional = [f'element-summary/{player_id}/' for player_id in element_summaries]
+        optional += [f'event/{gameweek}/live/' for gameweek in live_gameweeks]
+        for path in optional:
+            try:
+                self.record(path)
+            except requests.RequestException as e:
+                logger.warning("Skipping %s: %s", path, e)
+
+        manifest = {
+            'base_url': self.base_url,
+            'recorded_at': datetime.now(timezone.utc).isoformat(),
+            'files': self.files,
+        }
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w') as fh:
+            json.dump(manifest, fh, indent=2, sort_keys=True)
+        return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Record FPL API responses into a snapshot directory')
+    parser.add_argument('--output', required=True, help='Snapshot directory to write')
+    parser.add_argument('--base-url', default=None, help='API root (default: FPL_API_BASE_URL or the public API)')
+    parser.add_argument('--element-summaries', type=int, nargs='*', default=None,
+                        help='Player ids to record element-summary for (default: most selected)')
+    parser.add_argument('--live-gameweeks', type=int, nargs='*', default=None,
+                        help='Gameweeks to record event/{gw}/live for (default: current)')
+    parser.add_argument('--delay', type=float, default=0.5, help='Seconds between requests')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    recorder = SnapshotRecorder(args.output, args.base_url, args.delay)
+    manifest = recorder.record_snapshot(args.element_summaries, args.live_gameweeks)
+    print(f"Recorded {len(manifest['files'])} files to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+Recorded API Replay
+
+Serves the checked-in payloads in place of ``requests.get`` so benchmarks
+exercise the real fetch/decode code paths without touching the FPL API.
+"""
+
+import copy
+import gzip
+import json
+import os
+import re
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def load_fixture(name: str, fixtures_dir: str = FIXTURES_DIR):
+    """Load one recorded payload (``name`` without the .json.gz suffix)."""
+    with gzip.open(os.path.join(fixtures_dir, f'{name}.json.gz'), 'rb') as fh:
+        return json.loads(fh.read())
+
+
+def scale_bootstrap(bootstrap: Dict, scale: int) -> Dict:
+    """
+    Replicate bootstrap elements ``scale`` times with fresh ids.
+
+    Args:
+        bootstrap: Recorded bootstrap payload
+        scale: Multiplier for the number of players (1 = unchanged)
+
+    Returns:
+        Dict: New bootstrap payload
+    """
+    if scale <= 1:
+        return bootstrap
+    scaled = dict(bootstrap)
+    base = bootstrap['elements']
+    elements = []
+    for k in range(scale):
+        for element in base:
+            clone = copy.copy(element)
+            clone['id'] = element['id'] + k * len(base)
+            elements.append(clone)
+    scaled['elements'] = elements
+    return scaled
+
+
+class RecordedResponse:
+    """Minimal stand-in for ``requests.Response`` over recorded bytes."""
+
+    def __init__(self, url: str, content: bytes, status_code: int = 200):
+        self.url = url
+        self.content = content
+        self.status_code = status_code
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'{self.status_code} for url: {self.url}', response=self)
+
+
+class RecordedAPI:
+    """
+    Replays recorded FPL payloads by URL path.
+
+    Handles ``bootstrap-static/``, ``fixtures/`` (with optional ``?event=``),
+    ``element-summary/{id}/`` and ``event/{gw}/live/`` when recorded.
+    Element-summary requests for scaled-up ids reuse the recorded players
+    round-robin.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, scale: int = 1):
+        self.fixtures_dir = fixtures_dir
+        self.scale = scale
+        self.request_count = 0
+
+        bootstrap = scale_bootstrap(load_fixture('bootstrap-static', fixtures_dir), scale)
+        self.fixtures = load_fixture('fixtures', fixtures_dir)
+        self._payloads = {
+            'bootstrap-static': json.dumps(bootstrap).encode('utf-8'),
+            'fixtures': json.dumps(self.fixtures).encode('utf-8'),
+        }
+        self._summary_ids = sorted(
+            int(m.group(1)) for m in
+            (re.match(r'element-summary-(\d+)\.json\.gz$', name) for name in os.listdir(fixtures_dir)) if m
+        )
+
+    def payload(self, path: str, query: Optional[Dict] = None) -> Optional[bytes]:
+        """Get the recorded bytes for an API path, or None if not recorded."""
+        path = path.strip('/')
+        if path in self._payloads and not query:
+            return self._payloads[path]
+
+        if path == 'fixtures' and query and 'event' in query:
+            event = int(query['event'][0])
+            return json.dumps([fx for fx in self.fixtures if fx.get('event') == event]).encode('utf-8')
+
+        match = re.match(r'element-summary/(\d+)$', path)
+        if match and self._summary_ids:
+            player_id = int(match.group(1))
+            recorded = self._summary_ids[(player_id - 1) % len(self._summary_ids)]
+            return self._cached_file(f'element-summary-{recorded}')
+
+        match = re.match(r'event/(\d+)/live$', path)
+        if match:
+            return self._cached_file(f'event-{match.group(1)}-live')
+        return None
+
+    def _cached_file(self, name: str) -> Optional[bytes]:
+        if name not in self._payloads:
+            path = os.path.join(self.fixtures_dir, f'{name}.json.gz')
+            if not os.path.exists(path):
+                return None
+            with gzip.open(path, 'rb') as fh:
+                self._payloads[name] = fh.read()
+        return self._payloads[name]
+
+    def get(self, url: str, params: Optional[Dict] = None, **kwargs) -> RecordedResponse:
+        """Drop-in replacement for ``requests.get``."""
+        self.request_count += 1
+        parsed = urlparse(url)
+        path = parsed.path.split('/api/', 1)[-1]
+        query = parse_qs(parsed.query)
+        if params:
+            query.update({k: [str(v)] for k, v in params.items()})
+        content = self.payload(path, query)
+        if content is None:
+            return RecordedResponse(url, b'{"detail":"Not found."}', status_code=404)
+        return RecordedResponse(url, content)
+
+    @contextmanager
+    def patch(self) -> Iterator['RecordedAPI']:
+        """Route every ``requests.get`` call through this replay for the block."""
+        with mock.patch('requests.get', self.get):
+            yield self
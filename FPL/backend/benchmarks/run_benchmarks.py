@@ -0,0 +1,297 @@
+"""
+Benchmark Runner
+
+Times the fetch, feature, prediction and optimization hot paths against the
+recorded payloads and emits the results as JSON. Pass ``--compare`` with an
+earlier results file to flag regressions between versions.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scale 4 --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json --threshold 0.25
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.fpl_analyzer import FPLAnalyzer
+from ai.analyzers.live_scoring import LiveScoringEngine
+from ai.analyzers.records import decode_bootstrap, decode_fixtures
+from ai.instrumentation import REGISTRY
+from ai.models.fpl_ml_model import FPLMLModel
+from ai.predictors.baseline_predictor import BaselinePredictor
+from ai.predictors.team_optimizer import TeamOptimizer
+from ai.serialization import JSON_BACKEND, dumps, dumps_stdlib, loads, loads_stdlib, msgspec
+from benchmarks.replay import RecordedAPI, load_fixture
+
+
+def time_call(fn: Callable, repeat: int, setup: Optional[Callable] = None) -> Dict[str, float]:
+    """
+    Time ``fn`` over ``repeat`` runs, calling ``setup`` untimed before each.
+
+    Returns:
+        Dict[str, float]: min/median/mean/max in milliseconds plus the run count
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        'min_ms': min(samples),
+        'median_ms': statistics.median(samples),
+        'mean_ms': statistics.fmean(samples),
+        'max_ms': max(samples),
+        'repeat': repeat,
+    }
+
+
+def synthetic_optimizer_players(bootstrap: Dict, seed: int = 0) -> List[Dict]:
+    """Bootstrap elements with seeded ``adjusted_predicted_points`` for the optimizer."""
+    rng = np.random.default_rng(seed)
+    players = []
+    for element in bootstrap['elements']:
+        player = dict(element)
+        player['adjusted_predicted_points'] = float(rng.gamma(2.0, 1.5) * element['now_cost'] / 60.0)
+        players.append(player)
+    return players
+
+
+def random_squads(player_ids: List[int], count: int, seed: int = 0) -> np.ndarray:
+    """(count, 16) int32 squads of random distinct players, captained by their first pick."""
+    rng = np.random.default_rng(seed)
+    ids = np.asarray(player_ids, dtype=np.int32)
+    chunks = []
+    for start in range(0, count, 10_000):
+        # argpartition of random keys picks 15 distinct players per row
+        keys = rng.random((min(10_000, count - start), len(ids)))
+        chunks.append(ids[np.argpartition(keys, 15, axis=1)[:, :15]])
+    picks = np.concatenate(chunks)
+    return np.concatenate([picks, picks[:, :1]], axis=1)
+
+
+def live_polls(payload: Dict, polls: int, changes: int = 40, seed: int = 0) -> List[Dict]:
+    """Successive live payloads, each moving the stats of ``changes`` players who are on the pitch."""
+    rng = np.random.default_rng(seed)
+    sequence = []
+    current = payload
+    for _ in range(polls):
+        current = {'elements': [dict(e, stats=dict(e['stats'])) for e in current['elements']]}
+        playing = [e for e in current['elements'] if e['stats']['minutes']]
+        for k in rng.choice(len(playing), size=min(changes, len(playing)), replace=False):
+            stats = playing[k]['stats']
+            stats['bps'] += int(rng.integers(1, 8))
+            stats['minutes'] = min(90, stats['minutes'] + 3)
+        sequence.append(current)
+    return sequence
+
+
+def live_benchmarks(bootstrap: Dict, repeat: int) -> Dict[str, Dict]:
+    """Incremental live refresh of 100k tracked squads against the recorded live payload."""
+    payload = load_fixture('event-9-live')
+    engine = LiveScoringEngine.from_bootstrap(bootstrap)
+    engine.track(random_squads([e['id'] for e in payload['elements']], 100_000))
+    engine.update(payload)
+    polls = iter(live_polls(payload, repeat + 1))
+    return {
+        'live.parse_and_score': time_call(
+            lambda: LiveScoringEngine.from_bootstrap(bootstrap).update(payload), repeat),
+        'live.update_100k_squads': time_call(lambda: engine.update(next(polls)), repeat),
+    }
+
+
+def serialization_benchmarks(api: RecordedAPI, players: List[Dict], repeat: int) -> Dict[str, Dict]:
+    """
+    Compare the stdlib JSON path with the optional fast backend.
+
+    Decoding runs over the recorded bootstrap and fixtures bytes; encoding
+    runs over a predictions-style payload that mixes dicts and NumPy arrays.
+    """
+    bootstrap_bytes = api.payload('bootstrap-static/')
+    fixtures_bytes = api.payload('fixtures/')
+    response = {
+        'players': players,
+        'predicted_points': np.array([p.get('adjusted_predicted_points', 0.0) for p in players]),
+        'now_cost': np.array([p['now_cost'] for p in players], dtype=np.int64),
+    }
+    results = {}
+    for label, load, dump in (('stdlib', loads_stdlib, dumps_stdlib), (JSON_BACKEND, loads, dumps)):
+        results[f'serialization.decode_bootstrap.{label}'] = time_call(lambda: load(bootstrap_bytes), repeat)
+        results[f'serialization.decode_fixtures.{label}'] = time_call(lambda: load(fixtures_bytes), repeat)
+        results[f'serialization.encode_predictions.{label}'] = time_call(lambda: dump(response), repeat)
+    results['serialization.decode_bootstrap.records'] = time_call(lambda: decode_bootstrap(bootstrap_bytes), repeat)
+    results['serialization.decode_fixtures.records'] = time_call(lambda: decode_fixtures(fixtures_bytes), repeat)
+    return results
+
+
+def retained_bytes(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by ``build``'s result once it returns (via tracemalloc)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return retained
+
+
+def memory_footprint(api: RecordedAPI) -> Dict[str, int]:
+    """Resident size of the bootstrap and fixtures snapshots as raw dicts vs compact records."""
+    bootstrap_bytes = api.payload('bootstrap-static/')
+    fixtures_bytes = api.payload('fixtures/')
+    return {
+        'bootstrap_dict_bytes': retained_bytes(lambda: loads(bootstrap_bytes)),
+        'bootstrap_records_bytes': retained_bytes(lambda: decode_bootstrap(bootstrap_bytes)),
+        'fixtures_dict_bytes': retained_bytes(lambda: loads(fixtures_bytes)),
+        'fixtures_records_bytes': retained_bytes(lambda: decode_fixtures(fixtures_bytes)),
+    }
+
+
+def run(scale: int = 1, repeat: int = 5) -> Dict:
+    """
+    Run every benchmark at the given player scale.
+
+    Args:
+        scale: Multiplier applied to the recorded player list
+        repeat: Timed runs per benchmark
+
+    Returns:
+        Dict: {'meta': ..., 'results': {benchmark_name: timings}}
+    """
+    api = RecordedAPI(scale=scale)
+    results: Dict[str, Dict] = {}
+
+    REGISTRY.reset()
+    with api.patch():
+        fetcher = FPLDataFetcher()
+        results['fetcher.get_players_dataframe'] = time_call(
+            fetcher.get_players_dataframe, repeat, setup=fetcher.clear_cache)
+
+        analyzer = FPLAnalyzer()
+        analyzer.fetch_data()
+        results['analyzer.process_fixtures'] = time_call(analyzer.process_fixtures, repeat)
+        fixtures = analyzer.process_fixtures()
+        results['analyzer.get_top_teams_with_easiest_fixtures'] = time_call(
+            lambda: analyzer.get_top_teams_with_easiest_fixtures(fixtures, window_size=5, top_n=5), repeat)
+        # Full refit over every recorded result (a refresh only applies new ones)
+        results['analyzer.team_strength_refit'] = time_call(
+            lambda: analyzer.team_strength.refit(analyzer.fixtures_data), repeat)
+
+        model = FPLMLModel()
+        raw = model.fetch_player_data()
+        results['model.engineer_features'] = time_call(lambda: model.engineer_features(raw), repeat)
+        features = model.engineer_features(raw)
+        model.train_model(features)
+        results['model.predict_player_points'] = time_call(lambda: model.predict_player_points(features), repeat)
+        # Cold runs: the fetcher cache is cleared so each run refetches once
+        results['model.create_best_team'] = time_call(
+            model.create_best_team, repeat, setup=model.data_fetcher.clear_cache)
+        results['model.get_team_suggestions'] = time_call(
+            model.get_team_suggestions, repeat, setup=model.data_fetcher.clear_cache)
+        # The NumPy ridge baseline on the same raw bootstrap rows, for latency-sensitive callers
+        baseline = BaselinePredictor()
+        results['baseline.train'] = time_call(lambda: baseline.train(raw), repeat)
+        results['baseline.predict'] = time_call(lambda: baseline.predict(raw), repeat)
+        squads = random_squads([p['id'] for p in model.get_all_players_with_predictions()], 100_000)
+        model.score_squads(squads[:1])
+        results['model.score_squads_100k'] = time_call(lambda: model.score_squads(squads), repeat)
+
+        optimizer = TeamOptimizer()
+        players = synthetic_optimizer_players(json.loads(api.payload('bootstrap-static/')))
+        results['optimizer.optimize_team'] = time_call(lambda: optimizer.optimize_team(players), repeat)
+        results['optimizer.generate_multiple_strategies'] = time_call(
+            lambda: optimizer.generate_multiple_strategies(players), repeat)
+
+        results.update(live_benchmarks(json.loads(api.payload('bootstrap-static/')), repeat))
+        results.update(serialization_benchmarks(api, players, repeat))
+
+    return {'meta': environment_info(scale, repeat, len(players)), 'results': results,
+            'memory': memory_footprint(api), 'stages': REGISTRY.snapshot()}
+
+
+def environment_info(scale: int, repeat: int, num_players: int) -> Dict:
+    """Describe the machine, library versions and revision the results came from."""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        revision = ''
+    return {
+        'revision': revision,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'json_backend': JSON_BACKEND,
+        'msgspec': msgspec.__version__ if msgspec is not None else None,
+        'scale': scale,
+        'players': num_players,
+        'repeat': repeat,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    Find benchmarks whose median got slower than ``baseline`` by more than ``threshold``.
+
+    Returns:
+        List[Dict]: One entry per regressed benchmark
+    """
+    regressions = []
+    for name, timing in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or previous['median_ms'] <= 0:
+            continue
+        change = timing['median_ms'] / previous['median_ms'] - 1.0
+        if change > threshold:
+            regressions.append({'benchmark': name, 'baseline_ms': previous['median_ms'],
+                                'current_ms': timing['median_ms'], 'change': change})
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the FPL Python pipeline.')
+    parser.add_argument('--scale', type=int, default=1, help='multiply the recorded player list')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--output', help='write results JSON to this path (default: stdout)')
+    parser.add_argument('--compare', help='earlier results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative median slowdown counted as a regression')
+    args = parser.parse_args(argv)
+
+    report = run(scale=args.scale, repeat=args.repeat)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as fh:
+            report['regressions'] = compare(report, json.load(fh), args.threshold)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(output + '\n')
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Local FPL API Stand-in
+
+A small FastAPI app that serves a recorded snapshot directory (see
+``benchmarks.record``; the checked-in ``benchmarks/fixtures`` work too)
+under the FPL API paths. Latency, errors and stalls can be injected, so the
+server stack can be load-tested in isolation, without the real service or
+its rate limits.
+
+Usage:
+    python -m benchmarks.standin --port 8001 --latency-ms 80 --jitter-ms 40 --error-rate 0.02
+    FPL_API_BASE_URL=http://127.0.0.1:8001/api/ uvicorn server.main:app
+
+Fault settings can be changed while running with
+``PUT /__standin/faults`` (JSON body with any of the fields below), and
+``GET /__standin/stats`` reports what has been served.
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Dict, Optional
+
+from fastapi import Body, FastAPI, Request, Response
+
+from benchmarks.replay import FIXTURES_DIR, RecordedAPI
+
+
+class FaultConfig:
+    """
+    Latency and failure injection for the stand-in.
+
+    Attributes:
+        latency_ms: Base delay added to every response
+        jitter_ms: Extra uniform random delay, 0..jitter_ms
+        error_rate: Probability of answering with ``error_status`` instead
+        error_status: HTTP status used for injected errors
+        stall_rate: Probability of stalling for ``stall_seconds`` (client timeouts)
+        stall_seconds: Length of an injected stall
+    """
+
+    FIELDS = ('latency_ms', 'jitter_ms', 'error_rate', 'error_status', 'stall_rate', 'stall_seconds')
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, stall_rate: float = 0.0, stall_seconds: float = 30.0):
+        self.update({'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'error_rate': error_rate,
+                     'error_status': error_status, 'stall_rate': stall_rate, 'stall_seconds': stall_seconds})
+
+    def update(self, values: Dict) -> None:
+        """Change the given fields, ignoring unknown keys."""
+        for field in self.FIELDS:
+            if field in values:
+                setattr(self, field, int(values[field]) if field == 'error_status' else float(values[field]))
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+def create_app(api: Optional[RecordedAPI] = None, faults: Optional[FaultConfig] = None,
+               seed: Optional[int] = None) -> FastAPI:
+    """
+    Build the stand-in app.
+
+    Args:
+        api: Recorded payloads to serve (default: ``benchmarks/fixtures``)
+        faults: Latency and error injection (default: none)
+        seed: Seed for the injection RNG, for reproducible runs
+
+    Returns:
+        FastAPI: App serving ``/api/...`` like the FPL API
+    """
+    api = api or RecordedAPI()
+    faults = faults or FaultConfig()
+    rng = random.Random(seed)
+    stats = {'requests': 0, 'errors': 0, 'stalls': 0, 'not_found': 0, 'bytes': 0, 'paths': {}}
+
+    app = FastAPI(title='FPL API stand-in')
+    app.state.api = api
+    app.state.faults = faults
+    app.state.stats = stats
+
+    @app.get('/__standin/stats')
+    def standin_stats():
+        return dict(stats, faults=faults.to_dict())
+
+    @app.put('/__standin/faults')
+    def standin_faults(values: Dict = Body(...)):
+        faults.update(values)
+        return faults.to_dict()
+
+    @app.get('/api/{path:path}')
+    async def serve(path: str, request: Request):
+        stats['requests'] += 1
+        route = path.strip('/').split('/', 1)[0]
+        stats['paths'][route] = stats['paths'].get(route, 0) + 1
+
+        delay = faults.latency_ms + rng.uniform(0, faults.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+        if faults.stall_rate and rng.random() < faults.stall_rate:
+            stats['stalls'] += 1
+            await asyncio.sleep(faults.stall_seconds)
+        if faults.error_rate and rng.random() < faults.error_rate:
+            stats['errors'] += 1
+            return Response(b'{"detail":"Injected error."}', status_code=faults.error_status,
+                            media_type='application/json')
+
+        query = {key: request.query_params.getlist(key) for key in request.query_params.keys()}
+        content = api.payload(path, query or None)
+        if content is None:
+            stats['not_found'] += 1
+            return Response(b'{"detail":"Not found."}', status_code=404, media_type='application/json')
+        stats['bytes'] += len(content)
+        return Response(content, media_type='application/json')
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Serve recorded FPL API snapshots locally')
+    parser.add_argument('--snapshot-dir', default=FIXTURES_DIR, help='Directory of recorded .json.gz payloads')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--scale', type=int, default=1, help='Replicate bootstrap players N times')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--stall-rate', type=float, default=0.0)
+    parser.add_argument('--stall-seconds', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    faults = FaultConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status,
+                         args.stall_rate, args.stall_seconds)
+    app = create_app(RecordedAPI(args.snapshot_dir, args.scale), faults, args.seed)
+    print(f'Serving {args.snapshot_dir} at http://{args.host}:{args.port}/api/')
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,52 @@
 # server/main.py
-from fastapi import FastAPI
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import Body, FastAPI, HTTPException, Path, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import httpx
+import numpy as np
+
+from ai.instrumentation import REGISTRY, configure_logging, span
+from ai.serialization import loads
+from ai.analyzers.data_fetcher import fixtures_frame, resolve_base_url
+from ai.analyzers.league_table import LeagueTable
+from ai.analyzers.live_scoring import LiveScoringEngine
+from ai.analyzers.price_changes import PriceChangePredictor
+from ai.analyzers.timeseries import DOWNSAMPLE_METHODS, SnapshotTimeSeries
+from server import workers
+from server.response_cache import CachedPayload, FastJSONResponse, ResultCache, SnapshotCache, payload_response
+from server.streaming import parse_fields, stream_pages
+
+# Pipeline logging is silent unless FPL_LOG_LEVEL is set
+configure_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers load the model and the server's snapshot up front so the first request
+    # is not slow; training a missing model blocks, so it runs off the event loop
+    worker_pool.snapshot = await worker_snapshot()
+    await asyncio.to_thread(worker_pool.start)
+    # Price progress and trend history need every snapshot, not only those a request happens to fetch
+    poller = asyncio.create_task(poll_snapshots(SNAPSHOT_POLL_SECONDS)) if SNAPSHOT_POLL_SECONDS > 0 else None
+    yield
+    if poller is not None:
+        poller.cancel()
+    worker_pool.shutdown()
+    global _upstream_client
+    if _upstream_client is not None:
+        await _upstream_client.aclose()
+        _upstream_client = None
 
-app = FastAPI()
+# Routes returning plain dicts skip the stdlib encoder
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # allow your frontend port:
 app.add_middleware(
@@ -14,28 +57,414 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-FPL_BASE = "https://fantasy.premierleague.com/api"
+# FPL_API_BASE_URL points the server (and its workers) at a local stand-in
+FPL_BASE = resolve_base_url().rstrip("/")
+
+# How long upstream snapshots are reused before checking FPL again
+CACHE_TTL_SECONDS = int(os.environ.get("FPL_CACHE_TTL", "60"))
+
+response_cache = SnapshotCache(ttl=CACHE_TTL_SECONDS)
+# Model results keyed by (snapshot, model file) version and normalized parameters
+result_cache = ResultCache(max_entries=int(os.environ.get("FPL_RESULT_CACHE_SIZE", "128")))
+worker_pool = workers.WorkerPool(
+    max_workers=int(os.environ.get("FPL_WORKERS", "0")) or None,
+    max_pending=int(os.environ.get("FPL_MAX_PENDING", "0")) or None,
+    timeout=float(os.environ.get("FPL_REQUEST_TIMEOUT", "30")),
+)
+_upstream_client: Optional[httpx.AsyncClient] = None
+
+# Upstream bootstrap and fixtures, fetched once per poll and shared with the workers
+shared_snapshot = workers.SharedSnapshot(os.environ.get("FPL_SNAPSHOT_DIR"))
+# The shared snapshot is re-polled this often in the background (0 disables polling)
+SNAPSHOT_POLL_SECONDS = int(os.environ.get("FPL_SNAPSHOT_POLL_SECONDS", str(CACHE_TTL_SECONDS)))
+
+# Net transfer progress per player, advanced by every bootstrap diff of the shared snapshot
+price_predictor = PriceChangePredictor()
+shared_snapshot.fetcher.subscribe(price_predictor.apply)
+
+# Running totals from finished fixtures; each fixtures snapshot adds only new results
+league_table = LeagueTable()
+
+# Records per pool task when streaming; the server holds one page at a time
+STREAM_PAGE_SIZE = int(os.environ.get("FPL_STREAM_PAGE_SIZE", "200"))
+
+# Live data is re-polled at most this often; each poll's response is built once
+LIVE_POLL_SECONDS = int(os.environ.get("FPL_LIVE_POLL_SECONDS", "30"))
+live_cache = SnapshotCache(ttl=LIVE_POLL_SECONDS)
+# One engine per gameweek, updated incrementally from poll to poll
+_live_engines: Dict[int, LiveScoringEngine] = {}
+
+# Each new bootstrap snapshot is appended here when set; the trend routes read it
+TIMESERIES_DIR = os.environ.get("FPL_TIMESERIES_DIR")
+trend_store = SnapshotTimeSeries(TIMESERIES_DIR) if TIMESERIES_DIR else None
+if trend_store is not None:
+    # Every bootstrap version the shared snapshot installs is recorded, whoever fetched it
+    shared_snapshot.fetcher.subscribe(trend_store.on_snapshot)
+
+def get_upstream_client() -> httpx.AsyncClient:
+    """Shared pooled client for FPL API requests."""
+    global _upstream_client
+    if _upstream_client is None:
+        _upstream_client = httpx.AsyncClient(timeout=10.0)
+    return _upstream_client
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-stage timings and result cache counters in Prometheus text format."""
+    lines = [REGISTRY.to_prometheus()]
+    stats = result_cache.stats()
+    for name in ("hits", "misses", "coalesced"):
+        lines.append(f"# TYPE fpl_result_cache_{name}_total counter\n"
+                     f"fpl_result_cache_{name}_total {stats[name]}\n")
+    lines.append(f"# TYPE fpl_result_cache_entries gauge\nfpl_result_cache_entries {stats['entries']}\n")
+    return PlainTextResponse("".join(lines), media_type="text/plain; version=0.0.4")
+
+def build_opponents_map(boot: dict, fixtures: list) -> dict:
+    """Map each team's short name to its opponent in the current (or first scheduled) event."""
+    teamsById = { t["id"]: t["short_name"].upper() for t in boot["teams"] }
+
+    # Index the full fixture list by event once instead of one request per event
+    by_event = {}
+    for f in fixtures:
+        if f.get("event") is not None:
+            by_event.setdefault(f["event"], []).append(f)
+
+    event = next((e["id"] for e in boot["events"] if e.get("is_current")), boot["events"][0]["id"])
+    event_fixtures = by_event.get(event)
+    if not event_fixtures:
+        event_fixtures = next((by_event[e["id"]] for e in boot["events"] if by_event.get(e["id"])), [])
+
+    opp_map = {}
+    for f in event_fixtures:
+        h = teamsById.get(f["team_h"])
+        a = teamsById.get(f["team_a"])
+        if h and a:
+            opp_map[h] = f"{a} (H)"
+            opp_map[a] = f"{h} (A)"
+    return opp_map
+
+async def _fetch_upstream_snapshot(stage: str):
+    """Fetch bootstrap-static and the full fixture list concurrently."""
+    client = get_upstream_client()
+    with span(stage):
+        boot_resp, fixtures_resp = await asyncio.gather(
+            client.get(f"{FPL_BASE}/bootstrap-static/"),
+            client.get(f"{FPL_BASE}/fixtures/"),
+        )
+        boot_resp.raise_for_status()
+        fixtures_resp.raise_for_status()
+    return boot_resp, fixtures_resp
+
+async def _refresh_snapshot(previous: Optional[CachedPayload]) -> CachedPayload:
+    boot_resp, fixtures_resp = await _fetch_upstream_snapshot("server.snapshot.upstream")
+    # Decoding and diffing new content is CPU work; unchanged content returns at once
+    with span("server.snapshot.install"):
+        changed = await asyncio.to_thread(shared_snapshot.install, boot_resp.content, fixtures_resp.content)
+    if previous is not None and not changed:
+        return previous
+    return CachedPayload.from_object({"snapshot_version": shared_snapshot.key}, shared_snapshot.key)
+
+async def refresh_snapshot() -> workers.SharedSnapshot:
+    """
+    The upstream bootstrap and fixtures, re-checked at most once per cache TTL.
+
+    Every route reads this one snapshot, and pool tasks run on it too, so a
+    poll downloads each payload once.
+
+    Raises:
+        httpx.HTTPError: Upstream unreachable and nothing fetched yet
+    """
+    await response_cache.get("snapshot-version", _refresh_snapshot)
+    return shared_snapshot
+
+async def worker_snapshot() -> Optional[workers.SnapshotRef]:
+    """Snapshot for the next pool task (None until upstream has been reached once)."""
+    try:
+        await refresh_snapshot()
+    except httpx.HTTPError:
+        pass
+    return shared_snapshot.ref
+
+async def current_snapshot_version() -> Optional[str]:
+    """Content hash of the shared snapshot (None if upstream has never been reached)."""
+    await worker_snapshot()
+    return shared_snapshot.key
+
+# Pool tasks run on the shared snapshot, refreshed first when it has expired
+worker_pool.snapshot_source = worker_snapshot
+
+async def poll_snapshots(interval: float) -> None:
+    """Refresh the shared snapshot every ``interval`` seconds, independent of requests."""
+    while True:
+        try:
+            await refresh_snapshot()
+        except httpx.HTTPError as e:
+            logger.warning("Snapshot poll failed: %s", e)
+        await asyncio.sleep(interval)
+
+async def _build_opponents_payload(previous: Optional[CachedPayload]) -> CachedPayload:
+    snapshot = await refresh_snapshot()
+
+    boot = snapshot.bootstrap
+    current_event = next((e["id"] for e in boot["events"] if e.get("is_current")), None)
+    # One payload per fixtures snapshot: unchanged fixtures keep the old bytes and ETag
+    snapshot_key = f'{snapshot.fetcher.get_snapshot_hash("fixtures")}-{current_event}'
+    if previous is not None and previous.source_key == snapshot_key:
+        return previous
+
+    with span("server.opponents.build"):
+        return CachedPayload.from_object(build_opponents_map(boot, snapshot.fixtures), snapshot_key)
 
 @app.get("/api/fpl/opponents")
-async def fpl_opponents():
-    async with httpx.AsyncClient() as client:
-        boot = (await client.get(f"{FPL_BASE}/bootstrap-static/")).json()
-        teamsById = { t["id"]: t["short_name"].upper() for t in boot["teams"] }
-
-        event = next((e["id"] for e in boot["events"] if e.get("is_current")), boot["events"][0]["id"])
-        fixtures = (await client.get(f"{FPL_BASE}/fixtures/?event={event}")).json()
-        if not fixtures:
-            for e in boot["events"]:
-                fx = (await client.get(f"{FPL_BASE}/fixtures/?event={e['id']}")).json()
-                if fx:
-                    fixtures = fx
-                    break
-
-        opp_map = {}
-        for f in fixtures:
-            h = teamsById.get(f["team_h"])
-            a = teamsById.get(f["team_a"])
-            if h and a:
-                opp_map[h] = f"{a} (H)"
-                opp_map[a] = f"{h} (A)"
-        return opp_map
\ No newline at end of file
+async def fpl_opponents(request: Request):
+    payload = await response_cache.get("opponents", _build_opponents_payload)
+    return payload_response(request, payload, max_age=CACHE_TTL_SECONDS)
+
+async def _build_league_table(previous: Optional[CachedPayload]) -> CachedPayload:
+    snapshot = await refresh_snapshot()
+
+    teams = [{"id": t["id"], "name": t.get("name"), "short_name": t.get("short_name")}
+             for t in snapshot.bootstrap["teams"]]
+    # One table per fixtures snapshot (and set of clubs): bootstrap price churn keeps the ETag
+    table_key = hashlib.sha1(snapshot.fetcher.get_snapshot_hash("fixtures").encode()
+                             + repr(teams).encode()).hexdigest()
+    if previous is not None and previous.source_key == table_key:
+        return previous
+
+    with span("server.table.build"):
+        league_table.update(fixtures_frame(snapshot.fixtures))
+        return CachedPayload.from_object({
+            "standings": league_table.standings(teams),
+            "lastUpdated": datetime.now(timezone.utc).isoformat(),
+        }, table_key)
+
+@app.get("/api/fpl/table")
+async def fpl_table(request: Request):
+    """Premier League table with goal difference and form, rebuilt only when the fixtures change."""
+    try:
+        payload = await response_cache.get("table", _build_league_table)
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Failed to fetch Premier League table")
+    return payload_response(request, payload, max_age=CACHE_TTL_SECONDS)
+
+async def _build_live_bonus(gameweek: int, previous: Optional[CachedPayload]) -> CachedPayload:
+    client = get_upstream_client()
+    with span("server.live.upstream"):
+        live_resp = await client.get(f"{FPL_BASE}/event/{gameweek}/live/")
+        live_resp.raise_for_status()
+    # An unchanged live payload keeps the previous bytes and ETag
+    live_key = hashlib.sha1(live_resp.content).hexdigest()
+    if previous is not None and previous.source_key == live_key:
+        return previous
+
+    live = loads(live_resp.content)
+    engine = _live_engines.get(gameweek)
+    max_id = max((e["id"] for e in live.get("elements", [])), default=0)
+    if engine is None or max_id >= len(engine.positions_by_id):
+        # Positions only change with new players, so the engine is rebuilt only then
+        snapshot = await refresh_snapshot()
+        engine = _live_engines[gameweek] = LiveScoringEngine.from_bootstrap(snapshot.bootstrap)
+    with span("server.live.bonus"):
+        engine.update(live)
+        return CachedPayload.from_object({"gameweek": gameweek, "fixtures": engine.bonus_table()}, live_key)
+
+@app.get("/api/live/{gameweek}/bonus")
+async def live_bonus(request: Request, gameweek: int = Path(..., ge=1, le=38)):
+    """Confirmed or provisional 3/2/1 bonus per match, from BPS in the live payload."""
+    try:
+        payload = await live_cache.get(f"bonus-{gameweek}",
+                                       lambda previous: _build_live_bonus(gameweek, previous))
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            raise HTTPException(status_code=404, detail=f"No live data for gameweek {gameweek}")
+        raise HTTPException(status_code=502, detail="FPL API error")
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="FPL API unreachable")
+    return payload_response(request, payload, max_age=LIVE_POLL_SECONDS)
+
+async def cached_model_result(key: tuple, fn, *args):
+    """
+    Run a model task through the result cache.
+
+    Identical concurrent requests share one pool task, and results are
+    dropped as soon as the upstream snapshot or the model file changes.
+    """
+    snapshot_version = await current_snapshot_version()
+    result_cache.set_version((snapshot_version, workers.model_file_version(worker_pool.model_path)))
+    return await result_cache.get(
+        key,
+        lambda: worker_pool.run(fn, *args),
+        cacheable=lambda result: not isinstance(result, dict) or result.get("success", True),
+    )
+
+@app.get("/api/fixtures/analyze")
+async def fixtures_analyze(window_size: int = Query(5, ge=1, le=38), top_n: int = Query(5, ge=1, le=20)):
+    return await worker_pool.run(workers.analyze_fixtures, window_size, top_n)
+
+@app.get("/api/fixtures/strength")
+async def fixtures_strength():
+    return await worker_pool.run(workers.team_strength)
+
+@app.get("/api/players/analyze")
+async def players_analyze(position: str = "all", min_price: float = 4.0, max_price: float = 15.0):
+    return await worker_pool.run(workers.analyze_players, position, min_price, max_price)
+
+async def pool_pages(fn, *args) -> AsyncIterator[List[dict]]:
+    """
+    Page through a task whose last two arguments are (offset, limit), all on one snapshot.
+
+    The first page is fetched before returning, so pool errors (503/504)
+    still become the response status; each later page is requested once the
+    stream has written the previous one, and a failure there ends the stream
+    with an error record (see :func:`server.streaming.encode_pages`).
+    """
+    snapshot = await worker_snapshot()
+    first = await worker_pool.run(fn, *args, 0, STREAM_PAGE_SIZE, snapshot=snapshot)
+
+    async def pages():
+        page, offset = first, 0
+        while True:
+            yield page
+            if len(page) < STREAM_PAGE_SIZE:
+                return
+            offset += len(page)
+            try:
+                page = await worker_pool.run(fn, *args, offset, STREAM_PAGE_SIZE, snapshot=snapshot)
+            except HTTPException as e:
+                # Headers are already sent; the encoder turns this into an error record
+                logger.warning("Stream of %s truncated at offset %d: %s", fn.__name__, offset, e.detail)
+                raise
+
+    return pages()
+
+@app.get("/api/players/stream")
+async def players_stream(position: str = "all", min_price: float = 4.0, max_price: float = 15.0,
+                         format: str = Query("ndjson", pattern="^(ndjson|sse)$"), fields: Optional[str] = None):
+    """Filtered players as NDJSON or SSE; ``fields`` is a comma-separated projection."""
+    pages = await pool_pages(workers.player_records, position, min_price, max_price, parse_fields(fields))
+    return stream_pages(pages, format, event="player")
+
+@app.post("/api/players/compare")
+async def players_compare(player1: dict = Body(...), player2: dict = Body(...)):
+    return await worker_pool.run(workers.compare_players, player1, player2)
+
+@app.get("/api/ml/players")
+async def ml_players():
+    return await cached_model_result(("players",), workers.players_with_predictions)
+
+@app.get("/api/ml/players/stream")
+async def ml_players_stream(format: str = Query("ndjson", pattern="^(ndjson|sse)$"), fields: Optional[str] = None):
+    """Players with predictions as NDJSON or SSE, projected to ``fields`` in the worker."""
+    pages = await pool_pages(workers.prediction_records, parse_fields(fields))
+    return stream_pages(pages, format, event="player")
+
+def _round_threshold(threshold: Optional[float]) -> Optional[float]:
+    return None if threshold is None else round(threshold, 1)
+
+@app.get("/api/ml/best-team")
+async def ml_best_team(budget: float = Query(100.0, gt=0), fixture_window: int = Query(5, ge=1, le=38),
+                       fixture_weight: float = Query(0.15, ge=0, le=1), simulate: bool = True,
+                       threshold: Optional[float] = Query(None, ge=0)):
+    """Best team; ``simulate`` adds Monte Carlo percentiles, captain value and P(total > threshold)."""
+    budget, fixture_weight, threshold = round(budget, 1), round(fixture_weight, 3), _round_threshold(threshold)
+    return await cached_model_result(("best-team", budget, fixture_window, fixture_weight, simulate, threshold),
+                                     workers.best_team, budget, fixture_window, fixture_weight, simulate, threshold)
+
+@app.get("/api/ml/team-suggestions")
+async def ml_team_suggestions(budget: float = Query(100.0, gt=0), num_suggestions: int = Query(3, ge=1, le=3),
+                              fixture_window: int = Query(5, ge=1, le=38),
+                              fixture_weight: float = Query(0.15, ge=0, le=1), simulate: bool = True,
+                              threshold: Optional[float] = Query(None, ge=0)):
+    # Normalize so 100, 100.0 and 100.04 share one cache entry
+    budget, fixture_weight, threshold = round(budget, 1), round(fixture_weight, 3), _round_threshold(threshold)
+    return await cached_model_result(
+        ("team-suggestions", budget, num_suggestions, fixture_window, fixture_weight, simulate, threshold),
+        workers.team_suggestions, budget, num_suggestions, fixture_window, fixture_weight, simulate, threshold)
+
+@app.post("/api/ml/lineups")
+async def ml_lineups(squads: List[List[int]] = Body(..., embed=True, max_length=100000),
+                     captain_by: str = Body("expected", embed=True, pattern="^(expected|upside)$")):
+    """Best XI, captain, vice-captain and bench order for a batch of 15-id squads."""
+    return await worker_pool.run(workers.lineups, squads, captain_by)
+
+@app.post("/api/ml/score-squads")
+async def ml_score_squads(request: Request, fixture_window: int = Query(5, ge=1, le=38),
+                          fixture_weight: float = Query(0.15, ge=0, le=1),
+                          gameweeks: Optional[int] = Query(None, ge=1, le=38)):
+    """
+    Score a batch of squads: 15 player ids in pick order plus the captain's id per squad.
+
+    The body is either raw little-endian int32 (``application/octet-stream``,
+    16 values per squad) or JSON ``{"squads": [[...16 ids...], ...]}``.
+    """
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("application/octet-stream"):
+            squads = np.frombuffer(body, dtype="<i4").reshape(-1, 16)
+        else:
+            squads = np.asarray(loads(body)["squads"], dtype=np.int32).reshape(-1, 16)
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        # OverflowError: a JSON id outside the int32 range
+        raise HTTPException(status_code=422, detail=f"Invalid squads: {e}")
+    result = await worker_pool.run(workers.score_squads, squads, fixture_window, round(fixture_weight, 3), gameweeks)
+    # Returned directly so the NumPy arrays are encoded by orjson, not jsonable_encoder
+    return FastJSONResponse(result)
+
+@app.get("/api/prices/predictions")
+async def price_predictions(limit: int = Query(20, ge=1, le=100)):
+    """Players ranked by projected progress towards tonight's price rise or fall."""
+    try:
+        # A new snapshot reaches the predictor through the fetcher subscription
+        await refresh_snapshot()
+    except httpx.HTTPError:
+        if price_predictor.version is None:
+            raise HTTPException(status_code=502, detail="Failed to fetch FPL data")
+    # Projections depend on the time left to the update, so they are not cached
+    return price_predictor.predictions(limit)
+
+def _trend_store() -> SnapshotTimeSeries:
+    if trend_store is None:
+        raise HTTPException(status_code=404, detail="Trend history is disabled (set FPL_TIMESERIES_DIR)")
+    return trend_store
+
+@app.get("/api/trends/players/{player_id}")
+async def player_trend(player_id: int = Path(..., ge=1), columns: Optional[str] = None,
+                       start: Optional[float] = None, end: Optional[float] = None,
+                       every: Optional[float] = Query(None, gt=0),
+                       how: str = Query("last", pattern=f"^({'|'.join(DOWNSAMPLE_METHODS)})$")):
+    """One player's recorded price, form, ownership and transfers, optionally downsampled to ``every`` seconds."""
+    store = _trend_store()
+    try:
+        frame = await asyncio.to_thread(store.series, player_id, parse_fields(columns), start, end, every, how)
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=e.args[0])
+    return FastJSONResponse({"player_id": player_id, "time": frame.index.to_numpy(),
+                             **{column: frame[column].to_numpy() for column in frame.columns}})
+
+@app.get("/api/trends/players")
+async def players_trend(at: Optional[float] = None, columns: Optional[str] = None):
+    """Every player's recorded values in the latest snapshot at or before ``at`` (default: now), column-wise."""
+    store = _trend_store()
+    try:
+        frame = await asyncio.to_thread(store.at, at, parse_fields(columns))
+    except KeyError as e:
+        raise HTTPException(status_code=422, detail=e.args[0])
+    return FastJSONResponse({"time": frame.attrs["time"], "id": frame.index.to_numpy(),
+                             **{column: frame[column].to_numpy() for column in frame.columns}})
+
+@app.get("/api/ml/chip-plan")
+async def ml_chip_plan(squad: Optional[str] = Query(None, pattern=r"^\d+(,\d+){14}$"),
+                       budget: Optional[float] = Query(None, gt=0), horizon: int = Query(5, ge=1, le=10),
+                       fixture_weight: float = Query(0.15, ge=0, le=1)):
+    """Best gameweek for each chip; ``squad`` is the held squad as 15 comma-separated ids."""
+    squad_ids = tuple(int(i) for i in squad.split(",")) if squad else None
+    budget = None if budget is None else round(budget, 1)
+    fixture_weight = round(fixture_weight, 3)
+    return await cached_model_result(("chip-plan", squad_ids, budget, horizon, fixture_weight),
+                                     workers.chip_plan, squad_ids, budget, horizon, fixture_weight)
+
+@app.get("/api/ml/strategies")
+async def ml_strategies(budget: float = Query(100.0, gt=0), num_strategies: int = Query(3, ge=1, le=3)):
+    budget = round(budget, 1)
+    return await cached_model_result(("strategies", budget, num_strategies),
+                                     workers.optimizer_strategies, budget, num_strategies)
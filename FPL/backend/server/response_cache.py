@@ -0,0 +1,218 @@
+# server/response_cache.py
+"""
+In-process response cache for the FastAPI server.
+
+Payloads are serialized once into JSON bytes with a content ETag, so repeat
+requests skip both the upstream fetch and serialization, and clients that
+send a matching ``If-None-Match`` get an empty 304. Computed results (team
+suggestions and the like) go through :class:`ResultCache`, which coalesces
+identical in-flight requests and is versioned by data snapshot and model.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from ai.instrumentation import span
+from ai.serialization import dumps
+
+
+class CachedPayload:
+    """Pre-serialized JSON body with its ETag."""
+
+    __slots__ = ("body", "etag", "created_at", "source_key")
+
+    def __init__(self, body: bytes, source_key: Optional[str] = None):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        self.created_at = time.time()
+        self.source_key = source_key
+
+    @classmethod
+    def from_object(cls, obj: Any, source_key: Optional[str] = None) -> "CachedPayload":
+        with span("server.serialize"):
+            return cls(dumps(obj), source_key)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by :mod:`ai.serialization` (orjson when installed, NumPy-aware)."""
+
+    def render(self, content: Any) -> bytes:
+        with span("server.serialize"):
+            return dumps(content)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check an ``If-None-Match`` header (list or ``*``) against an ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [c.strip() for c in header.split(",")]
+    # Weak comparison: W/"x" matches "x"
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def payload_response(request: Request, payload: CachedPayload, max_age: int = 0) -> Response:
+    """
+    Serve a cached payload, answering 304 when the client already has it.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        payload: Cached body and ETag
+        max_age: Seconds browsers may reuse the body without revalidating
+
+    Returns:
+        Response: 200 with the JSON bytes, or an empty 304
+    """
+    headers = {"ETag": payload.etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+class SnapshotCache:
+    """
+    Keeps one payload per name and rebuilds it at most once per TTL.
+
+    Refreshes are serialized per name, so a burst of requests after expiry
+    triggers a single upstream fetch. Builders receive the previous payload
+    and can return it unchanged when its ``source_key`` (e.g. the fixtures
+    content hash) still matches, which keeps the ETag stable.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._entries: Dict[str, CachedPayload] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _is_fresh(self, name: str) -> bool:
+        fetched_at = self._fetched_at.get(name)
+        return fetched_at is not None and time.time() - fetched_at < self.ttl
+
+    async def get(self, name: str,
+                  build: Callable[[Optional[CachedPayload]], Awaitable[CachedPayload]]) -> CachedPayload:
+        """
+        Get the cached payload, rebuilding it if the TTL has expired.
+
+        Args:
+            name: Cache entry name
+            build: Coroutine taking the previous payload (or None) and returning a new one
+
+        Returns:
+            CachedPayload: Current payload
+        """
+        if self._is_fresh(name):
+            return self._entries[name]
+
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed while we waited
+            if self._is_fresh(name):
+                return self._entries[name]
+            previous = self._entries.get(name)
+            try:
+                payload = await build(previous)
+            except Exception:
+                if previous is None:
+                    raise
+                # Serve the last good payload rather than failing the request
+                payload = previous
+            self._entries[name] = payload
+            self._fetched_at[name] = time.time()
+            return payload
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Expire one entry, or all entries when ``name`` is None."""
+        if name is None:
+            self._fetched_at.clear()
+        else:
+            self._fetched_at.pop(name, None)
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of computed results with in-flight coalescing.
+
+    Entries are stored under the current version (e.g. data snapshot and
+    model file) plus a caller-supplied key of normalized parameters. When
+    the version changes every entry is dropped. Concurrent requests for a
+    key that is still being computed await the same task instead of
+    starting another one, and a caller that disconnects does not cancel the
+    computation for the others.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self.version: Optional[Hashable] = None
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def set_version(self, version: Hashable) -> None:
+        """Switch to a new version, dropping results computed under the old one."""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]],
+                  cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get a cached result, computing it once if missing.
+
+        Args:
+            key: Normalized request parameters
+            compute: Coroutine function producing the result
+            cacheable: Predicate deciding whether a result is kept (e.g. only successes)
+
+        Returns:
+            Any: Cached or freshly computed result
+        """
+        version = self.version
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        task = self._inflight.get((version, key))
+        if task is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._inflight[(version, key)] = task
+
+        def _done(finished: asyncio.Future) -> None:
+            self._inflight.pop((version, key), None)
+            if finished.cancelled() or finished.exception() is not None:
+                return
+            result = finished.result()
+            # A result computed under a version that has since been replaced is not kept
+            if version == self.version and (cacheable is None or cacheable(result)):
+                self._store(key, result)
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    def invalidate(self) -> None:
+        """Drop every cached result."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and coalesced request counts plus the current size."""
+        return {'entries': len(self._entries), 'hits': self.hits,
+                'misses': self.misses, 'coalesced': self.coalesced}
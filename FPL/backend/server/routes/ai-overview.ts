@@ -3,7 +3,7 @@ import { authenticateToken, AuthRequest } from '../middleware/auth';
 import { generateAIOverview } from '../services/ai-overview';
 
 const router = express.Router();
-const FPL_BASE = "https://fantasy.premierleague.com/api";
+const FPL_BASE = (process.env.FPL_API_BASE_URL || "https://fantasy.premierleague.com/api").replace(/\/+$/, "");
 
 /** Small JSON fetch helper */
 async function j(url: string) {
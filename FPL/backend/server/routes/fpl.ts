@@ -3,7 +3,7 @@ import express from "express";
 // import fetch from "node-fetch";
 
 const router = express.Router();
-const FPL_BASE = "https://fantasy.premierleague.com/api";
+const FPL_BASE = (process.env.FPL_API_BASE_URL || "https://fantasy.premierleague.com/api").replace(/\/+$/, "");
 
 router.get("/fpl/opponents", async (_req, res) => {
   try {
@@ -1,7 +1,7 @@
 import express from "express";
 
 const router = express.Router();
-const FPL_BASE = "https://fantasy.premierleague.com/api";
+const FPL_BASE = (process.env.FPL_API_BASE_URL || "https://fantasy.premierleague.com/api").replace(/\/+$/, "");
 
 /**
  * Determines the current gameweek based on match timing
@@ -4,7 +4,7 @@ import express from "express";
 // import fetch from "node-fetch";
 
 const router = express.Router();
-const FPL = "https://fantasy.premierleague.com/api";
+const FPL = (process.env.FPL_API_BASE_URL || "https://fantasy.premierleague.com/api").replace(/\/+$/, "");
 
 /** Small JSON fetch helper */
 async function j(url: string) {
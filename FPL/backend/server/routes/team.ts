@@ -4,7 +4,7 @@ import { userStore } from "../store/userStore";
 import { SavedTeam } from "../types/user";
 
 const router = express.Router();
-const FPL_BASE = "https://fantasy.premierleague.com/api";
+const FPL_BASE = (process.env.FPL_API_BASE_URL || "https://fantasy.premierleague.com/api").replace(/\/+$/, "");
 
 /** Small JSON fetch helper */
 async function j(url: string) {
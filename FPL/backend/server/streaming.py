@@ -0,0 +1,95 @@
+# server/streaming.py
+"""
+Streaming responses for large record lists.
+
+Records are written as NDJSON (one JSON object per line) or as server-sent
+events, a page at a time as the worker pool produces them, so the first
+players reach the client before the rest are built and neither the full
+record list nor the full JSON document ever exists in the server.
+
+A page that fails once the response has started (headers already sent with
+200) ends the stream with an error record: an ``{"error": ..., "status": ...}``
+line in NDJSON, or an ``error`` event instead of ``end`` in SSE.
+"""
+
+from typing import AsyncIterable, AsyncIterator, List, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from ai.serialization import dumps as _dumps
+
+
+STREAM_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list]:
+    """Turn a comma-separated ``fields`` query value into a list (None = all fields)."""
+    if not fields:
+        return None
+    parsed = [f.strip() for f in fields.split(",") if f.strip()]
+    return parsed or None
+
+
+def _ndjson_chunk(records: List[dict]) -> bytes:
+    return b"".join(_dumps(record) + b"\n" for record in records)
+
+
+def _sse_chunk(records: List[dict], event: str) -> bytes:
+    prefix = f"event: {event}\ndata: ".encode("utf-8")
+    return b"".join(prefix + _dumps(record) + b"\n\n" for record in records)
+
+
+def _sse_end(count: int) -> bytes:
+    return b"event: end\ndata: " + _dumps({"count": count}) + b"\n\n"
+
+
+def _error_chunk(error: HTTPException, count: int, fmt: str) -> bytes:
+    payload = _dumps({"error": error.detail, "status": error.status_code, "count": count})
+    return b"event: error\ndata: " + payload + b"\n\n" if fmt == "sse" else payload + b"\n"
+
+
+async def encode_pages(pages: AsyncIterable[List[dict]], fmt: str = "ndjson",
+                       event: str = "record") -> AsyncIterator[bytes]:
+    """Encode pages of records as NDJSON or SSE, one chunk per page, ending with an error record if a page fails."""
+    count = 0
+    try:
+        async for page in pages:
+            count += len(page)
+            if page:
+                yield _sse_chunk(page, event) if fmt == "sse" else _ndjson_chunk(page)
+    except HTTPException as error:
+        yield _error_chunk(error, count, fmt)
+        return
+    if fmt == "sse":
+        yield _sse_end(count)
+
+
+def stream_pages(pages: AsyncIterable[List[dict]], fmt: str = "ndjson", event: str = "record") -> StreamingResponse:
+    """
+    Stream pages of records as NDJSON or SSE, requesting each page as the previous one is written.
+
+    Args:
+        pages: Async iterable of record lists, already projected
+        fmt: 'ndjson' or 'sse'
+        event: SSE event name for each record
+
+    Returns:
+        StreamingResponse: Chunked response with the matching media type
+    """
+    _check_format(fmt)
+    return _streaming_response(encode_pages(pages, fmt, event), fmt)
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(STREAM_FORMATS)}")
+
+
+def _streaming_response(body, fmt: str) -> StreamingResponse:
+    # Proxies such as nginx buffer responses unless told not to
+    return StreamingResponse(body, media_type=STREAM_FORMATS[fmt],
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,523 @@
+# server/workers.py
+"""
+Process pool for CPU-bound analysis, prediction and optimization.
+
+Each worker process loads the trained model and an FPL data snapshot once,
+in the pool initializer, and then serves task functions from this module.
+When the server shares its upstream snapshot (:class:`SharedSnapshot`),
+every task carries the snapshot's key and file paths, and a worker installs
+a newer snapshot before running the task, so results always match the
+snapshot version the server caches them under. Workers without a shared
+snapshot fetch from the FPL API themselves, once per snapshot TTL.
+A missing model is trained once, in the server process, before the workers
+start, so they never race to train and write the same file.
+The async ``WorkerPool`` wrapper bounds the number of queued tasks (503 when
+full) and applies a per-request timeout (504), so bursts of team-builder
+requests queue in the pool instead of blocking the event loop.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.fpl_analyzer import FPLAnalyzer
+from ai.instrumentation import REGISTRY, span
+from ai.models.fpl_ml_model import FPLMLModel
+from ai.predictors.squad_simulator import SquadSimulator
+from ai.predictors.team_optimizer import TeamOptimizer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'ai', 'models', 'fpl_xgboost_model.pkl')
+
+POSITION_IDS = {'GKP': 1, 'DEF': 2, 'MID': 3, 'FWD': 4}
+
+# Per-process state, populated by init_worker
+_state: Dict[str, Any] = {}
+
+# (key, bootstrap path, fixtures path) of a snapshot shared by the server
+SnapshotRef = Tuple[str, str, str]
+
+
+def model_file_version(model_path: str = DEFAULT_MODEL_PATH) -> Optional[str]:
+    """
+    Cheap version stamp for a saved model: modification time and size.
+
+    Args:
+        model_path: Path to the pickled model
+
+    Returns:
+        Optional[str]: Version string, or None if the file does not exist
+    """
+    try:
+        stat = os.stat(model_path)
+    except OSError:
+        return None
+    return f'{stat.st_mtime_ns}-{stat.st_size}'
+
+
+def init_worker(model_path: str = DEFAULT_MODEL_PATH, snapshot_ttl: float = 300.0,
+                snapshot: Optional[SnapshotRef] = None) -> None:
+    """
+    Pool initializer: load the model and the data snapshot once per process.
+
+    The snapshot is the server's shared one when given, otherwise it is
+    fetched. Failures are logged rather than raised, since an exception here
+    would break the whole pool; tasks retry the snapshot load lazily.
+    """
+    # Forked workers inherit the server's counts; they must not be reported twice
+    REGISTRY.reset()
+    _state['snapshot_ttl'] = snapshot_ttl
+    _state['fetcher'] = FPLDataFetcher(cache_duration=int(snapshot_ttl))
+    _state['analyzer'] = FPLAnalyzer()
+    _state['optimizer'] = TeamOptimizer(simulator=SquadSimulator())
+    _state['snapshot_loaded_at'] = 0.0
+    _state['snapshot_key'] = None
+    _state['model_path'] = model_path
+    _load_model()
+
+    try:
+        _sync_snapshot(snapshot)
+        _ensure_snapshot()
+    except Exception as e:
+        logger.error("Worker snapshot preload failed: %s", e)
+
+
+def ensure_model_file(model_path: str = DEFAULT_MODEL_PATH) -> bool:
+    """
+    Train and save a model when none exists at ``model_path``.
+
+    Called once in the server process before the pool starts; workers only
+    ever load the file.
+
+    Returns:
+        bool: True if a model file is available
+    """
+    if os.path.exists(model_path):
+        return True
+    logger.warning("No model at %s; training on the current snapshot", model_path)
+    try:
+        return FPLMLModel().auto_train(model_path)
+    except Exception as e:
+        logger.error("Model training failed: %s", e)
+        return False
+
+
+def _load_model() -> None:
+    """Load the model and remember the file version."""
+    model_path = _state['model_path']
+    # One team-strength fit per worker, read by both the fixture analysis and the model
+    model = FPLMLModel(data_fetcher=_state['fetcher'], team_strength=_state['analyzer'].team_strength)
+    if not model.load_model(model_path):
+        logger.error("Could not load model from %s", model_path)
+    elif model.feature_set != 'bootstrap':
+        # Gameweek-table models predict offline only (FPLMLModel.predict_gameweek)
+        logger.error("%s holds a %s-feature model, which the routes cannot serve", model_path, model.feature_set)
+        model = FPLMLModel(data_fetcher=_state['fetcher'], team_strength=_state['analyzer'].team_strength)
+    _state['model'] = model
+    _state['model_version'] = model_file_version(model_path)
+
+
+def _ensure_model() -> FPLMLModel:
+    """Reload the model when the file on disk has been replaced."""
+    if not _state:
+        init_worker()
+    if model_file_version(_state['model_path']) != _state['model_version']:
+        _load_model()
+    return _state['model']
+
+
+def _sync_snapshot(snapshot: Optional[SnapshotRef]) -> None:
+    """Install the server's shared snapshot unless this worker already has it."""
+    if snapshot is None:
+        return
+    if not _state:
+        init_worker()
+    key, bootstrap_path, fixtures_path = snapshot
+    if key == _state['snapshot_key']:
+        return
+    fetcher = _state['fetcher']
+    with span('worker.snapshot.install'):
+        try:
+            for kind, path in (('bootstrap', bootstrap_path), ('fixtures', fixtures_path)):
+                with open(path, 'rb') as fh:
+                    fetcher.install_snapshot(kind, fh.read())
+        except OSError as e:
+            # Superseded and removed before this task ran; the next task brings a newer one
+            logger.warning("Shared snapshot %s unavailable: %s", key, e)
+            return
+        # The server keeps the snapshot current from now on; stop refreshing from upstream
+        fetcher.cache_duration = float('inf')
+        _state['analyzer'].load_data(fetcher.get_bootstrap_data(), fetcher.get_fixtures_data())
+    _state['snapshot_key'] = key
+    _state['snapshot_loaded_at'] = time.time()
+
+
+def _ensure_snapshot() -> FPLAnalyzer:
+    """
+    The analyzer over the worker's snapshot.
+
+    Without a shared snapshot, bootstrap and fixtures are refreshed through the
+    worker's fetcher once older than the snapshot TTL, so the analyzer and the
+    model always read the same data.
+    """
+    if not _state:
+        init_worker()
+    analyzer = _state['analyzer']
+    stale = time.time() - _state['snapshot_loaded_at'] >= _state['snapshot_ttl']
+    if (_state['snapshot_key'] is None and stale) or not analyzer.bootstrap_data:
+        fetcher = _state['fetcher']
+        bootstrap, fixtures = fetcher.get_bootstrap_data(), fetcher.get_fixtures_data()
+        if not bootstrap:
+            raise Exception("Failed to fetch FPL data")
+        analyzer.load_data(bootstrap, fixtures)
+        _state['snapshot_loaded_at'] = time.time()
+    return analyzer
+
+
+# ----------------------------------------------------------------------
+# Task functions (run inside worker processes)
+# ----------------------------------------------------------------------
+
+def warm_up() -> int:
+    """No-op task that makes the pool start a worker (and run its initializer)."""
+    return os.getpid()
+
+
+def run_task(fn: Callable, snapshot: Optional[SnapshotRef], *args) -> tuple:
+    """
+    Worker-side wrapper: run a task and hand back the stage metrics it recorded.
+
+    The server's current snapshot is installed first when this worker is
+    behind. Each worker has its own metrics registry; exporting (and
+    resetting) it with every result lets the server's ``/metrics`` include
+    worker stages such as upstream fetches and model inference.
+    """
+    _sync_snapshot(snapshot)
+    with span(f'worker.{fn.__name__}'):
+        result = fn(*args)
+    return result, REGISTRY.export(reset=True)
+
+
+def analyze_fixtures(window_size: int = 5, top_n: int = 5) -> Dict:
+    """Fixture analysis over the preloaded snapshot."""
+    try:
+        analyzer = _ensure_snapshot()
+        fixtures = analyzer.process_fixtures()
+        analysis = analyzer.get_top_teams_with_easiest_fixtures(fixtures, window_size, top_n)
+        return {
+            'success': True,
+            'data': analysis,
+            'message': f'Analysis complete for {len(analysis)} fixture windows'
+        }
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'message': 'Failed to analyze fixtures'}
+
+
+def team_strength() -> Dict:
+    """Learned attack and defence ratings per team."""
+    try:
+        return _ensure_snapshot().get_team_strength()
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+def analyze_players(position_filter: str = 'all', min_price: float = 4.0, max_price: float = 15.0) -> Dict:
+    """Player analysis over the preloaded snapshot."""
+    try:
+        _ensure_snapshot()
+    except Exception as e:
+        return {'success': False, 'error': str(e), 'message': 'Failed to analyze players'}
+    return _state['analyzer'].analyze_players(position_filter, min_price, max_price)
+
+
+def compare_players(player1: Dict, player2: Dict) -> Dict:
+    """Rule-based comparison of two players."""
+    if not _state:
+        init_worker()
+    return _state['analyzer'].compare_players_ai(player1, player2)
+
+
+def _page(records, offset: int, limit: Optional[int]) -> List[Dict]:
+    return list(itertools.islice(records, offset, None if limit is None else offset + limit))
+
+
+def player_records(position_filter: str = 'all', min_price: float = 4.0, max_price: float = 15.0,
+                   fields: Optional[List[str]] = None, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Filtered players, ``limit`` of them from ``offset``, highest total points first.
+
+    Records are projected in the worker so only requested fields cross the
+    process boundary, and a page at a time so streams never hold the full list.
+    """
+    analyzer = _ensure_snapshot()
+    return _page(analyzer.iter_player_data(position_filter, min_price, max_price, fields), offset, limit)
+
+
+def players_with_predictions() -> List[Dict]:
+    """All players with ML predictions."""
+    return _ensure_model().get_all_players_with_predictions()
+
+
+def prediction_records(fields: Optional[List[str]] = None, offset: int = 0,
+                       limit: Optional[int] = None) -> List[Dict]:
+    """A page of players with predictions, projected in the worker (predictions are cached per snapshot)."""
+    return _page(_ensure_model().iter_players_with_predictions(fields), offset, limit)
+
+
+def best_team(budget: float = 100.0, fixture_window: int = 5, fixture_weight: float = 0.15,
+              simulate: bool = False, threshold: Optional[float] = None) -> Dict:
+    """Single best team from the ML model, optionally with a simulated points distribution."""
+    return _ensure_model().create_best_team(budget, fixture_window, fixture_weight,
+                                            simulate=simulate, threshold=threshold)
+
+
+def team_suggestions(budget: float = 100.0, num_suggestions: int = 3,
+                     fixture_window: int = 5, fixture_weight: float = 0.15,
+                     simulate: bool = False, threshold: Optional[float] = None) -> Dict:
+    """Multiple team strategies from the ML model, optionally with simulated points distributions."""
+    return _ensure_model().get_team_suggestions(budget, num_suggestions, fixture_window, fixture_weight,
+                                                simulate=simulate, threshold=threshold)
+
+
+def lineups(squads: List[List[int]], captain_by: str = 'expected') -> Dict:
+    """
+    Starting XI, captaincy and bench order for squads given as player ids.
+
+    Ids are resolved against the model's current predictions, and every
+    complete squad is optimized in one vectorized batch.
+
+    Args:
+        squads: 15 player ids per squad
+        captain_by: 'expected' or 'upside'
+
+    Returns:
+        Dict: Success flag and one lineup per squad (in request order)
+    """
+    by_id = {p['id']: p for p in players_with_predictions()}
+    if not by_id:
+        return {'success': False, 'error': 'No players available'}
+    resolved, results = [], []
+    for ids in squads:
+        missing = [i for i in ids if i not in by_id]
+        if missing:
+            results.append({'success': False, 'error': f'Unknown player ids: {missing}'})
+        else:
+            results.append(None)
+            resolved.append([by_id[i] for i in ids])
+    picked = iter(_ensure_model().lineup_optimizer.pick_lineups(resolved, captain_by=captain_by))
+    return {'success': True, 'lineups': [r if r is not None else next(picked) for r in results]}
+
+
+def score_squads(squads, fixture_window: int = 5, fixture_weight: float = 0.15,
+                 gameweeks: Optional[int] = None) -> Dict:
+    """Expected and fixture-adjusted points and batch rank for (N, 16) int32 squads."""
+    return _ensure_model().score_squads(squads, fixture_window, fixture_weight, gameweeks)
+
+
+def chip_plan(squad_ids: Optional[List[int]] = None, budget: Optional[float] = None,
+              horizon: int = 5, fixture_weight: float = 0.15) -> Dict:
+    """Ranked Wildcard, Free Hit, Bench Boost and Triple Captain timing."""
+    return _ensure_model().plan_chips(squad_ids, budget, horizon, fixture_weight)
+
+
+def optimizer_strategies(budget: float = 100.0, num_strategies: int = 3) -> Dict:
+    """TeamOptimizer strategies over the model's predictions."""
+    players = players_with_predictions()
+    if not players:
+        return {'success': False, 'error': 'No players available'}
+    # TeamOptimizer works in FPL units and element types
+    candidates = [
+        dict(p, element_type=POSITION_IDS.get(p['position']), now_cost=int(round(p['price'] * 10)),
+             adjusted_predicted_points=p['predicted_points'])
+        for p in players
+    ]
+    return _state['optimizer'].generate_multiple_strategies(candidates, budget, num_strategies)
+
+
+# ----------------------------------------------------------------------
+# Async front end (runs in the server process)
+# ----------------------------------------------------------------------
+
+class SharedSnapshot:
+    """
+    The server's bootstrap and fixtures snapshot, shared with the workers.
+
+    The server downloads both payloads once per poll and installs them here.
+    New content is decoded and diffed by :attr:`fetcher` (whose subscribers
+    see every version) and written to ``directory``, where workers load it
+    by the key and paths in :attr:`ref`. The key is the content hash that
+    results are cached under.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Where snapshot files are written (default: a new temporary directory)
+        """
+        self.directory = directory or tempfile.mkdtemp(prefix='fpl-snapshot-')
+        os.makedirs(self.directory, exist_ok=True)
+        # Fed by install() only; it never fetches by itself
+        self.fetcher = FPLDataFetcher(cache_duration=float('inf'))
+        self.key: Optional[str] = None
+        self.ref: Optional[SnapshotRef] = None
+
+    @property
+    def bootstrap(self) -> Any:
+        return self.fetcher.get_cached('bootstrap', {})
+
+    @property
+    def fixtures(self) -> List[Any]:
+        return self.fetcher.get_cached('fixtures', [])
+
+    def install(self, bootstrap_content: bytes, fixtures_content: bytes) -> bool:
+        """
+        Make a downloaded bootstrap and fixtures pair the current snapshot.
+
+        Args:
+            bootstrap_content: bootstrap-static response body
+            fixtures_content: fixtures response body
+
+        Returns:
+            bool: False when the content matches the current snapshot
+        """
+        key = hashlib.sha1(bootstrap_content + fixtures_content).hexdigest()[:16]
+        if key == self.key:
+            return False
+        paths = []
+        for kind, content in (('bootstrap', bootstrap_content), ('fixtures', fixtures_content)):
+            path = os.path.join(self.directory, f'{kind}-{key}.json')
+            with open(f'{path}.tmp', 'wb') as fh:
+                fh.write(content)
+            os.replace(f'{path}.tmp', path)
+            paths.append(path)
+        self.fetcher.install_snapshot('bootstrap', bootstrap_content)
+        self.fetcher.install_snapshot('fixtures', fixtures_content)
+        # Workers may still be loading the previous snapshot; anything older goes
+        keep = {key} | ({self.key} if self.key else set())
+        for name in os.listdir(self.directory):
+            if name.rsplit('-', 1)[-1].split('.')[0] not in keep:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self.key, self.ref = key, (key, paths[0], paths[1])
+        return True
+
+
+class WorkerPool:
+    """
+    Bounded async front end for a ProcessPoolExecutor.
+
+    ``max_pending`` caps tasks that are queued or running; beyond it requests
+    are rejected with 503 and a Retry-After hint. A request that exceeds
+    ``timeout`` gets 504; its task is cancelled if it has not started yet.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 timeout: float = 30.0, model_path: str = DEFAULT_MODEL_PATH,
+                 snapshot_ttl: float = 300.0):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_pending = max_pending or self.max_workers * 4
+        self.timeout = timeout
+        self.model_path = model_path
+        self.snapshot_ttl = snapshot_ttl
+        # Awaited before each task for the snapshot to run it on (None: workers fetch their own)
+        self.snapshot_source: Optional[Callable[[], Awaitable[Optional[SnapshotRef]]]] = None
+        self.snapshot: Optional[SnapshotRef] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Tasks currently queued or running."""
+        return self._pending
+
+    def start(self) -> None:
+        """
+        Start every worker process, each preloading the model and snapshot.
+
+        Trains the model first if there is none (blocking), then submits one
+        warm-up task per worker, since the executor only spawns processes as
+        tasks arrive. Returns without waiting for the workers to finish loading.
+        """
+        if self._executor is None:
+            ensure_model_file(self.model_path)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=init_worker,
+                initargs=(self.model_path, self.snapshot_ttl, self.snapshot),
+            )
+            for _ in range(self.max_workers):
+                self._executor.submit(warm_up).add_done_callback(self._log_warm_up)
+
+    @staticmethod
+    def _log_warm_up(future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error("Worker warm-up failed: %s", future.exception())
+
+    def shutdown(self) -> None:
+        """Stop the workers, dropping queued tasks."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+        # Merge worker stage metrics even if the caller already timed out
+        if not future.cancelled() and future.exception() is None:
+            REGISTRY.merge(future.result()[1])
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None,
+                  snapshot: Optional[SnapshotRef] = None) -> Any:
+        """
+        Run a task function in the pool.
+
+        Args:
+            fn: Module-level task function
+            *args: Picklable arguments
+            timeout: Seconds before giving up (default: the pool timeout)
+            snapshot: Shared snapshot to run on (default: the current one from ``snapshot_source``)
+
+        Returns:
+            Any: The task's return value
+
+        Raises:
+            HTTPException: 503 when the queue is full, 504 on timeout
+        """
+        self.start()
+        if snapshot is None and self.snapshot_source is not None:
+            self.snapshot = await self.snapshot_source()
+        snapshot = snapshot or self.snapshot
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HTTPException(status_code=503, detail='Server busy, try again shortly',
+                                    headers={'Retry-After': '1'})
+            self._pending += 1
+
+        with span(f'server.pool.{fn.__name__}'):
+            try:
+                future = self._executor.submit(run_task, fn, snapshot, *args)
+            except Exception:
+                with self._lock:
+                    self._pending -= 1
+                raise
+            # The slot is freed when the task really finishes, not when we stop waiting
+            future.add_done_callback(self._release)
+            try:
+                result, _metrics = await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+                return result
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=504, detail='Request timed out')
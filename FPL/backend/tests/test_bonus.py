@@ -0,0 +1,80 @@
+"""Provisional bonus ranking and the per-match bonus table."""
+
+import numpy as np
+
+from ai.analyzers.live_scoring import LIVE_STATS, STAT_INDEX, LiveScoringEngine, provisional_bonus
+
+
+def rows(*appearances):
+    """(fixtures, stats) from (fixture, minutes, bps, bonus) tuples."""
+    stats = np.zeros((len(appearances), len(LIVE_STATS)), dtype=np.int32)
+    for k, (_, minutes, bps, bonus) in enumerate(appearances):
+        stats[k, [STAT_INDEX['minutes'], STAT_INDEX['bps'], STAT_INDEX['bonus']]] = (minutes, bps, bonus)
+    return np.array([a[0] for a in appearances], dtype=np.int64), stats
+
+
+def live_payload(appearances):
+    """Live payload from (player id, fixture, minutes, bps, bonus) tuples."""
+    return {'elements': [
+        {'id': pid, 'stats': {'minutes': minutes, 'bps': bps, 'bonus': bonus},
+         'explain': [{'fixture': fixture, 'stats': [{'identifier': 'minutes', 'value': minutes, 'points': 2}]}]}
+        for pid, fixture, minutes, bps, bonus in appearances]}
+
+
+def test_top_three_bps_per_match_get_three_two_one():
+    fixtures, stats = rows((1, 90, 20, 0), (1, 90, 35, 0), (1, 90, 28, 0), (1, 90, 10, 0),
+                           (2, 90, 5, 0), (2, 60, 9, 0))
+    assert provisional_bonus(fixtures, stats).tolist() == [1, 3, 2, 0, 2, 3]
+
+
+def test_ties_share_the_higher_bonus_and_push_the_next_down():
+    fixtures, stats = rows((1, 90, 30, 0), (1, 90, 30, 0), (1, 90, 25, 0), (1, 90, 20, 0))
+    assert provisional_bonus(fixtures, stats).tolist() == [3, 3, 1, 0]
+
+    fixtures, stats = rows((1, 90, 30, 0), (1, 90, 25, 0), (1, 90, 25, 0), (1, 90, 20, 0))
+    assert provisional_bonus(fixtures, stats).tolist() == [3, 2, 2, 0]
+
+
+def test_confirmed_matches_and_non_players_get_no_provisional_bonus():
+    fixtures, stats = rows((1, 90, 30, 3), (1, 90, 40, 0),     # bonus already awarded in match 1
+                           (2, 0, 50, 0), (2, 90, 10, 0),      # an unused substitute has BPS
+                           (0, 0, 0, 0))                       # no fixture this gameweek
+    assert provisional_bonus(fixtures, stats).tolist() == [0, 0, 0, 3, 0]
+
+
+def test_subset_ranking_matches_full_ranking_of_those_fixtures():
+    fixtures, stats = rows((1, 90, 20, 0), (2, 90, 5, 0), (1, 90, 35, 0), (2, 90, 9, 0), (1, 90, 28, 0))
+    touched = np.flatnonzero(fixtures == 1)
+    assert provisional_bonus(fixtures, stats, touched).tolist() == \
+        provisional_bonus(fixtures, stats)[touched].tolist()
+
+
+def test_incremental_poll_reranks_a_match_like_a_fresh_engine():
+    positions = np.array([0, 3, 3, 4, 2, 2])
+    first = [(1, 11, 90, 30, 0), (2, 11, 90, 25, 0), (3, 11, 90, 20, 0),
+             (4, 12, 90, 15, 0), (5, 12, 90, 12, 0)]
+    # Player 3 overtakes both rivals; match 12 is untouched
+    second = [(1, 11, 90, 30, 0), (2, 11, 90, 25, 0), (3, 11, 90, 33, 0),
+              (4, 12, 90, 15, 0), (5, 12, 90, 12, 0)]
+    engine = LiveScoringEngine(positions)
+    engine.update(live_payload(first))
+    result = engine.update(live_payload(second))
+    fresh = LiveScoringEngine(positions)
+    fresh.update(live_payload(second))
+
+    assert result['incremental'] and result['rescored'] == 1
+    assert engine.row_bonus.tolist() == fresh.row_bonus.tolist() == [2, 1, 3, 3, 2]
+    assert engine.points_for(range(1, 6)) == fresh.points_for(range(1, 6))
+
+
+def test_bonus_table_lists_bonus_per_match_best_first():
+    engine = LiveScoringEngine(np.array([0, 3, 3, 4, 2, 2]))
+    engine.update(live_payload([(1, 11, 90, 30, 3), (2, 11, 90, 25, 2), (3, 11, 90, 20, 1),
+                                (4, 12, 90, 15, 0), (5, 12, 90, 18, 0)]))
+
+    assert engine.bonus_table() == [
+        {'fixture': 11, 'confirmed': True, 'players': [
+            {'id': 1, 'bps': 30, 'bonus': 3}, {'id': 2, 'bps': 25, 'bonus': 2}, {'id': 3, 'bps': 20, 'bonus': 1}]},
+        {'fixture': 12, 'confirmed': False, 'players': [
+            {'id': 5, 'bps': 18, 'bonus': 3}, {'id': 4, 'bps': 15, 'bonus': 2}]},
+    ]
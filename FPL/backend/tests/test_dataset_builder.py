@@ -0,0 +1,87 @@
+"""Player x gameweek rows built from stub API payloads."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.dataset_builder import GameweekDatasetBuilder
+from ai.models.fpl_ml_model import FPLMLModel
+
+
+class StubFetcher:
+    """Serves fixed payloads through the FPLDataFetcher methods the builder calls."""
+
+    def __init__(self, elements, histories, live, fixtures=()):
+        self.elements = elements
+        self.histories = histories
+        self.live = live
+        self.fixtures = list(fixtures)
+
+    def get_bootstrap_data(self):
+        return {'elements': self.elements, 'events': [{'id': 1, 'deadline_time': '2026-08-15T17:30:00Z'}]}
+
+    def get_fixtures_data(self):
+        return self.fixtures
+
+    def get_gameweek_data(self, gameweek):
+        return self.live[gameweek]
+
+    def get_player_detailed_data(self, player_id):
+        return {'history': self.histories.get(player_id, [])}
+
+
+def history(*rounds):
+    return [{'round': round_, 'value': value, 'fixture': round_, 'was_home': True} for round_, value in rounds]
+
+
+@pytest.fixture
+def builder(tmp_path):
+    # Player 1 rose twice since GW2, player 2 blanked in GW2, player 3 has no history
+    elements = [{'id': 1, 'team': 1, 'element_type': 4, 'now_cost': 82},
+                {'id': 2, 'team': 2, 'element_type': 2, 'now_cost': 44},
+                {'id': 3, 'team': 2, 'element_type': 3, 'now_cost': 55}]
+    histories = {1: history((1, 80), (2, 80), (3, 81), (4, 82)), 2: history((1, 45), (3, 44))}
+    live = {2: {'elements': [{'id': pid, 'stats': {'minutes': 90, 'total_points': 2}} for pid in (1, 2, 3)]}}
+    fixtures = [{'id': 9, 'event': 2, 'team_h': 1, 'team_a': 3, 'team_h_difficulty': 2, 'team_a_difficulty': 4}]
+    return GameweekDatasetBuilder(StubFetcher(elements, histories, live, fixtures), root_dir=str(tmp_path))
+
+
+def test_gameweek_rows_use_the_price_the_gameweek_was_played_at(builder):
+    frame = builder.build_gameweek_frame(2).set_index('player_id')
+    assert frame['price'].to_dict() == {1: 8.0, 2: 4.5, 3: 5.5}
+
+
+def test_gameweek_and_backfill_rows_agree_on_price(builder):
+    built = builder.build_gameweek_frame(2).set_index('player_id')['price']
+    backfilled = builder.build_player_history_frame([1]).set_index(['player_id', 'gameweek'])['price']
+    assert built[1] == backfilled[1, 2]
+
+
+def test_gameweek_model_predicts_from_the_stored_table_only(builder, tmp_path_factory):
+    rng = np.random.default_rng(0)
+    for gameweek in range(1, 7):
+        minutes = rng.choice([0, 60, 90], size=3)
+        builder.write_partition(pd.DataFrame({
+            'player_id': [1, 2, 3], 'price': [8.0, 4.5, 5.5], 'element_type': [4, 2, 3],
+            'was_home': [1.0, 0.0, 1.0], 'fixture_count': 1, 'opponent_difficulty': [2.0, 4.0, 3.0],
+            'total_points': rng.integers(0, 12, size=3), 'minutes': minutes,
+            'ict_index': rng.uniform(0, 10, size=3), 'bps': rng.integers(0, 30, size=3),
+            'starts': (minutes >= 60).astype(int),
+        }), gameweek, season='2026-27')
+    builder._season = '2026-27'
+
+    model = FPLMLModel(data_fetcher=FPLDataFetcher(cache_duration=float('inf')))
+    model.n_jobs = 1
+    assert model.train_on_gameweek_dataset(builder)['success']
+
+    predicted = model.predict_gameweek(builder, 7)
+    assert sorted(predicted['player_id']) == [1, 2, 3]
+    assert predicted['predicted_points'].is_monotonic_decreasing
+
+    path = str(tmp_path_factory.mktemp('models') / 'gameweek_model.pkl')
+    assert model.save_model(path)
+    served = FPLMLModel(data_fetcher=model.data_fetcher)
+    assert served.load_model(path) and served.feature_set == 'gameweek'
+    with pytest.raises(ValueError, match='predict_gameweek'):
+        served.predict_player_points(builder.inference_frame(7))
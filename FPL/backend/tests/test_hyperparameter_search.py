@@ -0,0 +1,92 @@
+"""Time-aware folds and the budgeted parallel search."""
+
+import time
+
+import numpy as np
+import pytest
+
+from ai.models.hyperparameter_search import HyperparameterSearch, evaluate_config, gameweek_folds, period_index
+
+
+def season_rows(seed=0, players=60):
+    """Rows for two seasons of 38 gameweeks, shuffled so row order says nothing about time."""
+    rng = np.random.default_rng(seed)
+    seasons = np.repeat(['2024-25', '2025-26'], 38 * players)
+    gameweeks = np.tile(np.repeat(np.arange(1, 39), players), 2)
+    order = rng.permutation(len(gameweeks))
+    return seasons[order], gameweeks[order]
+
+
+@pytest.mark.parametrize('n_splits', [1, 4, 9])
+def test_validation_periods_come_strictly_after_training_periods(n_splits):
+    seasons, gameweeks = season_rows()
+    folds = gameweek_folds(gameweeks, n_splits, seasons)
+    assert len(folds) == n_splits
+
+    periods = list(zip(seasons, gameweeks))
+    previous_valid = None
+    for train_idx, valid_idx in folds:
+        train = {periods[i] for i in train_idx}
+        valid = {periods[i] for i in valid_idx}
+        assert max(train) < min(valid)
+        # Forward chaining: the last fold's validation block joins the next fold's training
+        if previous_valid is not None:
+            assert previous_valid <= train
+        previous_valid = valid
+
+    # Gameweek 1 of the second season comes after gameweek 38 of the first
+    assert ('2025-26', 1) > ('2024-25', 38)
+    assert period_index(np.array([38, 1]), np.array(['2024-25', '2025-26'])).tolist() == [0, 1]
+
+
+def test_folds_need_two_periods():
+    with pytest.raises(ValueError):
+        gameweek_folds(np.array([3, 3, 3]))
+
+
+def test_no_fold_starts_after_the_deadline():
+    seasons, gameweeks = season_rows(players=5)
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(len(gameweeks), 4)).astype(np.float32)
+    y = X[:, 0] + rng.normal(scale=0.1, size=len(gameweeks)).astype(np.float32)
+    periods = period_index(gameweeks, seasons)
+    folds = gameweek_folds(periods, 4)
+
+    result = evaluate_config({'max_depth': 3}, X, y, periods, folds, deadline=time.time() - 1)
+    assert result['folds_completed'] == 0 and np.isnan(result['rmse'])
+
+    result = evaluate_config({'max_depth': 3}, X, y, periods, folds, deadline=None)
+    assert result['folds_completed'] == len(folds)
+
+
+def budget_rows(players):
+    seasons, gameweeks = season_rows(players=players)
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(len(gameweeks), 12)).astype(np.float32)
+    y = X @ rng.normal(size=12).astype(np.float32) + rng.normal(size=len(gameweeks)).astype(np.float32)
+    return X, y, gameweeks, seasons
+
+
+def test_search_stops_at_its_time_budget():
+    # 128 slow configurations (no early stopping) cannot all finish in a second
+    grid = {'max_depth': [4, 6, 8, 10], 'learning_rate': [0.01, 0.02], 'min_child_weight': [1, 2, 3, 4],
+            'subsample': [0.7, 0.8, 0.9, 1.0]}
+    search = HyperparameterSearch(grid, n_splits=4, n_workers=2, time_budget=1.0, early_stopping_rounds=500)
+
+    started = time.time()
+    results = search.run(*budget_rows(players=200))
+    elapsed = time.time() - started
+
+    # Queued configurations are cancelled; running ones only finish their current fold
+    assert elapsed < 1.0 + 5.0
+    assert len(results) < 128
+    full = [r['folds_completed'] == 4 for r in results]
+    assert full == sorted(full, reverse=True)
+    assert [r['rank'] for r in results] == list(range(1, len(results) + 1))
+
+
+def test_search_with_an_ample_budget_evaluates_every_configuration():
+    search = HyperparameterSearch({'max_depth': [2, 3]}, n_splits=3, n_workers=2, time_budget=120.0)
+    results = search.run(*budget_rows(players=5))
+    assert sorted(r['params']['max_depth'] for r in results) == [2, 3]
+    assert all(r['folds_completed'] == 3 for r in results)
@@ -0,0 +1,87 @@
+"""League table standings from fixture snapshots."""
+
+from ai.analyzers.data_fetcher import fixtures_frame
+from ai.analyzers.league_table import LeagueTable
+
+TEAMS = [{'id': 1, 'name': 'Arsenal', 'short_name': 'ars'}, {'id': 2, 'name': 'Brentford', 'short_name': 'bre'},
+         {'id': 3, 'name': 'Chelsea', 'short_name': 'che'}, {'id': 4, 'name': 'Everton', 'short_name': 'eve'}]
+
+
+def fixture(fixture_id, day, home, away, home_goals=None, away_goals=None):
+    return {'id': fixture_id, 'event': day, 'kickoff_time': f'2026-08-{day:02d}T15:00:00Z',
+            'team_h': home, 'team_a': away, 'team_h_score': home_goals, 'team_a_score': away_goals,
+            'finished': home_goals is not None}
+
+
+SEASON = [
+    fixture(1, 1, 1, 2, 2, 0), fixture(2, 1, 3, 4, 1, 1),
+    fixture(3, 8, 2, 3, 1, 3), fixture(4, 8, 4, 1, 0, 0),
+    fixture(5, 15, 1, 3), fixture(6, 15, 2, 4),
+]
+
+
+def table_of(*snapshots):
+    table = LeagueTable()
+    applied = [table.update(fixtures_frame(fixtures)) for fixtures in snapshots]
+    return table, applied
+
+
+def rows_by_name(table):
+    return {row['name']: row for row in table.standings(TEAMS)}
+
+
+def test_standings_count_results_and_points():
+    table, _ = table_of(SEASON)
+    rows = rows_by_name(table)
+
+    assert {k: rows['Arsenal'][k] for k in ('played', 'wins', 'draws', 'losses', 'goalsFor', 'goalsAgainst',
+                                            'goalDifference', 'points', 'form', 'shortName')} == {
+        'played': 2, 'wins': 1, 'draws': 1, 'losses': 0, 'goalsFor': 2, 'goalsAgainst': 0,
+        'goalDifference': 2, 'points': 4, 'form': 'WD', 'shortName': 'ARS'}
+    assert (rows['Brentford']['points'], rows['Brentford']['form']) == (0, 'LL')
+
+
+def test_ties_break_on_goal_difference_then_goals_then_name():
+    # Arsenal and Chelsea on 4 points and +2; Chelsea scored more. Everton (2 points) above Brentford.
+    table, _ = table_of(SEASON)
+    assert [(row['position'], row['name']) for row in table.standings(TEAMS)] == [
+        (1, 'Chelsea'), (2, 'Arsenal'), (3, 'Everton'), (4, 'Brentford')]
+
+    level = [fixture(1, 1, 1, 2, 1, 1), fixture(2, 1, 3, 4, 1, 1)]
+    table, _ = table_of(level)
+    assert [row['name'] for row in table.standings(TEAMS)] == ['Arsenal', 'Brentford', 'Chelsea', 'Everton']
+
+
+def test_clubs_without_results_are_listed_with_zeros():
+    table, applied = table_of([fixture(1, 1, 1, 2)])
+    assert applied == [0]
+    assert all(row['played'] == 0 and row['form'] == '' for row in table.standings(TEAMS))
+
+
+def test_new_snapshots_add_only_new_results():
+    first = SEASON[:2] + [fixture(3, 8, 2, 3), fixture(4, 8, 4, 1)] + SEASON[4:]
+    incremental, applied = table_of(first, SEASON, SEASON)
+    full, _ = table_of(SEASON)
+
+    assert applied == [2, 2, 0]
+    assert incremental.standings(TEAMS) == full.standings(TEAMS)
+
+
+def test_corrected_or_withdrawn_results_rebuild_the_table():
+    corrected = [fixture(1, 1, 1, 2, 0, 1)] + SEASON[1:]
+    table, applied = table_of(SEASON, corrected)
+    assert applied == [4, 4]
+    assert table.standings(TEAMS) == table_of(corrected)[0].standings(TEAMS)
+
+    withdrawn = SEASON[:3] + [fixture(4, 8, 4, 1)] + SEASON[4:]
+    table, applied = table_of(SEASON, withdrawn)
+    assert applied == [4, 3]
+    assert rows_by_name(table)['Everton']['played'] == 1
+
+
+def test_form_keeps_the_last_five_results_oldest_first():
+    results = [fixture(i, i, 1, 2, goals, 1) for i, goals in enumerate([0, 1, 2, 2, 1, 0, 3], start=1)]
+    table, _ = table_of(results)
+    rows = rows_by_name(table)
+    assert rows['Arsenal']['form'] == 'WWDLW'
+    assert rows['Brentford']['form'] == 'LLDWL'
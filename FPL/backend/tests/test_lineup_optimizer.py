@@ -0,0 +1,58 @@
+"""The auto-substitution table behind bench ordering, checked against FPL's rules by hand."""
+
+import pytest
+
+from ai.predictors.lineup_optimizer import DEF, FORMATIONS, FWD, MID, _BENCH_ORDERS, _autosub_table
+
+
+def came_on(formation, bench, missing, order=(0, 1, 2), featured=(True, True, True)):
+    """Which of the three outfield substitutes come on.
+
+    Args:
+        formation: Starting (DEF, MID, FWD) counts
+        bench: Position of each substitute, by bench index
+        missing: Starters who did not play per position (DEF, MID, FWD)
+        order: Bench indices in the order the substitutes are tried
+        featured: Whether each substitute (by bench index) played
+    """
+    formation_index = [tuple(row) for row in FORMATIONS.tolist()].index(formation)
+    kinds = sum((position - DEF) * 3 ** (2 - i) for i, position in enumerate(bench))
+    order_index = [tuple(row) for row in _BENCH_ORDERS.tolist()].index(order)
+    pattern = sum(1 << i for i, played in enumerate(featured) if played)
+    state = missing[0] * 16 + missing[1] * 4 + missing[2]
+    return _autosub_table()[formation_index, kinds, order_index, pattern, state].tolist()
+
+
+def test_a_substitute_replaces_a_missing_starter_of_the_same_position():
+    # 5-4-1 missing its lone forward: only the bench forward keeps a forward on the pitch
+    assert came_on((5, 4, 1), (DEF, MID, FWD), missing=(0, 0, 1)) == [False, False, True]
+    # 4-4-2 missing a defender: the bench defender comes on first
+    assert came_on((4, 4, 2), (DEF, MID, FWD), missing=(1, 0, 0)) == [True, False, False]
+
+
+def test_substitutes_that_would_break_the_formation_are_skipped():
+    # 3-5-2 missing a defender: a forward on would leave two defenders, so the bench defender comes on
+    assert came_on((3, 5, 2), (FWD, DEF, MID), missing=(1, 0, 0)) == [False, True, False]
+    # 5-2-3 missing a midfielder: defenders and forwards are already at their maximum
+    assert came_on((5, 2, 3), (DEF, FWD, MID), missing=(0, 1, 0)) == [False, False, True]
+    # No valid replacement at all: the starter's place stays empty
+    assert came_on((3, 5, 2), (FWD, MID, FWD), missing=(1, 0, 0)) == [False, False, False]
+
+
+def test_bench_order_decides_who_comes_on_first():
+    # 4-4-2 missing a defender: a midfielder or a defender keeps the formation legal, so the first one tried wins
+    assert came_on((4, 4, 2), (MID, DEF, FWD), missing=(1, 0, 0), order=(0, 1, 2)) == [True, False, False]
+    assert came_on((4, 4, 2), (MID, DEF, FWD), missing=(1, 0, 0), order=(1, 0, 2)) == [False, True, False]
+
+
+def test_substitutes_who_did_not_play_are_passed_over():
+    assert came_on((4, 4, 2), (MID, DEF, FWD), missing=(1, 0, 0),
+                   featured=(False, True, True)) == [False, True, False]
+
+
+@pytest.mark.parametrize('order', [(0, 1, 2), (2, 1, 0)])
+def test_each_missing_starter_is_replaced_at_most_once(order):
+    # 4-4-2 missing a midfielder and a forward: two substitutes come on, whichever order they are tried in
+    assert sum(came_on((4, 4, 2), (DEF, MID, FWD), missing=(0, 1, 1), order=order)) == 2
+    # Three missing, three substitutes: every one of them is used
+    assert came_on((4, 4, 2), (DEF, MID, FWD), missing=(1, 1, 1), order=order) == [True, True, True]
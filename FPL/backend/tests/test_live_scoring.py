@@ -0,0 +1,74 @@
+"""Live gameweek scoring from hand-written ``event/{gw}/live/`` payloads."""
+
+import numpy as np
+
+from ai.analyzers.live_scoring import STAT_INDEX, LiveScoringEngine, appearance_points, parse_live
+
+
+def stat(identifier, value, points):
+    return {'identifier': identifier, 'value': value, 'points': points}
+
+
+def element(player_id, stats, explain):
+    return {'id': player_id, 'stats': stats, 'explain': explain}
+
+
+# Player 10 (MID) plays twice: two goals and a clean sheet in fixture 101,
+# an assist and a booking in fixture 102. As in the real API, each
+# fixture's explain lists only what happened in it, with FPL's points.
+DGW_MID = element(10, {'minutes': 150, 'goals_scored': 2, 'assists': 1, 'clean_sheets': 1,
+                       'goals_conceded': 2, 'yellow_cards': 1, 'bps': 40, 'bonus': 0}, [
+    {'fixture': 101, 'stats': [stat('minutes', 90, 2), stat('goals_scored', 2, 10),
+                               stat('clean_sheets', 1, 1)]},
+    {'fixture': 102, 'stats': [stat('minutes', 60, 2), stat('assists', 1, 3),
+                               stat('yellow_cards', 1, -1)]},
+])
+SINGLE_FWD = element(11, {'minutes': 90, 'bps': 30, 'bonus': 0}, [
+    {'fixture': 101, 'stats': [stat('minutes', 90, 2)]},
+])
+SINGLE_DEF = element(12, {'minutes': 90, 'goals_conceded': 2, 'bps': 10, 'bonus': 0}, [
+    {'fixture': 102, 'stats': [stat('minutes', 90, 2), stat('goals_conceded', 2, -1)]},
+])
+PAYLOAD = {'elements': [DGW_MID, SINGLE_FWD, SINGLE_DEF]}
+POSITIONS = np.array([0] * 10 + [3, 4, 2])
+
+
+def explain_points(el):
+    return {f['fixture']: sum(s['points'] for s in f['stats']) for f in el['explain']}
+
+
+def test_double_gameweek_rows_take_each_fixtures_own_stats():
+    frame = parse_live(PAYLOAD)
+    rows = {(int(i), int(f)): frame.stats[k] for k, (i, f) in enumerate(zip(frame.ids, frame.fixtures))}
+
+    assert set(rows) == {(10, 101), (10, 102), (11, 101), (12, 102)}
+    first, second = rows[10, 101], rows[10, 102]
+    # Listed in one fixture's explain only: the other fixture gets 0, not a share
+    assert (first[STAT_INDEX['goals_scored']], second[STAT_INDEX['goals_scored']]) == (2, 0)
+    assert (first[STAT_INDEX['assists']], second[STAT_INDEX['assists']]) == (0, 1)
+    assert (first[STAT_INDEX['clean_sheets']], second[STAT_INDEX['clean_sheets']]) == (1, 0)
+    assert (first[STAT_INDEX['yellow_cards']], second[STAT_INDEX['yellow_cards']]) == (0, 1)
+    # Listed nowhere: split across the fixtures
+    assert (first[STAT_INDEX['bps']], second[STAT_INDEX['bps']]) == (20, 20)
+    assert (first[STAT_INDEX['goals_conceded']], second[STAT_INDEX['goals_conceded']]) == (1, 1)
+
+
+def test_appearance_points_match_explain_per_fixture():
+    frame = parse_live(PAYLOAD)
+    points = appearance_points(frame.stats, POSITIONS[frame.ids])
+    expected = {(el['id'], fixture): total for el in PAYLOAD['elements']
+                for fixture, total in explain_points(el).items()}
+
+    assert {(int(i), int(f)): int(p) for i, f, p in zip(frame.ids, frame.fixtures, points)} == expected
+    assert expected[10, 101] == 13 and expected[10, 102] == 4
+
+
+def test_engine_totals_add_provisional_bonus_per_fixture():
+    engine = LiveScoringEngine(POSITIONS)
+    engine.track(np.array([[10, 11, 12] + [0] * 12 + [10]]))
+    engine.update(PAYLOAD)
+
+    # Player 10 is second on BPS in fixture 101 (2) and first in fixture 102 (3)
+    assert engine.points_for([10, 11, 12]) == {10: 13 + 4 + 5, 11: 2 + 3, 12: 1 + 2}
+    # The captain counts twice
+    assert engine.squad_points.tolist() == [2 * 22 + 5 + 3]
@@ -0,0 +1,54 @@
+"""The XGBoost model and the NumPy baseline behind the BasePredictor interface."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.models.fpl_ml_model import FPLMLModel
+from ai.predictors.baseline_predictor import BaselinePredictor
+from benchmarks.replay import load_fixture
+
+
+@pytest.fixture(scope='module')
+def players():
+    """Raw player rows of the recorded bootstrap, split into train and test halves."""
+    frame = FPLMLModel._players_frame(load_fixture('bootstrap-static'))
+    frame = frame.sample(frac=1.0, random_state=0).reset_index(drop=True)
+    half = len(frame) // 2
+    return frame.iloc[:half].reset_index(drop=True), frame.iloc[half:].reset_index(drop=True)
+
+
+def test_validate_reports_metrics_for_both_predictors(players):
+    train, test = players
+    baseline = BaselinePredictor()
+    model = FPLMLModel(data_fetcher=FPLDataFetcher(cache_duration=float('inf')))
+    model.n_jobs = 1
+
+    assert baseline.train(train) and model.train(train)
+    scores = {type(p).__name__: p.validate(test) for p in (baseline, model)}
+
+    for metrics in scores.values():
+        assert metrics['samples'] == len(test)
+        assert np.isfinite([metrics['rmse'], metrics['mae'], metrics['r2']]).all()
+        assert metrics['validation_score'] == metrics['r2'] > 0.5
+
+
+def test_baseline_derives_price_from_now_cost():
+    raw = pd.DataFrame(load_fixture('bootstrap-static')['elements'])
+    assert 'price' not in raw.columns
+
+    baseline = BaselinePredictor()
+    assert baseline.train(raw)
+    assert baseline.get_feature_importance()['price'] > 0
+    with_price = raw.assign(price=raw['now_cost'] / 10.0)
+    np.testing.assert_allclose(baseline.predict(raw), baseline.predict(with_price))
+
+
+def test_baseline_rejects_missing_feature_columns(players):
+    train, test = players
+    baseline = BaselinePredictor()
+    assert not baseline.train(train.drop(columns=['form']))
+    assert baseline.train(train)
+    with pytest.raises(ValueError, match='form'):
+        baseline.predict(test.drop(columns=['form']))
@@ -0,0 +1,99 @@
+"""Price change progress from successive bootstrap snapshots."""
+
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.price_changes import PriceChangePredictor
+
+# Half an hour before the nightly update
+NOW = datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc).timestamp()
+TOTAL_PLAYERS = 10_000_000
+
+
+def player(player_id, cost=50, transfers_in=0, transfers_out=0, owned=5.0, cost_change_event=0):
+    return {'id': player_id, 'web_name': f'Player {player_id}', 'team': 1, 'element_type': 3,
+            'now_cost': cost, 'transfers_in_event': transfers_in, 'transfers_out_event': transfers_out,
+            'selected_by_percent': str(owned), 'cost_change_event': cost_change_event}
+
+
+class Feed:
+    """A fetcher fed bootstrap bodies by hand, as the server's shared snapshot is."""
+
+    def __init__(self, predictor=None):
+        self.fetcher = FPLDataFetcher(cache_duration=float('inf'))
+        self.predictor = predictor or PriceChangePredictor(clock=lambda: NOW)
+        self.fetcher.subscribe(self.predictor.apply)
+
+    def push(self, *players):
+        body = {'total_players': TOTAL_PLAYERS, 'events': [], 'teams': [], 'element_types': [],
+                'elements': list(players)}
+        self.fetcher.install_snapshot('bootstrap', json.dumps(body).encode('utf-8'))
+        return self.predictor
+
+
+def test_thresholds_scale_with_ownership_above_a_floor():
+    predictor = Feed().push(player(1, owned=5.0), player(2, owned=0.01))
+    rise, fall = predictor.thresholds(np.array([1, 2]))
+    # 5% of 10M owners: 10% of them to rise, 5% to fall; 0.01% hits the 10k floor
+    assert rise.tolist() == [50_000, 10_000]
+    assert fall.tolist() == [25_000, 10_000]
+
+
+def test_first_snapshot_counts_transfers_not_yet_used_by_a_change():
+    predictor = Feed().push(
+        player(1, transfers_in=80_000, transfers_out=10_000, cost_change_event=1),  # 70k, 50k used by a rise
+        player(2, transfers_in=200_000),                                             # capped short of a rise
+        player(3, transfers_out=5_000, cost_change_event=1),                         # rose earlier, now sold
+    )
+    assert predictor.net[[1, 2, 3]].tolist() == [20_000, 50_000, -5_000]
+
+
+def test_refresh_adds_only_the_transfers_since_the_last_snapshot():
+    feed = Feed()
+    feed.push(player(1, transfers_in=10_000), player(2, transfers_out=4_000))
+    predictor = feed.push(player(1, transfers_in=12_500, transfers_out=500), player(2, transfers_out=4_000))
+    assert predictor.net[[1, 2]].tolist() == [12_000, -4_000]
+
+
+def test_deadline_reset_counts_the_new_gameweek_counters_as_fresh_transfers():
+    feed = Feed()
+    feed.push(player(1, transfers_in=30_000, transfers_out=1_000))
+    predictor = feed.push(player(1, transfers_in=700, transfers_out=200))
+    assert predictor.net[1] == 29_000 + 500
+
+
+def test_price_change_restarts_progress_from_transfers_since_the_last_snapshot():
+    feed = Feed()
+    feed.push(player(1, cost=50, transfers_in=45_000))
+    predictor = feed.push(player(1, cost=51, transfers_in=49_000))
+    assert predictor.cost[1] == 51
+    assert predictor.net[1] == 4_000
+
+
+def test_missed_versions_rebuild_from_the_latest_snapshot():
+    feed = Feed()
+    feed.push(player(1, transfers_in=1_000))
+    late = PriceChangePredictor(clock=lambda: NOW)
+    feed.fetcher.subscribe(late.apply)
+    feed.push(player(1, transfers_in=3_000))
+    assert late.version == feed.predictor.version
+    assert late.net[1] == 3_000
+
+
+def test_predictions_rank_risers_and_fallers_by_projected_progress():
+    predictor = Feed().push(player(1, transfers_in=60_000), player(2, transfers_in=20_000),
+                            player(3, transfers_out=30_000), player(4))
+    result = predictor.predictions(limit=2)
+
+    assert result['success']
+    assert result['next_update'] == '2026-10-19T01:30:00+00:00'
+    assert [p['id'] for p in result['risers']] == [1, 2]
+    assert [p['id'] for p in result['fallers']] == [3, 4]
+    assert result['risers'][0]['progress'] == pytest.approx(100.0)   # capped at one change
+    assert [p['predicted_change'] for p in result['risers']] == [0.1, 0.0]
+    assert result['fallers'][0]['predicted_change'] == -0.1
+    assert (result['predicted_rises'], result['predicted_falls']) == (1, 1)
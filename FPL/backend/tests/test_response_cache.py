@@ -0,0 +1,130 @@
+"""Coalescing, versioning and cancellation in the model result cache."""
+
+import asyncio
+
+import pytest
+
+from server.response_cache import ResultCache
+
+
+class Builder:
+    """Counts calls and returns once released, so requests can pile up on one build."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return {'success': True, 'build': self.calls}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_identical_keys_build_once():
+    async def scenario():
+        cache, build = ResultCache(), Builder()
+        cache.set_version(1)
+        waiters = [asyncio.create_task(cache.get(('best-team', 100.0), build)) for _ in range(5)]
+        await asyncio.sleep(0)
+        build.release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert build.calls == 1
+        assert all(result is results[0] for result in results)
+        assert await cache.get(('best-team', 100.0), build) is results[0]
+        assert cache.stats() == {'entries': 1, 'hits': 1, 'misses': 1, 'coalesced': 4}
+
+    run(scenario())
+
+
+def test_a_version_bump_invalidates_the_entry():
+    async def scenario():
+        cache, build = ResultCache(), Builder()
+        build.release.set()
+        cache.set_version(1)
+        first = await cache.get('players', build)
+
+        cache.set_version(1)
+        assert await cache.get('players', build) is first
+        cache.set_version(2)
+        second = await cache.get('players', build)
+        assert (first['build'], second['build'], build.calls) == (1, 2, 2)
+
+    run(scenario())
+
+
+def test_a_result_finished_after_a_version_bump_is_not_kept():
+    async def scenario():
+        cache, build = ResultCache(), Builder()
+        cache.set_version(1)
+        pending = asyncio.create_task(cache.get('players', build))
+        await asyncio.sleep(0)
+        cache.set_version(2)
+        build.release.set()
+        await pending
+        assert cache.stats()['entries'] == 0
+
+    run(scenario())
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_shared_build():
+    async def scenario():
+        cache, build = ResultCache(), Builder()
+        cache.set_version(1)
+        leaving = asyncio.create_task(cache.get('players', build))
+        staying = asyncio.create_task(cache.get('players', build))
+        await asyncio.sleep(0)
+
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        build.release.set()
+
+        assert (await staying)['build'] == 1
+        assert build.calls == 1
+
+    run(scenario())
+
+
+def test_a_build_whose_waiters_all_left_still_completes_and_is_cached():
+    async def scenario():
+        cache, build = ResultCache(), Builder()
+        cache.set_version(1)
+        leaving = asyncio.create_task(cache.get('players', build))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+
+        build.release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert cache.stats()['entries'] == 1
+        assert (await cache.get('players', build))['build'] == 1
+        assert build.calls == 1
+
+    run(scenario())
+
+
+def test_failed_or_uncacheable_results_are_not_stored():
+    async def scenario():
+        cache = ResultCache()
+        cache.set_version(1)
+
+        async def failing():
+            raise RuntimeError('pool unavailable')
+
+        with pytest.raises(RuntimeError):
+            await cache.get('players', failing)
+
+        async def unsuccessful():
+            return {'success': False}
+
+        await cache.get('players', unsuccessful, cacheable=lambda result: result.get('success', True))
+        assert cache.stats()['entries'] == 0
+
+    run(scenario())
@@ -0,0 +1,127 @@
+"""Snapshot diffs and the fetcher's versioned subscriber notifications."""
+
+import copy
+import json
+
+import pytest
+
+from ai.analyzers.data_fetcher import FPLDataFetcher
+from ai.analyzers.snapshot import SnapshotDiff, diff_records
+from ai.models.fpl_ml_model import FPLMLModel
+from benchmarks.replay import load_fixture
+
+
+def body(payload):
+    return json.dumps(payload).encode('utf-8')
+
+
+def test_diff_records_reports_added_removed_and_changed_fields():
+    old = [{'id': 1, 'now_cost': 50, 'form': '2.0'}, {'id': 2, 'now_cost': 45, 'form': '1.0'},
+           {'id': 3, 'now_cost': 60, 'form': '0.0'}]
+    new = [{'id': 1, 'now_cost': 51, 'form': '2.0'}, {'id': 3, 'now_cost': 60, 'form': '0.0'},
+           {'id': 4, 'now_cost': 40, 'form': '0.0'}]
+
+    diff = diff_records(old, new, SnapshotDiff('bootstrap', 2, 1, 'hash'))
+
+    assert (diff.added, diff.removed) == ({4}, {2})
+    assert diff.changed == {1: {'now_cost': (50, 51)}}
+    assert diff.fields_changed('now_cost') == {1: (50, 51)}
+    assert set(diff.records) == diff.touched_ids == {1, 4}
+    assert diff.records[1] is new[0]
+    assert not diff.is_empty() and not diff.is_reset
+
+
+def test_identical_records_make_an_empty_diff():
+    records = [{'id': 1, 'now_cost': 50}]
+    diff = diff_records(records, copy.deepcopy(records), SnapshotDiff('fixtures', 2, 1, 'hash'))
+    assert diff.is_empty() and diff.records == {}
+
+
+@pytest.fixture
+def bootstrap():
+    return copy.deepcopy(load_fixture('bootstrap-static'))
+
+
+def test_versions_chain_and_subscribers_see_each_change(bootstrap):
+    fetcher = FPLDataFetcher(cache_duration=float('inf'))
+    seen = []
+    fetcher.subscribe(lambda diff, snapshot: seen.append(diff))
+
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+    fetcher.install_snapshot('bootstrap', body(bootstrap))  # same content: no new version
+    player = bootstrap['elements'][0]
+    player['now_cost'] += 1
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+
+    assert [(d.version, d.previous_version) for d in seen] == [(1, None), (2, 1)]
+    first, second = seen
+    assert first.is_reset and len(first.added) == len(bootstrap['elements'])
+    assert second.changed == {player['id']: {'now_cost': (player['now_cost'] - 1, player['now_cost'])}}
+    assert fetcher.get_snapshot_version('bootstrap') == 2
+    assert fetcher.player_index.by_id[player['id']]['now_cost'] == player['now_cost']
+
+
+def test_bound_subscribers_are_held_weakly(bootstrap):
+    fetcher = FPLDataFetcher(cache_duration=float('inf'))
+
+    class Listener:
+        calls = 0
+
+        def on_snapshot(self, diff, snapshot):
+            Listener.calls += 1
+
+    listener = Listener()
+    fetcher.subscribe(listener.on_snapshot)
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+    del listener
+    bootstrap['elements'][0]['now_cost'] += 1
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+    assert Listener.calls == 1
+
+
+@pytest.fixture
+def trained_model(bootstrap):
+    fetcher = FPLDataFetcher(cache_duration=float('inf'))
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+    model = FPLMLModel(data_fetcher=fetcher)
+    model.n_jobs = 1
+    assert model.train(FPLMLModel._players_frame(bootstrap))
+    model.get_all_players_with_predictions()
+    return model, bootstrap
+
+
+def test_prediction_cache_applies_the_next_version_in_place(trained_model):
+    model, bootstrap = trained_model
+    player = bootstrap['elements'][0]
+    player['now_cost'] += 5
+    model.data_fetcher.install_snapshot('bootstrap', body(bootstrap))
+
+    cached = model._prediction_cache
+    assert cached is not None and cached['version'] == 2
+    assert cached['by_id'][player['id']]['price'] == player['now_cost'] / 10.0
+
+    patched = model.get_all_players_with_predictions()
+    model._prediction_cache = None
+    recomputed = model.get_all_players_with_predictions()
+    assert [p['id'] for p in patched] == [p['id'] for p in recomputed]
+    assert [p['predicted_points'] for p in patched] == pytest.approx([p['predicted_points'] for p in recomputed])
+
+
+def test_prediction_cache_resets_when_a_version_is_missed(trained_model):
+    model, bootstrap = trained_model
+    fetcher = model.data_fetcher
+
+    # Version 2 arrives while the model is not subscribed, so version 3 does not follow its cache
+    fetcher.unsubscribe(model._apply_snapshot_diff)
+    bootstrap['elements'][0]['now_cost'] += 1
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+    fetcher.subscribe(model._apply_snapshot_diff)
+    bootstrap['elements'][1]['now_cost'] += 1
+    fetcher.install_snapshot('bootstrap', body(bootstrap))
+
+    assert fetcher.last_diffs['bootstrap'].previous_version == 2
+    assert model._prediction_cache is None
+    players = model.get_all_players_with_predictions()
+    assert model._prediction_cache['version'] == 3
+    prices = {p['id']: p['price'] for p in players}
+    assert prices[bootstrap['elements'][0]['id']] == bootstrap['elements'][0]['now_cost'] / 10.0
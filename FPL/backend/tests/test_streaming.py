@@ -0,0 +1,43 @@
+"""NDJSON and SSE encoding of paged record streams."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from server.streaming import encode_pages
+
+
+def encoded(fmt, *pages, fail_with=None):
+    async def source():
+        for page in pages:
+            yield page
+        if fail_with is not None:
+            raise fail_with
+
+    async def collect():
+        return b"".join([chunk async for chunk in encode_pages(source(), fmt, event="player")])
+
+    return asyncio.run(collect()).decode()
+
+
+def test_complete_streams_carry_every_record():
+    lines = encoded("ndjson", [{"id": 1}, {"id": 2}], [{"id": 3}]).splitlines()
+    assert [json.loads(line) for line in lines] == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    events = encoded("sse", [{"id": 1}], []).split("\n\n")
+    assert events[:2] == ['event: player\ndata: {"id":1}', 'event: end\ndata: {"count":1}']
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "sse"])
+def test_a_failed_page_ends_the_stream_with_an_error_record(fmt):
+    body = encoded(fmt, [{"id": 1}, {"id": 2}], fail_with=HTTPException(status_code=504, detail="Worker timed out"))
+    error = {"error": "Worker timed out", "status": 504, "count": 2}
+
+    if fmt == "ndjson":
+        assert json.loads(body.splitlines()[-1]) == error
+    else:
+        events = [event for event in body.split("\n\n") if event]
+        assert events[-1] == "event: error\ndata: " + json.dumps(error, separators=(",", ":"))
+        assert not any(event.startswith("event: end") for event in events)
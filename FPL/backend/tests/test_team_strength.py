@@ -0,0 +1,61 @@
+"""Team strength ratings learned from results, incrementally and in one fit."""
+
+import numpy as np
+
+from ai.analyzers.team_strength import AWAY, HOME, TeamStrengthModel
+
+TEAMS = [{'id': i, 'name': f'Team {i}'} for i in range(1, 5)]
+
+
+def result(fixture_id, event, home, away, home_goals, away_goals):
+    return {'id': fixture_id, 'event': event, 'kickoff_time': f'2026-08-{event:02d}T15:00:00Z',
+            'team_h': home, 'team_a': away, 'team_h_score': home_goals, 'team_a_score': away_goals,
+            'finished': True}
+
+
+ROUND_1 = [result(1, 1, 1, 2, 3, 0), result(2, 1, 3, 4, 1, 1)]
+ROUND_2 = [result(3, 2, 2, 3, 0, 2), result(4, 2, 4, 1, 0, 4)]
+
+
+def fitted(*snapshots):
+    model = TeamStrengthModel()
+    model.set_teams(TEAMS)
+    for fixtures in snapshots:
+        model.update(fixtures)
+    return model
+
+
+def assert_same_ratings(a, b):
+    np.testing.assert_allclose(a.attack, b.attack)
+    np.testing.assert_allclose(a.defence, b.defence)
+    assert (a.mu, a.home) == (b.mu, b.home)
+
+
+def test_results_of_a_round_in_progress_fit_like_the_whole_round():
+    batch = fitted(ROUND_1 + ROUND_2)
+    # Round 2 finishes one match at a time
+    incremental = fitted(ROUND_1, ROUND_1 + ROUND_2[:1], ROUND_1 + ROUND_2)
+    assert_same_ratings(incremental, batch)
+
+
+def test_new_rounds_are_applied_without_a_refit():
+    model = fitted(ROUND_1)
+    attack = model.attack.copy()
+    assert model.update(ROUND_1 + ROUND_2) == 2
+    assert_same_ratings(model, fitted(ROUND_1 + ROUND_2))
+    assert not np.array_equal(model.attack, attack)
+
+
+def test_a_corrected_score_refits_every_result():
+    corrected = [result(1, 1, 1, 2, 2, 0)] + ROUND_1[1:] + ROUND_2
+    model = fitted(ROUND_1 + ROUND_2, corrected)
+    assert_same_ratings(model, fitted(corrected))
+    assert model.results[1][5:] == (2, 0)
+
+
+def test_difficulty_follows_results():
+    model = fitted(ROUND_1 + ROUND_2)
+    difficulty = model.difficulty_matrix()
+    # Team 1 won both matches 3-0 and 4-0; team 2 lost both without scoring
+    assert difficulty[2, 1, AWAY] > difficulty[2, 1, HOME] > 3.0 > difficulty[1, 2, HOME]
+    assert model.fixture_difficulty(1, 99, True) == 3.0